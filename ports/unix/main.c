@@ -60,6 +60,12 @@ STATIC uint emit_opt = MP_EMIT_OPT_NONE;
 // Heap size of GC heap (if enabled)
 // Make it larger on a 64 bit machine, because pointers are larger.
 long heap_size = 1024*1024 * (sizeof(mp_uint_t) / 4);
+#if MICROPY_GC_SPLIT_HEAP_AUTO
+// Total size the heap may grow to by adding regions; no growth if less than
+// heap_size
+long heap_max = 0;
+STATIC long heap_total;
+#endif
 #endif
 
 STATIC void stderr_print_strn(void *env, const char *str, size_t len) {
@@ -121,7 +127,11 @@ STATIC int execute_from_lexer(int source_kind, const void *source, mp_parse_inpu
             lex = mp_lexer_new_from_fd(MP_QSTR__lt_stdin_gt_, 0, false);
         }
 
+        // parse straight away: the parser frees the lexer, and keeping it live
+        // across other calls would leave a pointer to its memory in this frame,
+        // which the GC would take as a root for whatever is allocated there next
         qstr source_name = lex->source_name;
+        mp_parse_tree_t parse_tree = mp_parse(lex, input_kind);
 
         #if MICROPY_PY___FILE__
         if (input_kind == MP_PARSE_FILE_INPUT) {
@@ -129,8 +139,6 @@ STATIC int execute_from_lexer(int source_kind, const void *source, mp_parse_inpu
         }
         #endif
 
-        mp_parse_tree_t parse_tree = mp_parse(lex, input_kind);
-
         #if defined(MICROPY_UNIX_COVERAGE)
         // allow to print the parse tree in the coverage build
         if (mp_verbose_flag >= 3) {
@@ -327,6 +335,12 @@ STATIC int usage(char **argv) {
 "  heapsize=<n>[w][K|M] -- set the heap size for the GC (default %ld)\n"
 , heap_size);
     impl_opts_cnt++;
+    #if MICROPY_GC_SPLIT_HEAP_AUTO
+    printf(
+"  heapmax=<n>[w][K|M] -- let the heap grow up to this size (default: no growth)\n"
+);
+    impl_opts_cnt++;
+    #endif
 #endif
 
     if (impl_opts_cnt == 0) {
@@ -336,6 +350,40 @@ STATIC int usage(char **argv) {
     return 1;
 }
 
+#if MICROPY_ENABLE_GC
+// Parse a size given as <n>[w][K|M], returning -1 if it's malformed
+STATIC long parse_heap_size(const char *str) {
+    char *end;
+    long size = strtol(str, &end, 0);
+    // Don't bring unneeded libc dependencies like tolower()
+    // If there's 'w' immediately after number, adjust it for
+    // target word size. Note that it should be *before* size
+    // suffix like K or M, to avoid confusion with kilowords,
+    // etc. the size is still in bytes, just can be adjusted
+    // for word size (taking 32bit as baseline).
+    bool word_adjust = false;
+    if ((*end | 0x20) == 'w') {
+        word_adjust = true;
+        end++;
+    }
+    if ((*end | 0x20) == 'k') {
+        size *= 1024;
+    } else if ((*end | 0x20) == 'm') {
+        size *= 1024 * 1024;
+    } else {
+        // Compensate for ++ below
+        --end;
+    }
+    if (*++end != 0) {
+        return -1;
+    }
+    if (word_adjust) {
+        size = size * BYTES_PER_WORD / 4;
+    }
+    return size;
+}
+#endif
+
 // Process options which set interpreter init options
 STATIC void pre_process_options(int argc, char **argv) {
     for (int a = 1; a < argc; a++) {
@@ -357,37 +405,18 @@ STATIC void pre_process_options(int argc, char **argv) {
                 #endif
 #if MICROPY_ENABLE_GC
                 } else if (strncmp(argv[a + 1], "heapsize=", sizeof("heapsize=") - 1) == 0) {
-                    char *end;
-                    heap_size = strtol(argv[a + 1] + sizeof("heapsize=") - 1, &end, 0);
-                    // Don't bring unneeded libc dependencies like tolower()
-                    // If there's 'w' immediately after number, adjust it for
-                    // target word size. Note that it should be *before* size
-                    // suffix like K or M, to avoid confusion with kilowords,
-                    // etc. the size is still in bytes, just can be adjusted
-                    // for word size (taking 32bit as baseline).
-                    bool word_adjust = false;
-                    if ((*end | 0x20) == 'w') {
-                        word_adjust = true;
-                        end++;
-                    }
-                    if ((*end | 0x20) == 'k') {
-                        heap_size *= 1024;
-                    } else if ((*end | 0x20) == 'm') {
-                        heap_size *= 1024 * 1024;
-                    } else {
-                        // Compensate for ++ below
-                        --end;
-                    }
-                    if (*++end != 0) {
-                        goto invalid_arg;
-                    }
-                    if (word_adjust) {
-                        heap_size = heap_size * BYTES_PER_WORD / 4;
-                    }
+                    heap_size = parse_heap_size(argv[a + 1] + sizeof("heapsize=") - 1);
                     // If requested size too small, we'll crash anyway
                     if (heap_size < 700) {
                         goto invalid_arg;
                     }
+                #if MICROPY_GC_SPLIT_HEAP_AUTO
+                } else if (strncmp(argv[a + 1], "heapmax=", sizeof("heapmax=") - 1) == 0) {
+                    heap_max = parse_heap_size(argv[a + 1] + sizeof("heapmax=") - 1);
+                    if (heap_max < 0) {
+                        goto invalid_arg;
+                    }
+                #endif
 #endif
                 } else {
 invalid_arg:
@@ -449,6 +478,9 @@ MP_NOINLINE int main_(int argc, char **argv) {
 #if MICROPY_ENABLE_GC
     char *heap = malloc(heap_size);
     gc_init(heap, heap + heap_size);
+    #if MICROPY_GC_SPLIT_HEAP_AUTO
+    heap_total = heap_size;
+    #endif
 #endif
 
     #if MICROPY_ENABLE_PYSTACK
@@ -687,6 +719,14 @@ MP_NOINLINE int main_(int argc, char **argv) {
 #if MICROPY_ENABLE_GC && !defined(NDEBUG)
     // We don't really need to free memory since we are about to exit the
     // process, but doing so helps to find memory leaks.
+    #if MICROPY_GC_SPLIT_HEAP_AUTO
+    // Each added region starts with its own area descriptor
+    for (mp_state_mem_area_t *area = MP_STATE_MEM(area).next; area != NULL;) {
+        mp_state_mem_area_t *next = area->next;
+        free(area);
+        area = next;
+    }
+    #endif
     free(heap);
 #endif
 
@@ -694,6 +734,25 @@ MP_NOINLINE int main_(int argc, char **argv) {
     return ret & 0xff;
 }
 
+#if MICROPY_GC_SPLIT_HEAP_AUTO
+// Called by the GC when an allocation fails even after a collection
+bool gc_try_add_heap(size_t n_bytes) {
+    // Add a region the size of the initial heap, or larger if needed to fit
+    // the allocation along with the region's descriptor and GC tables
+    size_t size = MAX((size_t)heap_size, n_bytes + n_bytes / 8 + 1024);
+    if (heap_total + (long)size > heap_max) {
+        return false;
+    }
+    char *region = malloc(size);
+    if (region == NULL) {
+        return false;
+    }
+    heap_total += size;
+    gc_add(region, region + size);
+    return true;
+}
+#endif
+
 #if !MICROPY_VFS
 uint mp_import_stat(const char *path) {
     struct stat st;
@@ -77,6 +77,27 @@
 #endif
 #define MICROPY_STREAMS_POSIX_API   (1)
 #define MICROPY_OPT_COMPUTED_GOTO   (1)
+#define MICROPY_QSTR_HASH_INDEX     (1)
+#define MICROPY_OPT_MAP_LOOKUP_CACHE (1)
+#define MICROPY_OPT_INSTANCE_SHARED_KEYS (1)
+#define MICROPY_PY_CLASS_SLOTS      (1)
+#define MICROPY_OPT_STR_INLINE      (1)
+#define MICROPY_OPT_STR_INDEX_CACHE (1)
+#define MICROPY_OPT_STR_FIND_FAST   (1)
+#define MICROPY_OPT_STR_FORMAT_CACHE (1)
+#define MICROPY_OPT_ATTR_CACHE      (1)
+#define MICROPY_OPT_LOAD_GLOBAL_CACHE (1)
+#define MICROPY_OPT_QUICKEN         (1)
+#define MICROPY_OPT_LIST_TIMSORT    (1)
+#define MICROPY_OPT_MPZ_FAST_LARGE  (1)
+#define MICROPY_GC_SKIP_TENURED     (1)
+#define MICROPY_GC_INCREMENTAL_SWEEP (1)
+#define MICROPY_GC_FREE_RUN_INDEX   (1)
+#define MICROPY_GC_SPLIT_HEAP       (1)
+#define MICROPY_GC_SPLIT_HEAP_AUTO  (1)
+#define MICROPY_GC_THREAD_CACHE     (1)
+#define MICROPY_GC_STATS            (1)
+#define MICROPY_GC_ADAPTIVE_THRESHOLD (1)
 #ifndef MICROPY_OPT_CACHE_MAP_LOOKUP_IN_BYTECODE
 #define MICROPY_OPT_CACHE_MAP_LOOKUP_IN_BYTECODE (1)
 #endif
@@ -88,6 +109,7 @@
 #define MICROPY_PY_BUILTINS_STR_CENTER (1)
 #define MICROPY_PY_BUILTINS_STR_PARTITION (1)
 #define MICROPY_PY_BUILTINS_STR_SPLITLINES (1)
+#define MICROPY_PY_BUILTINS_STR_ISPLIT (1)
 #define MICROPY_PY_BUILTINS_MEMORYVIEW (1)
 #define MICROPY_PY_BUILTINS_FROZENSET (1)
 #define MICROPY_PY_BUILTINS_COMPILE (1)
@@ -96,6 +118,7 @@
 #define MICROPY_PY_BUILTINS_POW3    (1)
 #define MICROPY_PY_BUILTINS_ROUND_INT    (1)
 #define MICROPY_PY_MICROPYTHON_MEM_INFO (1)
+#define MICROPY_PY_MICROPYTHON_HEAP_DUMP (1)
 #define MICROPY_PY_ALL_SPECIAL_METHODS (1)
 #define MICROPY_PY_REVERSE_SPECIAL_METHODS (1)
 #define MICROPY_PY_ARRAY_SLICE_ASSIGN (1)
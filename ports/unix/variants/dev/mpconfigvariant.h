@@ -28,3 +28,4 @@
 #define MICROPY_REPL_EMACS_EXTRA_WORDS_MOVE (1)
 
 #define MICROPY_PY_SYS_SETTRACE (1)
+#define MICROPY_PY_MICROPYTHON_ALLOC_STATS (1)
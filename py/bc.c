@@ -123,8 +123,10 @@ void mp_setup_code_state(mp_code_state_t *code_state, size_t n_args, size_t n_kw
     code_state->prev = NULL;
     #endif
 
-    #if MICROPY_PY_SYS_SETTRACE
+    #if MICROPY_PY_SYS_SETTRACE || MICROPY_PY_MICROPYTHON_ALLOC_STATS
     code_state->prev_state = NULL;
+    #endif
+    #if MICROPY_PY_SYS_SETTRACE
     code_state->frame = NULL;
     #endif
 
@@ -300,16 +302,64 @@ continue2:;
     dump_args(code_state->state, n_state);
 }
 
+#if MICROPY_OPT_QUICKEN
+
+// The binary operation that each quickened opcode performs
+const byte mp_bc_quick_binary_op[MP_BC_QUICK_BINARY_OP_MULTI_NUM] = {
+    MP_BINARY_OP_ADD,
+    MP_BINARY_OP_SUBTRACT,
+    MP_BINARY_OP_INPLACE_ADD,
+    MP_BINARY_OP_INPLACE_SUBTRACT,
+    MP_BINARY_OP_LESS,
+    MP_BINARY_OP_MORE,
+    MP_BINARY_OP_LESS_EQUAL,
+    MP_BINARY_OP_MORE_EQUAL,
+    MP_BINARY_OP_ADD,
+    MP_BINARY_OP_SUBTRACT,
+    MP_BINARY_OP_MULTIPLY,
+    MP_BINARY_OP_INPLACE_ADD,
+    MP_BINARY_OP_LESS,
+    MP_BINARY_OP_MORE,
+};
+
+// The quickened opcode to use for a binary operation on two small ints, or 0
+const byte mp_bc_quick_int_opcode[MP_BINARY_OP_NUM_BYTECODE] = {
+    [MP_BINARY_OP_ADD] = MP_BC_QUICK_INT_ADD,
+    [MP_BINARY_OP_SUBTRACT] = MP_BC_QUICK_INT_SUBTRACT,
+    [MP_BINARY_OP_INPLACE_ADD] = MP_BC_QUICK_INT_INPLACE_ADD,
+    [MP_BINARY_OP_INPLACE_SUBTRACT] = MP_BC_QUICK_INT_INPLACE_SUBTRACT,
+    [MP_BINARY_OP_LESS] = MP_BC_QUICK_INT_LESS,
+    [MP_BINARY_OP_MORE] = MP_BC_QUICK_INT_MORE,
+    [MP_BINARY_OP_LESS_EQUAL] = MP_BC_QUICK_INT_LESS_EQUAL,
+    [MP_BINARY_OP_MORE_EQUAL] = MP_BC_QUICK_INT_MORE_EQUAL,
+};
+
+#if MICROPY_PY_BUILTINS_FLOAT
+// The quickened opcode to use for a binary operation on two floats, or 0
+const byte mp_bc_quick_float_opcode[MP_BINARY_OP_NUM_BYTECODE] = {
+    [MP_BINARY_OP_ADD] = MP_BC_QUICK_FLOAT_ADD,
+    [MP_BINARY_OP_SUBTRACT] = MP_BC_QUICK_FLOAT_SUBTRACT,
+    [MP_BINARY_OP_MULTIPLY] = MP_BC_QUICK_FLOAT_MULTIPLY,
+    [MP_BINARY_OP_INPLACE_ADD] = MP_BC_QUICK_FLOAT_INPLACE_ADD,
+    [MP_BINARY_OP_LESS] = MP_BC_QUICK_FLOAT_LESS,
+    [MP_BINARY_OP_MORE] = MP_BC_QUICK_FLOAT_MORE,
+};
+#endif
+
+#endif // MICROPY_OPT_QUICKEN
+
 #if MICROPY_PERSISTENT_CODE_LOAD || MICROPY_PERSISTENT_CODE_SAVE
 
 // The following table encodes the number of bytes that a specific opcode
 // takes up.  Some opcodes have an extra byte, defined by MP_BC_MASK_EXTRA_BYTE.
-// There are 4 special opcodes that have an extra byte only when
+// There are 5 special opcodes that have an extra byte only when
 // MICROPY_OPT_CACHE_MAP_LOOKUP_IN_BYTECODE is enabled (and they take a qstr):
 //     MP_BC_LOAD_NAME
 //     MP_BC_LOAD_GLOBAL
 //     MP_BC_LOAD_ATTR
+//     MP_BC_LOAD_FAST_LOAD_ATTR
 //     MP_BC_STORE_ATTR
+// MP_BC_LOAD_FAST_LOAD_ATTR also always has an extra byte after the qstr.
 uint mp_opcode_format(const byte *ip, size_t *opcode_size, bool count_var_uint) {
     uint f = MP_BC_FORMAT(*ip);
     const byte *ip_start = ip;
@@ -318,10 +368,14 @@ uint mp_opcode_format(const byte *ip, size_t *opcode_size, bool count_var_uint)
             if (*ip == MP_BC_LOAD_NAME
                 || *ip == MP_BC_LOAD_GLOBAL
                 || *ip == MP_BC_LOAD_ATTR
+                || *ip == MP_BC_LOAD_FAST_LOAD_ATTR
                 || *ip == MP_BC_STORE_ATTR) {
                 ip += 1;
             }
         }
+        if (*ip_start == MP_BC_LOAD_FAST_LOAD_ATTR) {
+            ip += 1;
+        }
         ip += 3;
     } else {
         int extra_byte = (*ip & MP_BC_MASK_EXTRA_BYTE) == 0;
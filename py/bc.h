@@ -209,8 +209,10 @@ typedef struct _mp_code_state_t {
     #if MICROPY_STACKLESS
     struct _mp_code_state_t *prev;
     #endif
-    #if MICROPY_PY_SYS_SETTRACE
+    #if MICROPY_PY_SYS_SETTRACE || MICROPY_PY_MICROPYTHON_ALLOC_STATS
     struct _mp_code_state_t *prev_state;
+    #endif
+    #if MICROPY_PY_SYS_SETTRACE
     struct _mp_obj_frame_t *frame;
     #endif
     // Variable-length
@@ -225,6 +227,14 @@ const byte *mp_decode_uint_skip(const byte *ptr);
 
 mp_vm_return_kind_t mp_execute_bytecode(mp_code_state_t *code_state, volatile mp_obj_t inject_exc);
 mp_code_state_t *mp_obj_fun_bc_prepare_codestate(mp_obj_t func, size_t n_args, size_t n_kw, const mp_obj_t *args);
+#if MICROPY_OPT_TIERED_NATIVE
+// Whether the VM can run a call to func itself; a function promoted to native
+// code is called via mp_call_function_n_kw instead
+#define MP_OBJ_FUN_BC_IS_STACKLESS(func) (mp_obj_get_type(func) == &mp_type_fun_bc \
+    && ((mp_obj_fun_bc_t *)MP_OBJ_TO_PTR(func))->tier_native == NULL)
+#else
+#define MP_OBJ_FUN_BC_IS_STACKLESS(func) (mp_obj_get_type(func) == &mp_type_fun_bc)
+#endif
 void mp_setup_code_state(mp_code_state_t *code_state, size_t n_args, size_t n_kw, const mp_obj_t *args);
 void mp_bytecode_print(const void *descr, const byte *code, mp_uint_t len, const mp_uint_t *const_table);
 void mp_bytecode_print2(const byte *code, size_t len, const mp_uint_t *const_table);
@@ -237,6 +247,14 @@ const byte *mp_bytecode_print_str(const byte *ip);
 #define MP_TAGPTR_TAG1(x) ((uintptr_t)(x) & 2)
 #define MP_TAGPTR_MAKE(ptr, tag) ((void*)((uintptr_t)(ptr) | (tag)))
 
+#if MICROPY_OPT_QUICKEN
+extern const byte mp_bc_quick_binary_op[];
+extern const byte mp_bc_quick_int_opcode[MP_BINARY_OP_NUM_BYTECODE];
+#if MICROPY_PY_BUILTINS_FLOAT
+extern const byte mp_bc_quick_float_opcode[MP_BINARY_OP_NUM_BYTECODE];
+#endif
+#endif
+
 #if MICROPY_PERSISTENT_CODE_LOAD || MICROPY_PERSISTENT_CODE_SAVE
 
 uint mp_opcode_format(const byte *ip, size_t *opcode_size, bool count_var_uint);
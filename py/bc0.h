@@ -39,14 +39,14 @@
 // Nibbles in magic number are: BB BB BB BB BB BO VV QU
 #define MP_BC_FORMAT(op) ((0x000003a4 >> (2 * ((op) >> 4))) & 3)
 
-// Load, Store, Delete, Import, Make, Build, Unpack, Call, Jump, Exception, For, sTack, Return, Yield, Op
-#define MP_BC_BASE_RESERVED                 (0x00) // ----------------
-#define MP_BC_BASE_QSTR_O                   (0x10) // LLLLLLSSSDDII---
+// Load, Store, Delete, Import, Make, Build, Unpack, Call, Jump, Exception, For, sTack, Return, Yield, Op, Quick
+#define MP_BC_BASE_RESERVED                 (0x00) // --QQQQQQQQQQQQQQ
+#define MP_BC_BASE_QSTR_O                   (0x10) // LLLLLLSSSDDIIL--
 #define MP_BC_BASE_VINT_E                   (0x20) // MMLLLLSSDDBBBBBB
 #define MP_BC_BASE_VINT_O                   (0x30) // UUMMCCCC--------
-#define MP_BC_BASE_JUMP_E                   (0x40) // J-JJJJJEEEEF----
+#define MP_BC_BASE_JUMP_E                   (0x40) // JJJJJJJEEEEF----
 #define MP_BC_BASE_BYTE_O                   (0x50) // LLLLSSDTTTTTEEFF
-#define MP_BC_BASE_BYTE_E                   (0x60) // --BREEEYYI------
+#define MP_BC_BASE_BYTE_E                   (0x60) // LLBREEEYYI------
 #define MP_BC_LOAD_CONST_SMALL_INT_MULTI    (0x70) // LLLLLLLLLLLLLLLL
                                          // (0x80) // LLLLLLLLLLLLLLLL
                                          // (0x90) // LLLLLLLLLLLLLLLL
@@ -147,4 +147,30 @@
 #define MP_BC_IMPORT_FROM                   (MP_BC_BASE_QSTR_O + 0x0c) // qstr
 #define MP_BC_IMPORT_STAR                   (MP_BC_BASE_BYTE_E + 0x09)
 
+// Superinstructions, which combine common sequences of the opcodes above
+#define MP_BC_LOAD_FAST_LOAD_FAST           (MP_BC_BASE_BYTE_E + 0x00) // extra byte: local nums 0-15 in high, low nibble
+#define MP_BC_LOAD_FAST_BINARY_OP_SMALL_INT (MP_BC_BASE_BYTE_E + 0x01) // extra byte: local num 0-15, small int 0-3, op
+#define MP_BC_LOAD_FAST_LOAD_ATTR           (MP_BC_BASE_QSTR_O + 0x0d) // qstr; then a byte: local num
+#define MP_BC_BINARY_OP_POP_JUMP_IF         (MP_BC_BASE_JUMP_E + 0x01) // rel byte code offset, 16-bit signed, in excess; then a byte: op, cond
+
+// Quickened binary operations, specialised for the types of their arguments.
+// These are never emitted by the compiler or stored in .mpy files, they are
+// written over MP_BC_BINARY_OP_MULTI in RAM at runtime by MICROPY_OPT_QUICKEN.
+#define MP_BC_QUICK_BINARY_OP_MULTI         (MP_BC_BASE_RESERVED + 0x02)
+#define MP_BC_QUICK_BINARY_OP_MULTI_NUM     (14)
+#define MP_BC_QUICK_INT_ADD                 (MP_BC_QUICK_BINARY_OP_MULTI + 0x00)
+#define MP_BC_QUICK_INT_SUBTRACT            (MP_BC_QUICK_BINARY_OP_MULTI + 0x01)
+#define MP_BC_QUICK_INT_INPLACE_ADD         (MP_BC_QUICK_BINARY_OP_MULTI + 0x02)
+#define MP_BC_QUICK_INT_INPLACE_SUBTRACT    (MP_BC_QUICK_BINARY_OP_MULTI + 0x03)
+#define MP_BC_QUICK_INT_LESS                (MP_BC_QUICK_BINARY_OP_MULTI + 0x04)
+#define MP_BC_QUICK_INT_MORE                (MP_BC_QUICK_BINARY_OP_MULTI + 0x05)
+#define MP_BC_QUICK_INT_LESS_EQUAL          (MP_BC_QUICK_BINARY_OP_MULTI + 0x06)
+#define MP_BC_QUICK_INT_MORE_EQUAL          (MP_BC_QUICK_BINARY_OP_MULTI + 0x07)
+#define MP_BC_QUICK_FLOAT_ADD               (MP_BC_QUICK_BINARY_OP_MULTI + 0x08)
+#define MP_BC_QUICK_FLOAT_SUBTRACT          (MP_BC_QUICK_BINARY_OP_MULTI + 0x09)
+#define MP_BC_QUICK_FLOAT_MULTIPLY          (MP_BC_QUICK_BINARY_OP_MULTI + 0x0a)
+#define MP_BC_QUICK_FLOAT_INPLACE_ADD       (MP_BC_QUICK_BINARY_OP_MULTI + 0x0b)
+#define MP_BC_QUICK_FLOAT_LESS              (MP_BC_QUICK_BINARY_OP_MULTI + 0x0c)
+#define MP_BC_QUICK_FLOAT_MORE              (MP_BC_QUICK_BINARY_OP_MULTI + 0x0d)
+
 #endif // MICROPY_INCLUDED_PY_BC0_H
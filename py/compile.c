@@ -161,6 +161,9 @@ typedef struct _compiler_t {
     uint8_t is_repl;
     uint8_t pass; // holds enum type pass_kind_t
     uint8_t have_star;
+    #if MICROPY_OPT_TIERED_NATIVE
+    uint8_t tier_retain; // whether scopes may later be recompiled to native code
+    #endif
 
     // try to keep compiler clean from nlr
     mp_obj_t compile_error; // set to an exception object if there's an error
@@ -216,7 +219,11 @@ STATIC uint comp_next_label(compiler_t *comp) {
 
 #if MICROPY_EMIT_NATIVE
 STATIC void reserve_labels_for_native(compiler_t *comp, int n) {
-    if (comp->scope_cur->emit_options != MP_EMIT_OPT_BYTECODE) {
+    if (comp->scope_cur->emit_options != MP_EMIT_OPT_BYTECODE
+        #if MICROPY_OPT_TIERED_NATIVE
+        || comp->tier_retain
+        #endif
+        ) {
         comp->next_label += n;
     }
 }
@@ -308,6 +315,10 @@ STATIC void compile_store_id(compiler_t *comp, qstr qst) {
 STATIC void compile_delete_id(compiler_t *comp, qstr qst) {
     if (comp->pass == MP_PASS_SCOPE) {
         mp_emit_common_get_id_for_modification(comp->scope_cur, qst);
+        #if MICROPY_EMIT_NATIVE
+        // native code only checks arguments for being unbound if they are deleted
+        scope_find(comp->scope_cur, qst)->flags |= ID_FLAG_IS_DELETED;
+        #endif
     } else {
         #if NEED_METHOD_TABLE
         mp_emit_common_id_op(comp->emit, &comp->emit_method_table->delete_id, comp->scope_cur, qst);
@@ -3006,7 +3017,7 @@ STATIC void compile_scope(compiler_t *comp, scope_t *scope, pass_kind_t pass) {
     comp->scope_cur = scope;
     comp->next_label = 0;
     EMIT_ARG(start_pass, pass, scope);
-    reserve_labels_for_native(comp, 6); // used by native's start_pass
+    reserve_labels_for_native(comp, 7); // used by native's start_pass
 
     if (comp->pass == MP_PASS_SCOPE) {
         // reset maximum stack sizes in scope
@@ -3420,6 +3431,75 @@ STATIC void scope_compute_things(scope_t *scope) {
     }
 }
 
+#if MICROPY_OPT_TIERED_NATIVE
+// Compiler state kept after compilation so functions can be recompiled later
+typedef struct _mp_tier_module_t {
+    mp_parse_tree_t parse_tree;
+    scope_t *scope_head;
+    size_t n_pending; // functions that haven't been tried yet
+    qstr source_file;
+    uint max_num_labels;
+} mp_tier_module_t;
+
+// Returns true if the given statements contain a loop, not counting nested
+// functions and classes.  Native code has a higher cost per call than the VM,
+// so it only pays off for functions that loop.
+STATIC bool compile_tier_has_loop(mp_parse_node_t pn) {
+    if (!MP_PARSE_NODE_IS_STRUCT(pn)) {
+        return false;
+    }
+    mp_parse_node_struct_t *pns = (mp_parse_node_struct_t *)pn;
+    switch (MP_PARSE_NODE_STRUCT_KIND(pns)) {
+        case PN_for_stmt:
+        case PN_while_stmt:
+            return true;
+        case PN_funcdef:
+        case PN_lambdef:
+        case PN_lambdef_nocond:
+        case PN_classdef:
+        case PN_const_object:
+            return false;
+    }
+    size_t n = MP_PARSE_NODE_STRUCT_NUM_NODES(pns);
+    for (size_t i = 0; i < n; i++) {
+        if (compile_tier_has_loop(pns->nodes[i])) {
+            return true;
+        }
+    }
+    return false;
+}
+
+// Attach tiering info to the raw code of all functions that can be promoted
+// to native code.  Returns true if the parse tree and scopes were retained.
+STATIC bool compile_tier_retain(compiler_t *comp, mp_parse_tree_t *parse_tree, uint max_num_labels) {
+    mp_tier_module_t *mod = NULL;
+    for (scope_t *s = comp->scope_head; s != NULL; s = s->next) {
+        if (s->kind == SCOPE_FUNCTION
+            && (s->emit_options == MP_EMIT_OPT_NONE || s->emit_options == MP_EMIT_OPT_BYTECODE)
+            && !(s->scope_flags & MP_SCOPE_FLAG_GENERATOR)
+            && compile_tier_has_loop(((mp_parse_node_struct_t *)s->pn)->nodes[3])) {
+            if (mod == NULL) {
+                mod = m_new_obj(mp_tier_module_t);
+                mod->parse_tree = *parse_tree;
+                mod->scope_head = comp->scope_head;
+                mod->n_pending = 0;
+                mod->source_file = comp->source_file;
+                mod->max_num_labels = max_num_labels;
+            }
+            mp_tier_info_t *tier = m_new_obj(mp_tier_info_t);
+            tier->count = 0;
+            tier->n_generic = 0;
+            tier->module = mod;
+            tier->scope = s;
+            tier->native_rc = NULL;
+            s->raw_code->tier = tier;
+            ++mod->n_pending;
+        }
+    }
+    return mod != NULL;
+}
+#endif
+
 #if !MICROPY_PERSISTENT_CODE_SAVE
 STATIC
 #endif
@@ -3432,6 +3512,9 @@ mp_raw_code_t *mp_compile_to_raw_code(mp_parse_tree_t *parse_tree, qstr source_f
     comp->is_repl = is_repl;
     comp->break_label = INVALID_LABEL;
     comp->continue_label = INVALID_LABEL;
+    #if MICROPY_OPT_TIERED_NATIVE
+    comp->tier_retain = MP_STATE_VM(tier_threshold) != 0;
+    #endif
 
     // create the module scope
     #if MICROPY_EMIT_NATIVE
@@ -3575,15 +3658,26 @@ mp_raw_code_t *mp_compile_to_raw_code(mp_parse_tree_t *parse_tree, qstr source_f
     }
     #endif
 
-    // free the parse tree
-    mp_parse_tree_clear(parse_tree);
-
-    // free the scopes
     mp_raw_code_t *outer_raw_code = module_scope->raw_code;
-    for (scope_t *s = module_scope; s;) {
-        scope_t *next = s->next;
-        scope_free(s);
-        s = next;
+
+    #if MICROPY_OPT_TIERED_NATIVE
+    if (comp->tier_retain && comp->compile_error == MP_OBJ_NULL
+        && compile_tier_retain(comp, parse_tree, max_num_labels)) {
+        // the parse tree and scopes are now owned by the tiering info, and
+        // are freed once all functions have been tried, or reclaimed by the
+        // GC once the functions are no longer used
+    } else
+    #endif
+    {
+        // free the parse tree
+        mp_parse_tree_clear(parse_tree);
+
+        // free the scopes
+        for (scope_t *s = module_scope; s;) {
+            scope_t *next = s->next;
+            scope_free(s);
+            s = next;
+        }
     }
 
     if (comp->compile_error != MP_OBJ_NULL) {
@@ -3599,4 +3693,97 @@ mp_obj_t mp_compile(mp_parse_tree_t *parse_tree, qstr source_file, bool is_repl)
     return mp_make_function_from_raw_code(rc, MP_OBJ_NULL, MP_OBJ_NULL);
 }
 
+#if MICROPY_OPT_TIERED_NATIVE
+
+#if MICROPY_PY_THREAD && !MICROPY_PY_THREAD_GIL
+#define TIER_ENTER() (mp_thread_mutex_lock(&MP_STATE_VM(tier_mutex), 0) == 1)
+#define TIER_EXIT() mp_thread_mutex_unlock(&MP_STATE_VM(tier_mutex))
+#else
+#define TIER_ENTER() (true)
+#define TIER_EXIT()
+#endif
+
+#if MICROPY_OPT_QUICKEN
+// Native code only pays off when the function runs binary ops that the VM
+// can't quicken, at least one for every two calls or loop iterations;
+// otherwise it is left as bytecode, which runs quickened ops inline
+#define TIER_WORTH_PROMOTING(tier) (2 * (tier)->n_generic >= (tier)->count)
+#else
+#define TIER_WORTH_PROMOTING(tier) (true)
+#endif
+
+bool mp_compile_tier_native(mp_tier_info_t *tier) {
+    // if another thread is promoting a function then keep running bytecode
+    if (!TIER_ENTER()) {
+        return false;
+    }
+
+    if (tier->module != NULL && TIER_WORTH_PROMOTING(tier)) {
+        mp_tier_module_t *mod = tier->module;
+        scope_t *scope = tier->scope;
+
+        compiler_t comp_state = {0};
+        compiler_t *comp = &comp_state;
+        comp->source_file = mod->source_file;
+        comp->break_label = INVALID_LABEL;
+        comp->continue_label = INVALID_LABEL;
+        comp->emit_method_table = NATIVE_EMITTER_TABLE;
+
+        // the native emitter updates these, so save them to restore afterwards
+        mp_raw_code_t *bc_raw_code = scope->raw_code;
+        uint16_t emit_options = scope->emit_options;
+        uint16_t scope_flags = scope->scope_flags;
+        uint16_t stack_size = scope->stack_size;
+
+        // the scope pass was already done when compiling to bytecode; if an
+        // exception is raised the partially built code is left to the GC
+        nlr_buf_t nlr;
+        if (nlr_push(&nlr) == 0) {
+            scope->emit_options = MP_EMIT_OPT_NATIVE_TIER;
+            scope->raw_code = mp_emit_glue_new_raw_code();
+            emit_t *emit_native = NATIVE_EMITTER(new)(&comp->compile_error, &comp->next_label, mod->max_num_labels);
+            comp->emit = emit_native;
+            compile_scope(comp, scope, MP_PASS_STACK_SIZE);
+            if (comp->compile_error == MP_OBJ_NULL) {
+                compile_scope(comp, scope, MP_PASS_CODE_SIZE);
+            }
+            if (comp->compile_error == MP_OBJ_NULL) {
+                compile_scope(comp, scope, MP_PASS_EMIT);
+            }
+            if (comp->compile_error == MP_OBJ_NULL) {
+                tier->native_rc = scope->raw_code;
+            }
+            NATIVE_EMITTER(free)(emit_native);
+            nlr_pop();
+        }
+
+        scope->raw_code = bc_raw_code;
+        scope->emit_options = emit_options;
+        scope->scope_flags = scope_flags;
+        scope->stack_size = stack_size;
+    }
+
+    // only try once, and free the retained state when all functions are tried
+    if (tier->module != NULL) {
+        mp_tier_module_t *mod = tier->module;
+        tier->module = NULL;
+        tier->scope = NULL;
+        if (--mod->n_pending == 0) {
+            mp_parse_tree_clear(&mod->parse_tree);
+            for (scope_t *s = mod->scope_head; s;) {
+                scope_t *next = s->next;
+                scope_free(s);
+                s = next;
+            }
+            m_del_obj(mp_tier_module_t, mod);
+        }
+    }
+
+    TIER_EXIT();
+
+    return tier->native_rc != NULL;
+}
+
+#endif // MICROPY_OPT_TIERED_NATIVE
+
 #endif // MICROPY_ENABLE_COMPILER
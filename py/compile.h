@@ -39,6 +39,12 @@ mp_obj_t mp_compile(mp_parse_tree_t *parse_tree, qstr source_file, bool is_repl)
 mp_raw_code_t *mp_compile_to_raw_code(mp_parse_tree_t *parse_tree, qstr source_file, bool is_repl);
 #endif
 
+#if MICROPY_OPT_TIERED_NATIVE
+// compile the function described by tier to native code, using the parse tree
+// and scopes retained from its original compilation; returns true on success
+bool mp_compile_tier_native(mp_tier_info_t *tier);
+#endif
+
 // this is implemented in runtime.c
 mp_obj_t mp_parse_compile_execute(mp_lexer_t *lex, mp_parse_input_kind_t parse_input_kind, mp_obj_dict_t *globals, mp_obj_dict_t *locals);
 
@@ -39,6 +39,18 @@
 #define BYTES_FOR_INT ((BYTES_PER_WORD * 8 + 6) / 7)
 #define DUMMY_DATA_SIZE (BYTES_FOR_INT)
 
+// States of the peephole optimiser that combines sequences of opcodes into
+// superinstructions.  The state records the trailing opcodes that were just
+// emitted and is only valid if nothing else was emitted after them.
+enum {
+    PEEP_NONE,
+    PEEP_LOAD_FAST, // arg[0]: local num
+    PEEP_LOAD_FAST_LOAD_FAST, // arg[0], arg[1]: local nums
+    PEEP_LOAD_FAST_SMALL_INT, // arg[0]: local num, arg[2]: small int
+    PEEP_LOAD_FAST_LOAD_FAST_SMALL_INT, // arg[0], arg[1]: local nums, arg[2]: small int
+    PEEP_COMPARE, // arg[0]: binary op
+};
+
 struct _emit_t {
     // Accessed as mp_obj_t, so must be aligned as such, and we rely on the
     // memory allocator returning a suitably aligned pointer.
@@ -67,6 +79,11 @@ struct _emit_t {
     size_t n_info;
     size_t n_cell;
 
+    byte peep_kind;
+    byte peep_arg[3];
+    size_t peep_start;
+    size_t peep_end;
+
     #if MICROPY_PERSISTENT_CODE
     uint16_t ct_cur_obj;
     uint16_t ct_num_obj;
@@ -308,6 +325,28 @@ STATIC void emit_write_bytecode_byte_signed_label(emit_t *emit, int stack_adj, b
     c[2] = bytecode_offset >> 8;
 }
 
+STATIC void emit_peep_set(emit_t *emit, byte kind, size_t start) {
+    emit->peep_kind = kind;
+    emit->peep_start = start;
+    emit->peep_end = emit->bytecode_offset;
+}
+
+STATIC byte emit_peep_get(emit_t *emit) {
+    if (emit->peep_end != emit->bytecode_offset) {
+        // Something else was emitted since the state was recorded
+        return PEEP_NONE;
+    }
+    return emit->peep_kind;
+}
+
+// Rewind the bytecode to the start of the opcodes recorded by the peephole
+// state, so they can be written again as a superinstruction.  Any stack
+// adjustment made by those opcodes still stands.
+STATIC void emit_peep_rewind(emit_t *emit) {
+    emit->bytecode_offset = emit->peep_start;
+    emit->peep_kind = PEEP_NONE;
+}
+
 void mp_emit_bc_start_pass(emit_t *emit, pass_kind_t pass, scope_t *scope) {
     emit->pass = pass;
     emit->stack_size = 0;
@@ -323,6 +362,7 @@ void mp_emit_bc_start_pass(emit_t *emit, pass_kind_t pass, scope_t *scope) {
     #endif
     emit->bytecode_offset = 0;
     emit->code_info_offset = 0;
+    emit->peep_kind = PEEP_NONE;
 
     // Write local state size, exception stack size, scope flags and number of arguments
     {
@@ -478,6 +518,8 @@ void mp_emit_bc_set_source_line(emit_t *emit, mp_uint_t source_line) {
         emit_write_code_info_bytes_lines(emit, bytes_to_skip, lines_to_skip);
         emit->last_source_line_offset = emit->bytecode_offset;
         emit->last_source_line = source_line;
+        // Opcodes can't be combined across a line number boundary
+        emit->peep_kind = PEEP_NONE;
     }
 #else
     (void)emit;
@@ -487,6 +529,8 @@ void mp_emit_bc_set_source_line(emit_t *emit, mp_uint_t source_line) {
 
 void mp_emit_bc_label_assign(emit_t *emit, mp_uint_t l) {
     mp_emit_bc_adjust_stack_size(emit, 0);
+    // Opcodes can't be combined across a jump target
+    emit->peep_kind = PEEP_NONE;
     if (emit->pass == MP_PASS_SCOPE) {
         return;
     }
@@ -523,6 +567,8 @@ void mp_emit_bc_load_const_tok(emit_t *emit, mp_token_kind_t tok) {
 }
 
 void mp_emit_bc_load_const_small_int(emit_t *emit, mp_int_t arg) {
+    byte peep = emit_peep_get(emit);
+    size_t start = emit->peep_start;
     if (-MP_BC_LOAD_CONST_SMALL_INT_MULTI_EXCESS <= arg
         && arg < MP_BC_LOAD_CONST_SMALL_INT_MULTI_NUM - MP_BC_LOAD_CONST_SMALL_INT_MULTI_EXCESS) {
         emit_write_bytecode_byte(emit, 1,
@@ -530,6 +576,15 @@ void mp_emit_bc_load_const_small_int(emit_t *emit, mp_int_t arg) {
     } else {
         emit_write_bytecode_byte_int(emit, 1, MP_BC_LOAD_CONST_SMALL_INT, arg);
     }
+    if (0 <= arg && arg <= 3) {
+        if (peep == PEEP_LOAD_FAST) {
+            emit->peep_arg[2] = arg;
+            emit_peep_set(emit, PEEP_LOAD_FAST_SMALL_INT, start);
+        } else if (peep == PEEP_LOAD_FAST_LOAD_FAST) {
+            emit->peep_arg[2] = arg;
+            emit_peep_set(emit, PEEP_LOAD_FAST_LOAD_FAST_SMALL_INT, start);
+        }
+    }
 }
 
 void mp_emit_bc_load_const_str(emit_t *emit, qstr qst) {
@@ -549,7 +604,20 @@ void mp_emit_bc_load_local(emit_t *emit, qstr qst, mp_uint_t local_num, int kind
     MP_STATIC_ASSERT(MP_BC_LOAD_FAST_N + MP_EMIT_IDOP_LOCAL_DEREF == MP_BC_LOAD_DEREF);
     (void)qst;
     if (kind == MP_EMIT_IDOP_LOCAL_FAST && local_num <= 15) {
-        emit_write_bytecode_byte(emit, 1, MP_BC_LOAD_FAST_MULTI + local_num);
+        if (emit_peep_get(emit) == PEEP_LOAD_FAST) {
+            // LOAD_FAST_MULTI, LOAD_FAST_MULTI -> LOAD_FAST_LOAD_FAST
+            size_t start = emit->peep_start;
+            emit_peep_rewind(emit);
+            emit_write_bytecode_byte(emit, 1, MP_BC_LOAD_FAST_LOAD_FAST);
+            emit_write_bytecode_raw_byte(emit, emit->peep_arg[0] << 4 | local_num);
+            emit->peep_arg[1] = local_num;
+            emit_peep_set(emit, PEEP_LOAD_FAST_LOAD_FAST, start);
+        } else {
+            size_t start = emit->bytecode_offset;
+            emit_write_bytecode_byte(emit, 1, MP_BC_LOAD_FAST_MULTI + local_num);
+            emit->peep_arg[0] = local_num;
+            emit_peep_set(emit, PEEP_LOAD_FAST, start);
+        }
     } else {
         emit_write_bytecode_byte_uint(emit, 1, MP_BC_LOAD_FAST_N + kind, local_num);
     }
@@ -587,7 +655,18 @@ void mp_emit_bc_subscr(emit_t *emit, int kind) {
 }
 
 void mp_emit_bc_attr(emit_t *emit, qstr qst, int kind) {
-    if (kind == MP_EMIT_ATTR_LOAD) {
+    byte peep = emit_peep_get(emit);
+    if (kind == MP_EMIT_ATTR_LOAD && (peep == PEEP_LOAD_FAST || peep == PEEP_LOAD_FAST_LOAD_FAST)) {
+        // LOAD_FAST_MULTI, LOAD_ATTR -> LOAD_FAST_LOAD_ATTR
+        emit_peep_rewind(emit);
+        byte local_num = emit->peep_arg[0];
+        if (peep == PEEP_LOAD_FAST_LOAD_FAST) {
+            emit_write_bytecode_raw_byte(emit, MP_BC_LOAD_FAST_MULTI + local_num);
+            local_num = emit->peep_arg[1];
+        }
+        emit_write_bytecode_byte_qstr(emit, 0, MP_BC_LOAD_FAST_LOAD_ATTR, qst);
+        emit_write_bytecode_raw_byte(emit, local_num);
+    } else if (kind == MP_EMIT_ATTR_LOAD) {
         emit_write_bytecode_byte_qstr(emit, 0, MP_BC_LOAD_ATTR, qst);
     } else {
         if (kind == MP_EMIT_ATTR_DELETE) {
@@ -656,7 +735,12 @@ void mp_emit_bc_jump(emit_t *emit, mp_uint_t label) {
 }
 
 void mp_emit_bc_pop_jump_if(emit_t *emit, bool cond, mp_uint_t label) {
-    if (cond) {
+    if (emit_peep_get(emit) == PEEP_COMPARE) {
+        // BINARY_OP_MULTI, POP_JUMP_IF_xxx -> BINARY_OP_POP_JUMP_IF
+        emit_peep_rewind(emit);
+        emit_write_bytecode_byte_signed_label(emit, -1, MP_BC_BINARY_OP_POP_JUMP_IF, label);
+        emit_write_bytecode_raw_byte(emit, emit->peep_arg[0] | cond << 7);
+    } else if (cond) {
         emit_write_bytecode_byte_signed_label(emit, -1, MP_BC_POP_JUMP_IF_TRUE, label);
     } else {
         emit_write_bytecode_byte_signed_label(emit, -1, MP_BC_POP_JUMP_IF_FALSE, label);
@@ -742,9 +826,36 @@ void mp_emit_bc_binary_op(emit_t *emit, mp_binary_op_t op) {
         invert = true;
         op = MP_BINARY_OP_IS;
     }
+    byte peep = emit_peep_get(emit);
+    if ((peep == PEEP_LOAD_FAST_SMALL_INT || peep == PEEP_LOAD_FAST_LOAD_FAST_SMALL_INT)
+        && (op == MP_BINARY_OP_ADD || op == MP_BINARY_OP_SUBTRACT
+            || op == MP_BINARY_OP_INPLACE_ADD || op == MP_BINARY_OP_INPLACE_SUBTRACT)) {
+        // LOAD_FAST_MULTI, LOAD_CONST_SMALL_INT_MULTI, BINARY_OP_MULTI -> LOAD_FAST_BINARY_OP_SMALL_INT
+        MP_STATIC_ASSERT(MP_BINARY_OP_ADD + 1 == MP_BINARY_OP_SUBTRACT);
+        MP_STATIC_ASSERT(MP_BINARY_OP_INPLACE_ADD + 1 == MP_BINARY_OP_INPLACE_SUBTRACT);
+        emit_peep_rewind(emit);
+        byte local_num = emit->peep_arg[0];
+        if (peep == PEEP_LOAD_FAST_LOAD_FAST_SMALL_INT) {
+            emit_write_bytecode_raw_byte(emit, MP_BC_LOAD_FAST_MULTI + local_num);
+            local_num = emit->peep_arg[1];
+        }
+        byte op_bits;
+        if (op >= MP_BINARY_OP_ADD) {
+            op_bits = op - MP_BINARY_OP_ADD;
+        } else {
+            op_bits = 2 | (op - MP_BINARY_OP_INPLACE_ADD);
+        }
+        emit_write_bytecode_byte(emit, -1, MP_BC_LOAD_FAST_BINARY_OP_SMALL_INT);
+        emit_write_bytecode_raw_byte(emit, local_num << 4 | emit->peep_arg[2] << 2 | op_bits);
+        return;
+    }
+    size_t start = emit->bytecode_offset;
     emit_write_bytecode_byte(emit, -1, MP_BC_BINARY_OP_MULTI + op);
     if (invert) {
         emit_write_bytecode_byte(emit, 0, MP_BC_UNARY_OP_MULTI + MP_UNARY_OP_NOT);
+    } else if (op <= MP_BINARY_OP_IS) {
+        emit->peep_arg[0] = op;
+        emit_peep_set(emit, PEEP_COMPARE, start);
     }
 }
 
@@ -38,6 +38,7 @@ enum {
     MP_EMIT_OPT_NATIVE_PYTHON,
     MP_EMIT_OPT_VIPER,
     MP_EMIT_OPT_ASM,
+    MP_EMIT_OPT_NATIVE_TIER, // native Python promoted from bytecode at runtime
 };
 
 typedef enum {
@@ -54,6 +55,17 @@ typedef struct _mp_qstr_link_entry_t {
     uint16_t qst;
 } mp_qstr_link_entry_t;
 
+#if MICROPY_OPT_TIERED_NATIVE
+// State used to promote a bytecode function to native code once it is hot
+typedef struct _mp_tier_info_t {
+    size_t count; // number of calls and loop back-edges executed so far
+    size_t n_generic; // number of binary ops executed that can't be quickened
+    struct _mp_tier_module_t *module; // retained compiler state, NULL once tried
+    struct _scope_t *scope;
+    const struct _mp_raw_code_t *native_rc; // set if promotion succeeded
+} mp_tier_info_t;
+#endif
+
 typedef struct _mp_raw_code_t {
     mp_uint_t kind : 3; // of type mp_raw_code_kind_t
     mp_uint_t scope_flags : 7;
@@ -81,6 +93,9 @@ typedef struct _mp_raw_code_t {
     #if MICROPY_EMIT_MACHINE_CODE
     mp_uint_t type_sig; // for viper, compressed as 2-bit types; ret is MSB, then arg0, arg1, etc
     #endif
+    #if MICROPY_OPT_TIERED_NATIVE
+    mp_tier_info_t *tier;
+    #endif
 } mp_raw_code_t;
 
 mp_raw_code_t *mp_emit_glue_new_raw_code(void);
@@ -112,9 +112,18 @@
 #define NEED_FUN_OBJ(emit) ((emit)->scope->exc_stack_size > 0 \
     || ((emit)->scope->scope_flags & (MP_SCOPE_FLAG_REFGLOBALS | MP_SCOPE_FLAG_HASCONSTS)))
 
+// Whether the function keeps the current source line, for tracebacks (only
+// done for functions promoted from bytecode, so they behave as they did before)
+#if MICROPY_OPT_TIERED_NATIVE
+#define TRACK_SOURCE_LINE(emit) ((emit)->scope->emit_options == MP_EMIT_OPT_NATIVE_TIER)
+#else
+#define TRACK_SOURCE_LINE(emit) (false)
+#endif
+
 // Whether the native/viper function needs to be wrapped in an exception handler
 #define NEED_GLOBAL_EXC_HANDLER(emit) ((emit)->scope->exc_stack_size > 0 \
-    || ((emit)->scope->scope_flags & (MP_SCOPE_FLAG_GENERATOR | MP_SCOPE_FLAG_REFGLOBALS)))
+    || ((emit)->scope->scope_flags & (MP_SCOPE_FLAG_GENERATOR | MP_SCOPE_FLAG_REFGLOBALS)) \
+    || TRACK_SOURCE_LINE(emit))
 
 // Whether registers can be used to store locals (only true if there are no
 // exception handlers, because otherwise an nlr_jump will restore registers to
@@ -129,6 +138,7 @@
 #define LOCAL_IDX_FUN_OBJ(emit) ((emit)->code_state_start + OFFSETOF_CODE_STATE_FUN_BC)
 #define LOCAL_IDX_OLD_GLOBALS(emit) ((emit)->code_state_start + OFFSETOF_CODE_STATE_IP)
 #define LOCAL_IDX_GEN_PC(emit) ((emit)->code_state_start + OFFSETOF_CODE_STATE_IP)
+#define LOCAL_IDX_SOURCE_LINE(emit) ((emit)->code_state_start + OFFSETOF_CODE_STATE_SP)
 #define LOCAL_IDX_LOCAL_VAR(emit, local_num) ((emit)->stack_start + (emit)->n_state - 1 - (local_num))
 
 #define REG_GENERATOR_STATE (REG_LOCAL_3)
@@ -202,6 +212,12 @@ struct _emit_t {
 
     bool do_viper_types;
 
+    // label of the code that raises NameError for an unbound local, if used
+    uint unbound_local_label;
+    bool unbound_local_label_used;
+
+    mp_uint_t last_source_line;
+
     mp_uint_t local_vtype_alloc;
     vtype_kind_t *local_vtype;
 
@@ -240,6 +256,7 @@ struct _emit_t {
 
 STATIC const uint8_t reg_local_table[REG_LOCAL_NUM] = {REG_LOCAL_1, REG_LOCAL_2, REG_LOCAL_3};
 
+STATIC void need_reg_single(emit_t *emit, int reg_needed, int skip_stack_pos);
 STATIC void emit_native_global_exc_entry(emit_t *emit);
 STATIC void emit_native_global_exc_exit(emit_t *emit);
 STATIC void emit_native_load_const_obj(emit_t *emit, mp_obj_t obj);
@@ -346,6 +363,9 @@ STATIC void emit_native_start_pass(emit_t *emit, pass_kind_t pass, scope_t *scop
     #endif
     emit->last_emit_was_return_value = false;
     emit->scope = scope;
+    emit->unbound_local_label = *emit->label_slot + 6;
+    emit->unbound_local_label_used = false;
+    emit->last_source_line = 1;
 
     // allocate memory for keeping track of the types of locals
     if (emit->local_vtype_alloc < scope->num_locals) {
@@ -578,6 +598,11 @@ STATIC void emit_native_start_pass(emit_t *emit, pass_kind_t pass, scope_t *scop
             #endif
         }
 
+        if (TRACK_SOURCE_LINE(emit)) {
+            // Initialise the source line, which reuses the unused sp slot of code_state
+            emit_native_mov_state_imm_via(emit, LOCAL_IDX_SOURCE_LINE(emit), emit->last_source_line, REG_TEMP0);
+        }
+
         emit_native_global_exc_entry(emit);
 
         // cache some locals in registers, but only if no exception handlers
@@ -621,6 +646,13 @@ static inline void emit_native_write_code_info_byte(emit_t *emit, byte val) {
 STATIC void emit_native_end_pass(emit_t *emit) {
     emit_native_global_exc_exit(emit);
 
+    if (emit->unbound_local_label_used) {
+        // Raise NameError for a local that is used before it is assigned
+        mp_asm_base_label_assign(&emit->as->base, emit->unbound_local_label);
+        ASM_MOV_REG_IMM(emit->as, REG_ARG_1, (mp_uint_t)MP_OBJ_SENTINEL);
+        ASM_CALL_IND(emit->as, MP_F_NATIVE_RAISE);
+    }
+
     if (!emit->do_viper_types) {
         emit->prelude_offset = mp_asm_base_get_code_pos(&emit->as->base);
 
@@ -767,9 +799,23 @@ STATIC void emit_native_adjust_stack_size(emit_t *emit, mp_int_t delta) {
     adjust_stack(emit, delta);
 }
 
+STATIC void emit_native_store_source_line(emit_t *emit) {
+    need_reg_single(emit, REG_TEMP0, 0);
+    emit_native_mov_state_imm_via(emit, LOCAL_IDX_SOURCE_LINE(emit), emit->last_source_line, REG_TEMP0);
+}
+
 STATIC void emit_native_set_source_line(emit_t *emit, mp_uint_t source_line) {
+    #if MICROPY_ENABLE_SOURCE_LINE
+    // Lines are only stored where they increase, in the same way as emitbc,
+    // so that tracebacks give the same line as for the bytecode
+    if (TRACK_SOURCE_LINE(emit) && MP_STATE_VM(mp_optimise_value) < 3 && source_line > emit->last_source_line) {
+        emit->last_source_line = source_line;
+        emit_native_store_source_line(emit);
+    }
+    #else
     (void)emit;
     (void)source_line;
+    #endif
 }
 
 // this must be called at start of emit functions
@@ -1155,6 +1201,27 @@ STATIC void emit_native_label_assign(emit_t *emit, mp_uint_t l) {
     }
 }
 
+STATIC void emit_native_label_assign_from_compiler(emit_t *emit, mp_uint_t l) {
+    emit_native_label_assign(emit, l);
+    if (TRACK_SOURCE_LINE(emit)) {
+        // Code can jump here from other lines, so store the line for this point
+        emit_native_store_source_line(emit);
+    }
+}
+
+STATIC void emit_native_add_traceback(emit_t *emit) {
+    // Add the current line to the traceback of the exception in LOCAL_IDX_EXC_VAL
+    #if MICROPY_OPT_TIERED_NATIVE
+    ASM_MOV_REG_LOCAL(emit->as, REG_ARG_1, LOCAL_IDX_EXC_VAL(emit));
+    ASM_MOV_REG_LOCAL(emit->as, REG_ARG_2, LOCAL_IDX_SOURCE_LINE(emit));
+    emit_native_mov_reg_qstr(emit, REG_ARG_3, emit->scope->source_file);
+    emit_native_mov_reg_qstr(emit, REG_ARG_4, emit->scope->simple_name);
+    emit_call(emit, MP_F_NATIVE_ADD_TRACEBACK);
+    #else
+    (void)emit;
+    #endif
+}
+
 STATIC void emit_native_global_exc_entry(emit_t *emit) {
     // Note: 4 labels are reserved for this function, starting at *emit->label_slot
 
@@ -1176,7 +1243,7 @@ STATIC void emit_native_global_exc_entry(emit_t *emit) {
         }
 
         if (emit->scope->exc_stack_size == 0) {
-            if (!(emit->scope->scope_flags & MP_SCOPE_FLAG_GENERATOR)) {
+            if (!(emit->scope->scope_flags & MP_SCOPE_FLAG_GENERATOR) && !TRACK_SOURCE_LINE(emit)) {
                 // Optimisation: if globals didn't change don't push the nlr context
                 ASM_JUMP_IF_REG_ZERO(emit->as, REG_RET, start_label, false);
             }
@@ -1189,6 +1256,10 @@ STATIC void emit_native_global_exc_entry(emit_t *emit) {
             emit_call(emit, MP_F_SETJMP);
             #endif
             ASM_JUMP_IF_REG_ZERO(emit->as, REG_RET, start_label, true);
+
+            if (TRACK_SOURCE_LINE(emit)) {
+                emit_native_add_traceback(emit);
+            }
         } else {
             // Clear the unwind state
             ASM_XOR_REG_REG(emit->as, REG_TEMP0, REG_TEMP0);
@@ -1222,6 +1293,9 @@ STATIC void emit_native_global_exc_entry(emit_t *emit) {
             ASM_LOAD_REG_REG_OFFSET(emit->as, REG_LOCAL_1, REG_LOCAL_1, offsetof(mp_obj_fun_bc_t, const_table) / sizeof(uintptr_t));
             ASM_LOAD_REG_REG_OFFSET(emit->as, REG_FUN_TABLE, REG_LOCAL_1, emit->scope->num_pos_args + emit->scope->num_kwonly_args);
             #endif
+            if (TRACK_SOURCE_LINE(emit)) {
+                emit_native_add_traceback(emit);
+            }
             ASM_MOV_REG_LOCAL(emit->as, REG_LOCAL_1, LOCAL_IDX_EXC_HANDLER_PC(emit));
             ASM_JUMP_IF_REG_NONZERO(emit->as, REG_LOCAL_1, nlr_label, false);
         }
@@ -1273,7 +1347,7 @@ STATIC void emit_native_global_exc_exit(emit_t *emit) {
         if (!(emit->scope->scope_flags & MP_SCOPE_FLAG_GENERATOR)) {
             emit_native_mov_reg_state(emit, REG_ARG_1, LOCAL_IDX_OLD_GLOBALS(emit));
 
-            if (emit->scope->exc_stack_size == 0) {
+            if (emit->scope->exc_stack_size == 0 && !TRACK_SOURCE_LINE(emit)) {
                 // Optimisation: if globals didn't change then don't restore them and don't do nlr_pop
                 ASM_JUMP_IF_REG_ZERO(emit->as, REG_ARG_1, emit->exit_label + 1, false);
             }
@@ -1286,7 +1360,7 @@ STATIC void emit_native_global_exc_exit(emit_t *emit) {
         emit_call(emit, MP_F_NLR_POP);
 
         if (!(emit->scope->scope_flags & MP_SCOPE_FLAG_GENERATOR)) {
-            if (emit->scope->exc_stack_size == 0) {
+            if (emit->scope->exc_stack_size == 0 && !TRACK_SOURCE_LINE(emit)) {
                 // Destination label for above optimisation
                 emit_native_label_assign(emit, emit->exit_label + 1);
             }
@@ -1401,18 +1475,55 @@ STATIC void emit_native_load_null(emit_t *emit) {
     emit_post_push_imm(emit, VTYPE_PYOBJ, 0);
 }
 
+STATIC void emit_native_check_bound(emit_t *emit, int reg) {
+    // Locals that aren't assigned hold MP_OBJ_NULL, as they do for the VM
+    ASM_JUMP_IF_REG_ZERO(emit->as, reg, emit->unbound_local_label, false);
+    emit->unbound_local_label_used = true;
+}
+
+// Whether a load of the given local must check that it is assigned.  Arguments
+// only need the check if they are deleted, and cells are always assigned (it's
+// the value in the cell that must be checked).  Viper locals can't be unbound.
+STATIC bool emit_native_need_bound_check(emit_t *emit, mp_uint_t local_num) {
+    if (emit->do_viper_types) {
+        return false;
+    }
+    for (int i = 0; i < emit->scope->id_info_len; ++i) {
+        id_info_t *id = &emit->scope->id_info[i];
+        if (id->local_num == local_num && id->kind != ID_INFO_KIND_GLOBAL_IMPLICIT
+            && id->kind != ID_INFO_KIND_GLOBAL_EXPLICIT) {
+            if (id->kind != ID_INFO_KIND_LOCAL) {
+                return false;
+            }
+            return (id->flags & (ID_FLAG_IS_PARAM | ID_FLAG_IS_DELETED)) != ID_FLAG_IS_PARAM;
+        }
+    }
+    return true;
+}
+
 STATIC void emit_native_load_fast(emit_t *emit, qstr qst, mp_uint_t local_num) {
     DEBUG_printf("load_fast(%s, " UINT_FMT ")\n", qstr_str(qst), local_num);
     vtype_kind_t vtype = emit->local_vtype[local_num];
     if (vtype == VTYPE_UNBOUND) {
-        EMIT_NATIVE_VIPER_TYPE_ERROR(emit, "local '%q' used before type known", qst);
+        if (emit->do_viper_types) {
+            EMIT_NATIVE_VIPER_TYPE_ERROR(emit, "local '%q' used before type known", qst);
+        }
+        // it's checked below if the local is assigned when this runs
+        vtype = VTYPE_PYOBJ;
     }
     emit_native_pre(emit);
+    bool check = emit_native_need_bound_check(emit, local_num);
     if (local_num < REG_LOCAL_NUM && CAN_USE_REGS_FOR_LOCALS(emit)) {
+        if (check) {
+            emit_native_check_bound(emit, reg_local_table[local_num]);
+        }
         emit_post_push_reg(emit, vtype, reg_local_table[local_num]);
     } else {
         need_reg_single(emit, REG_TEMP0, 0);
         emit_native_mov_reg_state(emit, REG_TEMP0, LOCAL_IDX_LOCAL_VAR(emit, local_num));
+        if (check) {
+            emit_native_check_bound(emit, REG_TEMP0);
+        }
         emit_post_push_reg(emit, vtype, REG_TEMP0);
     }
 }
@@ -1425,6 +1536,9 @@ STATIC void emit_native_load_deref(emit_t *emit, qstr qst, mp_uint_t local_num)
     int reg_base = REG_RET;
     emit_pre_pop_reg_flexible(emit, &vtype, &reg_base, -1, -1);
     ASM_LOAD_REG_REG_OFFSET(emit->as, REG_RET, reg_base, 1);
+    if (!emit->do_viper_types) {
+        emit_native_check_bound(emit, REG_RET);
+    }
     // closed over vars are always Python objects
     emit_post_push_reg(emit, VTYPE_PYOBJ, REG_RET);
 }
@@ -1878,14 +1992,31 @@ STATIC void emit_native_store_subscr(emit_t *emit) {
 }
 
 STATIC void emit_native_delete_local(emit_t *emit, qstr qst, mp_uint_t local_num, int kind) {
-    if (kind == MP_EMIT_IDOP_LOCAL_FAST) {
-        // TODO: This is not compliant implementation. We could use MP_OBJ_SENTINEL
-        // to mark deleted vars but then every var would need to be checked on
-        // each access. Very inefficient, so just set value to None to enable GC.
-        emit_native_load_const_tok(emit, MP_TOKEN_KW_NONE);
+    if (emit->do_viper_types) {
+        // Viper locals can't be unbound, so just set value to None to enable GC
+        if (kind == MP_EMIT_IDOP_LOCAL_FAST) {
+            emit_native_load_const_tok(emit, MP_TOKEN_KW_NONE);
+            emit_native_store_fast(emit, qst, local_num);
+        }
+    } else if (kind == MP_EMIT_IDOP_LOCAL_FAST) {
+        // Raise NameError if the local is unbound, then unbind it
+        emit_native_load_fast(emit, qst, local_num);
+        emit_pre_pop_discard(emit);
+        emit_native_load_null(emit);
         emit_native_store_fast(emit, qst, local_num);
     } else {
-        // TODO implement me!
+        // Raise NameError if the cell is empty, then empty it
+        need_reg_single(emit, REG_TEMP0, 0);
+        need_reg_single(emit, REG_TEMP1, 0);
+        emit_native_load_fast(emit, qst, local_num);
+        vtype_kind_t vtype;
+        int reg_base = REG_TEMP0;
+        emit_pre_pop_reg_flexible(emit, &vtype, &reg_base, -1, -1);
+        ASM_LOAD_REG_REG_OFFSET(emit->as, REG_TEMP1, reg_base, 1);
+        emit_native_check_bound(emit, REG_TEMP1);
+        ASM_MOV_REG_IMM(emit->as, REG_TEMP1, (mp_uint_t)MP_OBJ_NULL);
+        ASM_STORE_REG_REG_OFFSET(emit->as, REG_TEMP1, reg_base, 1);
+        emit_post(emit);
     }
 }
 
@@ -2192,8 +2323,16 @@ STATIC void emit_native_end_finally(emit_t *emit) {
     //   else: raise exc
     // the check if exc is None is done in the MP_F_NATIVE_RAISE stub
     emit_native_pre(emit);
+    if (TRACK_SOURCE_LINE(emit)) {
+        // A re-raised exception already has this function in its traceback
+        need_reg_single(emit, REG_TEMP0, 0);
+        emit_native_mov_state_imm_via(emit, LOCAL_IDX_SOURCE_LINE(emit), 0, REG_TEMP0);
+    }
     ASM_MOV_REG_LOCAL(emit->as, REG_ARG_1, LOCAL_IDX_EXC_VAL(emit));
     emit_call(emit, MP_F_NATIVE_RAISE);
+    if (TRACK_SOURCE_LINE(emit)) {
+        emit_native_store_source_line(emit);
+    }
 
     // Get state for this finally and see if we need to unwind
     exc_stack_entry_t *e = emit_native_pop_exc_stack(emit);
@@ -2713,8 +2852,10 @@ STATIC void emit_native_return_value(emit_t *emit) {
 }
 
 STATIC void emit_native_raise_varargs(emit_t *emit, mp_uint_t n_args) {
-    (void)n_args;
-    assert(n_args == 1);
+    if (n_args != 1) {
+        // re-raise and raise-from are not supported
+        mp_raise_NotImplementedError("native raise");
+    }
     vtype_kind_t vtype_exc;
     emit_pre_pop_reg(emit, &vtype_exc, REG_ARG_1); // arg1 = object to raise
     if (vtype_exc != VTYPE_PYOBJ) {
@@ -2845,7 +2986,7 @@ const emit_method_table_t EXPORT_FUN(method_table) = {
         emit_native_delete_global,
     },
 
-    emit_native_label_assign,
+    emit_native_label_assign_from_compiler,
     emit_native_import,
     emit_native_load_const_tok,
     emit_native_load_const_small_int,
@@ -15,7 +15,7 @@
 #define NLR_BUF_IDX_LOCAL_3 (6) // edi
 
 // x86 needs a table to know how many args a given function has
-STATIC byte mp_f_n_args[MP_F_NUMBER_OF] = {
+STATIC byte mp_f_n_args[] = {
     [MP_F_CONVERT_OBJ_TO_NATIVE] = 2,
     [MP_F_CONVERT_NATIVE_TO_OBJ] = 2,
     [MP_F_NATIVE_SWAP_GLOBALS] = 1,
@@ -63,6 +63,9 @@ STATIC byte mp_f_n_args[MP_F_NUMBER_OF] = {
     [MP_F_SMALL_INT_MODULO] = 2,
     [MP_F_NATIVE_YIELD_FROM] = 3,
     [MP_F_SETJMP] = 1,
+    #if MICROPY_OPT_TIERED_NATIVE
+    [MP_F_NATIVE_ADD_TRACEBACK] = 4,
+    #endif
 };
 
 #define N_X86 (1)
@@ -32,6 +32,19 @@
 #include "py/gc.h"
 #include "py/runtime.h"
 
+#if MICROPY_GC_INCREMENTAL_SWEEP || MICROPY_GC_STATS
+#include "py/mphal.h"
+#endif
+
+#if MICROPY_PY_MICROPYTHON_ALLOC_STATS
+#include "py/profile.h"
+#endif
+
+#if MICROPY_PY_MICROPYTHON_HEAP_DUMP
+#include "py/builtin.h"
+#include "py/objmodule.h"
+#endif
+
 #if MICROPY_ENABLE_GC
 
 #if MICROPY_DEBUG_VERBOSE // print debugging info
@@ -75,26 +88,84 @@
 #define ATB_3_IS_FREE(a) (((a) & ATB_MASK_3) == 0)
 
 #define BLOCK_SHIFT(block) (2 * ((block) & (BLOCKS_PER_ATB - 1)))
-#define ATB_GET_KIND(block) ((MP_STATE_MEM(gc_alloc_table_start)[(block) / BLOCKS_PER_ATB] >> BLOCK_SHIFT(block)) & 3)
-#define ATB_ANY_TO_FREE(block) do { MP_STATE_MEM(gc_alloc_table_start)[(block) / BLOCKS_PER_ATB] &= (~(AT_MARK << BLOCK_SHIFT(block))); } while (0)
-#define ATB_FREE_TO_HEAD(block) do { MP_STATE_MEM(gc_alloc_table_start)[(block) / BLOCKS_PER_ATB] |= (AT_HEAD << BLOCK_SHIFT(block)); } while (0)
-#define ATB_FREE_TO_TAIL(block) do { MP_STATE_MEM(gc_alloc_table_start)[(block) / BLOCKS_PER_ATB] |= (AT_TAIL << BLOCK_SHIFT(block)); } while (0)
-#define ATB_HEAD_TO_MARK(block) do { MP_STATE_MEM(gc_alloc_table_start)[(block) / BLOCKS_PER_ATB] |= (AT_MARK << BLOCK_SHIFT(block)); } while (0)
-#define ATB_MARK_TO_HEAD(block) do { MP_STATE_MEM(gc_alloc_table_start)[(block) / BLOCKS_PER_ATB] &= (~(AT_TAIL << BLOCK_SHIFT(block))); } while (0)
-
-#define BLOCK_FROM_PTR(ptr) (((byte*)(ptr) - MP_STATE_MEM(gc_pool_start)) / BYTES_PER_BLOCK)
-#define PTR_FROM_BLOCK(block) (((block) * BYTES_PER_BLOCK + (uintptr_t)MP_STATE_MEM(gc_pool_start)))
+#define ATB_GET_KIND(area, block) (((area)->gc_alloc_table_start[(block) / BLOCKS_PER_ATB] >> BLOCK_SHIFT(block)) & 3)
+#define ATB_ANY_TO_FREE(area, block) do { (area)->gc_alloc_table_start[(block) / BLOCKS_PER_ATB] &= (~(AT_MARK << BLOCK_SHIFT(block))); } while (0)
+#define ATB_FREE_TO_HEAD(area, block) do { (area)->gc_alloc_table_start[(block) / BLOCKS_PER_ATB] |= (AT_HEAD << BLOCK_SHIFT(block)); } while (0)
+#define ATB_FREE_TO_TAIL(area, block) do { (area)->gc_alloc_table_start[(block) / BLOCKS_PER_ATB] |= (AT_TAIL << BLOCK_SHIFT(block)); } while (0)
+#define ATB_HEAD_TO_MARK(area, block) do { (area)->gc_alloc_table_start[(block) / BLOCKS_PER_ATB] |= (AT_MARK << BLOCK_SHIFT(block)); } while (0)
+#define ATB_MARK_TO_HEAD(area, block) do { (area)->gc_alloc_table_start[(block) / BLOCKS_PER_ATB] &= (~(AT_TAIL << BLOCK_SHIFT(block))); } while (0)
+
+#define BLOCK_FROM_PTR(area, ptr) (((byte*)(ptr) - (area)->gc_pool_start) / BYTES_PER_BLOCK)
+#define PTR_FROM_BLOCK(area, block) (((block) * BYTES_PER_BLOCK + (uintptr_t)(area)->gc_pool_start))
 #define ATB_FROM_BLOCK(bl) ((bl) / BLOCKS_PER_ATB)
 
+// the total number of blocks in a region of the heap
+#define AREA_BLOCKS(area) ((area)->gc_alloc_table_byte_len * BLOCKS_PER_ATB)
+
+#if MICROPY_GC_SPLIT_HEAP
+#define NEXT_AREA(area) ((area)->next)
+#else
+#define NEXT_AREA(area) (NULL)
+#endif
+
 #if MICROPY_ENABLE_FINALISER
 // FTB = finaliser table byte
 // if set, then the corresponding block may have a finaliser
 
 #define BLOCKS_PER_FTB (8)
 
-#define FTB_GET(block) ((MP_STATE_MEM(gc_finaliser_table_start)[(block) / BLOCKS_PER_FTB] >> ((block) & 7)) & 1)
-#define FTB_SET(block) do { MP_STATE_MEM(gc_finaliser_table_start)[(block) / BLOCKS_PER_FTB] |= (1 << ((block) & 7)); } while (0)
-#define FTB_CLEAR(block) do { MP_STATE_MEM(gc_finaliser_table_start)[(block) / BLOCKS_PER_FTB] &= (~(1 << ((block) & 7))); } while (0)
+#define FTB_GET(area, block) (((area)->gc_finaliser_table_start[(block) / BLOCKS_PER_FTB] >> ((block) & 7)) & 1)
+#define FTB_SET(area, block) do { (area)->gc_finaliser_table_start[(block) / BLOCKS_PER_FTB] |= (1 << ((block) & 7)); } while (0)
+#define FTB_CLEAR(area, block) do { (area)->gc_finaliser_table_start[(block) / BLOCKS_PER_FTB] &= (~(1 << ((block) & 7))); } while (0)
+#endif
+
+#if MICROPY_GC_SKIP_TENURED
+// OTB = old table byte
+// if set, then the corresponding head block is tenured: it survived a collection
+
+#define BLOCKS_PER_OTB (8)
+
+#define OTB_GET(area, block) (((area)->gc_old_table_start[(block) / BLOCKS_PER_OTB] >> ((block) & 7)) & 1)
+#define OTB_SET(area, block) do { (area)->gc_old_table_start[(block) / BLOCKS_PER_OTB] |= (1 << ((block) & 7)); } while (0)
+#define OTB_CLEAR(area, block) do { (area)->gc_old_table_start[(block) / BLOCKS_PER_OTB] &= (~(1 << ((block) & 7))); } while (0)
+
+// a head block must be traced if it's unmarked, and young during a minor collection
+#define ATB_IS_UNMARKED_HEAD(area, block) (ATB_GET_KIND(area, block) == AT_HEAD && !(MP_STATE_MEM(gc_young_only) && OTB_GET(area, block)))
+#else
+#define ATB_IS_UNMARKED_HEAD(area, block) (ATB_GET_KIND(area, block) == AT_HEAD)
+#endif
+
+#if MICROPY_GC_FREE_RUN_INDEX
+// CTB = chunk table bytes
+// each chunk of BLOCKS_PER_CHUNK blocks has 3 bytes giving the length of the
+// run of free blocks at its start, the run at its end, and its longest run;
+// the longest run is set to CTB_DIRTY when blocks in the chunk are freed, and
+// the lengths are worked out again when next needed.  Allocating blocks only
+// makes the runs shorter, so it doesn't mark the chunk: the lengths are then
+// an upper bound and a run found with them is checked before it's used.
+
+#define BLOCKS_PER_CHUNK (32)
+#define BYTES_PER_CTB (3)
+#define CTB_HEAD_RUN (0)
+#define CTB_TAIL_RUN (1)
+#define CTB_MAX_RUN (2)
+#define CTB_DIRTY (0xff)
+
+#define CTB_SET_DIRTY(area, first, last) gc_chunk_set_dirty((area), (first), (last))
+
+// allocations of fewer blocks than this are usually satisfied near the last
+// free ATB index, so a plain scan is quicker for them
+#define FREE_RUN_INDEX_MIN_BLOCKS (4)
+#else
+#define CTB_SET_DIRTY(area, first, last)
+#endif
+
+#if MICROPY_GC_INCREMENTAL_SWEEP
+// while a sweep is in progress, live objects that are yet to be swept are marked
+#define ATB_IS_HEAD(area, block) (ATB_GET_KIND(area, block) & AT_HEAD)
+#define GC_SWEEP_PENDING() (MP_STATE_MEM(gc_sweep_area) != NULL)
+#else
+#define ATB_IS_HEAD(area, block) (ATB_GET_KIND(area, block) == AT_HEAD)
 #endif
 
 #if MICROPY_PY_THREAD && !MICROPY_PY_THREAD_GIL
@@ -106,48 +177,124 @@
 #endif
 
 // TODO waste less memory; currently requires that all entries in alloc_table have a corresponding block in pool
-void gc_init(void *start, void *end) {
-    // align end pointer on block boundary
-    end = (void*)((uintptr_t)end & (~(BYTES_PER_BLOCK - 1)));
-    DEBUG_printf("Initializing GC heap: %p..%p = " UINT_FMT " bytes\n", start, end, (byte*)end - (byte*)start);
-
-    // calculate parameters for GC (T=total, A=alloc table, F=finaliser table, P=pool; all in bytes):
-    // T = A + F + P
+STATIC void gc_setup_area(mp_state_mem_area_t *area, void *start, void *end) {
+    // calculate parameters for GC (T=total, A=alloc table, F=finaliser table, O=old table, C=chunk table, P=pool; all in bytes):
+    // T = A + F + O + C + P
     //     F = A * BLOCKS_PER_ATB / BLOCKS_PER_FTB
+    //     O = A * BLOCKS_PER_ATB / BLOCKS_PER_OTB
+    //     C = A * BLOCKS_PER_ATB * BYTES_PER_CTB / BLOCKS_PER_CHUNK
     //     P = A * BLOCKS_PER_ATB * BYTES_PER_BLOCK
-    // => T = A * (1 + BLOCKS_PER_ATB / BLOCKS_PER_FTB + BLOCKS_PER_ATB * BYTES_PER_BLOCK)
+    // => T = A * (1 + BLOCKS_PER_ATB / BLOCKS_PER_FTB + BLOCKS_PER_ATB / BLOCKS_PER_OTB + BLOCKS_PER_ATB * BYTES_PER_CTB / BLOCKS_PER_CHUNK + BLOCKS_PER_ATB * BYTES_PER_BLOCK)
     size_t total_byte_len = (byte*)end - (byte*)start;
-#if MICROPY_ENABLE_FINALISER
-    MP_STATE_MEM(gc_alloc_table_byte_len) = total_byte_len * BITS_PER_BYTE / (BITS_PER_BYTE + BITS_PER_BYTE * BLOCKS_PER_ATB / BLOCKS_PER_FTB + BITS_PER_BYTE * BLOCKS_PER_ATB * BYTES_PER_BLOCK);
-#else
-    MP_STATE_MEM(gc_alloc_table_byte_len) = total_byte_len / (1 + BITS_PER_BYTE / 2 * BYTES_PER_BLOCK);
-#endif
+    area->gc_alloc_table_byte_len = total_byte_len * BITS_PER_BYTE / (BITS_PER_BYTE
+        #if MICROPY_ENABLE_FINALISER
+        + BITS_PER_BYTE * BLOCKS_PER_ATB / BLOCKS_PER_FTB
+        #endif
+        #if MICROPY_GC_SKIP_TENURED
+        + BITS_PER_BYTE * BLOCKS_PER_ATB / BLOCKS_PER_OTB
+        #endif
+        #if MICROPY_GC_FREE_RUN_INDEX
+        + BITS_PER_BYTE * BLOCKS_PER_ATB * BYTES_PER_CTB / BLOCKS_PER_CHUNK
+        #endif
+        + BITS_PER_BYTE * BLOCKS_PER_ATB * BYTES_PER_BLOCK);
 
-    MP_STATE_MEM(gc_alloc_table_start) = (byte*)start;
+    area->gc_alloc_table_start = (byte*)start;
 
 #if MICROPY_ENABLE_FINALISER
-    size_t gc_finaliser_table_byte_len = (MP_STATE_MEM(gc_alloc_table_byte_len) * BLOCKS_PER_ATB + BLOCKS_PER_FTB - 1) / BLOCKS_PER_FTB;
-    MP_STATE_MEM(gc_finaliser_table_start) = MP_STATE_MEM(gc_alloc_table_start) + MP_STATE_MEM(gc_alloc_table_byte_len);
+    size_t gc_finaliser_table_byte_len = (area->gc_alloc_table_byte_len * BLOCKS_PER_ATB + BLOCKS_PER_FTB - 1) / BLOCKS_PER_FTB;
+    area->gc_finaliser_table_start = area->gc_alloc_table_start + area->gc_alloc_table_byte_len;
 #endif
 
-    size_t gc_pool_block_len = MP_STATE_MEM(gc_alloc_table_byte_len) * BLOCKS_PER_ATB;
-    MP_STATE_MEM(gc_pool_start) = (byte*)end - gc_pool_block_len * BYTES_PER_BLOCK;
-    MP_STATE_MEM(gc_pool_end) = end;
+    #if MICROPY_GC_SKIP_TENURED
+    size_t gc_old_table_byte_len = (area->gc_alloc_table_byte_len * BLOCKS_PER_ATB + BLOCKS_PER_OTB - 1) / BLOCKS_PER_OTB;
+    #if MICROPY_ENABLE_FINALISER
+    area->gc_old_table_start = area->gc_finaliser_table_start + gc_finaliser_table_byte_len;
+    #else
+    area->gc_old_table_start = area->gc_alloc_table_start + area->gc_alloc_table_byte_len;
+    #endif
+    #endif
+
+    #if MICROPY_GC_FREE_RUN_INDEX
+    size_t gc_chunk_table_byte_len = (area->gc_alloc_table_byte_len * BLOCKS_PER_ATB + BLOCKS_PER_CHUNK - 1) / BLOCKS_PER_CHUNK * BYTES_PER_CTB;
+    #if MICROPY_GC_SKIP_TENURED
+    area->gc_chunk_table_start = area->gc_old_table_start + gc_old_table_byte_len;
+    #elif MICROPY_ENABLE_FINALISER
+    area->gc_chunk_table_start = area->gc_finaliser_table_start + gc_finaliser_table_byte_len;
+    #else
+    area->gc_chunk_table_start = area->gc_alloc_table_start + area->gc_alloc_table_byte_len;
+    #endif
+    #endif
+
+    size_t gc_pool_block_len = area->gc_alloc_table_byte_len * BLOCKS_PER_ATB;
+    area->gc_pool_start = (byte*)end - gc_pool_block_len * BYTES_PER_BLOCK;
+    area->gc_pool_end = end;
 
 #if MICROPY_ENABLE_FINALISER
-    assert(MP_STATE_MEM(gc_pool_start) >= MP_STATE_MEM(gc_finaliser_table_start) + gc_finaliser_table_byte_len);
+    assert(area->gc_pool_start >= area->gc_finaliser_table_start + gc_finaliser_table_byte_len);
 #endif
+    #if MICROPY_GC_SKIP_TENURED
+    assert(area->gc_pool_start >= area->gc_old_table_start + gc_old_table_byte_len);
+    #endif
+    #if MICROPY_GC_FREE_RUN_INDEX
+    assert(area->gc_pool_start >= area->gc_chunk_table_start + gc_chunk_table_byte_len);
+    #endif
 
     // clear ATBs
-    memset(MP_STATE_MEM(gc_alloc_table_start), 0, MP_STATE_MEM(gc_alloc_table_byte_len));
+    memset(area->gc_alloc_table_start, 0, area->gc_alloc_table_byte_len);
 
 #if MICROPY_ENABLE_FINALISER
     // clear FTBs
-    memset(MP_STATE_MEM(gc_finaliser_table_start), 0, gc_finaliser_table_byte_len);
+    memset(area->gc_finaliser_table_start, 0, gc_finaliser_table_byte_len);
 #endif
 
+    #if MICROPY_GC_SKIP_TENURED
+    // clear OTBs, and start with no young objects
+    memset(area->gc_old_table_start, 0, gc_old_table_byte_len);
+    area->gc_young_lo = gc_pool_block_len;
+    area->gc_young_hi = 0;
+    #endif
+
+    #if MICROPY_GC_FREE_RUN_INDEX
+    // the chunk lengths are worked out when first needed
+    memset(area->gc_chunk_table_start, CTB_DIRTY, gc_chunk_table_byte_len);
+    #endif
+
+    #if MICROPY_GC_INCREMENTAL_SWEEP
+    area->gc_sweep_block = 0;
+    area->gc_sweep_end = 0;
+    #endif
+
     // set last free ATB index to start of heap
-    MP_STATE_MEM(gc_last_free_atb_index) = 0;
+    area->gc_last_free_atb_index = 0;
+
+    #if MICROPY_GC_SPLIT_HEAP
+    area->next = NULL;
+    #endif
+
+    DEBUG_printf("GC layout:\n");
+    DEBUG_printf("  alloc table at %p, length " UINT_FMT " bytes, " UINT_FMT " blocks\n", area->gc_alloc_table_start, area->gc_alloc_table_byte_len, area->gc_alloc_table_byte_len * BLOCKS_PER_ATB);
+#if MICROPY_ENABLE_FINALISER
+    DEBUG_printf("  finaliser table at %p, length " UINT_FMT " bytes, " UINT_FMT " blocks\n", area->gc_finaliser_table_start, gc_finaliser_table_byte_len, gc_finaliser_table_byte_len * BLOCKS_PER_FTB);
+#endif
+    DEBUG_printf("  pool at %p, length " UINT_FMT " bytes, " UINT_FMT " blocks\n", area->gc_pool_start, gc_pool_block_len * BYTES_PER_BLOCK, gc_pool_block_len);
+}
+
+void gc_init(void *start, void *end) {
+    // align end pointer on block boundary
+    end = (void*)((uintptr_t)end & (~(BYTES_PER_BLOCK - 1)));
+    DEBUG_printf("Initializing GC heap: %p..%p = " UINT_FMT " bytes\n", start, end, (byte*)end - (byte*)start);
+
+    gc_setup_area(&MP_STATE_MEM(area), start, end);
+
+    #if MICROPY_GC_SKIP_TENURED
+    MP_STATE_MEM(gc_young_only) = 0;
+    MP_STATE_MEM(gc_tenured_blocks) = 0;
+    MP_STATE_MEM(gc_full_live_blocks) = 0;
+    #endif
+
+    #if MICROPY_GC_INCREMENTAL_SWEEP
+    MP_STATE_MEM(gc_sweep_area) = NULL;
+    #endif
 
     // unlock the GC
     MP_STATE_MEM(gc_lock_depth) = 0;
@@ -161,17 +308,48 @@ void gc_init(void *start, void *end) {
     MP_STATE_MEM(gc_alloc_amount) = 0;
     #endif
 
+    #if MICROPY_GC_THREAD_CACHE
+    // any cached objects belonged to a previous heap
+    memset(MP_STATE_THREAD(gc_cache), 0, sizeof(MP_STATE_THREAD(gc_cache)));
+    #endif
+
+    #if MICROPY_GC_STATS
+    gc_stats_reset();
+    MP_STATE_MEM(gc_stats_end_us) = mp_hal_ticks_us();
+    #endif
+
+    #if MICROPY_GC_ADAPTIVE_THRESHOLD
+    MP_STATE_MEM(gc_adapt_pause_us) = 0;
+    MP_STATE_MEM(gc_adapt_overhead) = 0;
+    #endif
+
     #if MICROPY_PY_THREAD && !MICROPY_PY_THREAD_GIL
     mp_thread_mutex_init(&MP_STATE_MEM(gc_mutex));
     #endif
+}
 
-    DEBUG_printf("GC layout:\n");
-    DEBUG_printf("  alloc table at %p, length " UINT_FMT " bytes, " UINT_FMT " blocks\n", MP_STATE_MEM(gc_alloc_table_start), MP_STATE_MEM(gc_alloc_table_byte_len), MP_STATE_MEM(gc_alloc_table_byte_len) * BLOCKS_PER_ATB);
-#if MICROPY_ENABLE_FINALISER
-    DEBUG_printf("  finaliser table at %p, length " UINT_FMT " bytes, " UINT_FMT " blocks\n", MP_STATE_MEM(gc_finaliser_table_start), gc_finaliser_table_byte_len, gc_finaliser_table_byte_len * BLOCKS_PER_FTB);
-#endif
-    DEBUG_printf("  pool at %p, length " UINT_FMT " bytes, " UINT_FMT " blocks\n", MP_STATE_MEM(gc_pool_start), gc_pool_block_len * BYTES_PER_BLOCK, gc_pool_block_len);
+#if MICROPY_GC_SPLIT_HEAP
+void gc_add(void *start, void *end) {
+    // the area's tables go at the start of the memory, after the area itself
+    mp_state_mem_area_t *area = (mp_state_mem_area_t*)start;
+    start = (byte*)start + sizeof(mp_state_mem_area_t);
+
+    // align end pointer on block boundary
+    end = (void*)((uintptr_t)end & (~(BYTES_PER_BLOCK - 1)));
+    DEBUG_printf("Adding GC heap: %p..%p = " UINT_FMT " bytes\n", start, end, (byte*)end - (byte*)start);
+
+    gc_setup_area(area, start, end);
+
+    // add it to the end of the list
+    GC_ENTER();
+    mp_state_mem_area_t *prev = &MP_STATE_MEM(area);
+    while (prev->next != NULL) {
+        prev = prev->next;
+    }
+    prev->next = area;
+    GC_EXIT();
 }
+#endif
 
 void gc_lock(void) {
     GC_ENTER();
@@ -189,13 +367,39 @@ bool gc_is_locked(void) {
     return MP_STATE_MEM(gc_lock_depth) != 0;
 }
 
+#if MICROPY_GC_FREE_RUN_INDEX
+// Mark the chunks holding blocks first to last (inclusive) as changed
+STATIC void gc_chunk_set_dirty(mp_state_mem_area_t *area, size_t first, size_t last) {
+    byte *ctb = area->gc_chunk_table_start + first / BLOCKS_PER_CHUNK * BYTES_PER_CTB;
+    for (size_t n = last / BLOCKS_PER_CHUNK - first / BLOCKS_PER_CHUNK + 1; n > 0; n--) {
+        ctb[CTB_MAX_RUN] = CTB_DIRTY;
+        ctb += BYTES_PER_CTB;
+    }
+}
+#endif
+
 // ptr should be of type void*
-#define VERIFY_PTR(ptr) ( \
+#define VERIFY_PTR(area, ptr) ( \
         ((uintptr_t)(ptr) & (BYTES_PER_BLOCK - 1)) == 0      /* must be aligned on a block */ \
-        && ptr >= (void*)MP_STATE_MEM(gc_pool_start)     /* must be above start of pool */ \
-        && ptr < (void*)MP_STATE_MEM(gc_pool_end)        /* must be below end of pool */ \
+        && ptr >= (void*)(area)->gc_pool_start     /* must be above start of pool */ \
+        && ptr < (void*)(area)->gc_pool_end        /* must be below end of pool */ \
     )
 
+#if MICROPY_GC_SPLIT_HEAP
+// Returns the region of the heap that ptr points to the start of a block in,
+// or NULL if it doesn't point into the heap
+static inline mp_state_mem_area_t *gc_get_ptr_area(const void *ptr) {
+    for (mp_state_mem_area_t *area = &MP_STATE_MEM(area); area != NULL; area = area->next) {
+        if (VERIFY_PTR(area, ptr)) {
+            return area;
+        }
+    }
+    return NULL;
+}
+#else
+#define gc_get_ptr_area(ptr) (VERIFY_PTR(&MP_STATE_MEM(area), (ptr)) ? &MP_STATE_MEM(area) : NULL)
+#endif
+
 #ifndef TRACE_MARK
 #if DEBUG_PRINT
 #define TRACE_MARK(block, ptr) DEBUG_printf("gc_mark(%p)\n", ptr)
@@ -208,7 +412,7 @@ bool gc_is_locked(void) {
 // children: mark the unmarked child blocks and put those newly marked
 // blocks on the stack. When all children have been checked, pop off the
 // topmost block on the stack and repeat with that one.
-STATIC void gc_mark_subtree(size_t block) {
+STATIC void gc_mark_subtree(mp_state_mem_area_t *area, size_t block) {
     // Start with the block passed in the argument.
     size_t sp = 0;
     for (;;) {
@@ -216,20 +420,24 @@ STATIC void gc_mark_subtree(size_t block) {
         size_t n_blocks = 0;
         do {
             n_blocks += 1;
-        } while (ATB_GET_KIND(block + n_blocks) == AT_TAIL);
+        } while (ATB_GET_KIND(area, block + n_blocks) == AT_TAIL);
 
         // check this block's children
-        void **ptrs = (void**)PTR_FROM_BLOCK(block);
+        void **ptrs = (void**)PTR_FROM_BLOCK(area, block);
         for (size_t i = n_blocks * BYTES_PER_BLOCK / sizeof(void*); i > 0; i--, ptrs++) {
             void *ptr = *ptrs;
-            if (VERIFY_PTR(ptr)) {
+            mp_state_mem_area_t *ptr_area = gc_get_ptr_area(ptr);
+            if (ptr_area != NULL) {
                 // Mark and push this pointer
-                size_t childblock = BLOCK_FROM_PTR(ptr);
-                if (ATB_GET_KIND(childblock) == AT_HEAD) {
+                size_t childblock = BLOCK_FROM_PTR(ptr_area, ptr);
+                if (ATB_IS_UNMARKED_HEAD(ptr_area, childblock)) {
                     // an unmarked head, mark it, and push it on gc stack
                     TRACE_MARK(childblock, ptr);
-                    ATB_HEAD_TO_MARK(childblock);
+                    ATB_HEAD_TO_MARK(ptr_area, childblock);
                     if (sp < MICROPY_ALLOC_GC_STACK_SIZE) {
+                        #if MICROPY_GC_SPLIT_HEAP
+                        MP_STATE_MEM(gc_area_stack)[sp] = ptr_area;
+                        #endif
                         MP_STATE_MEM(gc_stack)[sp++] = childblock;
                     } else {
                         MP_STATE_MEM(gc_stack_overflow) = 1;
@@ -245,6 +453,9 @@ STATIC void gc_mark_subtree(size_t block) {
 
         // pop the next block off the stack
         block = MP_STATE_MEM(gc_stack)[--sp];
+        #if MICROPY_GC_SPLIT_HEAP
+        area = MP_STATE_MEM(gc_area_stack)[sp];
+        #endif
     }
 }
 
@@ -253,27 +464,116 @@ STATIC void gc_deal_with_stack_overflow(void) {
         MP_STATE_MEM(gc_stack_overflow) = 0;
 
         // scan entire memory looking for blocks which have been marked but not their children
-        for (size_t block = 0; block < MP_STATE_MEM(gc_alloc_table_byte_len) * BLOCKS_PER_ATB; block++) {
-            // trace (again) if mark bit set
-            if (ATB_GET_KIND(block) == AT_MARK) {
-                gc_mark_subtree(block);
+        for (mp_state_mem_area_t *area = &MP_STATE_MEM(area); area != NULL; area = NEXT_AREA(area)) {
+            for (size_t block = 0; block < AREA_BLOCKS(area); block++) {
+                // trace (again) if mark bit set
+                if (ATB_GET_KIND(area, block) == AT_MARK) {
+                    gc_mark_subtree(area, block);
+                }
             }
         }
     }
 }
 
-STATIC void gc_sweep(void) {
-    #if MICROPY_PY_GC_COLLECT_RETVAL
-    MP_STATE_MEM(gc_collected) = 0;
+#if MICROPY_GC_SKIP_TENURED
+// Tenured objects are not traced during a minor collection, and there is no
+// write barrier to record when one is made to refer to a young object, so scan
+// all tenured objects for such references.  Only pointers into the range of
+// blocks allocated since the last collection need to be looked at.
+STATIC void gc_mark_from_old(void) {
+    // work out the range of addresses of the young blocks in all regions
+    uintptr_t young_start = UINTPTR_MAX;
+    uintptr_t young_end = 0;
+    for (mp_state_mem_area_t *area = &MP_STATE_MEM(area); area != NULL; area = NEXT_AREA(area)) {
+        if (area->gc_young_lo < area->gc_young_hi) {
+            young_start = MIN(young_start, PTR_FROM_BLOCK(area, area->gc_young_lo));
+            young_end = MAX(young_end, PTR_FROM_BLOCK(area, area->gc_young_hi));
+        }
+    }
+    if (young_start >= young_end) {
+        // nothing was allocated
+        return;
+    }
+    uintptr_t young_len = young_end - young_start;
+    for (mp_state_mem_area_t *area = &MP_STATE_MEM(area); area != NULL; area = NEXT_AREA(area)) {
+        size_t max_block = AREA_BLOCKS(area);
+        for (size_t i = 0; i < (max_block + BLOCKS_PER_OTB - 1) / BLOCKS_PER_OTB; i++) {
+            if (area->gc_old_table_start[i] == 0) {
+                continue;
+            }
+            for (size_t block = i * BLOCKS_PER_OTB; block < (i + 1) * BLOCKS_PER_OTB; block++) {
+                if (!OTB_GET(area, block)) {
+                    continue;
+                }
+                size_t n_blocks = 0;
+                do {
+                    n_blocks += 1;
+                } while (block + n_blocks < max_block && ATB_GET_KIND(area, block + n_blocks) == AT_TAIL);
+                void **ptrs = (void**)PTR_FROM_BLOCK(area, block);
+                for (size_t j = n_blocks * BYTES_PER_BLOCK / sizeof(void*); j > 0; j--, ptrs++) {
+                    void *ptr = *ptrs;
+                    if ((uintptr_t)ptr - young_start < young_len) {
+                        mp_state_mem_area_t *ptr_area = gc_get_ptr_area(ptr);
+                        if (ptr_area == NULL) {
+                            continue;
+                        }
+                        size_t childblock = BLOCK_FROM_PTR(ptr_area, ptr);
+                        if (ATB_IS_UNMARKED_HEAD(ptr_area, childblock)) {
+                            TRACE_MARK(childblock, ptr);
+                            ATB_HEAD_TO_MARK(ptr_area, childblock);
+                            gc_mark_subtree(ptr_area, childblock);
+                        }
+                    }
+                }
+            }
+        }
+    }
+}
+#endif
+
+// Free unmarked heads and their tails, from block up to end_block.  With
+// incremental sweeping this stops early, at the head of an object, once at
+// least max_blocks blocks have been swept.  Returns the block it stopped at.
+STATIC size_t gc_sweep_blocks(mp_state_mem_area_t *area, size_t block, size_t end_block, size_t max_blocks) {
+    (void)max_blocks;
+    #if MICROPY_GC_FREE_RUN_INDEX
+    size_t start_block = block;
     #endif
-    // free unmarked heads and their tails
     int free_tail = 0;
-    for (size_t block = 0; block < MP_STATE_MEM(gc_alloc_table_byte_len) * BLOCKS_PER_ATB; block++) {
-        switch (ATB_GET_KIND(block)) {
+    #if MICROPY_GC_STATS
+    size_t n_freed = 0;
+    #endif
+    #if MICROPY_GC_SKIP_TENURED
+    // count the blocks of surviving objects, which are tenured
+    int count_tail = 0;
+    size_t n_survived = 0;
+    #endif
+    for (; block < end_block; block++) {
+        #if MICROPY_GC_INCREMENTAL_SWEEP
+        if (max_blocks == 0) {
+            if (ATB_GET_KIND(area, block) != AT_TAIL) {
+                break;
+            }
+        } else {
+            max_blocks--;
+        }
+        #endif
+        switch (ATB_GET_KIND(area, block)) {
             case AT_HEAD:
+                #if MICROPY_GC_SKIP_TENURED
+                if (OTB_GET(area, block)) {
+                    if (MP_STATE_MEM(gc_young_only)) {
+                        // a tenured object, which wasn't traced
+                        free_tail = 0;
+                        count_tail = 0;
+                        break;
+                    }
+                    OTB_CLEAR(area, block);
+                }
+                #endif
 #if MICROPY_ENABLE_FINALISER
-                if (FTB_GET(block)) {
-                    mp_obj_base_t *obj = (mp_obj_base_t*)PTR_FROM_BLOCK(block);
+                if (FTB_GET(area, block)) {
+                    mp_obj_base_t *obj = (mp_obj_base_t*)PTR_FROM_BLOCK(area, block);
                     if (obj->type != NULL) {
                         // if the object has a type then see if it has a __del__ method
                         mp_obj_t dest[2];
@@ -290,11 +590,14 @@ STATIC void gc_sweep(void) {
                         }
                     }
                     // clear finaliser flag
-                    FTB_CLEAR(block);
+                    FTB_CLEAR(area, block);
                 }
 #endif
                 free_tail = 1;
-                DEBUG_printf("gc_sweep(%p)\n", PTR_FROM_BLOCK(block));
+                #if MICROPY_GC_SKIP_TENURED
+                count_tail = 0;
+                #endif
+                DEBUG_printf("gc_sweep(%p)\n", PTR_FROM_BLOCK(area, block));
                 #if MICROPY_PY_GC_COLLECT_RETVAL
                 MP_STATE_MEM(gc_collected)++;
                 #endif
@@ -302,24 +605,228 @@ STATIC void gc_sweep(void) {
 
             case AT_TAIL:
                 if (free_tail) {
-                    ATB_ANY_TO_FREE(block);
+                    ATB_ANY_TO_FREE(area, block);
+                    #if MICROPY_GC_STATS
+                    n_freed++;
+                    #endif
                     #if CLEAR_ON_SWEEP
-                    memset((void*)PTR_FROM_BLOCK(block), 0, BYTES_PER_BLOCK);
+                    memset((void*)PTR_FROM_BLOCK(area, block), 0, BYTES_PER_BLOCK);
                     #endif
                 }
+                #if MICROPY_GC_SKIP_TENURED
+                else if (count_tail) {
+                    n_survived++;
+                }
+                #endif
                 break;
 
             case AT_MARK:
-                ATB_MARK_TO_HEAD(block);
+                ATB_MARK_TO_HEAD(area, block);
+                #if MICROPY_GC_SKIP_TENURED
+                // the object survived so it's now tenured
+                OTB_SET(area, block);
+                count_tail = 1;
+                n_survived++;
+                #endif
                 free_tail = 0;
                 break;
         }
     }
+
+    #if MICROPY_GC_SKIP_TENURED
+    MP_STATE_MEM(gc_survived_blocks) += n_survived;
+    #endif
+    #if MICROPY_GC_STATS
+    MP_STATE_MEM(gc_stats_freed) += n_freed;
+    #endif
+    #if MICROPY_GC_FREE_RUN_INDEX
+    if (block > start_block) {
+        CTB_SET_DIRTY(area, start_block, block - 1);
+    }
+    #endif
+    return block;
+}
+
+#if MICROPY_GC_STATS
+void gc_stats_reset(void) {
+    MP_STATE_MEM(gc_stats_count) = 0;
+    MP_STATE_MEM(gc_stats_total_us) = 0;
+    MP_STATE_MEM(gc_stats_max_us) = 0;
+    memset(MP_STATE_MEM(gc_stats_history), 0, sizeof(MP_STATE_MEM(gc_stats_history)));
+}
+
+// Return the number of blocks in use over all regions of the heap
+STATIC size_t gc_used_blocks(void) {
+    size_t n = 0;
+    for (mp_state_mem_area_t *area = &MP_STATE_MEM(area); area != NULL; area = NEXT_AREA(area)) {
+        for (size_t i = 0; i < area->gc_alloc_table_byte_len; i++) {
+            byte a = area->gc_alloc_table_start[i];
+            n += !ATB_0_IS_FREE(a) + !ATB_1_IS_FREE(a) + !ATB_2_IS_FREE(a) + !ATB_3_IS_FREE(a);
+        }
+    }
+    return n;
+}
+
+#if MICROPY_GC_ADAPTIVE_THRESHOLD
+// Move the allocation threshold towards the goals set by gc.adaptive, given
+// the last pause and the time spent running other code before it.  A pause
+// that is too long makes collections more frequent, so each has less to do,
+// and too much time collecting makes them less frequent.  When within both
+// goals the threshold is moved to make use of the slack.
+STATIC void gc_adapt_threshold(mp_uint_t pause_us, mp_uint_t between_us) {
+    mp_uint_t goal_pause = MP_STATE_MEM(gc_adapt_pause_us);
+    mp_uint_t goal_overhead = MP_STATE_MEM(gc_adapt_overhead);
+    if (goal_pause == 0 && goal_overhead == 0) {
+        return;
+    }
+    size_t total = 0;
+    for (mp_state_mem_area_t *area = &MP_STATE_MEM(area); area != NULL; area = NEXT_AREA(area)) {
+        total += AREA_BLOCKS(area);
+    }
+    size_t threshold = MP_STATE_MEM(gc_alloc_threshold);
+    if (threshold > total) {
+        // start from an eighth of the heap if there was no threshold
+        threshold = total / 8;
+    }
+    mp_uint_t overhead = pause_us * 100 / (pause_us + between_us + 1);
+    if (goal_pause != 0 && pause_us > goal_pause) {
+        threshold -= threshold / 4;
+    } else if (goal_overhead != 0 && overhead > goal_overhead) {
+        threshold += threshold / 4;
+    } else if (goal_pause != 0) {
+        if (pause_us < goal_pause / 2) {
+            threshold += threshold / 8;
+        }
+    } else if (overhead < goal_overhead / 2) {
+        threshold -= threshold / 8;
+    }
+    size_t min_threshold = total / 64;
+    if (threshold < min_threshold) {
+        threshold = min_threshold;
+    }
+    if (threshold > total) {
+        threshold = total;
+    }
+    MP_STATE_MEM(gc_alloc_threshold) = threshold > 0 ? threshold : 1;
+}
+#endif
+
+// Record the figures of a collection once its sweep is done.  Must be called
+// with the GC mutex held.
+STATIC void gc_stats_record(void) {
+    mp_uint_t pause_us = MP_STATE_MEM(gc_stats_pause_us);
+    mp_uint_t between_us = MP_STATE_MEM(gc_stats_start_us) - MP_STATE_MEM(gc_stats_end_us);
+    MP_STATE_MEM(gc_stats_end_us) = MP_STATE_MEM(gc_stats_start_us) + pause_us;
+
+    mp_gc_stats_t *stats = &MP_STATE_MEM(gc_stats_history)[MP_STATE_MEM(gc_stats_count) % MICROPY_GC_STATS_HISTORY];
+    stats->pause_us = pause_us;
+    stats->freed = MP_STATE_MEM(gc_stats_freed) * BYTES_PER_BLOCK;
+    stats->used = gc_used_blocks() * BYTES_PER_BLOCK;
+    stats->full = MP_STATE_MEM(gc_stats_full);
+    MP_STATE_MEM(gc_stats_count) += 1;
+    MP_STATE_MEM(gc_stats_total_us) += pause_us;
+    if (pause_us > MP_STATE_MEM(gc_stats_max_us)) {
+        MP_STATE_MEM(gc_stats_max_us) = pause_us;
+    }
+
+    #if MICROPY_GC_ADAPTIVE_THRESHOLD
+    gc_adapt_threshold(pause_us, between_us);
+    #else
+    (void)between_us;
+    #endif
+
+    #if MICROPY_ENABLE_SCHEDULER
+    if (MP_STATE_VM(gc_callback) != MP_OBJ_NULL) {
+        mp_sched_schedule(MP_STATE_VM(gc_callback), MP_OBJ_NEW_SMALL_INT(pause_us));
+    }
+    #endif
+}
+#endif
+
+#if MICROPY_GC_SKIP_TENURED
+STATIC void gc_sweep_done(void) {
+    if (MP_STATE_MEM(gc_young_only)) {
+        MP_STATE_MEM(gc_tenured_blocks) += MP_STATE_MEM(gc_survived_blocks);
+    } else {
+        MP_STATE_MEM(gc_tenured_blocks) = 0;
+        MP_STATE_MEM(gc_full_live_blocks) = MP_STATE_MEM(gc_survived_blocks);
+    }
+    MP_STATE_MEM(gc_young_only) = 0;
 }
+#endif
+
+#if MICROPY_GC_INCREMENTAL_SWEEP
+// Sweep at least n_blocks of the blocks left unswept by a lazy collection, or
+// all of them if n_blocks is SIZE_MAX.  Must be called with the GC mutex held.
+// Returns true if there's nothing left to sweep.
+STATIC bool gc_sweep_step(size_t n_blocks) {
+    mp_state_mem_area_t *area = MP_STATE_MEM(gc_sweep_area);
+    if (area == NULL) {
+        return true;
+    }
+    MP_STATE_MEM(gc_lock_depth)++;
+    for (;;) {
+        size_t block = area->gc_sweep_block;
+        area->gc_sweep_block = gc_sweep_blocks(area, block, area->gc_sweep_end, n_blocks);
+        // blocks from here on may have been freed
+        if (block / BLOCKS_PER_ATB < area->gc_last_free_atb_index) {
+            area->gc_last_free_atb_index = block / BLOCKS_PER_ATB;
+        }
+        if (area->gc_sweep_block < area->gc_sweep_end) {
+            break;
+        }
+        // this region is done, go on to the next
+        size_t n_swept = area->gc_sweep_block > block ? area->gc_sweep_block - block : 0;
+        area->gc_sweep_block = 0;
+        area->gc_sweep_end = 0;
+        area = NEXT_AREA(area);
+        MP_STATE_MEM(gc_sweep_area) = area;
+        if (area == NULL || n_swept >= n_blocks) {
+            break;
+        }
+        if (n_blocks != SIZE_MAX) {
+            n_blocks -= n_swept;
+        }
+    }
+    MP_STATE_MEM(gc_lock_depth)--;
+    if (GC_SWEEP_PENDING()) {
+        return false;
+    }
+    #if MICROPY_GC_STATS
+    gc_stats_record();
+    #endif
+    #if MICROPY_GC_SKIP_TENURED
+    gc_sweep_done();
+    #endif
+    return true;
+}
+#endif
 
 void gc_collect_start(void) {
     GC_ENTER();
     MP_STATE_MEM(gc_lock_depth)++;
+    #if MICROPY_GC_INCREMENTAL_SWEEP
+    // marks left by the last collection must be swept before marking again
+    gc_sweep_step(SIZE_MAX);
+    #endif
+    #if MICROPY_GC_SKIP_TENURED
+    MP_STATE_MEM(gc_young_only) = MP_STATE_THREAD(gc_collect_young);
+    MP_STATE_THREAD(gc_collect_young) = false;
+    #endif
+    #if MICROPY_GC_STATS
+    MP_STATE_MEM(gc_stats_start_us) = mp_hal_ticks_us();
+    MP_STATE_MEM(gc_stats_freed) = 0;
+    #if MICROPY_GC_SKIP_TENURED
+    MP_STATE_MEM(gc_stats_full) = !MP_STATE_MEM(gc_young_only);
+    #else
+    MP_STATE_MEM(gc_stats_full) = true;
+    #endif
+    #endif
+    #if MICROPY_GC_THREAD_CACHE
+    // return the objects cached by this thread to the heap; other threads may
+    // be taking from their caches so theirs are left, and are traced as usual
+    memset(MP_STATE_THREAD(gc_cache), 0, sizeof(MP_STATE_THREAD(gc_cache)));
+    #endif
     #if MICROPY_GC_ALLOC_THRESHOLD
     MP_STATE_MEM(gc_alloc_amount) = 0;
     #endif
@@ -343,75 +850,196 @@ void gc_collect_start(void) {
 void gc_collect_root(void **ptrs, size_t len) {
     for (size_t i = 0; i < len; i++) {
         void *ptr = ptrs[i];
-        if (VERIFY_PTR(ptr)) {
-            size_t block = BLOCK_FROM_PTR(ptr);
-            if (ATB_GET_KIND(block) == AT_HEAD) {
+        mp_state_mem_area_t *area = gc_get_ptr_area(ptr);
+        if (area != NULL) {
+            size_t block = BLOCK_FROM_PTR(area, ptr);
+            if (ATB_IS_UNMARKED_HEAD(area, block)) {
                 // An unmarked head: mark it, and mark all its children
                 TRACE_MARK(block, ptr);
-                ATB_HEAD_TO_MARK(block);
-                gc_mark_subtree(block);
+                ATB_HEAD_TO_MARK(area, block);
+                gc_mark_subtree(area, block);
             }
         }
     }
 }
 
 void gc_collect_end(void) {
+    #if MICROPY_GC_SKIP_TENURED
+    if (MP_STATE_MEM(gc_young_only)) {
+        gc_mark_from_old();
+    }
+    #endif
     gc_deal_with_stack_overflow();
-    gc_sweep();
-    MP_STATE_MEM(gc_last_free_atb_index) = 0;
+    #if MICROPY_PY_GC_COLLECT_RETVAL
+    MP_STATE_MEM(gc_collected) = 0;
+    #endif
+    #if MICROPY_GC_SKIP_TENURED
+    MP_STATE_MEM(gc_survived_blocks) = 0;
+    #endif
+    #if MICROPY_GC_INCREMENTAL_SWEEP
+    bool lazy = MP_STATE_THREAD(gc_collect_lazy);
+    MP_STATE_THREAD(gc_collect_lazy) = false;
+    #endif
+    for (mp_state_mem_area_t *area = &MP_STATE_MEM(area); area != NULL; area = NEXT_AREA(area)) {
+        size_t block = 0;
+        size_t end_block = AREA_BLOCKS(area);
+        #if MICROPY_GC_SKIP_TENURED
+        if (MP_STATE_MEM(gc_young_only)) {
+            // only young objects can be freed
+            block = area->gc_young_lo;
+            end_block = area->gc_young_hi;
+        }
+        #endif
+        #if MICROPY_GC_INCREMENTAL_SWEEP
+        if (lazy) {
+            // leave the sweep to be done a slice at a time by later allocations
+            area->gc_sweep_block = block;
+            area->gc_sweep_end = end_block;
+        } else
+        #endif
+        {
+            gc_sweep_blocks(area, block, end_block, SIZE_MAX);
+            #if MICROPY_GC_SKIP_TENURED
+            if (MP_STATE_MEM(gc_young_only)) {
+                // only young blocks were freed, so there are no free blocks before
+                // the current index or the first young block
+                if (area->gc_young_lo / BLOCKS_PER_ATB < area->gc_last_free_atb_index) {
+                    area->gc_last_free_atb_index = area->gc_young_lo / BLOCKS_PER_ATB;
+                }
+            } else
+            #endif
+            {
+                area->gc_last_free_atb_index = 0;
+            }
+        }
+        #if MICROPY_GC_SKIP_TENURED
+        // all surviving objects are now tenured
+        area->gc_young_lo = AREA_BLOCKS(area);
+        area->gc_young_hi = 0;
+        #endif
+    }
+    #if MICROPY_GC_STATS
+    // a lazy collection is recorded when its sweep is done
+    MP_STATE_MEM(gc_stats_pause_us) = mp_hal_ticks_us() - MP_STATE_MEM(gc_stats_start_us);
+    #endif
+    #if MICROPY_GC_INCREMENTAL_SWEEP
+    if (lazy) {
+        MP_STATE_MEM(gc_sweep_area) = &MP_STATE_MEM(area);
+    } else
+    #endif
+    {
+        #if MICROPY_GC_STATS
+        gc_stats_record();
+        #endif
+        #if MICROPY_GC_SKIP_TENURED
+        gc_sweep_done();
+        #endif
+    }
     MP_STATE_MEM(gc_lock_depth)--;
     GC_EXIT();
 }
 
+#if MICROPY_GC_SKIP_TENURED
+void gc_collect_young(void) {
+    MP_STATE_THREAD(gc_collect_young) = true;
+    gc_collect();
+}
+
+// Tenured objects are only freed by a full collection, so once more blocks
+// have been tenured than survived the last full collection do a full one,
+// to reclaim tenured garbage before it fragments the heap.  Returns true if
+// the collection was a full one.
+STATIC bool gc_collect_auto(void) {
+    if (MP_STATE_MEM(gc_tenured_blocks) > MP_STATE_MEM(gc_full_live_blocks)) {
+        gc_collect();
+        return true;
+    }
+    gc_collect_young();
+    return false;
+}
+#endif
+
+#if MICROPY_GC_INCREMENTAL_SWEEP
+bool gc_collect_step(bool young, mp_uint_t budget_us) {
+    mp_uint_t start = mp_hal_ticks_us();
+    GC_ENTER();
+    bool pending = GC_SWEEP_PENDING();
+    GC_EXIT();
+    if (!pending) {
+        MP_STATE_THREAD(gc_collect_lazy) = true;
+        #if MICROPY_GC_SKIP_TENURED
+        if (young) {
+            gc_collect_young();
+        } else
+        #endif
+        {
+            (void)young;
+            gc_collect();
+        }
+    }
+    GC_ENTER();
+    bool done;
+    do {
+        done = gc_sweep_step(MICROPY_GC_SWEEP_SLICE);
+    } while (!done && mp_hal_ticks_us() - start < budget_us);
+    GC_EXIT();
+    return done;
+}
+#endif
+
 void gc_sweep_all(void) {
     GC_ENTER();
     MP_STATE_MEM(gc_lock_depth)++;
+    #if MICROPY_GC_INCREMENTAL_SWEEP
+    gc_sweep_step(SIZE_MAX);
+    #endif
     MP_STATE_MEM(gc_stack_overflow) = 0;
     gc_collect_end();
 }
 
-void gc_info(gc_info_t *info) {
-    GC_ENTER();
-    info->total = MP_STATE_MEM(gc_pool_end) - MP_STATE_MEM(gc_pool_start);
-    info->used = 0;
-    info->free = 0;
-    info->max_free = 0;
-    info->num_1block = 0;
-    info->num_2block = 0;
-    info->max_block = 0;
+// Add the figures for one region of the heap to info
+STATIC void gc_info_add(mp_state_mem_area_t *area, gc_info_t *info) {
+    info->total += area->gc_pool_end - area->gc_pool_start;
+    size_t n_used = 0;
+    size_t n_free = 0;
     bool finish = false;
     for (size_t block = 0, len = 0, len_free = 0; !finish;) {
-        size_t kind = ATB_GET_KIND(block);
+        size_t kind = ATB_GET_KIND(area, block);
         switch (kind) {
             case AT_FREE:
-                info->free += 1;
+                n_free += 1;
                 len_free += 1;
                 len = 0;
                 break;
 
             case AT_HEAD:
-                info->used += 1;
+            #if MICROPY_GC_INCREMENTAL_SWEEP
+            case AT_MARK:
+            #endif
+                n_used += 1;
                 len = 1;
                 break;
 
             case AT_TAIL:
-                info->used += 1;
+                n_used += 1;
                 len += 1;
                 break;
 
+            #if !MICROPY_GC_INCREMENTAL_SWEEP
             case AT_MARK:
                 // shouldn't happen
                 break;
+            #endif
         }
 
         block++;
-        finish = (block == MP_STATE_MEM(gc_alloc_table_byte_len) * BLOCKS_PER_ATB);
+        finish = (block == AREA_BLOCKS(area));
         // Get next block type if possible
         if (!finish) {
-            kind = ATB_GET_KIND(block);
+            kind = ATB_GET_KIND(area, block);
         }
 
-        if (finish || kind == AT_FREE || kind == AT_HEAD) {
+        if (finish || kind != AT_TAIL) {
             if (len == 1) {
                 info->num_1block += 1;
             } else if (len == 2) {
@@ -420,7 +1048,7 @@ void gc_info(gc_info_t *info) {
             if (len > info->max_block) {
                 info->max_block = len;
             }
-            if (finish || kind == AT_HEAD) {
+            if (finish || kind != AT_FREE) {
                 if (len_free > info->max_free) {
                     info->max_free = len_free;
                 }
@@ -429,11 +1057,277 @@ void gc_info(gc_info_t *info) {
         }
     }
 
-    info->used *= BYTES_PER_BLOCK;
-    info->free *= BYTES_PER_BLOCK;
+    info->used += n_used * BYTES_PER_BLOCK;
+    info->free += n_free * BYTES_PER_BLOCK;
+}
+
+STATIC void gc_info_init(gc_info_t *info) {
+    info->total = 0;
+    info->used = 0;
+    info->free = 0;
+    info->max_free = 0;
+    info->num_1block = 0;
+    info->num_2block = 0;
+    info->max_block = 0;
+}
+
+void gc_info(gc_info_t *info) {
+    GC_ENTER();
+    gc_info_init(info);
+    for (mp_state_mem_area_t *area = &MP_STATE_MEM(area); area != NULL; area = NEXT_AREA(area)) {
+        gc_info_add(area, info);
+    }
+    GC_EXIT();
+}
+
+#if MICROPY_GC_SPLIT_HEAP
+bool gc_info_area(size_t n, gc_info_t *info) {
+    GC_ENTER();
+    mp_state_mem_area_t *area = &MP_STATE_MEM(area);
+    for (; area != NULL && n > 0; n--) {
+        area = area->next;
+    }
+    if (area != NULL) {
+        gc_info_init(info);
+        gc_info_add(area, info);
+    }
     GC_EXIT();
+    return area != NULL;
+}
+#endif
+
+#if MICROPY_GC_FREE_RUN_INDEX
+// Work out the lengths of the runs of free blocks in the given chunk; blocks
+// past the end of the heap count as used.
+STATIC void gc_chunk_update(mp_state_mem_area_t *area, byte *ctb, size_t chunk) {
+    size_t block = chunk * BLOCKS_PER_CHUNK;
+    size_t n = AREA_BLOCKS(area) - block;
+    if (n > BLOCKS_PER_CHUNK) {
+        n = BLOCKS_PER_CHUNK;
+    }
+    size_t head_run = n;
+    size_t run = 0;
+    size_t max_run = 0;
+    for (size_t i = 0; i < n; i += BLOCKS_PER_ATB) {
+        byte a = area->gc_alloc_table_start[(block + i) / BLOCKS_PER_ATB];
+        if (a == 0) {
+            // all 4 blocks are free
+            run += BLOCKS_PER_ATB;
+        } else if (((a | a >> 1) & 0x55) == 0x55) {
+            // all 4 blocks are used
+            if (head_run == n) {
+                head_run = i;
+            }
+            if (run > max_run) {
+                max_run = run;
+            }
+            run = 0;
+        } else {
+            for (size_t j = 0; j < BLOCKS_PER_ATB; j++, a >>= 2) {
+                if ((a & 3) == AT_FREE) {
+                    run += 1;
+                } else {
+                    if (head_run == n) {
+                        head_run = i + j;
+                    }
+                    if (run > max_run) {
+                        max_run = run;
+                    }
+                    run = 0;
+                }
+            }
+        }
+    }
+    if (run > max_run) {
+        max_run = run;
+    }
+    if (n < BLOCKS_PER_CHUNK) {
+        // a run can't continue past the end of the heap
+        run = 0;
+    }
+    ctb[CTB_HEAD_RUN] = head_run;
+    ctb[CTB_TAIL_RUN] = run;
+    ctb[CTB_MAX_RUN] = max_run;
+}
+
+// Look for a run of n_blocks free blocks ending before block end, given the
+// length of the run of free blocks just before block.  Returns the last block
+// of the run, or SIZE_MAX if there is no such run; in that case *run is set to
+// the length of the run of free blocks just before end.
+STATIC size_t gc_scan_free_run(mp_state_mem_area_t *area, size_t block, size_t end, size_t n_blocks, size_t *run) {
+    size_t r = *run;
+    for (; block < end; block++) {
+        if (ATB_GET_KIND(area, block) != AT_FREE) {
+            r = 0;
+        } else if (++r == n_blocks) {
+            return block;
+        }
+    }
+    *run = r;
+    return SIZE_MAX;
+}
+
+// Find the first run of n_blocks free blocks, using the chunk table to skip
+// over chunks that can't contain the run.  Returns the last block of the run,
+// or SIZE_MAX if there is no such run.  This is kept out of gc_alloc so that
+// it doesn't slow down the common case of small allocations.
+MP_NOINLINE STATIC size_t gc_find_free_run(mp_state_mem_area_t *area, size_t n_blocks) {
+    byte *ctb_start = area->gc_chunk_table_start;
+    size_t n_total_blocks = AREA_BLOCKS(area);
+    size_t n_chunks = (n_total_blocks + BLOCKS_PER_CHUNK - 1) / BLOCKS_PER_CHUNK;
+    // there are no free blocks before the last free ATB index, and the chunk
+    // it's in usually has just changed, so scan the rest of that chunk
+    size_t block = area->gc_last_free_atb_index * BLOCKS_PER_ATB;
+    size_t chunk = block / BLOCKS_PER_CHUNK;
+    // the number of free blocks at the end of the blocks looked at so far
+    size_t run = 0;
+    size_t last = gc_scan_free_run(area, block, MIN((chunk + 1) * BLOCKS_PER_CHUNK, n_total_blocks), n_blocks, &run);
+    if (last != SIZE_MAX) {
+        return last;
+    }
+    for (chunk++; chunk < n_chunks; chunk++) {
+        byte *ctb = ctb_start + chunk * BYTES_PER_CTB;
+        if (ctb[CTB_MAX_RUN] == CTB_DIRTY) {
+            gc_chunk_update(area, ctb, chunk);
+        }
+        block = chunk * BLOCKS_PER_CHUNK;
+        if (run + ctb[CTB_HEAD_RUN] >= n_blocks) {
+            // the run may end in this chunk, so check that its blocks are free
+            last = block + n_blocks - run - 1;
+            size_t r = 0;
+            if (gc_scan_free_run(area, block - run, last + 1, n_blocks, &r) != SIZE_MAX) {
+                return last;
+            }
+            // some were allocated: bring the chunks the run covers up to date
+            // and look again from the first of them
+            size_t first_chunk = (block - run) / BLOCKS_PER_CHUNK;
+            for (size_t c = first_chunk; c <= chunk; c++) {
+                gc_chunk_update(area, ctb_start + c * BYTES_PER_CTB, c);
+            }
+            chunk = first_chunk - 1;
+            run = 0;
+            continue;
+        }
+        if (ctb[CTB_HEAD_RUN] == BLOCKS_PER_CHUNK) {
+            // the whole chunk is free
+            run += BLOCKS_PER_CHUNK;
+            continue;
+        }
+        if (ctb[CTB_MAX_RUN] >= n_blocks) {
+            // the run may be within this chunk
+            run = 0;
+            last = gc_scan_free_run(area, block, MIN(block + BLOCKS_PER_CHUNK, n_total_blocks), n_blocks, &run);
+            if (last != SIZE_MAX) {
+                return last;
+            }
+            gc_chunk_update(area, ctb, chunk);
+            continue;
+        }
+        run = ctb[CTB_TAIL_RUN];
+    }
+    return SIZE_MAX;
+}
+#endif
+
+// Look for a run of n_blocks free blocks in the given region, returning the
+// last block of the run or SIZE_MAX if there isn't one.
+static inline size_t gc_alloc_find(mp_state_mem_area_t *area, size_t n_blocks) {
+    #if MICROPY_GC_FREE_RUN_INDEX
+    if (n_blocks >= FREE_RUN_INDEX_MIN_BLOCKS) {
+        return gc_find_free_run(area, n_blocks);
+    }
+    #endif
+    size_t n_free = 0;
+    for (size_t i = area->gc_last_free_atb_index; i < area->gc_alloc_table_byte_len; i++) {
+        byte a = area->gc_alloc_table_start[i];
+        if (ATB_0_IS_FREE(a)) { if (++n_free >= n_blocks) { return i * BLOCKS_PER_ATB + 0; } } else { n_free = 0; }
+        if (ATB_1_IS_FREE(a)) { if (++n_free >= n_blocks) { return i * BLOCKS_PER_ATB + 1; } } else { n_free = 0; }
+        if (ATB_2_IS_FREE(a)) { if (++n_free >= n_blocks) { return i * BLOCKS_PER_ATB + 2; } } else { n_free = 0; }
+        if (ATB_3_IS_FREE(a)) { if (++n_free >= n_blocks) { return i * BLOCKS_PER_ATB + 3; } } else { n_free = 0; }
+    }
+    return SIZE_MAX;
 }
 
+#if MICROPY_GC_SPLIT_HEAP
+// Regions of the heap are tried in the order they were added, except that
+// large allocations try the first region, given to gc_init, last.  This keeps
+// the first region, usually the fastest memory, for small objects.  The first
+// region is searched directly by gc_alloc, and this function searches the rest.
+MP_NOINLINE STATIC size_t gc_alloc_find_added(size_t n_blocks, bool large, mp_state_mem_area_t **area_out) {
+    for (mp_state_mem_area_t *area = MP_STATE_MEM(area).next; area != NULL; area = area->next) {
+        size_t i = gc_alloc_find(area, n_blocks);
+        if (i != SIZE_MAX) {
+            *area_out = area;
+            return i;
+        }
+    }
+    if (large) {
+        return gc_alloc_find(&MP_STATE_MEM(area), n_blocks);
+    }
+    return SIZE_MAX;
+}
+#endif
+
+#if MICROPY_GC_THREAD_CACHE
+// Fill the given cache of the current thread with objects of n_blocks blocks
+// each, taken from the next free blocks at or after the given one.  Must be
+// called with the GC mutex held.
+MP_NOINLINE STATIC void gc_fill_cache(mp_state_mem_area_t *area, size_t block, size_t n_blocks, void **cache) {
+    size_t n_total_blocks = AREA_BLOCKS(area);
+    size_t n_objs = 0;
+    size_t n_free = 0;
+    size_t first = SIZE_MAX;
+    for (; block < n_total_blocks && n_objs < MICROPY_GC_THREAD_CACHE_RUN; block++) {
+        if (ATB_GET_KIND(area, block) != AT_FREE) {
+            n_free = 0;
+            continue;
+        }
+        if (++n_free < n_blocks) {
+            continue;
+        }
+        // take the run of free blocks ending at this one
+        size_t start_block = block - n_blocks + 1;
+        ATB_FREE_TO_HEAD(area, start_block);
+        #if MICROPY_GC_INCREMENTAL_SWEEP
+        if (start_block >= area->gc_sweep_block && start_block < area->gc_sweep_end) {
+            ATB_HEAD_TO_MARK(area, start_block);
+        }
+        #endif
+        for (size_t bl = start_block + 1; bl <= block; bl++) {
+            ATB_FREE_TO_TAIL(area, bl);
+        }
+        // zero it and link it to the end of the list
+        void **ptr = (void**)PTR_FROM_BLOCK(area, start_block);
+        memset(ptr, 0, n_blocks * BYTES_PER_BLOCK);
+        *cache = ptr;
+        cache = ptr;
+        if (first == SIZE_MAX) {
+            first = start_block;
+        }
+        n_free = 0;
+        n_objs += 1;
+    }
+    if (n_blocks == 1) {
+        // all free blocks before this one have been taken
+        area->gc_last_free_atb_index = block / BLOCKS_PER_ATB;
+    }
+    if (n_objs == 0) {
+        return;
+    }
+    #if MICROPY_GC_SKIP_TENURED
+    if (first < area->gc_young_lo) {
+        area->gc_young_lo = first;
+    }
+    if (block > area->gc_young_hi) {
+        area->gc_young_hi = block;
+    }
+    #endif
+    #if MICROPY_GC_ALLOC_THRESHOLD
+    MP_STATE_MEM(gc_alloc_amount) += n_objs * n_blocks;
+    #endif
+}
+#endif
+
 void *gc_alloc(size_t n_bytes, unsigned int alloc_flags) {
     bool has_finaliser = alloc_flags & GC_ALLOC_FLAG_HAS_FINALISER;
     size_t n_blocks = ((n_bytes + BYTES_PER_BLOCK - 1) & (~(BYTES_PER_BLOCK - 1))) / BYTES_PER_BLOCK;
@@ -444,6 +1338,24 @@ void *gc_alloc(size_t n_bytes, unsigned int alloc_flags) {
         return NULL;
     }
 
+    #if MICROPY_GC_THREAD_CACHE
+    // take a small object from this thread's cache if there is one; it's
+    // already allocated and zeroed, and only this thread touches the cache
+    void **cache = NULL;
+    if (n_blocks <= MICROPY_GC_THREAD_CACHE_MAX_BLOCKS && !has_finaliser) {
+        cache = &MP_STATE_THREAD(gc_cache)[n_blocks - 1];
+        void **ptr = *cache;
+        if (ptr != NULL && MP_STATE_MEM(gc_lock_depth) == 0) {
+            *cache = *ptr;
+            *ptr = NULL;
+            #if MICROPY_PY_MICROPYTHON_ALLOC_STATS
+            mp_alloc_stats_record(n_bytes);
+            #endif
+            return ptr;
+        }
+    }
+    #endif
+
     GC_ENTER();
 
     // check if GC is locked
@@ -452,41 +1364,101 @@ void *gc_alloc(size_t n_bytes, unsigned int alloc_flags) {
         return NULL;
     }
 
+    #if MICROPY_GC_INCREMENTAL_SWEEP
+    // sweep a little more of what the last collection left
+    gc_sweep_step(MICROPY_GC_SWEEP_SLICE);
+    #endif
+
     size_t i;
     size_t end_block;
     size_t start_block;
-    size_t n_free;
+    mp_state_mem_area_t *area;
     int collected = !MP_STATE_MEM(gc_auto_collect_enabled);
 
+    #if MICROPY_GC_SPLIT_HEAP
+    bool large = MICROPY_GC_SPLIT_HEAP_LARGE_ALLOC > 0 && n_bytes >= MICROPY_GC_SPLIT_HEAP_LARGE_ALLOC;
+    #endif
+
+    #if MICROPY_GC_SKIP_TENURED
+    // automatic collections are minor at first, then full if that wasn't enough
+    int collected_young = collected;
+    #endif
+
     #if MICROPY_GC_ALLOC_THRESHOLD
     if (!collected && MP_STATE_MEM(gc_alloc_amount) >= MP_STATE_MEM(gc_alloc_threshold)) {
         GC_EXIT();
+        #if MICROPY_GC_INCREMENTAL_SWEEP
+        MP_STATE_THREAD(gc_collect_lazy) = true;
+        #endif
+        #if MICROPY_GC_SKIP_TENURED
+        collected = gc_collect_auto();
+        collected_young = 1;
+        #else
         gc_collect();
         collected = 1;
+        #endif
         GC_ENTER();
     }
     #endif
 
     for (;;) {
+        area = &MP_STATE_MEM(area);
 
-        // look for a run of n_blocks available blocks
-        n_free = 0;
-        for (i = MP_STATE_MEM(gc_last_free_atb_index); i < MP_STATE_MEM(gc_alloc_table_byte_len); i++) {
-            byte a = MP_STATE_MEM(gc_alloc_table_start)[i];
-            if (ATB_0_IS_FREE(a)) { if (++n_free >= n_blocks) { i = i * BLOCKS_PER_ATB + 0; goto found; } } else { n_free = 0; }
-            if (ATB_1_IS_FREE(a)) { if (++n_free >= n_blocks) { i = i * BLOCKS_PER_ATB + 1; goto found; } } else { n_free = 0; }
-            if (ATB_2_IS_FREE(a)) { if (++n_free >= n_blocks) { i = i * BLOCKS_PER_ATB + 2; goto found; } } else { n_free = 0; }
-            if (ATB_3_IS_FREE(a)) { if (++n_free >= n_blocks) { i = i * BLOCKS_PER_ATB + 3; goto found; } } else { n_free = 0; }
+        #if MICROPY_GC_SPLIT_HEAP
+        if (!large || area->next == NULL)
+        #endif
+        {
+            i = gc_alloc_find(area, n_blocks);
+            if (i != SIZE_MAX) {
+                goto found;
+            }
         }
 
+        #if MICROPY_GC_SPLIT_HEAP
+        if (area->next != NULL) {
+            i = gc_alloc_find_added(n_blocks, large, &area);
+            if (i != SIZE_MAX) {
+                goto found;
+            }
+        }
+        #endif
+
+        #if MICROPY_GC_INCREMENTAL_SWEEP
+        if (GC_SWEEP_PENDING()) {
+            // sweep a bigger slice before trying again
+            gc_sweep_step(MP_STATE_MEM(gc_sweep_area)->gc_alloc_table_byte_len * BLOCKS_PER_ATB / 8);
+            continue;
+        }
+        #endif
+
         GC_EXIT();
         // nothing found!
         if (collected) {
+            #if MICROPY_GC_SPLIT_HEAP_AUTO
+            // ask the port for more memory, once
+            if (collected == 1 && gc_try_add_heap(n_bytes)) {
+                collected = 2;
+                GC_ENTER();
+                continue;
+            }
+            #endif
             return NULL;
         }
         DEBUG_printf("gc_alloc(" UINT_FMT "): no free mem, triggering GC\n", n_bytes);
-        gc_collect();
-        collected = 1;
+        #if MICROPY_GC_INCREMENTAL_SWEEP
+        // the sweep is done a slice at a time as memory is needed
+        MP_STATE_THREAD(gc_collect_lazy) = true;
+        #endif
+        #if MICROPY_GC_SKIP_TENURED
+        if (!collected_young) {
+            collected = gc_collect_auto();
+            collected_young = 1;
+        } else
+        #endif
+        {
+            gc_collect();
+            collected = 1;
+        }
         GC_ENTER();
     }
 
@@ -494,35 +1466,58 @@ void *gc_alloc(size_t n_bytes, unsigned int alloc_flags) {
 found:
     // get starting and end blocks, both inclusive
     end_block = i;
-    start_block = i - n_free + 1;
+    start_block = i - n_blocks + 1;
 
     // Set last free ATB index to block after last block we found, for start of
     // next scan.  To reduce fragmentation, we only do this if we were looking
     // for a single free block, which guarantees that there are no free blocks
     // before this one.  Also, whenever we free or shink a block we must check
     // if this index needs adjusting (see gc_realloc and gc_free).
-    if (n_free == 1) {
-        MP_STATE_MEM(gc_last_free_atb_index) = (i + 1) / BLOCKS_PER_ATB;
+    if (n_blocks == 1) {
+        area->gc_last_free_atb_index = (i + 1) / BLOCKS_PER_ATB;
     }
 
     // mark first block as used head
-    ATB_FREE_TO_HEAD(start_block);
+    ATB_FREE_TO_HEAD(area, start_block);
+
+    #if MICROPY_GC_INCREMENTAL_SWEEP
+    if (start_block >= area->gc_sweep_block && start_block < area->gc_sweep_end) {
+        // the sweep hasn't reached this block yet, so mark it to keep it alive
+        ATB_HEAD_TO_MARK(area, start_block);
+    }
+    #endif
 
     // mark rest of blocks as used tail
     // TODO for a run of many blocks can make this more efficient
     for (size_t bl = start_block + 1; bl <= end_block; bl++) {
-        ATB_FREE_TO_TAIL(bl);
+        ATB_FREE_TO_TAIL(area, bl);
+    }
+
+    #if MICROPY_GC_SKIP_TENURED
+    assert(!OTB_GET(area, start_block));
+    if (start_block < area->gc_young_lo) {
+        area->gc_young_lo = start_block;
+    }
+    if (end_block >= area->gc_young_hi) {
+        area->gc_young_hi = end_block + 1;
     }
+    #endif
 
     // get pointer to first block
     // we must create this pointer before unlocking the GC so a collection can find it
-    void *ret_ptr = (void*)(MP_STATE_MEM(gc_pool_start) + start_block * BYTES_PER_BLOCK);
+    void *ret_ptr = (void*)(area->gc_pool_start + start_block * BYTES_PER_BLOCK);
     DEBUG_printf("gc_alloc(%p)\n", ret_ptr);
 
     #if MICROPY_GC_ALLOC_THRESHOLD
     MP_STATE_MEM(gc_alloc_amount) += n_blocks;
     #endif
 
+    #if MICROPY_GC_THREAD_CACHE
+    if (cache != NULL && *cache == NULL) {
+        gc_fill_cache(area, end_block + 1, n_blocks, cache);
+    }
+    #endif
+
     GC_EXIT();
 
     #if MICROPY_GC_CONSERVATIVE_CLEAR
@@ -543,7 +1538,7 @@ found:
         ((mp_obj_base_t*)ret_ptr)->type = NULL;
         // set mp_obj flag only if it has a finaliser
         GC_ENTER();
-        FTB_SET(start_block);
+        FTB_SET(area, start_block);
         GC_EXIT();
     }
     #else
@@ -554,6 +1549,10 @@ found:
     gc_dump_alloc_table();
     #endif
 
+    #if MICROPY_PY_MICROPYTHON_ALLOC_STATS
+    mp_alloc_stats_record(n_bytes);
+    #endif
+
     return ret_ptr;
 }
 
@@ -583,24 +1582,33 @@ void gc_free(void *ptr) {
         GC_EXIT();
     } else {
         // get the GC block number corresponding to this pointer
-        assert(VERIFY_PTR(ptr));
-        size_t block = BLOCK_FROM_PTR(ptr);
-        assert(ATB_GET_KIND(block) == AT_HEAD);
+        mp_state_mem_area_t *area = gc_get_ptr_area(ptr);
+        assert(area != NULL);
+        size_t block = BLOCK_FROM_PTR(area, ptr);
+        assert(ATB_IS_HEAD(area, block));
 
         #if MICROPY_ENABLE_FINALISER
-        FTB_CLEAR(block);
+        FTB_CLEAR(area, block);
+        #endif
+
+        #if MICROPY_GC_SKIP_TENURED
+        OTB_CLEAR(area, block);
         #endif
 
         // set the last_free pointer to this block if it's earlier in the heap
-        if (block / BLOCKS_PER_ATB < MP_STATE_MEM(gc_last_free_atb_index)) {
-            MP_STATE_MEM(gc_last_free_atb_index) = block / BLOCKS_PER_ATB;
+        if (block / BLOCKS_PER_ATB < area->gc_last_free_atb_index) {
+            area->gc_last_free_atb_index = block / BLOCKS_PER_ATB;
         }
 
         // free head and all of its tail blocks
+        #if MICROPY_GC_FREE_RUN_INDEX
+        size_t start_block = block;
+        #endif
         do {
-            ATB_ANY_TO_FREE(block);
+            ATB_ANY_TO_FREE(area, block);
             block += 1;
-        } while (ATB_GET_KIND(block) == AT_TAIL);
+        } while (ATB_GET_KIND(area, block) == AT_TAIL);
+        CTB_SET_DIRTY(area, start_block, block - 1);
 
         GC_EXIT();
 
@@ -610,16 +1618,27 @@ void gc_free(void *ptr) {
     }
 }
 
+// Returns true if ptr points anywhere within the memory managed by the heap
+bool gc_is_heap_ptr(const void *ptr) {
+    for (mp_state_mem_area_t *area = &MP_STATE_MEM(area); area != NULL; area = NEXT_AREA(area)) {
+        if (ptr >= (void*)area->gc_pool_start && ptr < (void*)area->gc_pool_end) {
+            return true;
+        }
+    }
+    return false;
+}
+
 size_t gc_nbytes(const void *ptr) {
     GC_ENTER();
-    if (VERIFY_PTR(ptr)) {
-        size_t block = BLOCK_FROM_PTR(ptr);
-        if (ATB_GET_KIND(block) == AT_HEAD) {
+    mp_state_mem_area_t *area = gc_get_ptr_area(ptr);
+    if (area != NULL) {
+        size_t block = BLOCK_FROM_PTR(area, ptr);
+        if (ATB_IS_HEAD(area, block)) {
             // work out number of consecutive blocks in the chain starting with this on
             size_t n_blocks = 0;
             do {
                 n_blocks += 1;
-            } while (ATB_GET_KIND(block + n_blocks) == AT_TAIL);
+            } while (ATB_GET_KIND(area, block + n_blocks) == AT_TAIL);
             GC_EXIT();
             return n_blocks * BYTES_PER_BLOCK;
         }
@@ -681,9 +1700,10 @@ void *gc_realloc(void *ptr_in, size_t n_bytes, bool allow_move) {
     }
 
     // get the GC block number corresponding to this pointer
-    assert(VERIFY_PTR(ptr));
-    size_t block = BLOCK_FROM_PTR(ptr);
-    assert(ATB_GET_KIND(block) == AT_HEAD);
+    mp_state_mem_area_t *area = gc_get_ptr_area(ptr);
+    assert(area != NULL);
+    size_t block = BLOCK_FROM_PTR(area, ptr);
+    assert(ATB_IS_HEAD(area, block));
 
     // compute number of new blocks that are requested
     size_t new_blocks = (n_bytes + BYTES_PER_BLOCK - 1) / BYTES_PER_BLOCK;
@@ -696,9 +1716,9 @@ void *gc_realloc(void *ptr_in, size_t n_bytes, bool allow_move) {
     // efficiently shrink it (see below for shrinking code).
     size_t n_free   = 0;
     size_t n_blocks = 1; // counting HEAD block
-    size_t max_block = MP_STATE_MEM(gc_alloc_table_byte_len) * BLOCKS_PER_ATB;
+    size_t max_block = AREA_BLOCKS(area);
     for (size_t bl = block + n_blocks; bl < max_block; bl++) {
-        byte block_type = ATB_GET_KIND(bl);
+        byte block_type = ATB_GET_KIND(area, bl);
         if (block_type == AT_TAIL) {
             n_blocks++;
             continue;
@@ -724,12 +1744,13 @@ void *gc_realloc(void *ptr_in, size_t n_bytes, bool allow_move) {
     if (new_blocks < n_blocks) {
         // free unneeded tail blocks
         for (size_t bl = block + new_blocks, count = n_blocks - new_blocks; count > 0; bl++, count--) {
-            ATB_ANY_TO_FREE(bl);
+            ATB_ANY_TO_FREE(area, bl);
         }
+        CTB_SET_DIRTY(area, block + new_blocks, block + n_blocks - 1);
 
         // set the last_free pointer to end of this block if it's earlier in the heap
-        if ((block + new_blocks) / BLOCKS_PER_ATB < MP_STATE_MEM(gc_last_free_atb_index)) {
-            MP_STATE_MEM(gc_last_free_atb_index) = (block + new_blocks) / BLOCKS_PER_ATB;
+        if ((block + new_blocks) / BLOCKS_PER_ATB < area->gc_last_free_atb_index) {
+            area->gc_last_free_atb_index = (block + new_blocks) / BLOCKS_PER_ATB;
         }
 
         GC_EXIT();
@@ -745,9 +1766,16 @@ void *gc_realloc(void *ptr_in, size_t n_bytes, bool allow_move) {
     if (new_blocks <= n_blocks + n_free) {
         // mark few more blocks as used tail
         for (size_t bl = block + n_blocks; bl < block + new_blocks; bl++) {
-            assert(ATB_GET_KIND(bl) == AT_FREE);
-            ATB_FREE_TO_TAIL(bl);
+            assert(ATB_GET_KIND(area, bl) == AT_FREE);
+            ATB_FREE_TO_TAIL(area, bl);
+        }
+
+        #if MICROPY_GC_SKIP_TENURED
+        // the tail of a young object must stay within the young range
+        if (block + new_blocks > area->gc_young_hi) {
+            area->gc_young_hi = block + new_blocks;
         }
+        #endif
 
         GC_EXIT();
 
@@ -759,6 +1787,11 @@ void *gc_realloc(void *ptr_in, size_t n_bytes, bool allow_move) {
         memset((byte*)ptr_in + n_bytes, 0, new_blocks * BYTES_PER_BLOCK - n_bytes);
         #endif
 
+        #if MICROPY_PY_MICROPYTHON_ALLOC_STATS
+        // count the growth as an allocation; a move is counted by gc_alloc
+        mp_alloc_stats_record((new_blocks - n_blocks) * BYTES_PER_BLOCK);
+        #endif
+
         #if EXTENSIVE_HEAP_PROFILING
         gc_dump_alloc_table();
         #endif
@@ -767,7 +1800,7 @@ void *gc_realloc(void *ptr_in, size_t n_bytes, bool allow_move) {
     }
 
     #if MICROPY_ENABLE_FINALISER
-    bool ftb_state = FTB_GET(block);
+    bool ftb_state = FTB_GET(area, block);
     #else
     bool ftb_state = false;
     #endif
@@ -801,118 +1834,360 @@ void gc_dump_info(void) {
         (uint)info.total, (uint)info.used, (uint)info.free);
     mp_printf(&mp_plat_print, " No. of 1-blocks: %u, 2-blocks: %u, max blk sz: %u, max free sz: %u\n",
            (uint)info.num_1block, (uint)info.num_2block, (uint)info.max_block, (uint)info.max_free);
+    #if MICROPY_GC_SPLIT_HEAP
+    if (MP_STATE_MEM(area).next != NULL) {
+        for (size_t n = 0; gc_info_area(n, &info); n++) {
+            mp_printf(&mp_plat_print, " region %u: total: %u, used: %u, free: %u, max free sz: %u\n",
+                (uint)n, (uint)info.total, (uint)info.used, (uint)info.free, (uint)info.max_free);
+        }
+    }
+    #endif
 }
 
 void gc_dump_alloc_table(void) {
     GC_ENTER();
     static const size_t DUMP_BYTES_PER_LINE = 64;
-    #if !EXTENSIVE_HEAP_PROFILING
-    // When comparing heap output we don't want to print the starting
-    // pointer of the heap because it changes from run to run.
-    mp_printf(&mp_plat_print, "GC memory layout; from %p:", MP_STATE_MEM(gc_pool_start));
-    #endif
-    for (size_t bl = 0; bl < MP_STATE_MEM(gc_alloc_table_byte_len) * BLOCKS_PER_ATB; bl++) {
-        if (bl % DUMP_BYTES_PER_LINE == 0) {
-            // a new line of blocks
-            {
-                // check if this line contains only free blocks
-                size_t bl2 = bl;
-                while (bl2 < MP_STATE_MEM(gc_alloc_table_byte_len) * BLOCKS_PER_ATB && ATB_GET_KIND(bl2) == AT_FREE) {
-                    bl2++;
-                }
-                if (bl2 - bl >= 2 * DUMP_BYTES_PER_LINE) {
-                    // there are at least 2 lines containing only free blocks, so abbreviate their printing
-                    mp_printf(&mp_plat_print, "\n       (%u lines all free)", (uint)(bl2 - bl) / DUMP_BYTES_PER_LINE);
-                    bl = bl2 & (~(DUMP_BYTES_PER_LINE - 1));
-                    if (bl >= MP_STATE_MEM(gc_alloc_table_byte_len) * BLOCKS_PER_ATB) {
-                        // got to end of heap
-                        break;
-                    }
-                }
-            }
-            // print header for new line of blocks
-            // (the cast to uint32_t is for 16-bit ports)
-            //mp_printf(&mp_plat_print, "\n%05x: ", (uint)(PTR_FROM_BLOCK(bl) & (uint32_t)0xfffff));
-            mp_printf(&mp_plat_print, "\n%05x: ", (uint)((bl * BYTES_PER_BLOCK) & (uint32_t)0xfffff));
-        }
-        int c = ' ';
-        switch (ATB_GET_KIND(bl)) {
-            case AT_FREE: c = '.'; break;
-            /* this prints out if the object is reachable from BSS or STACK (for unix only)
-            case AT_HEAD: {
-                c = 'h';
-                void **ptrs = (void**)(void*)&mp_state_ctx;
-                mp_uint_t len = offsetof(mp_state_ctx_t, vm.stack_top) / sizeof(mp_uint_t);
-                for (mp_uint_t i = 0; i < len; i++) {
-                    mp_uint_t ptr = (mp_uint_t)ptrs[i];
-                    if (VERIFY_PTR(ptr) && BLOCK_FROM_PTR(ptr) == bl) {
-                        c = 'B';
-                        break;
+    for (mp_state_mem_area_t *area = &MP_STATE_MEM(area); area != NULL; area = NEXT_AREA(area)) {
+        #if !EXTENSIVE_HEAP_PROFILING
+        // When comparing heap output we don't want to print the starting
+        // pointer of the heap because it changes from run to run.
+        mp_printf(&mp_plat_print, "GC memory layout; from %p:", area->gc_pool_start);
+        #endif
+        for (size_t bl = 0; bl < AREA_BLOCKS(area); bl++) {
+            if (bl % DUMP_BYTES_PER_LINE == 0) {
+                // a new line of blocks
+                {
+                    // check if this line contains only free blocks
+                    size_t bl2 = bl;
+                    while (bl2 < AREA_BLOCKS(area) && ATB_GET_KIND(area, bl2) == AT_FREE) {
+                        bl2++;
                     }
-                }
-                if (c == 'h') {
-                    ptrs = (void**)&c;
-                    len = ((mp_uint_t)MP_STATE_THREAD(stack_top) - (mp_uint_t)&c) / sizeof(mp_uint_t);
-                    for (mp_uint_t i = 0; i < len; i++) {
-                        mp_uint_t ptr = (mp_uint_t)ptrs[i];
-                        if (VERIFY_PTR(ptr) && BLOCK_FROM_PTR(ptr) == bl) {
-                            c = 'S';
+                    if (bl2 - bl >= 2 * DUMP_BYTES_PER_LINE) {
+                        // there are at least 2 lines containing only free blocks, so abbreviate their printing
+                        mp_printf(&mp_plat_print, "\n       (%u lines all free)", (uint)(bl2 - bl) / DUMP_BYTES_PER_LINE);
+                        bl = bl2 & (~(DUMP_BYTES_PER_LINE - 1));
+                        if (bl >= AREA_BLOCKS(area)) {
+                            // got to end of heap
                             break;
                         }
                     }
                 }
-                break;
+                // print header for new line of blocks
+                // (the cast to uint32_t is for 16-bit ports)
+                //mp_printf(&mp_plat_print, "\n%05x: ", (uint)(PTR_FROM_BLOCK(bl) & (uint32_t)0xfffff));
+                mp_printf(&mp_plat_print, "\n%05x: ", (uint)((bl * BYTES_PER_BLOCK) & (uint32_t)0xfffff));
             }
-            */
-            /* this prints the uPy object type of the head block */
-            case AT_HEAD: {
-                void **ptr = (void**)(MP_STATE_MEM(gc_pool_start) + bl * BYTES_PER_BLOCK);
-                if (*ptr == &mp_type_tuple) { c = 'T'; }
-                else if (*ptr == &mp_type_list) { c = 'L'; }
-                else if (*ptr == &mp_type_dict) { c = 'D'; }
-                else if (*ptr == &mp_type_str || *ptr == &mp_type_bytes) { c = 'S'; }
-                #if MICROPY_PY_BUILTINS_BYTEARRAY
-                else if (*ptr == &mp_type_bytearray) { c = 'A'; }
-                #endif
-                #if MICROPY_PY_ARRAY
-                else if (*ptr == &mp_type_array) { c = 'A'; }
-                #endif
-                #if MICROPY_PY_BUILTINS_FLOAT
-                else if (*ptr == &mp_type_float) { c = 'F'; }
-                #endif
-                else if (*ptr == &mp_type_fun_bc) { c = 'B'; }
-                else if (*ptr == &mp_type_module) { c = 'M'; }
-                else {
+            int c = ' ';
+            switch (ATB_GET_KIND(area, bl)) {
+                case AT_FREE: c = '.'; break;
+                /* this prints out if the object is reachable from BSS or STACK (for unix only)
+                case AT_HEAD: {
                     c = 'h';
-                    #if 0
-                    // This code prints "Q" for qstr-pool data, and "q" for qstr-str
-                    // data.  It can be useful to see how qstrs are being allocated,
-                    // but is disabled by default because it is very slow.
-                    for (qstr_pool_t *pool = MP_STATE_VM(last_pool); c == 'h' && pool != NULL; pool = pool->prev) {
-                        if ((qstr_pool_t*)ptr == pool) {
-                            c = 'Q';
+                    void **ptrs = (void**)(void*)&mp_state_ctx;
+                    mp_uint_t len = offsetof(mp_state_ctx_t, vm.stack_top) / sizeof(mp_uint_t);
+                    for (mp_uint_t i = 0; i < len; i++) {
+                        mp_uint_t ptr = (mp_uint_t)ptrs[i];
+                        if (VERIFY_PTR(area, ptr) && BLOCK_FROM_PTR(area, ptr) == bl) {
+                            c = 'B';
                             break;
                         }
-                        for (const byte **q = pool->qstrs, **q_top = pool->qstrs + pool->len; q < q_top; q++) {
-                            if ((const byte*)ptr == *q) {
-                                c = 'q';
+                    }
+                    if (c == 'h') {
+                        ptrs = (void**)&c;
+                        len = ((mp_uint_t)MP_STATE_THREAD(stack_top) - (mp_uint_t)&c) / sizeof(mp_uint_t);
+                        for (mp_uint_t i = 0; i < len; i++) {
+                            mp_uint_t ptr = (mp_uint_t)ptrs[i];
+                            if (VERIFY_PTR(area, ptr) && BLOCK_FROM_PTR(area, ptr) == bl) {
+                                c = 'S';
                                 break;
                             }
                         }
                     }
+                    break;
+                }
+                */
+                /* this prints the uPy object type of the head block */
+                case AT_HEAD: {
+                    void **ptr = (void**)(area->gc_pool_start + bl * BYTES_PER_BLOCK);
+                    if (*ptr == &mp_type_tuple) { c = 'T'; }
+                    else if (*ptr == &mp_type_list) { c = 'L'; }
+                    else if (*ptr == &mp_type_dict) { c = 'D'; }
+                    else if (*ptr == &mp_type_str || *ptr == &mp_type_bytes) { c = 'S'; }
+                    #if MICROPY_PY_BUILTINS_BYTEARRAY
+                    else if (*ptr == &mp_type_bytearray) { c = 'A'; }
+                    #endif
+                    #if MICROPY_PY_ARRAY
+                    else if (*ptr == &mp_type_array) { c = 'A'; }
                     #endif
+                    #if MICROPY_PY_BUILTINS_FLOAT
+                    else if (*ptr == &mp_type_float) { c = 'F'; }
+                    #endif
+                    else if (*ptr == &mp_type_fun_bc) { c = 'B'; }
+                    else if (*ptr == &mp_type_module) { c = 'M'; }
+                    else {
+                        c = 'h';
+                        #if 0
+                        // This code prints "Q" for qstr-pool data, and "q" for qstr-str
+                        // data.  It can be useful to see how qstrs are being allocated,
+                        // but is disabled by default because it is very slow.
+                        for (qstr_pool_t *pool = MP_STATE_VM(last_pool); c == 'h' && pool != NULL; pool = pool->prev) {
+                            if ((qstr_pool_t*)ptr == pool) {
+                                c = 'Q';
+                                break;
+                            }
+                            for (const byte **q = pool->qstrs, **q_top = pool->qstrs + pool->len; q < q_top; q++) {
+                                if ((const byte*)ptr == *q) {
+                                    c = 'q';
+                                    break;
+                                }
+                            }
+                        }
+                        #endif
+                    }
+                    break;
                 }
-                break;
+                case AT_TAIL: c = '='; break;
+                case AT_MARK: c = 'm'; break;
             }
-            case AT_TAIL: c = '='; break;
-            case AT_MARK: c = 'm'; break;
+            mp_printf(&mp_plat_print, "%c", c);
         }
-        mp_printf(&mp_plat_print, "%c", c);
+        mp_print_str(&mp_plat_print, "\n");
     }
-    mp_print_str(&mp_plat_print, "\n");
     GC_EXIT();
 }
 
+#if MICROPY_PY_MICROPYTHON_HEAP_DUMP
+// Write a snapshot of the heap for micropython.heap_dump, to be read by
+// tools/heapdump.py.  It starts with the magic bytes "MPHD" and then has
+// unsigned numbers encoded 7 bits at a time, most significant first, as in
+// .mpy files: the format version, bytes per word and bytes per block.  Then
+// come records that each start with a tag byte:
+//  'R' a region: the address of its first block and its number of blocks
+//  'S' the roots: a count, then the objects referred to by the root pointers
+//      and by the stack of the current thread
+//  'T' a type: its address, then the length and bytes of its name
+//  'O' an object: the distance from the previous object, its number of
+//      blocks, its first word, flags (bit 0 if it has a finaliser), then a
+//      count and the objects its words refer to
+//  'E' the end of the snapshot
+// Objects are numbered by their head block, counting from 1 at the start of
+// the first region and across all regions in turn.  A 'T' record comes before
+// the first object whose first word is that type.
+
+#define HEAP_DUMP_VERSION (1)
+#define HEAP_DUMP_TYPE_CACHE (16)
+
+typedef struct _gc_dump_t {
+    const mp_print_t *print;
+    // types already written, so most objects don't repeat their type
+    const mp_obj_type_t *type_cache[HEAP_DUMP_TYPE_CACHE];
+    // the range of addresses of the types in ROM found so far
+    uintptr_t rom_lo;
+    uintptr_t rom_hi;
+    size_t len;
+    byte buf[64];
+} gc_dump_t;
+
+STATIC void gc_dump_bytes(gc_dump_t *dump, const byte *data, size_t len) {
+    while (len--) {
+        if (dump->len == sizeof(dump->buf)) {
+            dump->print->print_strn(dump->print->data, (const char*)dump->buf, dump->len);
+            dump->len = 0;
+        }
+        dump->buf[dump->len++] = *data++;
+    }
+}
+
+STATIC void gc_dump_uint(gc_dump_t *dump, mp_uint_t val) {
+    byte buf[(sizeof(mp_uint_t) * 8 + 6) / 7];
+    byte *p = buf + sizeof(buf);
+    *--p = val & 0x7f;
+    for (val >>= 7; val != 0; val >>= 7) {
+        *--p = 0x80 | (val & 0x7f);
+    }
+    gc_dump_bytes(dump, p, buf + sizeof(buf) - p);
+}
+
+// Return the number of the object that ptr points to, or 0 if it doesn't
+// point to the start of an object.
+STATIC size_t gc_dump_ref(const void *ptr) {
+    size_t base = 1;
+    for (mp_state_mem_area_t *area = &MP_STATE_MEM(area); area != NULL; area = NEXT_AREA(area)) {
+        if (VERIFY_PTR(area, ptr)) {
+            size_t block = BLOCK_FROM_PTR(area, ptr);
+            return ATB_IS_HEAD(area, block) ? base + block : 0;
+        }
+        base += AREA_BLOCKS(area);
+    }
+    return 0;
+}
+
+STATIC size_t gc_dump_count_refs(void **ptrs, size_t len) {
+    size_t n = 0;
+    for (size_t i = 0; i < len; i++) {
+        n += gc_dump_ref(ptrs[i]) != 0;
+    }
+    return n;
+}
+
+STATIC void gc_dump_refs(gc_dump_t *dump, void **ptrs, size_t len) {
+    for (size_t i = 0; i < len; i++) {
+        size_t ref = gc_dump_ref(ptrs[i]);
+        if (ref != 0) {
+            gc_dump_uint(dump, ref);
+        }
+    }
+}
+
+// Write a 'T' record for ptr if it's a type that hasn't just been written.
+// Words in ROM are only taken to be types if they lie among the types found
+// in the builtins, as reading them is then safe.
+STATIC void gc_dump_type(gc_dump_t *dump, const void *ptr, bool known) {
+    if (((uintptr_t)ptr & (sizeof(void*) - 1)) != 0) {
+        return;
+    }
+    if (gc_get_ptr_area(ptr) != NULL) {
+        if (gc_dump_ref(ptr) == 0) {
+            return;
+        }
+    } else if (!known && ((uintptr_t)ptr < dump->rom_lo || (uintptr_t)ptr > dump->rom_hi)) {
+        return;
+    }
+    const mp_obj_type_t *type = ptr;
+    if (type->base.type != &mp_type_type) {
+        return;
+    }
+    size_t idx = ((uintptr_t)ptr / sizeof(void*)) % HEAP_DUMP_TYPE_CACHE;
+    if (dump->type_cache[idx] == type) {
+        return;
+    }
+    qstr name = type->name;
+    if (name >= MP_STATE_VM(last_pool)->total_prev_len + MP_STATE_VM(last_pool)->len) {
+        // not a valid qstr so this isn't really a type
+        return;
+    }
+    dump->type_cache[idx] = type;
+    size_t len;
+    const byte *data = qstr_data(name, &len);
+    gc_dump_bytes(dump, (const byte*)"T", 1);
+    gc_dump_uint(dump, (uintptr_t)ptr);
+    gc_dump_uint(dump, len);
+    gc_dump_bytes(dump, data, len);
+}
+
+// Note the types in a map of the builtins, widening the range of ROM addresses
+// that are taken to be types.
+STATIC void gc_dump_map_types(gc_dump_t *dump, const mp_map_t *map) {
+    for (size_t i = 0; i < map->alloc; i++) {
+        if (!mp_map_slot_is_filled(map, i)) {
+            continue;
+        }
+        mp_obj_t value = map->table[i].value;
+        if (mp_obj_is_type(value, &mp_type_type)) {
+            uintptr_t ptr = (uintptr_t)MP_OBJ_TO_PTR(value);
+            if (gc_get_ptr_area((void*)ptr) == NULL) {
+                if (dump->rom_lo == 0 || ptr < dump->rom_lo) {
+                    dump->rom_lo = ptr;
+                }
+                if (ptr > dump->rom_hi) {
+                    dump->rom_hi = ptr;
+                }
+            }
+            gc_dump_type(dump, (void*)ptr, true);
+        }
+    }
+}
+
+void gc_dump_heap(const mp_print_t *print) {
+    gc_dump_t dump;
+    memset(&dump, 0, sizeof(dump));
+    dump.print = print;
+
+    gc_dump_bytes(&dump, (const byte*)"MPHD", 4);
+    gc_dump_uint(&dump, HEAP_DUMP_VERSION);
+    gc_dump_uint(&dump, BYTES_PER_WORD);
+    gc_dump_uint(&dump, BYTES_PER_BLOCK);
+
+    // The GC mutex isn't held because writing to the stream may allocate;
+    // the snapshot is only exact if the stream doesn't use the heap.
+
+    for (mp_state_mem_area_t *area = &MP_STATE_MEM(area); area != NULL; area = NEXT_AREA(area)) {
+        gc_dump_bytes(&dump, (const byte*)"R", 1);
+        gc_dump_uint(&dump, (uintptr_t)area->gc_pool_start);
+        gc_dump_uint(&dump, AREA_BLOCKS(area));
+    }
+
+    // the same roots as gc_collect_start, and the stack of this thread
+    void **ptrs = (void**)(void*)&mp_state_ctx;
+    size_t root_start = offsetof(mp_state_ctx_t, thread.dict_locals);
+    size_t root_end = offsetof(mp_state_ctx_t, vm.qstr_last_chunk);
+    void **roots = ptrs + root_start / sizeof(void*);
+    size_t n_roots = (root_end - root_start) / sizeof(void*);
+    void *stack_dummy = NULL;
+    void **stack = &stack_dummy;
+    size_t n_stack = ((void**)MP_STATE_THREAD(stack_top) - stack);
+    gc_dump_bytes(&dump, (const byte*)"S", 1);
+    size_t n_refs = gc_dump_count_refs(roots, n_roots) + gc_dump_count_refs(stack, n_stack);
+    #if MICROPY_ENABLE_PYSTACK
+    void **pystack = (void**)(void*)MP_STATE_THREAD(pystack_start);
+    size_t n_pystack = (MP_STATE_THREAD(pystack_cur) - MP_STATE_THREAD(pystack_start)) / sizeof(void*);
+    n_refs += gc_dump_count_refs(pystack, n_pystack);
+    #endif
+    gc_dump_uint(&dump, n_refs);
+    gc_dump_refs(&dump, roots, n_roots);
+    gc_dump_refs(&dump, stack, n_stack);
+    #if MICROPY_ENABLE_PYSTACK
+    gc_dump_refs(&dump, pystack, n_pystack);
+    #endif
+
+    // names for the types in ROM, from the builtins and the built-in modules
+    gc_dump_map_types(&dump, &mp_module_builtins.globals->map);
+    for (size_t i = 0; i < mp_builtin_module_map.alloc; i++) {
+        if (mp_map_slot_is_filled(&mp_builtin_module_map, i)) {
+            mp_obj_t module = mp_builtin_module_map.table[i].value;
+            if (mp_obj_is_type(module, &mp_type_module)) {
+                gc_dump_map_types(&dump, &mp_obj_module_get_globals(module)->map);
+            }
+        }
+    }
+
+    size_t base = 1;
+    size_t prev = 0;
+    for (mp_state_mem_area_t *area = &MP_STATE_MEM(area); area != NULL; area = NEXT_AREA(area)) {
+        size_t n_blocks = AREA_BLOCKS(area);
+        for (size_t block = 0; block < n_blocks; block++) {
+            if (!ATB_IS_HEAD(area, block)) {
+                continue;
+            }
+            size_t n = 1;
+            while (block + n < n_blocks && ATB_GET_KIND(area, block + n) == AT_TAIL) {
+                n++;
+            }
+            void **obj = (void**)PTR_FROM_BLOCK(area, block);
+            size_t n_words = n * WORDS_PER_BLOCK;
+            gc_dump_type(&dump, obj[0], false);
+            gc_dump_bytes(&dump, (const byte*)"O", 1);
+            gc_dump_uint(&dump, base + block - prev);
+            gc_dump_uint(&dump, n);
+            gc_dump_uint(&dump, (uintptr_t)obj[0]);
+            #if MICROPY_ENABLE_FINALISER
+            gc_dump_uint(&dump, FTB_GET(area, block));
+            #else
+            gc_dump_uint(&dump, 0);
+            #endif
+            gc_dump_uint(&dump, gc_dump_count_refs(obj, n_words));
+            gc_dump_refs(&dump, obj, n_words);
+            prev = base + block;
+            block += n - 1;
+        }
+        base += n_blocks;
+    }
+
+    gc_dump_bytes(&dump, (const byte*)"E", 1);
+    print->print_strn(print->data, (const char*)dump.buf, dump.len);
+}
+#endif // MICROPY_PY_MICROPYTHON_HEAP_DUMP
+
 #if 0
 // For testing the GC functions
 void gc_test(void) {
@@ -30,9 +30,20 @@
 
 #include "py/mpconfig.h"
 #include "py/misc.h"
+#include "py/mpprint.h"
 
 void gc_init(void *start, void *end);
 
+#if MICROPY_GC_SPLIT_HEAP
+// Add a region of memory to the heap; the GC's tables for it go in the region
+void gc_add(void *start, void *end);
+
+#if MICROPY_GC_SPLIT_HEAP_AUTO
+// A port must implement this to grow the heap, see MICROPY_GC_SPLIT_HEAP_AUTO
+bool gc_try_add_heap(size_t n_bytes);
+#endif
+#endif
+
 // These lock/unlock functions can be nested.
 // They can be used to prevent the GC from allocating/freeing.
 void gc_lock(void);
@@ -45,6 +56,17 @@ void gc_collect_start(void);
 void gc_collect_root(void **ptrs, size_t len);
 void gc_collect_end(void);
 
+#if MICROPY_GC_SKIP_TENURED
+// Do a minor collection, which only frees objects allocated since the last one
+void gc_collect_young(void);
+#endif
+
+#if MICROPY_GC_INCREMENTAL_SWEEP
+// Sweep for up to budget_us microseconds, first doing a collection that leaves
+// the sweep pending if no sweep is in progress; returns true once it's complete
+bool gc_collect_step(bool young, mp_uint_t budget_us);
+#endif
+
 // Use this function to sweep the whole heap and run all finalisers
 void gc_sweep_all(void);
 
@@ -55,6 +77,7 @@ enum {
 void *gc_alloc(size_t n_bytes, unsigned int alloc_flags);
 void gc_free(void *ptr); // does not call finaliser
 size_t gc_nbytes(const void *ptr);
+bool gc_is_heap_ptr(const void *ptr);
 void *gc_realloc(void *ptr, size_t n_bytes, bool allow_move);
 
 typedef struct _gc_info_t {
@@ -68,7 +91,19 @@ typedef struct _gc_info_t {
 } gc_info_t;
 
 void gc_info(gc_info_t *info);
+#if MICROPY_GC_SPLIT_HEAP
+// Get the figures for region n of the heap; returns false if there's no such region
+bool gc_info_area(size_t n, gc_info_t *info);
+#endif
 void gc_dump_info(void);
 void gc_dump_alloc_table(void);
+#if MICROPY_GC_STATS
+// Clear the figures returned by gc.stats()
+void gc_stats_reset(void);
+#endif
+#if MICROPY_PY_MICROPYTHON_HEAP_DUMP
+// Write a binary snapshot of the heap; see gc.c for the format
+void gc_dump_heap(const mp_print_t *print);
+#endif
 
 #endif // MICROPY_INCLUDED_PY_GC_H
@@ -229,6 +229,30 @@ def compute_hash(qstr, bytes_hash):
     # Make sure that valid hash is never zero, zero means "hash not computed"
     return (hash & ((1 << (8 * bytes_hash)) - 1)) or 1
 
+# this must match the equivalent function in qstr.c
+def compute_hash_full(qstr):
+    hash = 5381
+    for b in qstr:
+        hash = ((hash * 33) ^ b) & 0xffffffff
+    return hash
+
+# build the open-addressed hash index for a pool, see qstr_pool_t in qstr.h
+# entries are the position of the qstr in the pool plus 1, 0 is an empty slot
+def make_hash_index(qstrs, first=0):
+    assert len(qstrs) < 0xffff
+    size = 1
+    while size < 2 * len(qstrs):
+        size *= 2
+    index = [0] * size
+    for i, qstr in enumerate(qstrs):
+        if i < first:
+            continue
+        pos = compute_hash_full(bytes_cons(qstr, 'utf8')) & (size - 1)
+        while index[pos] != 0:
+            pos = (pos + 1) & (size - 1)
+        index[pos] = i + 1
+    return index
+
 def qstr_escape(qst):
     def esc_char(m):
         c = ord(m.group(0))
@@ -346,6 +370,16 @@ def print_qstr_data(qcfgs, qstrs):
         qbytes = make_bytes(cfg_bytes_len, cfg_bytes_hash, qstr)
         print('QDEF(MP_QSTR_%s, %s)' % (ident, qbytes))
 
+    if int(qcfgs.get('HASH_INDEX', '0')):
+        # entry 0 is MP_QSTRnull which must never be found by a lookup
+        qstr_list = [''] + [q for _, _, q in sorted(qstrs.values(), key=lambda x: x[0])]
+        index = make_hash_index(qstr_list, first=1)
+        print('')
+        print('#ifdef QHASHINDEX')
+        for i in range(0, len(index), 16):
+            print('QHASHINDEX(%s)' % ', '.join(str(x) for x in index[i:i + 16]))
+        print('#endif')
+
 def do_work(infiles):
     qcfgs, qstrs = parse_input_headers(infiles)
     print_qstr_data(qcfgs, qstrs)
@@ -73,6 +73,41 @@ STATIC size_t get_hash_alloc_greater_or_equal_to(size_t x) {
     return (x + x / 2) | 1;
 }
 
+#if MICROPY_OPT_MAP_LOOKUP_CACHE
+// MP_STATE_VM(map_lookup_cache) holds the last known position of a key in
+// whichever map it was last found in.  The cache is shared by all maps and
+// is indexed by the key object, so an entry is only a hint: a hit is
+// confirmed by checking that the slot in the map really holds the key.  On
+// a hit this skips the linear search of an ordered map (all ROM dicts, such
+// as module globals and type locals) and the hash computation and probing
+// of a hash-table map.
+
+// The low bits of an mp_obj_t are mostly tag bits so discard them.
+#define MAP_CACHE_OFFSET(index) ((((uintptr_t)(index)) >> 2) % MICROPY_OPT_MAP_LOOKUP_CACHE_SIZE)
+#define MAP_CACHE_ENTRY(index) (MP_STATE_VM(map_lookup_cache)[MAP_CACHE_OFFSET(index)])
+// Positions that don't fit in an entry are not cached.
+#define MAP_CACHE_SET(index, pos) do { \
+        size_t _pos = (pos); \
+        if (_pos <= UINT16_MAX) { \
+            MAP_CACHE_ENTRY(index) = _pos; \
+        } \
+} while (0)
+#else
+#define MAP_CACHE_SET(index, pos)
+#endif
+
+#if MICROPY_MAP_VERSION
+// Adding a key to a versioned map can change the result of lookups that were
+// cached elsewhere, for example by shadowing a method in a base class.
+#define MAP_KEY_ADDED(map) do { if ((map)->is_versioned) { ++MP_STATE_VM(map_version); } } while (0)
+// Slots of a versioned map may be cached, so freeing its table must also
+// invalidate them.
+#define MAP_TABLE_FREED(map) MAP_KEY_ADDED(map)
+#else
+#define MAP_KEY_ADDED(map)
+#define MAP_TABLE_FREED(map)
+#endif
+
 /******************************************************************************/
 /* map                                                                        */
 
@@ -88,6 +123,9 @@ void mp_map_init(mp_map_t *map, size_t n) {
     map->all_keys_are_qstrs = 1;
     map->is_fixed = 0;
     map->is_ordered = 0;
+    #if MICROPY_MAP_VERSION
+    map->is_versioned = 0;
+    #endif
 }
 
 void mp_map_init_fixed_table(mp_map_t *map, size_t n, const mp_obj_t *table) {
@@ -96,6 +134,9 @@ void mp_map_init_fixed_table(mp_map_t *map, size_t n, const mp_obj_t *table) {
     map->all_keys_are_qstrs = 1;
     map->is_fixed = 1;
     map->is_ordered = 1;
+    #if MICROPY_MAP_VERSION
+    map->is_versioned = 0;
+    #endif
     map->table = (mp_map_elem_t*)table;
 }
 
@@ -105,12 +146,14 @@ void mp_map_deinit(mp_map_t *map) {
         m_del(mp_map_elem_t, map->table, map->alloc);
     }
     map->used = map->alloc = 0;
+    MAP_TABLE_FREED(map);
 }
 
 void mp_map_clear(mp_map_t *map) {
     if (!map->is_fixed) {
         m_del(mp_map_elem_t, map->table, map->alloc);
     }
+    MAP_TABLE_FREED(map);
     map->alloc = 0;
     map->used = 0;
     map->all_keys_are_qstrs = 1;
@@ -118,6 +161,18 @@ void mp_map_clear(mp_map_t *map) {
     map->table = NULL;
 }
 
+#if MICROPY_MAP_VERSION
+// Flag the map so that adding keys to it invalidates cached lookups.  The
+// version is also incremented here because the map may be at the address of
+// a previous map that had lookups cached against it.
+void mp_map_set_versioned(mp_map_t *map) {
+    if (!map->is_fixed) {
+        map->is_versioned = 1;
+    }
+    ++MP_STATE_VM(map_version);
+}
+#endif
+
 STATIC void mp_map_rehash(mp_map_t *map) {
     size_t old_alloc = map->alloc;
     size_t new_alloc = get_hash_alloc_greater_or_equal_to(map->alloc + 1);
@@ -147,6 +202,17 @@ mp_map_elem_t *mp_map_lookup(mp_map_t *map, mp_obj_t index, mp_map_lookup_kind_t
     // If the map is a fixed array then we must only be called for a lookup
     assert(!map->is_fixed || lookup_kind == MP_MAP_LOOKUP);
 
+    #if MICROPY_OPT_MAP_LOOKUP_CACHE
+    // Try the cache first; removal is excluded because it must update the map.
+    // A key that is equal but not identical misses here and is handled below.
+    if (lookup_kind != MP_MAP_LOOKUP_REMOVE_IF_FOUND) {
+        size_t pos = MAP_CACHE_ENTRY(index);
+        if (pos < map->alloc && map->table[pos].key == index) {
+            return &map->table[pos];
+        }
+    }
+    #endif
+
     // Work out if we can compare just pointers
     bool compare_only_ptrs = map->all_keys_are_qstrs;
     if (compare_only_ptrs) {
@@ -180,8 +246,10 @@ mp_map_elem_t *mp_map_lookup(mp_map_t *map, mp_obj_t index, mp_map_lookup_kind_t
                     elem = &map->table[map->used];
                     elem->key = MP_OBJ_NULL;
                     elem->value = value;
+                    return elem;
                 }
                 #endif
+                MAP_CACHE_SET(index, elem - map->table);
                 return elem;
             }
         }
@@ -195,6 +263,8 @@ mp_map_elem_t *mp_map_lookup(mp_map_t *map, mp_obj_t index, mp_map_lookup_kind_t
             map->table = m_renew(mp_map_elem_t, map->table, map->used, map->alloc);
             mp_seq_clear(map->table, map->used, map->alloc, sizeof(*map->table));
         }
+        MAP_CACHE_SET(index, map->used);
+        MAP_KEY_ADDED(map);
         mp_map_elem_t *elem = map->table + map->used++;
         elem->key = index;
         if (!mp_obj_is_qstr(index)) {
@@ -241,6 +311,8 @@ mp_map_elem_t *mp_map_lookup(mp_map_t *map, mp_obj_t index, mp_map_lookup_kind_t
                 if (!mp_obj_is_qstr(index)) {
                     map->all_keys_are_qstrs = 0;
                 }
+                MAP_CACHE_SET(index, avail_slot - map->table);
+                MAP_KEY_ADDED(map);
                 return avail_slot;
             } else {
                 return NULL;
@@ -263,6 +335,8 @@ mp_map_elem_t *mp_map_lookup(mp_map_t *map, mp_obj_t index, mp_map_lookup_kind_t
                     slot->key = MP_OBJ_SENTINEL;
                 }
                 // keep slot->value so that caller can access it if needed
+            } else {
+                MAP_CACHE_SET(index, pos);
             }
             return slot;
         }
@@ -281,6 +355,8 @@ mp_map_elem_t *mp_map_lookup(mp_map_t *map, mp_obj_t index, mp_map_lookup_kind_t
                     if (!mp_obj_is_qstr(index)) {
                         map->all_keys_are_qstrs = 0;
                     }
+                    MAP_CACHE_SET(index, avail_slot - map->table);
+                    MAP_KEY_ADDED(map);
                     return avail_slot;
                 } else {
                     // not enough room in table, rehash it
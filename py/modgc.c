@@ -24,22 +24,69 @@
  * THE SOFTWARE.
  */
 
+#include <string.h>
+
 #include "py/mpstate.h"
 #include "py/obj.h"
+#include "py/runtime.h"
 #include "py/gc.h"
 
 #if MICROPY_PY_GC && MICROPY_ENABLE_GC
 
-// collect(): run a garbage collection
-STATIC mp_obj_t py_gc_collect(void) {
-    gc_collect();
+#if MICROPY_GC_STATS && MICROPY_ENABLE_SCHEDULER
+// An explicit collection is a safe point, so run the callbacks that are already
+// pending, including the one gc.callback() scheduled for this collection.  The
+// VM would only run them at its next pending-event check, which native code
+// never makes.  Callbacks scheduled while these run are left to the VM.
+STATIC void gc_run_pending(void) {
+    if (MP_STATE_VM(gc_callback) == MP_OBJ_NULL) {
+        return;
+    }
+    for (size_t n = mp_sched_num_pending(); n > 0 && MP_STATE_VM(sched_state) == MP_SCHED_PENDING; --n) {
+        mp_handle_pending();
+    }
+}
+#else
+#define gc_run_pending()
+#endif
+
+// collect([generation], *, budget_us): run a garbage collection, a minor one if
+// generation is 0, or a slice of an incremental one if budget_us is given
+STATIC mp_obj_t py_gc_collect(size_t n_args, const mp_obj_t *pos_args, mp_map_t *kw_args) {
+    enum { ARG_generation, ARG_budget_us };
+    static const mp_arg_t allowed_args[] = {
+        { MP_QSTR_generation, MP_ARG_INT, {.u_int = 1} },
+        #if MICROPY_GC_INCREMENTAL_SWEEP
+        { MP_QSTR_budget_us, MP_ARG_KW_ONLY | MP_ARG_INT, {.u_int = -1} },
+        #endif
+    };
+    mp_arg_val_t args[MP_ARRAY_SIZE(allowed_args)];
+    mp_arg_parse_all(n_args, pos_args, kw_args, MP_ARRAY_SIZE(allowed_args), allowed_args, args);
+    bool young = args[ARG_generation].u_int == 0;
+    (void)young;
+    #if MICROPY_GC_INCREMENTAL_SWEEP
+    if (args[ARG_budget_us].u_int >= 0) {
+        bool done = gc_collect_step(young, args[ARG_budget_us].u_int);
+        gc_run_pending();
+        return mp_obj_new_bool(done);
+    }
+    #endif
+    #if MICROPY_GC_SKIP_TENURED
+    if (young) {
+        gc_collect_young();
+    } else
+    #endif
+    {
+        gc_collect();
+    }
+    gc_run_pending();
 #if MICROPY_PY_GC_COLLECT_RETVAL
     return MP_OBJ_NEW_SMALL_INT(MP_STATE_MEM(gc_collected));
 #else
     return mp_const_none;
 #endif
 }
-MP_DEFINE_CONST_FUN_OBJ_0(gc_collect_obj, py_gc_collect);
+MP_DEFINE_CONST_FUN_OBJ_KW(gc_collect_obj, 0, py_gc_collect);
 
 // disable(): disable the garbage collector
 STATIC mp_obj_t gc_disable(void) {
@@ -60,6 +107,32 @@ STATIC mp_obj_t gc_isenabled(void) {
 }
 MP_DEFINE_CONST_FUN_OBJ_0(gc_isenabled_obj, gc_isenabled);
 
+#if MICROPY_GC_SPLIT_HEAP
+// Fill in info for the whole heap, or just the region given by args[0]
+STATIC void gc_info_helper(size_t n_args, const mp_obj_t *args, gc_info_t *info) {
+    if (n_args == 0) {
+        gc_info(info);
+    } else if (!gc_info_area(mp_obj_get_int(args[0]), info)) {
+        mp_raise_ValueError("no such region");
+    }
+}
+
+// mem_free([region]): return the number of bytes of available heap RAM
+STATIC mp_obj_t gc_mem_free(size_t n_args, const mp_obj_t *args) {
+    gc_info_t info;
+    gc_info_helper(n_args, args, &info);
+    return MP_OBJ_NEW_SMALL_INT(info.free);
+}
+MP_DEFINE_CONST_FUN_OBJ_VAR_BETWEEN(gc_mem_free_obj, 0, 1, gc_mem_free);
+
+// mem_alloc([region]): return the number of bytes of heap RAM that are allocated
+STATIC mp_obj_t gc_mem_alloc(size_t n_args, const mp_obj_t *args) {
+    gc_info_t info;
+    gc_info_helper(n_args, args, &info);
+    return MP_OBJ_NEW_SMALL_INT(info.used);
+}
+MP_DEFINE_CONST_FUN_OBJ_VAR_BETWEEN(gc_mem_alloc_obj, 0, 1, gc_mem_alloc);
+#else
 // mem_free(): return the number of bytes of available heap RAM
 STATIC mp_obj_t gc_mem_free(void) {
     gc_info_t info;
@@ -76,6 +149,8 @@ STATIC mp_obj_t gc_mem_alloc(void) {
 }
 MP_DEFINE_CONST_FUN_OBJ_0(gc_mem_alloc_obj, gc_mem_alloc);
 
+#endif
+
 #if MICROPY_GC_ALLOC_THRESHOLD
 STATIC mp_obj_t gc_threshold(size_t n_args, const mp_obj_t *args) {
     if (n_args == 0) {
@@ -95,6 +170,84 @@ STATIC mp_obj_t gc_threshold(size_t n_args, const mp_obj_t *args) {
 MP_DEFINE_CONST_FUN_OBJ_VAR_BETWEEN(gc_threshold_obj, 0, 1, gc_threshold);
 #endif
 
+#if MICROPY_GC_STATS
+// stats([reset]): return (count, total_us, max_us, history) for the collections
+// so far, with history a list of (pause_us, freed, used, full) for the most
+// recent ones, oldest first
+STATIC mp_obj_t gc_stats(size_t n_args, const mp_obj_t *args) {
+    // take a copy first because building the result may run a collection
+    mp_gc_stats_t history[MICROPY_GC_STATS_HISTORY];
+    size_t count = MP_STATE_MEM(gc_stats_count);
+    mp_uint_t total_us = MP_STATE_MEM(gc_stats_total_us);
+    mp_uint_t max_us = MP_STATE_MEM(gc_stats_max_us);
+    memcpy(history, MP_STATE_MEM(gc_stats_history), sizeof(history));
+    if (n_args == 1 && mp_obj_is_true(args[0])) {
+        gc_stats_reset();
+    }
+
+    size_t n = MIN(count, MICROPY_GC_STATS_HISTORY);
+    mp_obj_t list = mp_obj_new_list(0, NULL);
+    for (size_t i = count - n; i < count; i++) {
+        mp_gc_stats_t *s = &history[i % MICROPY_GC_STATS_HISTORY];
+        mp_obj_t items[4] = {
+            mp_obj_new_int_from_uint(s->pause_us),
+            mp_obj_new_int_from_uint(s->freed),
+            mp_obj_new_int_from_uint(s->used),
+            mp_obj_new_bool(s->full),
+        };
+        mp_obj_list_append(list, mp_obj_new_tuple(4, items));
+    }
+    mp_obj_t tuple[4] = {
+        mp_obj_new_int_from_uint(count),
+        mp_obj_new_int_from_uint(total_us),
+        mp_obj_new_int_from_uint(max_us),
+        list,
+    };
+    return mp_obj_new_tuple(4, tuple);
+}
+MP_DEFINE_CONST_FUN_OBJ_VAR_BETWEEN(gc_stats_obj, 0, 1, gc_stats);
+
+#if MICROPY_ENABLE_SCHEDULER
+// callback(func): schedule func to be called with the pause in microseconds
+// after each collection, or stop doing so if func is None
+STATIC mp_obj_t gc_callback(mp_obj_t func) {
+    if (func == mp_const_none) {
+        MP_STATE_VM(gc_callback) = MP_OBJ_NULL;
+    } else if (mp_obj_is_callable(func)) {
+        MP_STATE_VM(gc_callback) = func;
+    } else {
+        mp_raise_ValueError("callback must be None or a callable object");
+    }
+    return mp_const_none;
+}
+MP_DEFINE_CONST_FUN_OBJ_1(gc_callback_obj, gc_callback);
+#endif
+#endif
+
+#if MICROPY_GC_ADAPTIVE_THRESHOLD
+// adaptive([pause_us, overhead]): get or set the goals for the longest pause and
+// the percentage of time spent collecting, which the threshold is adjusted
+// towards after each collection; a goal of 0 is not used
+STATIC mp_obj_t gc_adaptive(size_t n_args, const mp_obj_t *args) {
+    if (n_args == 0) {
+        mp_obj_t tuple[2] = {
+            mp_obj_new_int_from_uint(MP_STATE_MEM(gc_adapt_pause_us)),
+            mp_obj_new_int_from_uint(MP_STATE_MEM(gc_adapt_overhead)),
+        };
+        return mp_obj_new_tuple(2, tuple);
+    }
+    mp_int_t pause_us = mp_obj_get_int(args[0]);
+    mp_int_t overhead = mp_obj_get_int(args[1]);
+    if (pause_us < 0 || overhead < 0 || overhead > 100) {
+        mp_raise_ValueError(NULL);
+    }
+    MP_STATE_MEM(gc_adapt_pause_us) = pause_us;
+    MP_STATE_MEM(gc_adapt_overhead) = overhead;
+    return mp_const_none;
+}
+MP_DEFINE_CONST_FUN_OBJ_VAR_BETWEEN(gc_adaptive_obj, 0, 2, gc_adaptive);
+#endif
+
 STATIC const mp_rom_map_elem_t mp_module_gc_globals_table[] = {
     { MP_ROM_QSTR(MP_QSTR___name__), MP_ROM_QSTR(MP_QSTR_gc) },
     { MP_ROM_QSTR(MP_QSTR_collect), MP_ROM_PTR(&gc_collect_obj) },
@@ -106,6 +259,15 @@ STATIC const mp_rom_map_elem_t mp_module_gc_globals_table[] = {
     #if MICROPY_GC_ALLOC_THRESHOLD
     { MP_ROM_QSTR(MP_QSTR_threshold), MP_ROM_PTR(&gc_threshold_obj) },
     #endif
+    #if MICROPY_GC_STATS
+    { MP_ROM_QSTR(MP_QSTR_stats), MP_ROM_PTR(&gc_stats_obj) },
+    #if MICROPY_ENABLE_SCHEDULER
+    { MP_ROM_QSTR(MP_QSTR_callback), MP_ROM_PTR(&gc_callback_obj) },
+    #endif
+    #endif
+    #if MICROPY_GC_ADAPTIVE_THRESHOLD
+    { MP_ROM_QSTR(MP_QSTR_adaptive), MP_ROM_PTR(&gc_adaptive_obj) },
+    #endif
 };
 
 STATIC MP_DEFINE_CONST_DICT(mp_module_gc_globals, mp_module_gc_globals_table);
@@ -31,6 +31,8 @@
 #include "py/runtime.h"
 #include "py/gc.h"
 #include "py/mphal.h"
+#include "py/profile.h"
+#include "py/stream.h"
 
 // Various builtins specific to MicroPython runtime,
 // living in micropython module
@@ -47,6 +49,22 @@ STATIC mp_obj_t mp_micropython_opt_level(size_t n_args, const mp_obj_t *args) {
 STATIC MP_DEFINE_CONST_FUN_OBJ_VAR_BETWEEN(mp_micropython_opt_level_obj, 0, 1, mp_micropython_opt_level);
 #endif
 
+#if MICROPY_OPT_TIERED_NATIVE
+STATIC mp_obj_t mp_micropython_tier_threshold(size_t n_args, const mp_obj_t *args) {
+    if (n_args == 0) {
+        return mp_obj_new_int_from_uint(MP_STATE_VM(tier_threshold));
+    } else {
+        mp_int_t threshold = mp_obj_get_int(args[0]);
+        if (threshold < 0) {
+            mp_raise_ValueError(NULL);
+        }
+        MP_STATE_VM(tier_threshold) = threshold;
+        return mp_const_none;
+    }
+}
+STATIC MP_DEFINE_CONST_FUN_OBJ_VAR_BETWEEN(mp_micropython_tier_threshold_obj, 0, 1, mp_micropython_tier_threshold);
+#endif
+
 #if MICROPY_PY_MICROPYTHON_MEM_INFO
 
 #if MICROPY_MEM_STATS
@@ -133,6 +151,16 @@ STATIC mp_obj_t mp_micropython_heap_unlock(void) {
     return mp_const_none;
 }
 STATIC MP_DEFINE_CONST_FUN_OBJ_0(mp_micropython_heap_unlock_obj, mp_micropython_heap_unlock);
+
+#if MICROPY_PY_MICROPYTHON_HEAP_DUMP
+STATIC mp_obj_t mp_micropython_heap_dump(mp_obj_t stream) {
+    mp_get_stream_raise(stream, MP_STREAM_OP_WRITE);
+    mp_print_t print = {MP_OBJ_TO_PTR(stream), mp_stream_write_adaptor};
+    gc_dump_heap(&print);
+    return mp_const_none;
+}
+STATIC MP_DEFINE_CONST_FUN_OBJ_1(mp_micropython_heap_dump_obj, mp_micropython_heap_dump);
+#endif
 #endif
 
 #if MICROPY_ENABLE_EMERGENCY_EXCEPTION_BUF && (MICROPY_EMERGENCY_EXCEPTION_BUF_SIZE == 0)
@@ -147,6 +175,38 @@ STATIC mp_obj_t mp_micropython_kbd_intr(mp_obj_t int_chr_in) {
 STATIC MP_DEFINE_CONST_FUN_OBJ_1(mp_micropython_kbd_intr_obj, mp_micropython_kbd_intr);
 #endif
 
+#if MICROPY_OPT_ATTR_CACHE
+STATIC mp_obj_t mp_micropython_attr_cache_stats(void) {
+    mp_obj_t tuple[2] = {
+        mp_obj_new_int_from_uint(MP_STATE_THREAD(attr_cache_hits)),
+        mp_obj_new_int_from_uint(MP_STATE_THREAD(attr_cache_misses)),
+    };
+    return mp_obj_new_tuple(2, tuple);
+}
+STATIC MP_DEFINE_CONST_FUN_OBJ_0(mp_micropython_attr_cache_stats_obj, mp_micropython_attr_cache_stats);
+#endif
+
+#if MICROPY_PY_MICROPYTHON_ALLOC_STATS
+STATIC mp_obj_t mp_micropython_alloc_stats(size_t n_args, const mp_obj_t *args) {
+    size_t max_lines = MICROPY_PY_MICROPYTHON_ALLOC_STATS_SITES;
+    if (n_args == 1) {
+        mp_int_t n = mp_obj_get_int(args[0]);
+        if (n < 0) {
+            mp_raise_ValueError(NULL);
+        }
+        max_lines = n;
+    }
+    return mp_alloc_stats(max_lines);
+}
+STATIC MP_DEFINE_CONST_FUN_OBJ_VAR_BETWEEN(mp_micropython_alloc_stats_obj, 0, 1, mp_micropython_alloc_stats);
+
+STATIC mp_obj_t mp_micropython_alloc_stats_reset(void) {
+    mp_alloc_stats_reset();
+    return mp_const_none;
+}
+STATIC MP_DEFINE_CONST_FUN_OBJ_0(mp_micropython_alloc_stats_reset_obj, mp_micropython_alloc_stats_reset);
+#endif
+
 #if MICROPY_ENABLE_SCHEDULER
 STATIC mp_obj_t mp_micropython_schedule(mp_obj_t function, mp_obj_t arg) {
     if (!mp_sched_schedule(function, arg)) {
@@ -163,6 +223,9 @@ STATIC const mp_rom_map_elem_t mp_module_micropython_globals_table[] = {
     #if MICROPY_ENABLE_COMPILER
     { MP_ROM_QSTR(MP_QSTR_opt_level), MP_ROM_PTR(&mp_micropython_opt_level_obj) },
     #endif
+    #if MICROPY_OPT_TIERED_NATIVE
+    { MP_ROM_QSTR(MP_QSTR_tier_threshold), MP_ROM_PTR(&mp_micropython_tier_threshold_obj) },
+    #endif
 #if MICROPY_PY_MICROPYTHON_MEM_INFO
 #if MICROPY_MEM_STATS
     { MP_ROM_QSTR(MP_QSTR_mem_total), MP_ROM_PTR(&mp_micropython_mem_total_obj) },
@@ -175,6 +238,10 @@ STATIC const mp_rom_map_elem_t mp_module_micropython_globals_table[] = {
     #if MICROPY_PY_MICROPYTHON_STACK_USE
     { MP_ROM_QSTR(MP_QSTR_stack_use), MP_ROM_PTR(&mp_micropython_stack_use_obj) },
     #endif
+    #if MICROPY_PY_MICROPYTHON_ALLOC_STATS
+    { MP_ROM_QSTR(MP_QSTR_alloc_stats), MP_ROM_PTR(&mp_micropython_alloc_stats_obj) },
+    { MP_ROM_QSTR(MP_QSTR_alloc_stats_reset), MP_ROM_PTR(&mp_micropython_alloc_stats_reset_obj) },
+    #endif
 #if MICROPY_ENABLE_EMERGENCY_EXCEPTION_BUF && (MICROPY_EMERGENCY_EXCEPTION_BUF_SIZE == 0)
     { MP_ROM_QSTR(MP_QSTR_alloc_emergency_exception_buf), MP_ROM_PTR(&mp_alloc_emergency_exception_buf_obj) },
 #endif
@@ -184,6 +251,9 @@ STATIC const mp_rom_map_elem_t mp_module_micropython_globals_table[] = {
     #if MICROPY_ENABLE_GC
     { MP_ROM_QSTR(MP_QSTR_heap_lock), MP_ROM_PTR(&mp_micropython_heap_lock_obj) },
     { MP_ROM_QSTR(MP_QSTR_heap_unlock), MP_ROM_PTR(&mp_micropython_heap_unlock_obj) },
+    #if MICROPY_PY_MICROPYTHON_HEAP_DUMP
+    { MP_ROM_QSTR(MP_QSTR_heap_dump), MP_ROM_PTR(&mp_micropython_heap_dump_obj) },
+    #endif
     #endif
     #if MICROPY_KBD_EXCEPTION
     { MP_ROM_QSTR(MP_QSTR_kbd_intr), MP_ROM_PTR(&mp_micropython_kbd_intr_obj) },
@@ -191,6 +261,9 @@ STATIC const mp_rom_map_elem_t mp_module_micropython_globals_table[] = {
     #if MICROPY_ENABLE_SCHEDULER
     { MP_ROM_QSTR(MP_QSTR_schedule), MP_ROM_PTR(&mp_micropython_schedule_obj) },
     #endif
+    #if MICROPY_OPT_ATTR_CACHE
+    { MP_ROM_QSTR(MP_QSTR_attr_cache_stats), MP_ROM_PTR(&mp_micropython_attr_cache_stats_obj) },
+    #endif
 };
 
 STATIC MP_DEFINE_CONST_DICT(mp_module_micropython_globals, mp_module_micropython_globals_table);
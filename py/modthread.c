@@ -165,6 +165,35 @@ STATIC void *thread_entry(void *args_in) {
     mp_stack_set_top(&ts + 1); // need to include ts in root-pointer scan
     mp_stack_set_limit(args->stack_size);
 
+    #if MICROPY_OPT_ATTR_CACHE
+    memset(ts.attr_cache, 0, sizeof(ts.attr_cache));
+    ts.attr_cache_hits = 0;
+    ts.attr_cache_misses = 0;
+    #endif
+    #if MICROPY_OPT_LOAD_GLOBAL_CACHE
+    memset(ts.load_global_cache, 0, sizeof(ts.load_global_cache));
+    #endif
+    #if MICROPY_GC_SKIP_TENURED
+    ts.gc_collect_young = false;
+    #endif
+    #if MICROPY_GC_INCREMENTAL_SWEEP
+    ts.gc_collect_lazy = false;
+    #endif
+    #if MICROPY_GC_THREAD_CACHE
+    memset(ts.gc_cache, 0, sizeof(ts.gc_cache));
+    #endif
+    #if MICROPY_OPT_STR_INDEX_CACHE
+    memset(ts.str_index_cache, 0, sizeof(ts.str_index_cache));
+    ts.str_index_cache_next = 0;
+    #endif
+    #if MICROPY_OPT_STR_FORMAT_CACHE
+    memset(ts.str_template_cache, 0, sizeof(ts.str_template_cache));
+    ts.str_template_cache_next = 0;
+    #endif
+    #if MICROPY_PY_SYS_SETTRACE || MICROPY_PY_MICROPYTHON_ALLOC_STATS
+    ts.current_code_state = NULL;
+    #endif
+
     #if MICROPY_ENABLE_PYSTACK
     // TODO threading and pystack is not fully supported, for now just make a small stack
     mp_obj_t mini_pystack[128];
@@ -159,6 +159,102 @@
 #define MICROPY_GC_ALLOC_THRESHOLD (1)
 #endif
 
+// Whether the GC can run minor collections which skip tenured objects.
+// Objects that survive a collection are tenured, and a minor collection only
+// frees objects allocated since the previous collection.  This is not a true
+// generational GC: there is no write barrier or remembered set, so instead of
+// tracing the tenured objects a minor collection scans all of their memory
+// linearly for references to young objects.  Its cost therefore still grows
+// with the tenured heap, and it saves the pointer chasing of tracing them and
+// the sweep outside the young blocks.  Automatic collections are minor, with
+// a full collection when a minor one doesn't free enough memory or when more
+// has been tenured than survived the last full collection; gc.collect() is
+// full.  Uses an extra bit per GC block.
+#ifndef MICROPY_GC_SKIP_TENURED
+#define MICROPY_GC_SKIP_TENURED (0)
+#endif
+
+// Whether the GC can sweep incrementally.  Collections triggered by an
+// allocation then only mark, and each later allocation sweeps a slice of the
+// heap, so the pause is the mark time rather than the mark and sweep time.
+// Only the sweep is incremental: marking is still stop-the-world, so the
+// longest pause grows with the amount of live data.  Without a write barrier
+// an incremental mark would need a final rescan of all marked objects, which
+// costs as much as marking.
+// Requires mp_hal_ticks_us, for gc.collect(budget_us=...).
+#ifndef MICROPY_GC_INCREMENTAL_SWEEP
+#define MICROPY_GC_INCREMENTAL_SWEEP (0)
+#endif
+
+// Number of GC blocks swept by each allocation while a sweep is in progress
+#ifndef MICROPY_GC_SWEEP_SLICE
+#define MICROPY_GC_SWEEP_SLICE (256)
+#endif
+
+// Whether the GC keeps an index of the runs of free blocks in each chunk of
+// 32 blocks, so allocations of several blocks can skip over the parts of a
+// fragmented heap where they don't fit.  The search is still linear, but in
+// chunks rather than blocks: it looks at one index entry per chunk and only
+// scans the blocks of chunks that may hold the run.  Uses 3 bytes per 32 GC
+// blocks.
+#ifndef MICROPY_GC_FREE_RUN_INDEX
+#define MICROPY_GC_FREE_RUN_INDEX (0)
+#endif
+
+// Whether the heap can be made of several regions of memory: the one given
+// to gc_init, and more added with gc_add, eg internal RAM and external RAM
+#ifndef MICROPY_GC_SPLIT_HEAP
+#define MICROPY_GC_SPLIT_HEAP (0)
+#endif
+
+// Allocations of at least this many bytes try the regions added with gc_add
+// before the one given to gc_init, so the latter is kept for small objects;
+// 0 to always try the regions in order
+#ifndef MICROPY_GC_SPLIT_HEAP_LARGE_ALLOC
+#define MICROPY_GC_SPLIT_HEAP_LARGE_ALLOC (0)
+#endif
+
+// Whether the heap grows when an allocation fails even after a collection.
+// The port must provide gc_try_add_heap(n_bytes), which calls gc_add with a
+// region big enough for the allocation and returns true, or returns false.
+#ifndef MICROPY_GC_SPLIT_HEAP_AUTO
+#define MICROPY_GC_SPLIT_HEAP_AUTO (0)
+#endif
+
+// Whether each thread keeps a cache of small free objects, so most small
+// allocations are served without taking the GC mutex.  The cache is filled
+// with MICROPY_GC_THREAD_CACHE_RUN objects at a time, for allocations of up
+// to MICROPY_GC_THREAD_CACHE_MAX_BLOCKS blocks without a finaliser.
+#ifndef MICROPY_GC_THREAD_CACHE
+#define MICROPY_GC_THREAD_CACHE (0)
+#endif
+
+#ifndef MICROPY_GC_THREAD_CACHE_MAX_BLOCKS
+#define MICROPY_GC_THREAD_CACHE_MAX_BLOCKS (2)
+#endif
+
+#ifndef MICROPY_GC_THREAD_CACHE_RUN
+#define MICROPY_GC_THREAD_CACHE_RUN (16)
+#endif
+
+// Whether the GC records the pause, bytes freed and heap use of each
+// collection, for gc.stats() and gc.callback().  Needs mp_hal_ticks_us.
+#ifndef MICROPY_GC_STATS
+#define MICROPY_GC_STATS (0)
+#endif
+
+// Number of recent collections that gc.stats() returns
+#ifndef MICROPY_GC_STATS_HISTORY
+#define MICROPY_GC_STATS_HISTORY (8)
+#endif
+
+// Whether the allocation threshold can be tuned after each collection to meet
+// a goal for the pause or for the share of time spent collecting, set by
+// gc.adaptive().  Needs MICROPY_GC_STATS and MICROPY_GC_ALLOC_THRESHOLD.
+#ifndef MICROPY_GC_ADAPTIVE_THRESHOLD
+#define MICROPY_GC_ADAPTIVE_THRESHOLD (0)
+#endif
+
 // Number of bytes to allocate initially when creating new chunks to store
 // interned string data.  Smaller numbers lead to more chunks being needed
 // and more wastage at the end of the chunk.  Larger numbers lead to wasted
@@ -247,6 +343,14 @@
 #define MICROPY_QSTR_BYTES_IN_HASH (2)
 #endif
 
+// Whether each qstr pool carries a hash index so that interning a string is
+// O(1) rather than a linear scan over all qstrs.  The index for the ROM pool
+// is generated by makeqstrdata.py and costs 2 bytes per slot of flash, with
+// at least 2 slots per qstr.
+#ifndef MICROPY_QSTR_HASH_INDEX
+#define MICROPY_QSTR_HASH_INDEX (0)
+#endif
+
 // Avoid using C stack when making Python function calls. C stack still
 // may be used if there's no free heap.
 #ifndef MICROPY_STACKLESS
@@ -465,12 +569,175 @@
 #define MICROPY_OPT_CACHE_MAP_LOOKUP_IN_BYTECODE (0)
 #endif
 
+// Whether to keep a small global cache of the last known position of a key in
+// any map.  This makes lookups in const (ROM) dicts, such as module globals and
+// type locals, O(1) on a hit instead of a linear search, while leaving the
+// tables in ROM.  Uses 2 * MICROPY_OPT_MAP_LOOKUP_CACHE_SIZE bytes of RAM.
+#ifndef MICROPY_OPT_MAP_LOOKUP_CACHE
+#define MICROPY_OPT_MAP_LOOKUP_CACHE (0)
+#endif
+
+// Whether instances of user classes store just the values of their attributes
+// while they are added in the same order as on other instances of the class,
+// with the names kept once in a key table shared by the class.  An instance
+// falls back to its own map when its attributes diverge from that order or one
+// is deleted.
+#ifndef MICROPY_OPT_INSTANCE_SHARED_KEYS
+#define MICROPY_OPT_INSTANCE_SHARED_KEYS (0)
+#endif
+
+// Whether str and bytes objects made at runtime with up to
+// MICROPY_OPT_STR_INLINE_MAX bytes of data keep the data in the same heap
+// block as the object, so they take one allocation instead of two.  A pointer
+// to such data does not keep the object alive.
+#ifndef MICROPY_OPT_STR_INLINE
+#define MICROPY_OPT_STR_INLINE (0)
+#endif
+
+// Maximum length of str/bytes data stored in the object itself
+#ifndef MICROPY_OPT_STR_INLINE_MAX
+#define MICROPY_OPT_STR_INLINE_MAX (16)
+#endif
+
+// Whether find_subbytes, which does substring search for str and bytes
+// methods and the "in" operator, uses memchr for 1-byte needles, Horspool for
+// short needles and the two-way algorithm for long ones, instead of comparing
+// the needle at each position of the haystack
+#ifndef MICROPY_OPT_STR_FIND_FAST
+#define MICROPY_OPT_STR_FIND_FAST (0)
+#endif
+
+// Whether to remember, for the last few long str objects that were indexed,
+// if they are pure ASCII and the byte offset of every
+// MICROPY_OPT_STR_INDEX_STRIDE'th character, so that indexing, slicing and
+// len() of a unicode str don't need to walk its UTF-8 data from the start.
+// Only has an effect with MICROPY_PY_BUILTINS_STR_UNICODE.
+#ifndef MICROPY_OPT_STR_INDEX_CACHE
+#define MICROPY_OPT_STR_INDEX_CACHE (0)
+#endif
+
+// Number of str objects in the index cache (per thread)
+#ifndef MICROPY_OPT_STR_INDEX_CACHE_SIZE
+#define MICROPY_OPT_STR_INDEX_CACHE_SIZE (4)
+#endif
+
+// Number of characters between the recorded offsets of a non-ASCII str; str
+// objects with fewer bytes than this are not cached
+#ifndef MICROPY_OPT_STR_INDEX_STRIDE
+#define MICROPY_OPT_STR_INDEX_STRIDE (32)
+#endif
+
+// Whether str.format and % formatting keep the last few patterns they were
+// given, parsed into literal text and fields, so that formatting with the same
+// pattern object again doesn't need to parse it
+#ifndef MICROPY_OPT_STR_FORMAT_CACHE
+#define MICROPY_OPT_STR_FORMAT_CACHE (0)
+#endif
+
+// Number of patterns in the format cache (per thread)
+#ifndef MICROPY_OPT_STR_FORMAT_CACHE_SIZE
+#define MICROPY_OPT_STR_FORMAT_CACHE_SIZE (8)
+#endif
+
+// Maximum number of names in the shared key table of a class; instances with
+// more attributes than this use their own map (at most 255)
+#ifndef MICROPY_OPT_INSTANCE_SHARED_KEYS_MAX
+#define MICROPY_OPT_INSTANCE_SHARED_KEYS_MAX (16)
+#endif
+
+// Number of entries in the map lookup cache
+#ifndef MICROPY_OPT_MAP_LOOKUP_CACHE_SIZE
+#define MICROPY_OPT_MAP_LOOKUP_CACHE_SIZE (128)
+#endif
+
+// Whether to cache where an attribute was found in the class hierarchy of a
+// user class, keyed on (type, attr).  This speeds up method lookups and loads
+// of class attributes, which otherwise search the locals dict of each class
+// in the MRO.  It is one direct-mapped cache shared by all lookup sites, not
+// an inline cache per site, which would need writable bytecode and a change
+// to the .mpy format.  Because an entry can't tell which classes a new key
+// would shadow it in, the cache is invalidated by a single version that is
+// bumped when a key is added to any class locals dict.  Uses about 5 words of
+// RAM per entry.
+#ifndef MICROPY_OPT_ATTR_CACHE
+#define MICROPY_OPT_ATTR_CACHE (0)
+#endif
+
+// Number of entries in the attribute cache
+#ifndef MICROPY_OPT_ATTR_CACHE_SIZE
+#define MICROPY_OPT_ATTR_CACHE_SIZE (64)
+#endif
+
+// Whether to cache the slot that loading a global name resolved to, in the
+// module's globals or in the builtins, keyed on (globals, name).  Builtins like
+// len and range otherwise need a lookup in the globals and then in the builtins
+// each time, and names in the globals need a full lookup in native code and
+// whenever the slot cached in the bytecode (see
+// MICROPY_OPT_CACHE_MAP_LOOKUP_IN_BYTECODE) misses.  The cache is invalidated
+// when a key is added to any module globals dict or its table is freed.
+#ifndef MICROPY_OPT_LOAD_GLOBAL_CACHE
+#define MICROPY_OPT_LOAD_GLOBAL_CACHE (0)
+#endif
+
+// Number of entries in the global load cache
+#ifndef MICROPY_OPT_LOAD_GLOBAL_CACHE_SIZE
+#define MICROPY_OPT_LOAD_GLOBAL_CACHE_SIZE (32)
+#endif
+
+// Whether maps can be flagged so that adding a key to them increments
+// MP_STATE_VM(map_version), for use in invalidating lookup caches
+#define MICROPY_MAP_VERSION (MICROPY_OPT_ATTR_CACHE || MICROPY_OPT_LOAD_GLOBAL_CACHE)
+
+// Whether to quicken bytecode: binary operations that are executed with two
+// small ints or two floats are rewritten in place to opcodes specialised for
+// those types, which revert to the generic opcode if the types change.  Only
+// bytecode on the GC heap is rewritten, so frozen bytecode is left untouched.
+// Requires MICROPY_ENABLE_GC.
+#ifndef MICROPY_OPT_QUICKEN
+#define MICROPY_OPT_QUICKEN (0)
+#endif
+
+// Whether hot bytecode functions can be recompiled to native code at runtime.
+// When enabled, the parse tree and scopes of compiled code are retained and
+// a function with a loop whose call and loop back-edge count reaches the
+// threshold set by micropython.tier_threshold() is recompiled with the native
+// emitter; the native version is used for subsequent calls.  Functions where
+// MICROPY_OPT_QUICKEN rewrote a binary op are not promoted, because the VM
+// runs those ops inline.  The parse tree of a module stays allocated until
+// all its functions with a loop have been tried.  Requires
+// MICROPY_EMIT_NATIVE and MICROPY_ENABLE_COMPILER.
+#ifndef MICROPY_OPT_TIERED_NATIVE
+#define MICROPY_OPT_TIERED_NATIVE (0)
+#endif
+
+// Initial value of the tiering threshold; 0 disables tiering until it is set
+#ifndef MICROPY_OPT_TIERED_NATIVE_THRESHOLD
+#define MICROPY_OPT_TIERED_NATIVE_THRESHOLD (0)
+#endif
+
 // Whether to use fast versions of bitwise operations (and, or, xor) when the
 // arguments are both positive.  Increases Thumb2 code size by about 250 bytes.
 #ifndef MICROPY_OPT_MPZ_BITWISE
 #define MICROPY_OPT_MPZ_BITWISE (0)
 #endif
 
+// Whether to use faster algorithms for large mpz integers: Karatsuba
+// multiplication, recursive division, divide-and-conquer conversion to and
+// from strings, and windowed modular exponentiation with Montgomery
+// multiplication for odd moduli.  Costs about 4k of code.
+#ifndef MICROPY_OPT_MPZ_FAST_LARGE
+#define MICROPY_OPT_MPZ_FAST_LARGE (0)
+#endif
+
+// Whether list.sort and sorted use an adaptive, stable merge sort (after
+// CPython's timsort) instead of quicksort.  It is O(n) on input that is
+// already sorted or reversed, calls the key function once per item, and
+// needs a temporary buffer of up to half the length of the list.  Costs
+// about 1.5k of code.
+#ifndef MICROPY_OPT_LIST_TIMSORT
+#define MICROPY_OPT_LIST_TIMSORT (0)
+#endif
+
 
 // Whether math.factorial is large, fast and recursive (1) or small and slow (0).
 #ifndef MICROPY_OPT_MATH_FACTORIAL
@@ -823,6 +1090,13 @@ typedef double mp_float_t;
 #define MICROPY_PY_DESCRIPTORS (0)
 #endif
 
+// Whether __slots__ gives instances of a class a fixed array of attributes,
+// instead of storage that can hold any attribute
+// Requires MICROPY_OPT_INSTANCE_SHARED_KEYS
+#ifndef MICROPY_PY_CLASS_SLOTS
+#define MICROPY_PY_CLASS_SLOTS (0)
+#endif
+
 // Whether to support class __delattr__ and __setattr__ methods
 // This costs some code size and makes store/delete of instance
 // attributes slower for the classes that use this feature
@@ -884,6 +1158,13 @@ typedef double mp_float_t;
 #define MICROPY_PY_BUILTINS_STR_SPLITLINES (0)
 #endif
 
+// Whether str and bytes provide isplit() and, with splitlines(), also
+// isplitlines(), which are like split() and splitlines() but return an
+// iterator that makes one piece at a time instead of a list of all of them
+#ifndef MICROPY_PY_BUILTINS_STR_ISPLIT
+#define MICROPY_PY_BUILTINS_STR_ISPLIT (0)
+#endif
+
 // Whether to support bytearray object
 #ifndef MICROPY_PY_BUILTINS_BYTEARRAY
 #define MICROPY_PY_BUILTINS_BYTEARRAY (1)
@@ -1069,6 +1350,23 @@ typedef double mp_float_t;
 #define MICROPY_PY_MICROPYTHON_STACK_USE (MICROPY_PY_MICROPYTHON_MEM_INFO)
 #endif
 
+// Whether to count heap allocations for each line of Python code that makes
+// them, and provide "micropython.alloc_stats" and "alloc_stats_reset"
+#ifndef MICROPY_PY_MICROPYTHON_ALLOC_STATS
+#define MICROPY_PY_MICROPYTHON_ALLOC_STATS (0)
+#endif
+
+// Number of call sites that the allocation profiler can record (power of 2)
+#ifndef MICROPY_PY_MICROPYTHON_ALLOC_STATS_SITES
+#define MICROPY_PY_MICROPYTHON_ALLOC_STATS_SITES (64)
+#endif
+
+// Whether to provide "micropython.heap_dump" function, to write a snapshot
+// of the heap for tools/heapdump.py
+#ifndef MICROPY_PY_MICROPYTHON_HEAP_DUMP
+#define MICROPY_PY_MICROPYTHON_HEAP_DUMP (0)
+#endif
+
 // Whether to provide "array" module. Note that large chunk of the
 // underlying code is shared with "bytearray" builtin type, so to
 // get real savings, it should be disabled too.
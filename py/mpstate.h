@@ -62,12 +62,32 @@ typedef struct _mp_sched_item_t {
     mp_obj_t arg;
 } mp_sched_item_t;
 
-// This structure hold information about the memory allocation system.
-typedef struct _mp_state_mem_t {
-    #if MICROPY_MEM_STATS
-    size_t total_bytes_allocated;
-    size_t current_bytes_allocated;
-    size_t peak_bytes_allocated;
+#if MICROPY_PY_MICROPYTHON_ALLOC_STATS
+// This structure holds the allocations made at one call site, being a
+// position in the bytecode of a function.
+typedef struct _mp_alloc_site_t {
+    mp_obj_t fun;
+    size_t offset;
+    size_t count;
+    size_t bytes;
+} mp_alloc_site_t;
+#endif
+
+#if MICROPY_GC_STATS
+// This structure holds the figures for one garbage collection.
+typedef struct _mp_gc_stats_t {
+    mp_uint_t pause_us;
+    size_t freed;
+    size_t used;
+    bool full;
+} mp_gc_stats_t;
+#endif
+
+// This structure holds the GC's tables for one region of memory used for the
+// heap.  With MICROPY_GC_SPLIT_HEAP there can be several of them, in a list.
+typedef struct _mp_state_mem_area_t {
+    #if MICROPY_GC_SPLIT_HEAP
+    struct _mp_state_mem_area_t *next;
     #endif
 
     byte *gc_alloc_table_start;
@@ -75,11 +95,47 @@ typedef struct _mp_state_mem_t {
     #if MICROPY_ENABLE_FINALISER
     byte *gc_finaliser_table_start;
     #endif
+    #if MICROPY_GC_SKIP_TENURED
+    byte *gc_old_table_start;
+    #endif
+    #if MICROPY_GC_FREE_RUN_INDEX
+    byte *gc_chunk_table_start;
+    #endif
     byte *gc_pool_start;
     byte *gc_pool_end;
 
+    size_t gc_last_free_atb_index;
+
+    #if MICROPY_GC_SKIP_TENURED
+    // range of blocks allocated since the last collection, as [lo, hi)
+    size_t gc_young_lo;
+    size_t gc_young_hi;
+    #endif
+
+    #if MICROPY_GC_INCREMENTAL_SWEEP
+    // range of blocks left to sweep after a lazy collection, as [block, end)
+    size_t gc_sweep_block;
+    size_t gc_sweep_end;
+    #endif
+} mp_state_mem_area_t;
+
+// This structure hold information about the memory allocation system.
+typedef struct _mp_state_mem_t {
+    #if MICROPY_MEM_STATS
+    size_t total_bytes_allocated;
+    size_t current_bytes_allocated;
+    size_t peak_bytes_allocated;
+    #endif
+
+    // the first region of the heap, given to gc_init
+    mp_state_mem_area_t area;
+
     int gc_stack_overflow;
     MICROPY_GC_STACK_ENTRY_TYPE gc_stack[MICROPY_ALLOC_GC_STACK_SIZE];
+    #if MICROPY_GC_SPLIT_HEAP
+    // the region of each block on gc_stack
+    mp_state_mem_area_t *gc_area_stack[MICROPY_ALLOC_GC_STACK_SIZE];
+    #endif
     uint16_t gc_lock_depth;
 
     // This variable controls auto garbage collection.  If set to 0 then the
@@ -92,18 +148,77 @@ typedef struct _mp_state_mem_t {
     size_t gc_alloc_threshold;
     #endif
 
-    size_t gc_last_free_atb_index;
+    #if MICROPY_GC_SKIP_TENURED
+    // blocks tenured since the last full collection, and blocks that
+    // survived that collection
+    size_t gc_tenured_blocks;
+    size_t gc_full_live_blocks;
+    size_t gc_survived_blocks;
+    // set during a minor collection
+    uint8_t gc_young_only;
+    #endif
+
+    #if MICROPY_GC_INCREMENTAL_SWEEP
+    // the region the sweep after a lazy collection is up to, or NULL if the
+    // sweep is complete
+    mp_state_mem_area_t *gc_sweep_area;
+    #endif
 
     #if MICROPY_PY_GC_COLLECT_RETVAL
     size_t gc_collected;
     #endif
 
+    #if MICROPY_GC_STATS
+    // the collection in progress: when it started, its pause once marked
+    // (its sweep may be done later), whether it's full and the blocks freed
+    mp_uint_t gc_stats_start_us;
+    mp_uint_t gc_stats_pause_us;
+    bool gc_stats_full;
+    size_t gc_stats_freed;
+    // when the last collection ended, to find the time spent between them
+    mp_uint_t gc_stats_end_us;
+    // totals since the stats were reset, and the most recent collections
+    size_t gc_stats_count;
+    mp_uint_t gc_stats_total_us;
+    mp_uint_t gc_stats_max_us;
+    mp_gc_stats_t gc_stats_history[MICROPY_GC_STATS_HISTORY];
+    #endif
+
+    #if MICROPY_GC_ADAPTIVE_THRESHOLD
+    // goals for the pause, and for the percentage of time spent collecting;
+    // 0 if not set
+    mp_uint_t gc_adapt_pause_us;
+    mp_uint_t gc_adapt_overhead;
+    #endif
+
     #if MICROPY_PY_THREAD && !MICROPY_PY_THREAD_GIL
     // This is a global mutex used to make the GC thread-safe.
     mp_thread_mutex_t gc_mutex;
     #endif
 } mp_state_mem_t;
 
+#if MICROPY_OPT_ATTR_CACHE
+// An entry in the attribute cache, see mp_obj_class_lookup in objtype.c
+typedef struct _mp_attr_cache_entry_t {
+    const mp_obj_type_t *type;
+    const mp_obj_type_t *found_type;
+    size_t version;
+    qstr attr;
+    uint16_t meth_offset;
+    uint16_t pos;
+} mp_attr_cache_entry_t;
+#endif
+
+#if MICROPY_OPT_LOAD_GLOBAL_CACHE
+// An entry in the global load cache, see mp_load_global in runtime.c
+typedef struct _mp_load_global_cache_entry_t {
+    const mp_map_t *globals;
+    mp_map_elem_t *elem;
+    size_t version;
+    qstr qst;
+} mp_load_global_cache_entry_t;
+#endif
+
 // This structure hold runtime and VM information.  It includes a section
 // which contains root pointers that must be scanned by the GC.
 typedef struct _mp_state_vm_t {
@@ -167,6 +282,16 @@ typedef struct _mp_state_vm_t {
     mp_obj_dict_t *mp_module_builtins_override_dict;
     #endif
 
+    #if MICROPY_GC_STATS && MICROPY_ENABLE_SCHEDULER
+    // scheduled after each garbage collection, set by gc.callback()
+    mp_obj_t gc_callback;
+    #endif
+
+    #if MICROPY_PY_MICROPYTHON_ALLOC_STATS
+    // allocation profile, which keeps the functions of its sites alive
+    mp_alloc_site_t alloc_sites[MICROPY_PY_MICROPYTHON_ALLOC_STATS_SITES];
+    #endif
+
     // include any root pointers defined by a port
     MICROPY_PORT_ROOT_POINTERS
 
@@ -208,11 +333,26 @@ typedef struct _mp_state_vm_t {
     mp_thread_mutex_t qstr_mutex;
     #endif
 
+    #if MICROPY_OPT_MAP_LOOKUP_CACHE
+    // See mp_map_lookup for how this cache is used
+    uint16_t map_lookup_cache[MICROPY_OPT_MAP_LOOKUP_CACHE_SIZE];
+    #endif
+
+    #if MICROPY_MAP_VERSION
+    size_t map_version;
+    #endif
+
     #if MICROPY_ENABLE_COMPILER
     mp_uint_t mp_optimise_value;
     #if MICROPY_EMIT_NATIVE
     uint8_t default_emit_opt; // one of MP_EMIT_OPT_xxx
     #endif
+    #if MICROPY_OPT_TIERED_NATIVE
+    mp_uint_t tier_threshold;
+    #if MICROPY_PY_THREAD && !MICROPY_PY_THREAD_GIL
+    mp_thread_mutex_t tier_mutex;
+    #endif
+    #endif
     #endif
 
     // size of the emergency exception buf, if it's dynamically allocated
@@ -248,6 +388,27 @@ typedef struct _mp_state_thread_t {
     uint8_t *pystack_cur;
     #endif
 
+    #if MICROPY_OPT_ATTR_CACHE
+    // per-thread so that it can be used without the GIL
+    mp_attr_cache_entry_t attr_cache[MICROPY_OPT_ATTR_CACHE_SIZE];
+    size_t attr_cache_hits;
+    size_t attr_cache_misses;
+    #endif
+
+    #if MICROPY_OPT_LOAD_GLOBAL_CACHE
+    mp_load_global_cache_entry_t load_global_cache[MICROPY_OPT_LOAD_GLOBAL_CACHE_SIZE];
+    #endif
+
+    #if MICROPY_GC_SKIP_TENURED
+    // set by gc_collect_young to request a minor collection from gc_collect
+    bool gc_collect_young;
+    #endif
+
+    #if MICROPY_GC_INCREMENTAL_SWEEP
+    // set to request that gc_collect leaves the sweep to later allocations
+    bool gc_collect_lazy;
+    #endif
+
     ////////////////////////////////////////////////////////////
     // START ROOT POINTER SECTION
     // Everything that needs GC scanning must start here, and
@@ -259,9 +420,29 @@ typedef struct _mp_state_thread_t {
 
     nlr_buf_t *nlr_top;
 
+    #if MICROPY_GC_THREAD_CACHE
+    // objects ready for gc_alloc to hand out, one list for each size in blocks,
+    // linked through their first word; being roots they stay allocated
+    void *gc_cache[MICROPY_GC_THREAD_CACHE_MAX_BLOCKS];
+    #endif
+
+    #if MICROPY_OPT_STR_INDEX_CACHE
+    // recently indexed str objects, see objstrunicode.c
+    struct _mp_str_index_t *str_index_cache[MICROPY_OPT_STR_INDEX_CACHE_SIZE];
+    size_t str_index_cache_next;
+    #endif
+
+    #if MICROPY_OPT_STR_FORMAT_CACHE
+    // recently used format patterns, see objstr.c
+    struct _mp_str_template_t *str_template_cache[MICROPY_OPT_STR_FORMAT_CACHE_SIZE];
+    size_t str_template_cache_next;
+    #endif
+
     #if MICROPY_PY_SYS_SETTRACE
     mp_obj_t prof_trace_callback;
     bool prof_callback_is_executing;
+    #endif
+    #if MICROPY_PY_SYS_SETTRACE || MICROPY_PY_MICROPYTHON_ALLOC_STATS
     struct _mp_code_state_t *current_code_state;
     #endif
 } mp_state_thread_t;
@@ -36,6 +36,21 @@
 #define DIG_MSB  (MPZ_LONG_1 << (DIG_SIZE - 1))
 #define DIG_BASE (MPZ_LONG_1 << DIG_SIZE)
 
+#if MICROPY_OPT_MPZ_FAST_LARGE
+// Numbers of digits above which the faster algorithms for large numbers are
+// used: for each factor of a multiplication, for the divisor and quotient of
+// a division, and for conversions to and from strings
+#ifndef MPZ_KARATSUBA_THRESHOLD
+#define MPZ_KARATSUBA_THRESHOLD (32)
+#endif
+#ifndef MPZ_DIV_THRESHOLD
+#define MPZ_DIV_THRESHOLD (64)
+#endif
+#ifndef MPZ_STR_THRESHOLD
+#define MPZ_STR_THRESHOLD (64)
+#endif
+#endif
+
 /*
  mpz is an arbitrary precision integer type with a public API.
 
@@ -617,6 +632,122 @@ STATIC void mpn_div(mpz_dig_t *num_dig, size_t *num_len, const mpz_dig_t *den_di
     }
 }
 
+#if MICROPY_OPT_MPZ_FAST_LARGE
+
+/* computes i += j, where i has ilen digits and j has jlen <= ilen digits
+   returns the carry out of i
+*/
+STATIC mpz_dig_t mpn_add_inpl(mpz_dig_t *idig, size_t ilen, const mpz_dig_t *jdig, size_t jlen) {
+    mpz_dbl_dig_t carry = 0;
+    size_t n = 0;
+    for (; n < jlen; ++n) {
+        carry += (mpz_dbl_dig_t)idig[n] + (mpz_dbl_dig_t)jdig[n];
+        idig[n] = carry & DIG_MASK;
+        carry >>= DIG_SIZE;
+    }
+    for (; carry != 0 && n < ilen; ++n) {
+        carry += (mpz_dbl_dig_t)idig[n];
+        idig[n] = carry & DIG_MASK;
+        carry >>= DIG_SIZE;
+    }
+    return carry;
+}
+
+/* computes i -= j, where i has ilen digits and j has jlen <= ilen digits
+   returns the borrow out of i
+*/
+STATIC mpz_dig_t mpn_sub_inpl(mpz_dig_t *idig, size_t ilen, const mpz_dig_t *jdig, size_t jlen) {
+    mpz_dbl_dig_signed_t borrow = 0;
+    size_t n = 0;
+    for (; n < jlen; ++n) {
+        borrow += (mpz_dbl_dig_t)idig[n] - (mpz_dbl_dig_t)jdig[n];
+        idig[n] = borrow & DIG_MASK;
+        borrow >>= DIG_SIZE; // signed shift
+    }
+    for (; borrow != 0 && n < ilen; ++n) {
+        borrow += (mpz_dbl_dig_t)idig[n];
+        idig[n] = borrow & DIG_MASK;
+        borrow >>= DIG_SIZE; // signed shift
+    }
+    return borrow != 0;
+}
+
+// number of digits of scratch memory needed by mpn_mul_kara for n-digit operands
+#define MPN_MUL_KARA_TMP(n) (4 * (n) + 12 * 8 * sizeof(size_t))
+
+/* computes i = j * k using Karatsuba's method, where j and k have n digits
+   writes 2n digits to i, which must not overlap j or k
+   tmp must have MPN_MUL_KARA_TMP(n) digits
+*/
+STATIC void mpn_mul_kara(mpz_dig_t *idig, const mpz_dig_t *jdig, const mpz_dig_t *kdig, size_t n, mpz_dig_t *tmp) {
+    if (n < MPZ_KARATSUBA_THRESHOLD) {
+        memset(idig, 0, 2 * n * sizeof(mpz_dig_t));
+        mpn_mul(idig, (mpz_dig_t *)jdig, n, (mpz_dig_t *)kdig, n);
+        return;
+    }
+
+    // split j = j1 * B^h + j0 and k = k1 * B^h + k0, where j1 and k1 have l digits
+    size_t h = n / 2;
+    size_t l = n - h;
+
+    // z0 = j0 * k0 and z2 = j1 * k1 go straight into the low and high half of i
+    mpn_mul_kara(idig, jdig, kdig, h, tmp);
+    mpn_mul_kara(idig + 2 * h, jdig + h, kdig + h, l, tmp);
+
+    // z1 = (j0 + j1) * (k0 + k1) - z0 - z2 = j0 * k1 + j1 * k0
+    mpz_dig_t *js = tmp;
+    mpz_dig_t *ks = js + l + 1;
+    mpz_dig_t *z1 = ks + l + 1;
+    memcpy(js, jdig + h, l * sizeof(mpz_dig_t));
+    js[l] = mpn_add_inpl(js, l, jdig, h);
+    memcpy(ks, kdig + h, l * sizeof(mpz_dig_t));
+    ks[l] = mpn_add_inpl(ks, l, kdig, h);
+    mpn_mul_kara(z1, js, ks, l + 1, z1 + 2 * (l + 1));
+    mpn_sub_inpl(z1, 2 * l + 2, idig, 2 * h);
+    mpn_sub_inpl(z1, 2 * l + 2, idig + 2 * h, 2 * l);
+
+    // z1 < B^(2l + 1), add it to the middle of i
+    mpn_add_inpl(idig + h, 2 * n - h, z1, 2 * l + 1);
+}
+
+/* computes i = j * k
+   returns number of digits in i
+   assumes enough memory in i; assumes i is zeroed; assumes normalised j, k
+   can have j, k point to same memory
+*/
+STATIC size_t mpn_mul_large(mpz_dig_t *idig, const mpz_dig_t *jdig, size_t jlen, const mpz_dig_t *kdig, size_t klen) {
+    if (jlen < klen) {
+        const mpz_dig_t *t = jdig;
+        jdig = kdig;
+        kdig = t;
+        size_t tl = jlen;
+        jlen = klen;
+        klen = tl;
+    }
+    if (klen < MPZ_KARATSUBA_THRESHOLD) {
+        return mpn_mul(idig, (mpz_dig_t *)jdig, jlen, (mpz_dig_t *)kdig, klen);
+    }
+
+    // multiply k by each klen-digit chunk of j and add the products into i
+    size_t tmp_len = 2 * klen + MPN_MUL_KARA_TMP(klen);
+    mpz_dig_t *prod = m_new(mpz_dig_t, tmp_len);
+    for (size_t off = 0; off < jlen; off += klen) {
+        size_t n = MIN(klen, jlen - off);
+        if (n == klen) {
+            mpn_mul_kara(prod, jdig + off, kdig, klen, prod + 2 * klen);
+        } else {
+            memset(prod, 0, (klen + n) * sizeof(mpz_dig_t));
+            mpn_mul_large(prod, kdig, klen, jdig + off, mpn_remove_trailing_zeros((mpz_dig_t *)jdig + off, (mpz_dig_t *)jdig + off + n));
+        }
+        mpn_add_inpl(idig + off, jlen + klen - off, prod, klen + n);
+    }
+    m_del(mpz_dig_t, prod, tmp_len);
+
+    return mpn_remove_trailing_zeros(idig, idig + jlen + klen);
+}
+
+#endif
+
 #define MIN_ALLOC (2)
 
 void mpz_init_zero(mpz_t *z) {
@@ -840,6 +971,97 @@ typedef uint32_t mp_float_int_t;
 }
 #endif
 
+#if MICROPY_OPT_MPZ_FAST_LARGE
+
+// Conversions to and from strings of more than MPZ_STR_THRESHOLD digits are
+// split recursively at powers base ** (chunk << k) of the base, so they take
+// a few multiplications or divisions of large numbers rather than one of a
+// large number by a digit for each character.
+
+// returns the number of characters in a leaf of the recursion, whose value
+// fits in MPZ_STR_THRESHOLD / 2 digits
+STATIC size_t mpz_str_chunk(unsigned int base) {
+    size_t bits = 0;
+    for (unsigned int b = base - 1; b != 0; b >>= 1) {
+        ++bits;
+    }
+    return MPZ_STR_THRESHOLD / 2 * DIG_SIZE / bits;
+}
+
+// initialises pows[0..n) with pows[k] = base ** (chunk << k)
+STATIC void mpz_str_pows(mpz_t *pows, size_t n, unsigned int base, size_t chunk) {
+    mpz_t b, e;
+    mpz_dig_t b_dig[MPZ_NUM_DIG_FOR_INT];
+    mpz_dig_t e_dig[MPZ_NUM_DIG_FOR_INT];
+    mpz_init_fixed_from_int(&b, b_dig, MPZ_NUM_DIG_FOR_INT, base);
+    mpz_init_fixed_from_int(&e, e_dig, MPZ_NUM_DIG_FOR_INT, chunk);
+    for (size_t k = 0; k < n; ++k) {
+        mpz_init_zero(&pows[k]);
+        if (k == 0) {
+            mpz_pow_inpl(&pows[0], &b, &e);
+        } else {
+            mpz_mul_inpl(&pows[k], &pows[k - 1], &pows[k - 1]);
+        }
+    }
+}
+
+STATIC mp_uint_t mpz_char_to_digit(mp_uint_t v) {
+    if ('0' <= v && v <= '9') {
+        return v - '0';
+    } else if ('A' <= v && v <= 'Z') {
+        return v - ('A' - 10);
+    } else if ('a' <= v && v <= 'z') {
+        return v - ('a' - 10);
+    }
+    return 36;
+}
+
+/* sets z to the value of the n digits at str, where n <= chunk << k
+   and pows[j] = base ** (chunk << j)
+*/
+STATIC void mpz_set_from_str_rec(mpz_t *z, const char *str, size_t n, unsigned int base, const mpz_t *pows, size_t k, size_t chunk) {
+    if (n <= chunk) {
+        mpz_need_dig(z, n * 8 / DIG_SIZE + 1);
+        z->neg = 0;
+        z->len = 0;
+        for (; n > 0; --n, ++str) {
+            z->len = mpn_mul_dig_add_dig(z->dig, z->len, base, mpz_char_to_digit(*str));
+        }
+        return;
+    }
+
+    // z = hi * base ** lo_n + lo, where lo_n is the largest chunk << j below n
+    while ((chunk << (k - 1)) >= n) {
+        --k;
+    }
+    size_t lo_n = chunk << (k - 1);
+    mpz_t lo;
+    mpz_init_zero(&lo);
+    mpz_set_from_str_rec(z, str, n - lo_n, base, pows, k - 1, chunk);
+    mpz_set_from_str_rec(&lo, str + n - lo_n, lo_n, base, pows, k - 1, chunk);
+    mpz_mul_inpl(z, z, &pows[k - 1]);
+    mpz_add_inpl(z, z, &lo);
+    mpz_deinit(&lo);
+}
+
+// sets z to the value of the n digits at str, for large n
+STATIC void mpz_set_from_str_large(mpz_t *z, const char *str, size_t n, unsigned int base) {
+    size_t chunk = mpz_str_chunk(base);
+    size_t k = 0;
+    while ((chunk << k) < n) {
+        ++k;
+    }
+    mpz_t *pows = m_new(mpz_t, k);
+    mpz_str_pows(pows, k, base, chunk);
+    mpz_set_from_str_rec(z, str, n, base, pows, k, chunk);
+    for (size_t i = 0; i < k; ++i) {
+        mpz_deinit(&pows[i]);
+    }
+    m_del(mpz_t, pows, k);
+}
+
+#endif
+
 // returns number of bytes from str that were processed
 size_t mpz_set_from_str(mpz_t *z, const char *str, size_t len, bool neg, unsigned int base) {
     assert(base <= 36);
@@ -856,6 +1078,19 @@ size_t mpz_set_from_str(mpz_t *z, const char *str, size_t len, bool neg, unsigne
     }
 
     z->len = 0;
+
+    #if MICROPY_OPT_MPZ_FAST_LARGE
+    for (; cur < top && mpz_char_to_digit(*cur) < base; ++cur) {
+    }
+    if ((size_t)(cur - str) > 2 * mpz_str_chunk(base)) {
+        mpz_set_from_str_large(z, str, cur - str, base);
+        z->neg = neg;
+        return cur - str;
+    }
+    top = cur;
+    cur = str;
+    #endif
+
     for (; cur < top; ++cur) { // XXX UTF8 next char
         //mp_uint_t v = char_to_numeric(cur#); // XXX UTF8 get char
         mp_uint_t v = *cur;
@@ -1314,7 +1549,11 @@ void mpz_mul_inpl(mpz_t *dest, const mpz_t *lhs, const mpz_t *rhs) {
 
     mpz_need_dig(dest, lhs->len + rhs->len); // min mem l+r-1, max mem l+r
     memset(dest->dig, 0, dest->alloc * sizeof(mpz_dig_t));
+    #if MICROPY_OPT_MPZ_FAST_LARGE
+    dest->len = mpn_mul_large(dest->dig, lhs->dig, lhs->len, rhs->dig, rhs->len);
+    #else
     dest->len = mpn_mul(dest->dig, lhs->dig, lhs->len, rhs->dig, rhs->len);
+    #endif
 
     if (lhs->neg == rhs->neg) {
         dest->neg = 0;
@@ -1359,6 +1598,372 @@ void mpz_pow_inpl(mpz_t *dest, const mpz_t *lhs, const mpz_t *rhs) {
     mpz_free(n);
 }
 
+#if MICROPY_OPT_MPZ_FAST_LARGE
+
+#define MPZ_BIT(z, i) (((z)->dig[(i) / DIG_SIZE] >> ((i) % DIG_SIZE)) & 1)
+
+// returns the number of bits needed to represent the absolute value of z
+STATIC size_t mpz_bit_length(const mpz_t *z) {
+    if (z->len == 0) {
+        return 0;
+    }
+    size_t n = (z->len - 1) * DIG_SIZE;
+    for (mpz_dig_t d = z->dig[z->len - 1]; d != 0; d >>= 1) {
+        ++n;
+    }
+    return n;
+}
+
+/* computes dest = the low n bits of src, for non-negative src
+   can have dest, src the same
+*/
+STATIC void mpz_low_bits(mpz_t *dest, const mpz_t *src, size_t n) {
+    size_t len = MIN(src->len, (n + DIG_SIZE - 1) / DIG_SIZE);
+    mpz_need_dig(dest, len);
+    memmove(dest->dig, src->dig, len * sizeof(mpz_dig_t));
+    if (len * DIG_SIZE > n) {
+        dest->dig[len - 1] &= ((mpz_dig_t)1 << (n % DIG_SIZE)) - 1;
+    }
+    dest->len = mpn_remove_trailing_zeros(dest->dig, dest->dig + len);
+    dest->neg = 0;
+}
+
+/* computes q, r such that q * b + r = a, for non-negative a and positive b
+   uses schoolbook division; q, r can't be the same as a, b
+*/
+STATIC void mpz_divmod_school(mpz_t *q, mpz_t *r, const mpz_t *a, const mpz_t *b) {
+    mpz_need_dig(q, a->len + 1);
+    memset(q->dig, 0, (a->len + 1) * sizeof(mpz_dig_t));
+    q->len = 0;
+    q->neg = 0;
+    mpz_need_dig(r, a->len + 1);
+    mpz_set(r, a);
+    mpn_div(r->dig, &r->len, b->dig, b->len, q->dig, &q->len);
+}
+
+/* The functions below implement the recursive division of Burnikel and
+   Ziegler, in the form used by CPython's _pylong module.  Dividing a 2n-bit
+   number by an n-bit one takes two divisions of 3n/2 bits by n, each of
+   which takes one division of n bits by n/2 and a multiplication, so with
+   Karatsuba multiplication the whole is sub-quadratic.
+*/
+
+STATIC void mpz_div2n1n(mpz_t *q, mpz_t *r, const mpz_t *a, const mpz_t *b, size_t n);
+
+/* computes q, r for (a12 * 2^n + a3) / b, where b = b1 * 2^n + b2 and the
+   quotient is known to be less than 2^n; q, r can't be the same as any input
+*/
+STATIC void mpz_div3n2n(mpz_t *q, mpz_t *r, const mpz_t *a12, const mpz_t *a3,
+    const mpz_t *b, const mpz_t *b1, const mpz_t *b2, size_t n) {
+    mpz_t one;
+    mpz_dig_t one_dig[MPZ_NUM_DIG_FOR_INT];
+    mpz_init_fixed_from_int(&one, one_dig, MPZ_NUM_DIG_FOR_INT, 1);
+    mpz_t t;
+    mpz_init_zero(&t);
+
+    // estimate q from the top digits
+    mpz_shr_inpl(&t, a12, n);
+    if (mpz_cmp(&t, b1) == 0) {
+        // q = 2^n - 1, r = a12 - b1 * 2^n + b1
+        mpz_shl_inpl(q, &one, n);
+        mpz_sub_inpl(q, q, &one);
+        mpz_shl_inpl(&t, b1, n);
+        mpz_sub_inpl(r, a12, &t);
+        mpz_add_inpl(r, r, b1);
+    } else {
+        mpz_div2n1n(q, r, a12, b1, n);
+    }
+
+    // r = r * 2^n + a3 - q * b2, then correct q, which is at most 2 too large
+    mpz_shl_inpl(r, r, n);
+    mpz_add_inpl(r, r, a3);
+    mpz_mul_inpl(&t, q, b2);
+    mpz_sub_inpl(r, r, &t);
+    while (mpz_is_neg(r)) {
+        mpz_sub_inpl(q, q, &one);
+        mpz_add_inpl(r, r, b);
+    }
+
+    mpz_deinit(&t);
+}
+
+/* computes q, r for a / b, where b has exactly n bits and a < 2^n * b
+   q, r can't be the same as a, b
+*/
+STATIC void mpz_div2n1n(mpz_t *q, mpz_t *r, const mpz_t *a, const mpz_t *b, size_t n) {
+    if (mpz_bit_length(a) <= n + MPZ_DIV_THRESHOLD * DIG_SIZE) {
+        mpz_divmod_school(q, r, a, b);
+        return;
+    }
+
+    mpz_t a_pad, b_pad, b1, b2, a12, a3, q1, r1;
+    mpz_init_zero(&a_pad);
+    mpz_init_zero(&b_pad);
+    mpz_init_zero(&b1);
+    mpz_init_zero(&b2);
+    mpz_init_zero(&a12);
+    mpz_init_zero(&a3);
+    mpz_init_zero(&q1);
+    mpz_init_zero(&r1);
+
+    // make n even
+    bool pad = n & 1;
+    if (pad) {
+        mpz_shl_inpl(&a_pad, a, 1);
+        mpz_shl_inpl(&b_pad, b, 1);
+        a = &a_pad;
+        b = &b_pad;
+        ++n;
+    }
+
+    // split b into halves and a into quarters, and divide the top three
+    // quarters of a and then the remainder with the last quarter
+    size_t half = n / 2;
+    mpz_shr_inpl(&b1, b, half);
+    mpz_low_bits(&b2, b, half);
+    mpz_shr_inpl(&a12, a, n);
+    mpz_shr_inpl(&a3, a, half);
+    mpz_low_bits(&a3, &a3, half);
+    mpz_div3n2n(&q1, &r1, &a12, &a3, b, &b1, &b2, half);
+    mpz_low_bits(&a3, a, half);
+    mpz_div3n2n(q, r, &r1, &a3, b, &b1, &b2, half);
+
+    // q = q1 * 2^half + q2
+    mpz_shl_inpl(&q1, &q1, half);
+    mpz_add_inpl(q, q, &q1);
+    if (pad) {
+        mpz_shr_inpl(r, r, 1);
+    }
+
+    mpz_deinit(&a_pad);
+    mpz_deinit(&b_pad);
+    mpz_deinit(&b1);
+    mpz_deinit(&b2);
+    mpz_deinit(&a12);
+    mpz_deinit(&a3);
+    mpz_deinit(&q1);
+    mpz_deinit(&r1);
+}
+
+/* computes q, r such that q * |b| + r = |a|, by splitting a into chunks as
+   long as b and dividing each, with the remainder so far, using mpz_div2n1n
+   r can be the same as a; q can't be the same as a, b
+*/
+STATIC void mpz_divmod_large(mpz_t *q, mpz_t *r, const mpz_t *a, const mpz_t *b) {
+    mpz_t aa, bb, t, qi, ri;
+    mpz_init_zero(&aa);
+    mpz_init_zero(&bb);
+    mpz_init_zero(&t);
+    mpz_init_zero(&qi);
+    mpz_init_zero(&ri);
+
+    // normalise b so that the top bit of its top digit is set
+    size_t shift = 0;
+    for (mpz_dig_t d = b->dig[b->len - 1]; (d & DIG_MSB) == 0; d <<= 1) {
+        ++shift;
+    }
+    mpz_shl_inpl(&aa, a, shift);
+    aa.neg = 0;
+    mpz_shl_inpl(&bb, b, shift);
+    bb.neg = 0;
+
+    size_t nd = bb.len;
+    size_t n_chunks = (aa.len + nd - 1) / nd;
+    mpz_need_dig(q, n_chunks * nd);
+    memset(q->dig, 0, n_chunks * nd * sizeof(mpz_dig_t));
+    mpz_need_dig(&t, 2 * nd);
+    for (size_t i = n_chunks; i-- > 0;) {
+        // t = ri * B^nd + chunk i of a, which is less than bb * B^nd
+        size_t clen = MIN(nd, aa.len - i * nd);
+        memset(t.dig, 0, 2 * nd * sizeof(mpz_dig_t));
+        memcpy(t.dig, aa.dig + i * nd, clen * sizeof(mpz_dig_t));
+        memcpy(t.dig + nd, ri.dig, ri.len * sizeof(mpz_dig_t));
+        t.len = mpn_remove_trailing_zeros(t.dig, t.dig + 2 * nd);
+        mpz_div2n1n(&qi, &ri, &t, &bb, nd * DIG_SIZE);
+        memcpy(q->dig + i * nd, qi.dig, qi.len * sizeof(mpz_dig_t));
+    }
+    q->len = mpn_remove_trailing_zeros(q->dig, q->dig + n_chunks * nd);
+    q->neg = 0;
+    mpz_shr_inpl(r, &ri, shift);
+
+    mpz_deinit(&aa);
+    mpz_deinit(&bb);
+    mpz_deinit(&t);
+    mpz_deinit(&qi);
+    mpz_deinit(&ri);
+}
+
+#endif
+
+#if MICROPY_OPT_MPZ_FAST_LARGE
+
+// state for mpz_pow3_inpl: the modulus and, if it's odd and positive, what
+// is needed to multiply with Montgomery's method
+typedef struct _mpz_pow3_t {
+    const mpz_t *mod;
+    bool mont;
+    mpz_dig_t minv; // -1 / mod modulo the digit base
+    mpz_t t;
+    mpz_t quo;
+} mpz_pow3_t;
+
+/* computes dest = lhs * rhs % mod, or lhs * rhs / B^len(mod) % mod with Montgomery
+   multiplication, which replaces the division by a cheaper reduction
+   can have dest, lhs, rhs the same
+*/
+STATIC void mpz_pow3_mul(mpz_pow3_t *p, mpz_t *dest, const mpz_t *lhs, const mpz_t *rhs) {
+    if (!p->mont) {
+        mpz_mul_inpl(dest, lhs, rhs);
+        mpz_divmod_inpl(&p->quo, dest, dest, p->mod);
+        return;
+    }
+
+    const mpz_dig_t *mdig = p->mod->dig;
+    size_t n = p->mod->len;
+    mpz_dig_t *tdig = p->t.dig;
+    memset(tdig, 0, (2 * n + 1) * sizeof(mpz_dig_t));
+    if (lhs->len > 0 && rhs->len > 0) {
+        mpn_mul_large(tdig, lhs->dig, lhs->len, rhs->dig, rhs->len);
+    }
+
+    // add a multiple of mod to t that clears its low n digits, one at a time
+    for (size_t i = 0; i < n; ++i, ++tdig) {
+        mpz_dig_t u = ((mpz_dbl_dig_t)tdig[0] * p->minv) & DIG_MASK;
+        mpz_dbl_dig_t carry = 0;
+        for (size_t j = 0; j < n; ++j) {
+            carry += (mpz_dbl_dig_t)tdig[j] + (mpz_dbl_dig_t)u * mdig[j]; // will never overflow so long as DIG_SIZE <= 8*sizeof(mpz_dbl_dig_t)/2
+            tdig[j] = carry & DIG_MASK;
+            carry >>= DIG_SIZE;
+        }
+        for (mpz_dig_t *td = tdig + n; carry != 0; ++td) {
+            carry += *td;
+            *td = carry & DIG_MASK;
+            carry >>= DIG_SIZE;
+        }
+    }
+
+    // what's left is less than 2 * mod
+    size_t len = mpn_remove_trailing_zeros(tdig, tdig + n + 1);
+    if (mpn_cmp(tdig, len, mdig, n) >= 0) {
+        len = mpn_sub(tdig, tdig, len, mdig, n);
+    }
+    mpz_need_dig(dest, len);
+    memcpy(dest->dig, tdig, len * sizeof(mpz_dig_t));
+    dest->len = len;
+    dest->neg = 0;
+}
+
+/* computes dest = (lhs ** rhs) % mod
+   can have dest, lhs, rhs the same; mod can't be the same as dest
+*/
+void mpz_pow3_inpl(mpz_t *dest, const mpz_t *lhs, const mpz_t *rhs, const mpz_t *mod) {
+    if (lhs->len == 0 || rhs->neg != 0 || (mod->len == 1 && mod->dig[0] == 1)) {
+        mpz_set_from_int(dest, 0);
+        return;
+    }
+
+    if (rhs->len == 0) {
+        // 1 % mod, which is negative for a negative mod
+        mpz_set_from_int(dest, 1);
+        if (mod->neg) {
+            mpz_add_inpl(dest, dest, mod);
+        }
+        return;
+    }
+
+    mpz_pow3_t p;
+    p.mod = mod;
+    p.mont = !mod->neg && (mod->dig[0] & 1) != 0;
+    mpz_init_zero(&p.t);
+    mpz_init_zero(&p.quo);
+    mpz_t e, acc;
+    mpz_init_zero(&e);
+    mpz_init_zero(&acc);
+    mpz_set(&e, rhs);
+
+    // use windows of up to k bits of the exponent, for which the odd powers
+    // x^1, x^3, ..., x^(2^k - 1) of x = lhs % mod are computed first
+    size_t bits = mpz_bit_length(&e);
+    size_t k = bits > 671 ? 6 : bits > 239 ? 5 : bits > 79 ? 4 : bits > 23 ? 3 : 1;
+    size_t n_table = (size_t)1 << (k - 1);
+    mpz_t *table = m_new(mpz_t, n_table);
+    for (size_t i = 0; i < n_table; ++i) {
+        mpz_init_zero(&table[i]);
+    }
+    mpz_divmod_inpl(&p.quo, &table[0], lhs, mod);
+    if (p.mont) {
+        // work with x * B^len(mod) % mod instead of x
+        mpz_shl_inpl(&table[0], &table[0], mod->len * DIG_SIZE);
+        mpz_divmod_inpl(&p.quo, &table[0], &table[0], mod);
+        mpz_need_dig(&p.t, 2 * mod->len + 1);
+        // Newton's iteration for 1 / mod, doubling the correct bits each time
+        mpz_dbl_dig_t inv = mod->dig[0];
+        for (int i = 0; i < 5; ++i) {
+            inv = (inv * (2 - mod->dig[0] * inv)) & DIG_MASK;
+        }
+        p.minv = (0 - inv) & DIG_MASK;
+    }
+    if (n_table > 1) {
+        mpz_pow3_mul(&p, &acc, &table[0], &table[0]);
+        for (size_t i = 1; i < n_table; ++i) {
+            mpz_pow3_mul(&p, &table[i], &table[i - 1], &acc);
+        }
+    }
+
+    // go through the exponent from the top, squaring for each bit and
+    // multiplying by the table for each window that starts and ends with a 1
+    bool first = true;
+    for (mp_int_t i = bits - 1; i >= 0;) {
+        if (!MPZ_BIT(&e, i)) {
+            mpz_pow3_mul(&p, &acc, &acc, &acc);
+            --i;
+            continue;
+        }
+        mp_int_t j = i - (mp_int_t)k + 1;
+        if (j < 0) {
+            j = 0;
+        }
+        while (!MPZ_BIT(&e, j)) {
+            ++j;
+        }
+        size_t w = 0;
+        for (mp_int_t b = i; b >= j; --b) {
+            w = (w << 1) | MPZ_BIT(&e, b);
+            if (!first) {
+                mpz_pow3_mul(&p, &acc, &acc, &acc);
+            }
+        }
+        if (first) {
+            mpz_set(&acc, &table[w >> 1]);
+            first = false;
+        } else {
+            mpz_pow3_mul(&p, &acc, &acc, &table[w >> 1]);
+        }
+        i = j - 1;
+    }
+
+    if (p.mont) {
+        // convert back from the Montgomery form
+        mpz_t one;
+        mpz_dig_t one_dig[MPZ_NUM_DIG_FOR_INT];
+        mpz_init_fixed_from_int(&one, one_dig, MPZ_NUM_DIG_FOR_INT, 1);
+        mpz_pow3_mul(&p, dest, &acc, &one);
+    } else {
+        mpz_set(dest, &acc);
+    }
+
+    for (size_t i = 0; i < n_table; ++i) {
+        mpz_deinit(&table[i]);
+    }
+    m_del(mpz_t, table, n_table);
+    mpz_deinit(&p.t);
+    mpz_deinit(&p.quo);
+    mpz_deinit(&e);
+    mpz_deinit(&acc);
+}
+
+#else
+
 /* computes dest = (lhs ** rhs) % mod
    can have dest, lhs, rhs the same; mod can't be the same as dest
 */
@@ -1371,6 +1976,10 @@ void mpz_pow3_inpl(mpz_t *dest, const mpz_t *lhs, const mpz_t *rhs, const mpz_t
     mpz_set_from_int(dest, 1);
 
     if (rhs->len == 0) {
+        // 1 % mod, which is negative for a negative mod
+        if (mod->neg) {
+            mpz_add_inpl(dest, dest, mod);
+        }
         return;
     }
 
@@ -1396,6 +2005,8 @@ void mpz_pow3_inpl(mpz_t *dest, const mpz_t *lhs, const mpz_t *rhs, const mpz_t
     mpz_free(n);
 }
 
+#endif
+
 #if 0
 these functions are unused
 
@@ -1486,12 +2097,21 @@ mpz_t *mpz_lcm(const mpz_t *z1, const mpz_t *z2) {
 void mpz_divmod_inpl(mpz_t *dest_quo, mpz_t *dest_rem, const mpz_t *lhs, const mpz_t *rhs) {
     assert(!mpz_is_zero(rhs));
 
-    mpz_need_dig(dest_quo, lhs->len + 1); // +1 necessary?
-    memset(dest_quo->dig, 0, (lhs->len + 1) * sizeof(mpz_dig_t));
-    dest_quo->len = 0;
-    mpz_need_dig(dest_rem, lhs->len + 1); // +1 necessary?
-    mpz_set(dest_rem, lhs);
-    mpn_div(dest_rem->dig, &dest_rem->len, rhs->dig, rhs->len, dest_quo->dig, &dest_quo->len);
+    #if MICROPY_OPT_MPZ_FAST_LARGE
+    if (rhs->len >= MPZ_DIV_THRESHOLD && lhs->len >= rhs->len + MPZ_DIV_THRESHOLD) {
+        bool neg = lhs->neg;
+        mpz_divmod_large(dest_quo, dest_rem, lhs, rhs);
+        dest_rem->neg = neg;
+    } else
+    #endif
+    {
+        mpz_need_dig(dest_quo, lhs->len + 1); // +1 necessary?
+        memset(dest_quo->dig, 0, (lhs->len + 1) * sizeof(mpz_dig_t));
+        dest_quo->len = 0;
+        mpz_need_dig(dest_rem, lhs->len + 1); // +1 necessary?
+        mpz_set(dest_rem, lhs);
+        mpn_div(dest_rem->dig, &dest_rem->len, rhs->dig, rhs->len, dest_quo->dig, &dest_quo->len);
+    }
 
     // check signs and do Python style modulo
     if (lhs->neg != rhs->neg) {
@@ -1647,6 +2267,116 @@ char *mpz_as_str(const mpz_t *i, unsigned int base) {
 }
 #endif
 
+#if MICROPY_OPT_MPZ_FAST_LARGE
+
+/* writes the digits of x, which is at most MPZ_STR_THRESHOLD / 2 digits long,
+   at str least significant first and returns how many were written; if pad is
+   not zero then exactly pad digits are written, including leading zeros
+*/
+STATIC size_t mpz_as_str_small(const mpz_t *x, size_t pad, unsigned int base, char base_char, char *str) {
+    mpz_dig_t dig[MPZ_STR_THRESHOLD / 2 + 1];
+    size_t len = x->len;
+    memcpy(dig, x->dig, len * sizeof(mpz_dig_t));
+    char *s = str;
+    while (pad != 0 ? (size_t)(s - str) < pad : len != 0) {
+        mpz_dbl_dig_t a = 0;
+        for (mpz_dig_t *d = dig + len; --d >= dig;) {
+            a = (a << DIG_SIZE) | *d;
+            *d = a / base;
+            a %= base;
+        }
+        len = mpn_remove_trailing_zeros(dig, dig + len);
+        a += '0';
+        if (a > '9') {
+            a += base_char - '9' - 1;
+        }
+        *s++ = a;
+    }
+    return s - str;
+}
+
+/* writes x, which is less than pows[k] = base ** (chunk << k), as exactly
+   chunk << k digits at str, most significant first and padded with zeros
+*/
+STATIC void mpz_as_str_rec(const mpz_t *x, const mpz_t *pows, size_t k, size_t chunk, unsigned int base, char base_char, char *str) {
+    if (k == 0) {
+        mpz_as_str_small(x, chunk, base, base_char, str);
+        for (char *u = str, *v = str + chunk - 1; u < v; ++u, --v) {
+            char temp = *u;
+            *u = *v;
+            *v = temp;
+        }
+        return;
+    }
+
+    mpz_t hi, lo;
+    mpz_init_zero(&hi);
+    mpz_init_zero(&lo);
+    mpz_divmod_inpl(&hi, &lo, x, &pows[k - 1]);
+    mpz_as_str_rec(&hi, pows, k - 1, chunk, base, base_char, str);
+    mpz_deinit(&hi);
+    mpz_as_str_rec(&lo, pows, k - 1, chunk, base, base_char, str + (chunk << (k - 1)));
+    mpz_deinit(&lo);
+}
+
+/* writes x, which is positive and less than pows[k], at str most significant
+   first and without leading zeros, and returns the end of the digits
+*/
+STATIC char *mpz_as_str_top(const mpz_t *x, const mpz_t *pows, size_t k, size_t chunk, unsigned int base, char base_char, char *str) {
+    while (k > 0 && mpz_cmp(x, &pows[k - 1]) < 0) {
+        --k;
+    }
+    if (k == 0) {
+        char *end = str + mpz_as_str_small(x, 0, base, base_char, str);
+        for (char *u = str, *v = end - 1; u < v; ++u, --v) {
+            char temp = *u;
+            *u = *v;
+            *v = temp;
+        }
+        return end;
+    }
+
+    mpz_t hi, lo;
+    mpz_init_zero(&hi);
+    mpz_init_zero(&lo);
+    mpz_divmod_inpl(&hi, &lo, x, &pows[k - 1]);
+    str = mpz_as_str_top(&hi, pows, k - 1, chunk, base, base_char, str);
+    mpz_deinit(&hi);
+    mpz_as_str_rec(&lo, pows, k - 1, chunk, base, base_char, str);
+    mpz_deinit(&lo);
+    return str + (chunk << (k - 1));
+}
+
+/* writes the digits of the absolute value of i at str, most significant first,
+   and returns the end of the digits
+*/
+STATIC char *mpz_as_str_large(const mpz_t *i, unsigned int base, char base_char, char *str) {
+    // the absolute value, sharing the digits of i
+    mpz_t x = *i;
+    x.neg = 0;
+
+    // compute the powers up to the first one that is above x, but skip that
+    // last squaring if the bit length already shows it would be above x
+    size_t chunk = mpz_str_chunk(base);
+    size_t x_bits = mpz_bit_length(&x);
+    size_t n = 1;
+    mpz_t pows[8 * sizeof(size_t)];
+    mpz_str_pows(pows, 1, base, chunk);
+    while (mpz_cmp(&pows[n - 1], &x) <= 0 && 2 * mpz_bit_length(&pows[n - 1]) - 1 <= x_bits) {
+        mpz_init_zero(&pows[n]);
+        mpz_mul_inpl(&pows[n], &pows[n - 1], &pows[n - 1]);
+        ++n;
+    }
+
+    str = mpz_as_str_top(&x, pows, n, chunk, base, base_char, str);
+    for (size_t j = 0; j < n; ++j) {
+        mpz_deinit(&pows[j]);
+    }
+    return str;
+}
+
+#endif
+
 // assumes enough space in str as calculated by mp_int_format_size
 // base must be between 2 and 32 inclusive
 // returns length of string, not including null byte
@@ -1667,48 +2397,74 @@ size_t mpz_as_str_inpl(const mpz_t *i, unsigned int base, const char *prefix, ch
         return s - str;
     }
 
-    // make a copy of mpz digits, so we can do the div/mod calculation
-    mpz_dig_t *dig = m_new(mpz_dig_t, ilen);
-    memcpy(dig, i->dig, ilen * sizeof(mpz_dig_t));
-
-    // convert
     char *last_comma = str;
-    bool done;
-    do {
-        mpz_dig_t *d = dig + ilen;
-        mpz_dbl_dig_t a = 0;
 
-        // compute next remainder
-        while (--d >= dig) {
-            a = (a << DIG_SIZE) | *d;
-            *d = a / base;
-            a %= base;
+    #if MICROPY_OPT_MPZ_FAST_LARGE
+    if (ilen > MPZ_STR_THRESHOLD) {
+        char *end = mpz_as_str_large(i, base, base_char, s);
+        if (comma) {
+            // spread the digits out towards the end, with a comma after every 3
+            char *d = end;
+            end += (end - s - 1) / 3;
+            for (char *e = end; e > d;) {
+                *--e = *--d;
+                *--e = *--d;
+                *--e = *--d;
+                *--e = comma;
+            }
         }
-
-        // convert to character
-        a += '0';
-        if (a > '9') {
-            a += base_char - '9' - 1;
+        // the digits are reversed below along with the rest of the string
+        for (char *u = s, *v = end - 1; u < v; ++u, --v) {
+            char temp = *u;
+            *u = *v;
+            *v = temp;
         }
-        *s++ = a;
+        s = end;
+    } else
+    #endif
+    {
+        // make a copy of mpz digits, so we can do the div/mod calculation
+        mpz_dig_t *dig = m_new(mpz_dig_t, ilen);
+        memcpy(dig, i->dig, ilen * sizeof(mpz_dig_t));
 
-        // check if number is zero
-        done = true;
-        for (d = dig; d < dig + ilen; ++d) {
-            if (*d != 0) {
-                done = false;
-                break;
+        // convert
+        bool done;
+        do {
+            mpz_dig_t *d = dig + ilen;
+            mpz_dbl_dig_t a = 0;
+
+            // compute next remainder
+            while (--d >= dig) {
+                a = (a << DIG_SIZE) | *d;
+                *d = a / base;
+                a %= base;
+            }
+
+            // convert to character
+            a += '0';
+            if (a > '9') {
+                a += base_char - '9' - 1;
+            }
+            *s++ = a;
+
+            // check if number is zero
+            done = true;
+            for (d = dig; d < dig + ilen; ++d) {
+                if (*d != 0) {
+                    done = false;
+                    break;
+                }
+            }
+            if (comma && (s - last_comma) == 3 && !done) {
+                *s++ = comma;
+                last_comma = s;
             }
         }
-        if (comma && (s - last_comma) == 3) {
-            *s++ = comma;
-            last_comma = s;
-        }
-    }
-    while (!done);
+        while (!done);
 
-    // free the copy of the digits array
-    m_del(mpz_dig_t, dig, ilen);
+        // free the copy of the digits array
+        m_del(mpz_dig_t, dig, ilen);
+    }
 
     if (prefix) {
         const char *p = &prefix[strlen(prefix)];
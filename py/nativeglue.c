@@ -143,12 +143,26 @@ STATIC mp_obj_t mp_native_call_function_n_kw(mp_obj_t fun_in, size_t n_args_kw,
 
 // wrapper that makes raise obj and raises it
 // END_FINALLY opcode requires that we don't raise if o==None
+// MP_OBJ_SENTINEL is passed when a local is used before it is assigned
 STATIC void mp_native_raise(mp_obj_t o) {
+    if (o == MP_OBJ_SENTINEL) {
+        mp_raise_msg(&mp_type_NameError, "local variable referenced before assignment");
+    }
     if (o != MP_OBJ_NULL && o != mp_const_none) {
         nlr_raise(mp_make_raise_obj(o));
     }
 }
 
+#if MICROPY_OPT_TIERED_NATIVE
+// add the line that a promoted function is at to the traceback, as the VM would
+// (line is 0 when an exception is re-raised at the end of a finally block)
+STATIC void mp_native_add_traceback(mp_obj_t exc, size_t line, qstr source_file, qstr block_name) {
+    if (line != 0 && exc != MP_OBJ_FROM_PTR(&mp_const_GeneratorExit_obj)) {
+        mp_obj_exception_add_traceback(exc, source_file, line, block_name);
+    }
+}
+#endif
+
 // wrapper that handles iterator buffer
 STATIC mp_obj_t mp_native_getiter(mp_obj_t obj, mp_obj_iter_buf_t *iter) {
     if (iter == NULL) {
@@ -344,6 +358,9 @@ const mp_fun_table_t mp_fun_table = {
     &mp_stream_readinto_obj,
     &mp_stream_unbuffered_readline_obj,
     &mp_stream_write_obj,
+    #if MICROPY_OPT_TIERED_NATIVE
+    mp_native_add_traceback,
+    #endif
 };
 
 #endif // MICROPY_EMIT_NATIVE
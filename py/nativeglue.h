@@ -170,8 +170,17 @@ typedef struct _mp_fun_table_t {
     const mp_obj_fun_builtin_var_t *stream_readinto_obj;
     const mp_obj_fun_builtin_var_t *stream_unbuffered_readline_obj;
     const mp_obj_fun_builtin_var_t *stream_write_obj;
+    #if MICROPY_OPT_TIERED_NATIVE
+    // Entries for functions promoted to native code at runtime
+    void (*add_traceback)(mp_obj_t exc, size_t line, qstr source_file, qstr block_name);
+    #endif
 } mp_fun_table_t;
 
+#if MICROPY_OPT_TIERED_NATIVE
+// These come after the entries for the dynamic runtime, to keep their indices
+#define MP_F_NATIVE_ADD_TRACEBACK ((mp_fun_kind_t)(offsetof(mp_fun_table_t, add_traceback) / sizeof(uintptr_t)))
+#endif
+
 extern const mp_fun_table_t mp_fun_table;
 
 #endif // MICROPY_INCLUDED_PY_NATIVEGLUE_H
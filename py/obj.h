@@ -392,7 +392,12 @@ typedef struct _mp_map_t {
     size_t all_keys_are_qstrs : 1;
     size_t is_fixed : 1;    // a fixed array that can't be modified; must also be ordered
     size_t is_ordered : 1;  // an ordered array
+    #if MICROPY_MAP_VERSION
+    size_t is_versioned : 1; // adding a key increments MP_STATE_VM(map_version)
+    size_t used : (8 * sizeof(size_t) - 4);
+    #else
     size_t used : (8 * sizeof(size_t) - 3);
+    #endif
     size_t alloc;
     mp_map_elem_t *table;
 } mp_map_t;
@@ -417,6 +422,9 @@ void mp_map_free(mp_map_t *map);
 mp_map_elem_t *mp_map_lookup(mp_map_t *map, mp_obj_t index, mp_map_lookup_kind_t lookup_kind);
 void mp_map_clear(mp_map_t *map);
 void mp_map_dump(mp_map_t *map);
+#if MICROPY_MAP_VERSION
+void mp_map_set_versioned(mp_map_t *map);
+#endif
 
 // Underlying set implementation (not set object)
 
@@ -453,6 +461,7 @@ typedef mp_obj_t (*mp_fun_kw_t)(size_t n, const mp_obj_t *, mp_map_t *);
 #define MP_TYPE_FLAG_IS_SUBCLASSED (0x0001)
 #define MP_TYPE_FLAG_HAS_SPECIAL_ACCESSORS (0x0002)
 #define MP_TYPE_FLAG_NEEDS_FULL_EQ_TEST (0x0004)
+#define MP_TYPE_FLAG_HAS_SLOTS (0x0008)
 
 typedef enum {
     PRINT_STR = 0,
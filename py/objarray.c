@@ -220,6 +220,15 @@ STATIC mp_obj_t memoryview_make_new(const mp_obj_type_t *type_in, size_t n_args,
     mp_buffer_info_t bufinfo;
     mp_get_buffer_raise(args[0], &bufinfo, MP_BUFFER_READ);
 
+    #if MICROPY_OPT_STR_INLINE
+    // The memoryview keeps only a pointer to the data, which won't keep a
+    // str/bytes object alive if the data is inside the object.  Such data is
+    // short and can't change, so refer to a copy of it instead.
+    if (mp_obj_str_data_is_inline(args[0])) {
+        bufinfo.buf = memcpy(m_new(byte, bufinfo.len), bufinfo.buf, bufinfo.len);
+    }
+    #endif
+
     mp_obj_array_t *self = MP_OBJ_TO_PTR(mp_obj_new_memoryview(bufinfo.typecode,
         bufinfo.len / mp_binary_get_size('@', bufinfo.typecode, NULL),
         bufinfo.buf));
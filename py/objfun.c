@@ -30,6 +30,7 @@
 
 #include "py/objtuple.h"
 #include "py/objfun.h"
+#include "py/compile.h"
 #include "py/runtime.h"
 #include "py/bc.h"
 #include "py/stackctrl.h"
@@ -151,6 +152,10 @@ qstr mp_obj_code_get_name(const byte *code_info) {
 STATIC const mp_obj_type_t mp_type_fun_native;
 #endif
 
+#if MICROPY_OPT_TIERED_NATIVE
+STATIC mp_obj_t fun_native_call(mp_obj_t self_in, size_t n_args, size_t n_kw, const mp_obj_t *args);
+#endif
+
 qstr mp_obj_fun_get_name(mp_const_obj_t fun_in) {
     const mp_obj_fun_bc_t *fun = MP_OBJ_TO_PTR(fun_in);
     #if MICROPY_EMIT_NATIVE
@@ -208,11 +213,65 @@ STATIC void dump_args(const mp_obj_t *a, size_t sz) {
     mp_setup_code_state(code_state, n_args, n_kw, args); \
     code_state->old_globals = mp_globals_get();
 
+#if MICROPY_OPT_TIERED_NATIVE
+// Compile the given function to native code if that hasn't been tried yet, and
+// create a native function object sharing its globals and default arguments.
+// Returns NULL if the function can't be compiled to native code.
+STATIC mp_obj_fun_bc_t *fun_bc_tier_up(mp_obj_fun_bc_t *self) {
+    mp_tier_info_t *tier = self->rc->tier;
+    if (tier->native_rc == NULL && (tier->module == NULL || !mp_compile_tier_native(tier))) {
+        return NULL;
+    }
+
+    // The extra args are the positional defaults followed by the kw defaults
+    const byte *ip = self->bytecode;
+    size_t n_state, n_exc_stack, scope_flags, n_pos_args, n_kwonly_args, n_def_args;
+    MP_BC_PRELUDE_SIG_DECODE_INTO(ip, n_state, n_exc_stack, scope_flags, n_pos_args, n_kwonly_args, n_def_args);
+    (void)n_state;
+    (void)n_exc_stack;
+    (void)n_pos_args;
+    (void)n_kwonly_args;
+    size_t n_extra_args = n_def_args + ((scope_flags & MP_SCOPE_FLAG_DEFKWARGS) ? 1 : 0);
+
+    // The original function object is left untouched because it may be
+    // executing in the VM, which uses its bytecode and constant table
+    const mp_raw_code_t *rc = tier->native_rc;
+    mp_obj_fun_bc_t *o = m_new_obj_var(mp_obj_fun_bc_t, mp_obj_t, n_extra_args);
+    o->base.type = &mp_type_fun_native;
+    o->globals = self->globals;
+    o->bytecode = rc->fun_data;
+    o->const_table = rc->const_table;
+    o->rc = rc;
+    o->tier_native = NULL;
+    memcpy(o->extra_args, self->extra_args, n_extra_args * sizeof(mp_obj_t));
+    self->tier_native = o;
+    return o;
+}
+#endif
+
 #if MICROPY_STACKLESS
 mp_code_state_t *mp_obj_fun_bc_prepare_codestate(mp_obj_t self_in, size_t n_args, size_t n_kw, const mp_obj_t *args) {
     MP_STACK_CHECK();
     mp_obj_fun_bc_t *self = MP_OBJ_TO_PTR(self_in);
 
+    #if MICROPY_OPT_TIERED_NATIVE
+    // A promoted function must be called via fun_bc_call to run the native
+    // version; the VM checks tier_native so it doesn't get here for those
+    if (self->tier_native != NULL) {
+        return NULL;
+    }
+    // Promote the function if it has become hot; this call still runs the
+    // bytecode and later calls go to the native version
+    mp_tier_info_t *tier = self->rc->tier;
+    if (tier != NULL && MP_STATE_VM(tier_threshold) != 0 && ++tier->count >= MP_STATE_VM(tier_threshold)
+        #if MICROPY_PY_SYS_SETTRACE
+        && MP_STATE_THREAD(prof_trace_callback) == MP_OBJ_NULL
+        #endif
+        ) {
+        fun_bc_tier_up(self);
+    }
+    #endif
+
     size_t n_state, state_size;
     DECODE_CODESTATE_SIZE(self->bytecode, n_state, state_size);
 
@@ -251,6 +310,29 @@ STATIC mp_obj_t fun_bc_call(mp_obj_t self_in, size_t n_args, size_t n_kw, const
 
     mp_obj_fun_bc_t *self = MP_OBJ_TO_PTR(self_in);
 
+    #if MICROPY_OPT_TIERED_NATIVE
+    // Run the native version of the function if it has been promoted, or
+    // promote it now if it has become hot (tracing needs the bytecode)
+    if (self->tier_native != NULL
+        #if MICROPY_PY_SYS_SETTRACE
+        && MP_STATE_THREAD(prof_trace_callback) == MP_OBJ_NULL
+        #endif
+        ) {
+        return fun_native_call(MP_OBJ_FROM_PTR(self->tier_native), n_args, n_kw, args);
+    }
+    mp_tier_info_t *tier = self->rc->tier;
+    if (tier != NULL && MP_STATE_VM(tier_threshold) != 0 && ++tier->count >= MP_STATE_VM(tier_threshold)
+        #if MICROPY_PY_SYS_SETTRACE
+        && MP_STATE_THREAD(prof_trace_callback) == MP_OBJ_NULL
+        #endif
+        ) {
+        mp_obj_fun_bc_t *native = fun_bc_tier_up(self);
+        if (native != NULL) {
+            return fun_native_call(MP_OBJ_FROM_PTR(native), n_args, n_kw, args);
+        }
+    }
+    #endif
+
     size_t n_state, state_size;
     DECODE_CODESTATE_SIZE(self->bytecode, n_state, state_size);
 
@@ -383,6 +465,10 @@ mp_obj_t mp_obj_new_fun_bc(mp_obj_t def_args_in, mp_obj_t def_kw_args, const byt
     o->globals = mp_globals_get();
     o->bytecode = code;
     o->const_table = const_table;
+    #if MICROPY_OPT_TIERED_NATIVE
+    o->rc = NULL;
+    o->tier_native = NULL;
+    #endif
     if (def_args != NULL) {
         memcpy(o->extra_args, def_args->items, n_def_args * sizeof(mp_obj_t));
     }
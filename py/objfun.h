@@ -33,9 +33,12 @@ typedef struct _mp_obj_fun_bc_t {
     mp_obj_dict_t *globals;         // the context within which this function was defined
     const byte *bytecode;           // bytecode for the function
     const mp_uint_t *const_table;   // constant table
-    #if MICROPY_PY_SYS_SETTRACE
+    #if MICROPY_PY_SYS_SETTRACE || MICROPY_OPT_TIERED_NATIVE
     const struct _mp_raw_code_t *rc;
     #endif
+    #if MICROPY_OPT_TIERED_NATIVE
+    struct _mp_obj_fun_bc_t *tier_native; // native version of this function, if promoted
+    #endif
     // the following extra_args array is allocated space to take (in order):
     //  - values of positional default args (if any)
     //  - a single slot for default kw args dict (if it has them)
@@ -281,6 +281,513 @@ STATIC mp_obj_t list_pop(size_t n_args, const mp_obj_t *args) {
     return ret;
 }
 
+#if MICROPY_OPT_LIST_TIMSORT
+
+// An adaptive, stable merge sort after CPython's listsort.  It finds the runs
+// that are already in order (reversing descending ones), extends short runs
+// with a binary insertion sort and merges them pairwise, galloping through a
+// run when it keeps winning.  Elements are w words wide, and only the first
+// word is compared, so that with a key function (key, item) pairs are sorted.
+
+#define LISTSORT_MIN_GALLOP (7)
+#define LISTSORT_TEMP_SIZE (32)
+#define LISTSORT_MAX_PENDING (sizeof(size_t) * 12)
+
+typedef struct _listsort_t {
+    size_t w;
+    size_t min_gallop;
+    // temporary storage for the shorter run of a merge, temp_array if small
+    mp_obj_t *temp;
+    size_t temp_alloc;
+    // a merge in progress has n elements in temp which belong in the list at
+    // dest (merging low) or ending at dest (merging high), if it's abandoned
+    mp_obj_t *dest;
+    mp_obj_t *src;
+    size_t n;
+    bool hi;
+    // runs waiting to be merged
+    size_t n_pending;
+    struct {
+        mp_obj_t *base;
+        size_t len;
+    } pending[LISTSORT_MAX_PENDING];
+    mp_obj_t temp_array[LISTSORT_TEMP_SIZE];
+} listsort_t;
+
+#define LS_EL(p, i) ((p) + (i) * w)
+#define LS_SET(d, s) do { (d)[0] = (s)[0]; if (w == 2) { (d)[1] = (s)[1]; } } while (0)
+#define LS_MOVE(d, s, n) memmove((d), (s), (n) * w * sizeof(mp_obj_t))
+
+STATIC bool listsort_lt(mp_obj_t a, mp_obj_t b) {
+    if (mp_obj_is_small_int(a) && mp_obj_is_small_int(b)) {
+        return MP_OBJ_SMALL_INT_VALUE(a) < MP_OBJ_SMALL_INT_VALUE(b);
+    }
+    return mp_obj_is_true(mp_binary_op(MP_BINARY_OP_LESS, a, b));
+}
+
+STATIC void listsort_reverse(mp_obj_t *lo, size_t n, size_t w) {
+    mp_obj_t *hi = LS_EL(lo, n - 1);
+    for (; lo < hi; lo += w, hi -= w) {
+        for (size_t i = 0; i < w; i++) {
+            mp_obj_t x = lo[i];
+            lo[i] = hi[i];
+            hi[i] = x;
+        }
+    }
+}
+
+// Sort the n elements at lo with a binary insertion sort, given that the
+// first start of them are already sorted
+STATIC void listsort_binary(mp_obj_t *lo, size_t n, size_t start, size_t w) {
+    for (; start < n; start++) {
+        mp_obj_t pivot[2];
+        LS_SET(pivot, LS_EL(lo, start));
+        size_t l = 0;
+        size_t r = start;
+        while (l < r) {
+            size_t m = l + ((r - l) >> 1);
+            if (listsort_lt(pivot[0], LS_EL(lo, m)[0])) {
+                r = m;
+            } else {
+                l = m + 1;
+            }
+        }
+        LS_MOVE(LS_EL(lo, l + 1), LS_EL(lo, l), start - l);
+        LS_SET(LS_EL(lo, l), pivot);
+    }
+}
+
+// Return the length of the run at the start of the n elements at lo, which
+// is made ascending if it was strictly descending
+STATIC size_t listsort_count_run(mp_obj_t *lo, size_t n, size_t w) {
+    if (n == 1) {
+        return 1;
+    }
+    size_t len = 2;
+    if (listsort_lt(LS_EL(lo, 1)[0], lo[0])) {
+        while (len < n && listsort_lt(LS_EL(lo, len)[0], LS_EL(lo, len - 1)[0])) {
+            len++;
+        }
+        listsort_reverse(lo, len, w);
+    } else {
+        while (len < n && !listsort_lt(LS_EL(lo, len)[0], LS_EL(lo, len - 1)[0])) {
+            len++;
+        }
+    }
+    return len;
+}
+
+// Return the index at which key belongs among the n sorted elements at a, to
+// the left of any that are equal if right is false and to the right if true.
+// The search gallops outwards from a[hint] and then bisects.
+STATIC size_t listsort_gallop(mp_obj_t key, mp_obj_t *a, size_t n, size_t hint, bool right, size_t w) {
+    #define GOES_AFTER(i) (right ? !listsort_lt(key, LS_EL(a, i)[0]) : listsort_lt(LS_EL(a, i)[0], key))
+    mp_int_t last = 0;
+    mp_int_t ofs = 1;
+    if (GOES_AFTER(hint)) {
+        // find a[hint + last] < key <= a[hint + ofs]
+        mp_int_t max_ofs = n - hint;
+        while (ofs < max_ofs && GOES_AFTER(hint + ofs)) {
+            last = ofs;
+            ofs = (ofs << 1) + 1;
+        }
+        if (ofs > max_ofs) {
+            ofs = max_ofs;
+        }
+        last += hint;
+        ofs += hint;
+    } else {
+        // find a[hint - ofs] < key <= a[hint - last]
+        mp_int_t max_ofs = hint + 1;
+        while (ofs < max_ofs && !GOES_AFTER(hint - ofs)) {
+            last = ofs;
+            ofs = (ofs << 1) + 1;
+        }
+        if (ofs > max_ofs) {
+            ofs = max_ofs;
+        }
+        mp_int_t k = last;
+        last = hint - ofs;
+        ofs = hint - k;
+    }
+    // bisect in (last, ofs]
+    last += 1;
+    while (last < ofs) {
+        mp_int_t m = last + ((ofs - last) >> 1);
+        if (GOES_AFTER(m)) {
+            last = m + 1;
+        } else {
+            ofs = m;
+        }
+    }
+    return ofs;
+    #undef GOES_AFTER
+}
+
+STATIC mp_obj_t *listsort_get_temp(listsort_t *ms, size_t n) {
+    n *= ms->w;
+    if (n > LISTSORT_TEMP_SIZE && n > ms->temp_alloc) {
+        if (ms->temp_alloc > 0) {
+            m_del(mp_obj_t, ms->temp, ms->temp_alloc);
+            ms->temp_alloc = 0;
+        }
+        ms->temp = m_new(mp_obj_t, n);
+        ms->temp_alloc = n;
+    }
+    return ms->temp;
+}
+
+// Merge the na elements at pa with the nb elements following them, where
+// na <= nb, a[0] belongs after b[0] and a[na - 1] after all of b
+STATIC void listsort_merge_lo(listsort_t *ms, mp_obj_t *pa, size_t na, size_t nb) {
+    size_t w = ms->w;
+    mp_obj_t *pb = LS_EL(pa, na);
+    mp_obj_t *temp = listsort_get_temp(ms, na);
+    LS_MOVE(temp, pa, na);
+    ms->hi = false;
+    ms->dest = pa;
+    ms->src = temp;
+    ms->n = na;
+
+    size_t min_gallop = ms->min_gallop;
+    LS_SET(ms->dest, pb);
+    ms->dest += w;
+    pb += w;
+    if (--nb == 0) {
+        goto done;
+    }
+    if (ms->n == 1) {
+        goto copy_b;
+    }
+    for (;;) {
+        size_t a_count = 0;
+        size_t b_count = 0;
+        // one element at a time until a run seems to be winning consistently
+        for (;;) {
+            if (listsort_lt(pb[0], ms->src[0])) {
+                LS_SET(ms->dest, pb);
+                ms->dest += w;
+                pb += w;
+                b_count++;
+                a_count = 0;
+                if (--nb == 0) {
+                    goto done;
+                }
+                if (b_count >= min_gallop) {
+                    break;
+                }
+            } else {
+                LS_SET(ms->dest, ms->src);
+                ms->dest += w;
+                ms->src += w;
+                a_count++;
+                b_count = 0;
+                if (--ms->n == 1) {
+                    goto copy_b;
+                }
+                if (a_count >= min_gallop) {
+                    break;
+                }
+            }
+        }
+        // gallop while that pays off, and make it easier to start again
+        min_gallop++;
+        do {
+            min_gallop -= min_gallop > 1;
+            ms->min_gallop = min_gallop;
+            size_t k = listsort_gallop(pb[0], ms->src, ms->n, 0, true, w);
+            a_count = k;
+            if (k > 0) {
+                LS_MOVE(ms->dest, ms->src, k);
+                ms->dest += k * w;
+                ms->src += k * w;
+                ms->n -= k;
+                if (ms->n == 1) {
+                    goto copy_b;
+                }
+                if (ms->n == 0) {
+                    // only possible if the comparison is inconsistent
+                    goto done;
+                }
+            }
+            LS_SET(ms->dest, pb);
+            ms->dest += w;
+            pb += w;
+            if (--nb == 0) {
+                goto done;
+            }
+            k = listsort_gallop(ms->src[0], pb, nb, 0, false, w);
+            b_count = k;
+            if (k > 0) {
+                LS_MOVE(ms->dest, pb, k);
+                ms->dest += k * w;
+                pb += k * w;
+                nb -= k;
+                if (nb == 0) {
+                    goto done;
+                }
+            }
+            LS_SET(ms->dest, ms->src);
+            ms->dest += w;
+            ms->src += w;
+            if (--ms->n == 1) {
+                goto copy_b;
+            }
+        } while (a_count >= LISTSORT_MIN_GALLOP || b_count >= LISTSORT_MIN_GALLOP);
+        min_gallop++;
+        ms->min_gallop = min_gallop;
+    }
+copy_b:
+    // the last element of a goes after the rest of b
+    LS_MOVE(ms->dest, pb, nb);
+    ms->dest += nb * w;
+done:
+    LS_MOVE(ms->dest, ms->src, ms->n);
+    ms->n = 0;
+}
+
+// Merge the na elements at pa with the nb elements following them, where
+// na >= nb, a[0] belongs after b[0] and a[na - 1] after all of b
+STATIC void listsort_merge_hi(listsort_t *ms, mp_obj_t *pa, size_t na, size_t nb) {
+    size_t w = ms->w;
+    mp_obj_t *pb = LS_EL(pa, na);
+    mp_obj_t *base_a = pa;
+    mp_obj_t *temp = listsort_get_temp(ms, nb);
+    LS_MOVE(temp, pb, nb);
+    ms->hi = true;
+    ms->dest = LS_EL(pb, nb - 1);
+    ms->src = temp;
+    ms->n = nb;
+    // pa and pb point at the last remaining element of each run
+    pa = LS_EL(pa, na - 1);
+    pb = LS_EL(temp, nb - 1);
+
+    size_t min_gallop = ms->min_gallop;
+    LS_SET(ms->dest, pa);
+    ms->dest -= w;
+    pa -= w;
+    if (--na == 0) {
+        goto done;
+    }
+    if (ms->n == 1) {
+        goto copy_a;
+    }
+    for (;;) {
+        size_t a_count = 0;
+        size_t b_count = 0;
+        for (;;) {
+            if (listsort_lt(pb[0], pa[0])) {
+                LS_SET(ms->dest, pa);
+                ms->dest -= w;
+                pa -= w;
+                a_count++;
+                b_count = 0;
+                if (--na == 0) {
+                    goto done;
+                }
+                if (a_count >= min_gallop) {
+                    break;
+                }
+            } else {
+                LS_SET(ms->dest, pb);
+                ms->dest -= w;
+                pb -= w;
+                b_count++;
+                a_count = 0;
+                if (--ms->n == 1) {
+                    goto copy_a;
+                }
+                if (b_count >= min_gallop) {
+                    break;
+                }
+            }
+        }
+        min_gallop++;
+        do {
+            min_gallop -= min_gallop > 1;
+            ms->min_gallop = min_gallop;
+            size_t k = na - listsort_gallop(pb[0], base_a, na, na - 1, true, w);
+            a_count = k;
+            if (k > 0) {
+                ms->dest -= k * w;
+                pa -= k * w;
+                LS_MOVE(ms->dest + w, pa + w, k);
+                na -= k;
+                if (na == 0) {
+                    goto done;
+                }
+            }
+            LS_SET(ms->dest, pb);
+            ms->dest -= w;
+            pb -= w;
+            if (--ms->n == 1) {
+                goto copy_a;
+            }
+            k = ms->n - listsort_gallop(pa[0], temp, ms->n, ms->n - 1, false, w);
+            b_count = k;
+            if (k > 0) {
+                ms->dest -= k * w;
+                pb -= k * w;
+                LS_MOVE(ms->dest + w, pb + w, k);
+                ms->n -= k;
+                if (ms->n == 1) {
+                    goto copy_a;
+                }
+                if (ms->n == 0) {
+                    // only possible if the comparison is inconsistent
+                    goto done;
+                }
+            }
+            LS_SET(ms->dest, pa);
+            ms->dest -= w;
+            pa -= w;
+            if (--na == 0) {
+                goto done;
+            }
+        } while (a_count >= LISTSORT_MIN_GALLOP || b_count >= LISTSORT_MIN_GALLOP);
+        min_gallop++;
+        ms->min_gallop = min_gallop;
+    }
+copy_a:
+    // the first element of b goes before the rest of a
+    ms->dest -= na * w;
+    pa -= na * w;
+    LS_MOVE(ms->dest + w, pa + w, na);
+done:
+    if (ms->n > 0) {
+        LS_MOVE(ms->dest - (ms->n - 1) * w, temp, ms->n);
+        ms->n = 0;
+    }
+}
+
+// Merge the pending runs i and i + 1
+STATIC void listsort_merge_at(listsort_t *ms, size_t i) {
+    size_t w = ms->w;
+    mp_obj_t *pa = ms->pending[i].base;
+    size_t na = ms->pending[i].len;
+    mp_obj_t *pb = ms->pending[i + 1].base;
+    size_t nb = ms->pending[i + 1].len;
+    ms->pending[i].len = na + nb;
+    if (i == ms->n_pending - 3) {
+        ms->pending[i + 1] = ms->pending[i + 2];
+    }
+    ms->n_pending--;
+
+    // elements of a before b[0] and of b after a[na - 1] are already in place
+    size_t k = listsort_gallop(pb[0], pa, na, 0, true, w);
+    pa += k * w;
+    na -= k;
+    if (na == 0) {
+        return;
+    }
+    nb = listsort_gallop(LS_EL(pa, na - 1)[0], pb, nb, nb - 1, false, w);
+    if (nb == 0) {
+        return;
+    }
+    if (na <= nb) {
+        listsort_merge_lo(ms, pa, na, nb);
+    } else {
+        listsort_merge_hi(ms, pa, na, nb);
+    }
+}
+
+// Merge pending runs until their lengths decrease faster than the Fibonacci
+// numbers from the bottom of the stack, which keeps the merges balanced
+STATIC void listsort_merge_collapse(listsort_t *ms, bool force) {
+    while (ms->n_pending > 1) {
+        size_t n = ms->n_pending - 2;
+        #define LEN(i) (ms->pending[i].len)
+        if (force) {
+            if (n > 0 && LEN(n - 1) < LEN(n + 1)) {
+                n--;
+            }
+        } else if ((n > 0 && LEN(n - 1) <= LEN(n) + LEN(n + 1))
+                   || (n > 1 && LEN(n - 2) <= LEN(n - 1) + LEN(n))) {
+            if (LEN(n - 1) < LEN(n + 1)) {
+                n--;
+            }
+        } else if (LEN(n) > LEN(n + 1)) {
+            break;
+        }
+        #undef LEN
+        listsort_merge_at(ms, n);
+    }
+}
+
+STATIC void listsort_run(listsort_t *ms, mp_obj_t *lo, size_t n) {
+    size_t w = ms->w;
+    // runs shorter than min_run are extended, with min_run chosen so that the
+    // number of runs is a power of 2 or just below one
+    size_t min_run = n;
+    size_t r = 0;
+    while (min_run >= 64) {
+        r |= min_run & 1;
+        min_run >>= 1;
+    }
+    min_run += r;
+
+    while (n > 0) {
+        size_t len = listsort_count_run(lo, n, w);
+        if (len < min_run) {
+            size_t force = MIN(n, min_run);
+            listsort_binary(lo, force, len, w);
+            len = force;
+        }
+        ms->pending[ms->n_pending].base = lo;
+        ms->pending[ms->n_pending].len = len;
+        ms->n_pending++;
+        listsort_merge_collapse(ms, false);
+        lo += len * w;
+        n -= len;
+    }
+    listsort_merge_collapse(ms, true);
+}
+
+// Sort the n elements, each w words wide, at items
+STATIC void listsort(mp_obj_t *items, size_t n, size_t w, bool reverse) {
+    listsort_t ms;
+    ms.w = w;
+    ms.min_gallop = LISTSORT_MIN_GALLOP;
+    ms.temp = ms.temp_array;
+    ms.temp_alloc = 0;
+    ms.n = 0;
+    ms.n_pending = 0;
+
+    // reversing before and after the sort keeps it stable
+    if (reverse) {
+        listsort_reverse(items, n, w);
+    }
+    nlr_buf_t nlr;
+    if (nlr_push(&nlr) == 0) {
+        listsort_run(&ms, items, n);
+        nlr_pop();
+    } else {
+        // put back the elements of an abandoned merge, so that the list is
+        // left with all its items
+        if (ms.n > 0) {
+            mp_obj_t *dest = ms.hi ? ms.dest - (ms.n - 1) * w : ms.dest;
+            memmove(dest, ms.src, ms.n * w * sizeof(mp_obj_t));
+        }
+        if (reverse) {
+            listsort_reverse(items, n, w);
+        }
+        nlr_jump(nlr.ret_val);
+    }
+    if (reverse) {
+        listsort_reverse(items, n, w);
+    }
+    if (ms.temp_alloc > 0) {
+        m_del(mp_obj_t, ms.temp, ms.temp_alloc);
+    }
+}
+
+#undef LS_EL
+#undef LS_SET
+#undef LS_MOVE
+
+#else
+
+// TODO Python defines sort to be stable but ours is not
 STATIC void mp_quicksort(mp_obj_t *head, mp_obj_t *tail, mp_obj_t key_fn, mp_obj_t binop_less_result) {
     MP_STACK_CHECK();
     while (head < tail) {
@@ -309,7 +816,8 @@ STATIC void mp_quicksort(mp_obj_t *head, mp_obj_t *tail, mp_obj_t key_fn, mp_obj
     }
 }
 
-// TODO Python defines sort to be stable but ours is not
+#endif
+
 mp_obj_t mp_obj_list_sort(size_t n_args, const mp_obj_t *pos_args, mp_map_t *kw_args) {
     static const mp_arg_t allowed_args[] = {
         { MP_QSTR_key, MP_ARG_KW_ONLY | MP_ARG_OBJ, {.u_rom_obj = MP_ROM_NONE} },
@@ -326,11 +834,39 @@ mp_obj_t mp_obj_list_sort(size_t n_args, const mp_obj_t *pos_args, mp_map_t *kw_
     mp_check_self(mp_obj_is_type(pos_args[0], &mp_type_list));
     mp_obj_list_t *self = MP_OBJ_TO_PTR(pos_args[0]);
 
+    #if MICROPY_OPT_LIST_TIMSORT
+    size_t n = self->len;
+    mp_obj_t *items = self->items;
+    if (n > 1) {
+        if (args.key.u_obj == mp_const_none) {
+            listsort(items, n, 1, args.reverse.u_bool);
+        } else {
+            // call the key function once for each item, and sort (key, item)
+            // pairs in a copy so that the list is untouched if it raises
+            mp_obj_t *pairs = m_new(mp_obj_t, 2 * n);
+            for (size_t i = 0; i < n; i++) {
+                pairs[2 * i] = mp_call_function_1(args.key.u_obj, items[i]);
+                pairs[2 * i + 1] = items[i];
+            }
+            listsort(pairs, n, 2, args.reverse.u_bool);
+            if (self->items == items && self->len == n) {
+                for (size_t i = 0; i < n; i++) {
+                    items[i] = pairs[2 * i + 1];
+                }
+            }
+            m_del(mp_obj_t, pairs, 2 * n);
+        }
+        if (self->items != items || self->len != n) {
+            mp_raise_ValueError("list modified during sort");
+        }
+    }
+    #else
     if (self->len > 1) {
         mp_quicksort(self->items, self->items + self->len - 1,
                      args.key.u_obj == mp_const_none ? MP_OBJ_NULL : args.key.u_obj,
                      args.reverse.u_bool ? mp_const_false : mp_const_true);
     }
+    #endif
 
     return mp_const_none;
 }
@@ -81,6 +81,9 @@ STATIC void module_attr(mp_obj_t self_in, qstr attr, mp_obj_t *dest) {
             if (dict == &mp_module_builtins_globals) {
                 if (MP_STATE_VM(mp_module_builtins_override_dict) == NULL) {
                     MP_STATE_VM(mp_module_builtins_override_dict) = MP_OBJ_TO_PTR(mp_obj_new_dict(1));
+                    #if MICROPY_OPT_LOAD_GLOBAL_CACHE
+                    mp_map_set_versioned(&MP_STATE_VM(mp_module_builtins_override_dict)->map);
+                    #endif
                 }
                 dict = MP_STATE_VM(mp_module_builtins_override_dict);
             } else
@@ -121,6 +124,9 @@ mp_obj_t mp_obj_new_module(qstr module_name) {
     mp_obj_module_t *o = m_new_obj(mp_obj_module_t);
     o->base.type = &mp_type_module;
     o->globals = MP_OBJ_TO_PTR(mp_obj_new_dict(MICROPY_MODULE_DICT_SIZE));
+    #if MICROPY_OPT_LOAD_GLOBAL_CACHE
+    mp_map_set_versioned(&o->globals->map);
+    #endif
 
     // store __name__ entry in the module
     mp_obj_dict_store(MP_OBJ_FROM_PTR(o->globals), MP_OBJ_NEW_QSTR(MP_QSTR___name__), MP_OBJ_NEW_QSTR(module_name));
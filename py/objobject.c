@@ -73,7 +73,9 @@ STATIC mp_obj_t object___setattr__(mp_obj_t self_in, mp_obj_t attr, mp_obj_t val
     }
 
     mp_obj_instance_t *self = MP_OBJ_TO_PTR(self_in);
-    mp_map_lookup(&self->members, attr, MP_MAP_LOOKUP_ADD_IF_NOT_FOUND)->value = value;
+    if (!mp_obj_instance_store_member(self, mp_obj_str_get_qstr(attr), value)) {
+        mp_raise_msg(&mp_type_AttributeError, "no such attribute");
+    }
     return mp_const_none;
 }
 STATIC MP_DEFINE_CONST_FUN_OBJ_3(object___setattr___obj, object___setattr__);
@@ -88,7 +90,7 @@ STATIC mp_obj_t object___delattr__(mp_obj_t self_in, mp_obj_t attr) {
     }
 
     mp_obj_instance_t *self = MP_OBJ_TO_PTR(self_in);
-    if (mp_map_lookup(&self->members, attr, MP_MAP_LOOKUP_REMOVE_IF_FOUND) == NULL) {
+    if (!mp_obj_instance_store_member(self, mp_obj_str_get_qstr(attr), MP_OBJ_NULL)) {
         mp_raise_msg(&mp_type_AttributeError, "no such attribute");
     }
     return mp_const_none;
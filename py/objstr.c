@@ -173,6 +173,13 @@ mp_obj_t mp_obj_str_make_new(const mp_obj_type_t *type, size_t n_args, size_t n_
                     return MP_OBJ_NEW_QSTR(q);
                 }
 
+                #if MICROPY_OPT_STR_INLINE
+                if (mp_obj_str_data_is_inline(args[0])) {
+                    return mp_obj_new_str_copy(type, str_data, str_len);
+                }
+                #endif
+
+                // share the data with the bytes object
                 mp_obj_str_t *o = MP_OBJ_TO_PTR(mp_obj_new_str_copy(type, NULL, str_len));
                 o->data = str_data;
                 o->hash = str_hash;
@@ -214,6 +221,11 @@ STATIC mp_obj_t bytes_make_new(const mp_obj_type_t *type_in, size_t n_args, size
         if (str_hash == 0) {
             str_hash = qstr_compute_hash(str_data, str_len);
         }
+        #if MICROPY_OPT_STR_INLINE
+        if (mp_obj_str_data_is_inline(args[0])) {
+            return mp_obj_new_str_copy(&mp_type_bytes, str_data, str_len);
+        }
+        #endif
         mp_obj_str_t *o = MP_OBJ_TO_PTR(mp_obj_new_str_copy(&mp_type_bytes, NULL, str_len));
         o->data = str_data;
         o->hash = str_hash;
@@ -270,9 +282,155 @@ wrong_args:
     mp_raise_TypeError("wrong number of arguments");
 }
 
+#if MICROPY_OPT_STR_FIND_FAST
+
+// Needles at least this long are searched for forwards with the two-way
+// algorithm, which is linear in the worst case, shorter ones with Horspool.
+#define FIND_TWOWAY_MIN_LEN (32)
+
+// Fill in the Horspool shift for each byte: the distance from its last
+// occurrence in needle[0:nlen-1] to the end of the needle, or nlen if it
+// doesn't occur there.  Shifts are capped at 255, which is still safe.
+STATIC void find_make_shifts(uint8_t *shift, const byte *needle, size_t nlen) {
+    memset(shift, MIN(nlen, 255), 256);
+    for (size_t i = nlen > 255 ? nlen - 255 : 0; i < nlen - 1; ++i) {
+        shift[needle[i]] = nlen - 1 - i;
+    }
+}
+
+STATIC const byte *find_horspool(const byte *haystack, size_t hlen, const byte *needle, size_t nlen) {
+    uint8_t shift[256];
+    find_make_shifts(shift, needle, nlen);
+    size_t m1 = nlen - 1;
+    byte last = needle[m1];
+    for (size_t i = 0; i <= hlen - nlen; i += shift[haystack[i + m1]]) {
+        if (haystack[i + m1] == last && memcmp(haystack + i, needle, m1) == 0) {
+            return haystack + i;
+        }
+    }
+    return NULL;
+}
+
+// Horspool searching backwards, comparing the first byte of each window first
+STATIC const byte *find_horspool_reverse(const byte *haystack, size_t hlen, const byte *needle, size_t nlen) {
+    uint8_t shift[256];
+    memset(shift, MIN(nlen, 255), 256);
+    for (size_t i = MIN(nlen - 1, 255); i > 0; --i) {
+        shift[needle[i]] = i;
+    }
+    byte first = needle[0];
+    for (size_t i = hlen - nlen;; i -= shift[haystack[i]]) {
+        if (haystack[i] == first && memcmp(haystack + i + 1, needle + 1, nlen - 1) == 0) {
+            return haystack + i;
+        }
+        if (i < shift[haystack[i]]) {
+            return NULL;
+        }
+    }
+}
+
+// The two-way algorithm of Crochemore and Perrin, with the Horspool shift of
+// the last byte of each window to skip ahead quickly.  Requires nlen >= 2.
+STATIC const byte *find_twoway(const byte *haystack, size_t hlen, const byte *needle, size_t nlen) {
+    const byte *h = haystack, *top = haystack + hlen;
+    uint8_t shift[256];
+    find_make_shifts(shift, needle, nlen);
+
+    // split the needle at its critical factorisation, at the later of the
+    // maximal suffixes under the two orderings of bytes
+    size_t ms = (size_t)-1, p = 1;
+    for (int order = 0; order < 2; ++order) {
+        size_t ip = (size_t)-1, jp = 0, k = 1, per = 1;
+        while (jp + k < nlen) {
+            byte a = needle[ip + k], b = needle[jp + k];
+            if (a == b) {
+                if (k == per) {
+                    jp += per;
+                    k = 1;
+                } else {
+                    ++k;
+                }
+            } else if ((a > b) == (order == 0)) {
+                jp += k;
+                k = 1;
+                per = jp - ip;
+            } else {
+                ip = jp++;
+                k = per = 1;
+            }
+        }
+        if (order == 0 || ip + 1 > ms + 1) {
+            ms = ip;
+            p = per;
+        }
+    }
+
+    // for a periodic needle, remember how much of it is known to match after
+    // a shift by the period
+    size_t mem0;
+    if (memcmp(needle, needle + p, ms + 1) != 0) {
+        mem0 = 0;
+        p = MAX(ms, nlen - ms - 1) + 1;
+    } else {
+        mem0 = nlen - p;
+    }
+
+    size_t mem = 0;
+    while ((size_t)(top - h) >= nlen) {
+        size_t k = shift[h[nlen - 1]];
+        if (h[nlen - 1] != needle[nlen - 1]) {
+            h += MAX(k, mem);
+            mem = 0;
+            continue;
+        }
+        // compare the right half, then the left half
+        for (k = MAX(ms + 1, mem); k < nlen && needle[k] == h[k]; ++k) {
+        }
+        if (k < nlen) {
+            h += k - ms;
+            mem = 0;
+            continue;
+        }
+        for (k = ms + 1; k > mem && needle[k - 1] == h[k - 1]; --k) {
+        }
+        if (k <= mem) {
+            return h;
+        }
+        h += p;
+        mem = mem0;
+    }
+    return NULL;
+}
+
+#endif
+
 // like strstr but with specified length and allows \0 bytes
-// TODO replace with something more efficient/standard
 const byte *find_subbytes(const byte *haystack, size_t hlen, const byte *needle, size_t nlen, int direction) {
+    #if MICROPY_OPT_STR_FIND_FAST
+    if (hlen < nlen) {
+        return NULL;
+    }
+    if (nlen == 1) {
+        if (direction > 0) {
+            return memchr(haystack, needle[0], hlen);
+        }
+        for (const byte *p = haystack + hlen; p > haystack;) {
+            if (*--p == needle[0]) {
+                return p;
+            }
+        }
+        return NULL;
+    }
+    if (nlen > 1) {
+        if (direction < 0) {
+            return find_horspool_reverse(haystack, hlen, needle, nlen);
+        } else if (nlen < FIND_TWOWAY_MIN_LEN) {
+            return find_horspool(haystack, hlen, needle, nlen);
+        } else {
+            return find_twoway(haystack, hlen, needle, nlen);
+        }
+    }
+    #endif
     if (hlen >= nlen) {
         size_t str_index, str_index_end;
         if (direction > 0) {
@@ -548,19 +706,16 @@ mp_obj_t mp_obj_str_split(size_t n_args, const mp_obj_t *args) {
 
         for (;;) {
             const byte *start = s;
-            for (;;) {
-                if (splits == 0 || s + sep_len > top) {
-                    s = top;
-                    break;
-                } else if (memcmp(s, sep_str, sep_len) == 0) {
-                    break;
-                }
-                s++;
+            if (splits != 0) {
+                s = find_subbytes(s, top - s, (const byte*)sep_str, sep_len, 1);
+            } else {
+                s = NULL;
             }
-            mp_obj_list_append(res, mp_obj_new_str_of_type(self_type, start, s - start));
-            if (s >= top) {
+            if (s == NULL) {
+                mp_obj_list_append(res, mp_obj_new_str_of_type(self_type, start, top - start));
                 break;
             }
+            mp_obj_list_append(res, mp_obj_new_str_of_type(self_type, start, s - start));
             s += sep_len;
             if (splits > 0) {
                 splits--;
@@ -619,6 +774,149 @@ STATIC mp_obj_t str_splitlines(size_t n_args, const mp_obj_t *pos_args, mp_map_t
 MP_DEFINE_CONST_FUN_OBJ_KW(str_splitlines_obj, 1, str_splitlines);
 #endif
 
+#if MICROPY_PY_BUILTINS_STR_ISPLIT
+// Iterator for isplit() and isplitlines(), which makes one piece at a time
+typedef struct _mp_obj_str_isplit_t {
+    mp_obj_base_t base;
+    mp_fun_1_t iternext;
+    mp_obj_t str;
+    // the separator or None for isplit(), keepends for isplitlines()
+    mp_obj_t arg;
+    mp_int_t splits;
+    // offset of the rest of the string, or len + 1 when finished
+    size_t cur;
+} mp_obj_str_isplit_t;
+
+STATIC mp_obj_t str_isplit_new(mp_obj_t self_in, mp_fun_1_t iternext, mp_obj_t arg, mp_int_t splits) {
+    mp_obj_str_isplit_t *o = m_new_obj(mp_obj_str_isplit_t);
+    o->base.type = &mp_type_polymorph_iter;
+    o->iternext = iternext;
+    o->str = self_in;
+    o->arg = arg;
+    o->splits = splits;
+    o->cur = 0;
+    return MP_OBJ_FROM_PTR(o);
+}
+
+STATIC mp_obj_t str_isplit_iternext(mp_obj_t self_in) {
+    mp_obj_str_isplit_t *self = MP_OBJ_TO_PTR(self_in);
+    GET_STR_DATA_LEN(self->str, str, len);
+    if (self->cur > len) {
+        return MP_OBJ_STOP_ITERATION;
+    }
+    const byte *s = str + self->cur;
+    const byte *top = str + len;
+    const byte *start, *end;
+
+    if (self->arg == mp_const_none) {
+        // separate on whitespace, ignoring it at the start and end
+        while (s < top && unichar_isspace(*s)) s++;
+        if (s >= top) {
+            self->cur = len + 1;
+            return MP_OBJ_STOP_ITERATION;
+        }
+        start = s;
+        if (self->splits == 0) {
+            s = top;
+        } else {
+            while (s < top && !unichar_isspace(*s)) s++;
+        }
+        end = s;
+    } else {
+        GET_STR_DATA_LEN(self->arg, sep, sep_len);
+        start = s;
+        end = NULL;
+        if (self->splits != 0) {
+            end = find_subbytes(s, top - s, sep, sep_len, 1);
+        }
+        if (end == NULL) {
+            end = top;
+            s = str + len + 1;
+        } else {
+            s = end + sep_len;
+        }
+    }
+
+    if (self->splits > 0) {
+        self->splits--;
+    }
+    self->cur = s - str;
+    return mp_obj_new_str_of_type(mp_obj_get_type(self->str), start, end - start);
+}
+
+STATIC mp_obj_t str_isplit(size_t n_args, const mp_obj_t *args) {
+    mp_check_self(mp_obj_is_str_or_bytes(args[0]));
+    mp_int_t splits = -1;
+    mp_obj_t sep = mp_const_none;
+    if (n_args > 1) {
+        sep = args[1];
+        if (n_args > 2) {
+            splits = mp_obj_get_int(args[2]);
+        }
+    }
+    if (sep != mp_const_none) {
+        if (mp_obj_get_type(sep) != mp_obj_get_type(args[0])) {
+            bad_implicit_conversion(sep);
+        }
+        GET_STR_LEN(sep, sep_len);
+        if (sep_len == 0) {
+            mp_raise_ValueError("empty separator");
+        }
+    }
+    return str_isplit_new(args[0], str_isplit_iternext, sep, splits);
+}
+MP_DEFINE_CONST_FUN_OBJ_VAR_BETWEEN(str_isplit_obj, 1, 3, str_isplit);
+
+#if MICROPY_PY_BUILTINS_STR_SPLITLINES
+STATIC mp_obj_t str_isplitlines_iternext(mp_obj_t self_in) {
+    mp_obj_str_isplit_t *self = MP_OBJ_TO_PTR(self_in);
+    GET_STR_DATA_LEN(self->str, str, len);
+    if (self->cur >= len) {
+        return MP_OBJ_STOP_ITERATION;
+    }
+    const byte *start = str + self->cur;
+    const byte *top = str + len;
+    const byte *s = start;
+    size_t match = 0;
+    while (s < top) {
+        if (*s == '\n') {
+            match = 1;
+            break;
+        } else if (*s == '\r') {
+            if (s + 1 < top && s[1] == '\n') {
+                match = 2;
+            } else {
+                match = 1;
+            }
+            break;
+        }
+        s++;
+    }
+    self->cur = s + match - str;
+    size_t sub_len = s - start;
+    if (self->arg == mp_const_true) {
+        sub_len += match;
+    }
+    return mp_obj_new_str_of_type(mp_obj_get_type(self->str), start, sub_len);
+}
+
+STATIC mp_obj_t str_isplitlines(size_t n_args, const mp_obj_t *pos_args, mp_map_t *kw_args) {
+    enum { ARG_keepends };
+    static const mp_arg_t allowed_args[] = {
+        { MP_QSTR_keepends, MP_ARG_BOOL, {.u_bool = false} },
+    };
+
+    // parse args
+    mp_arg_val_t args[MP_ARRAY_SIZE(allowed_args)];
+    mp_arg_parse_all(n_args - 1, pos_args + 1, kw_args, MP_ARRAY_SIZE(allowed_args), allowed_args, args);
+
+    mp_check_self(mp_obj_is_str_or_bytes(pos_args[0]));
+    return str_isplit_new(pos_args[0], str_isplitlines_iternext, mp_obj_new_bool(args[ARG_keepends].u_bool), -1);
+}
+MP_DEFINE_CONST_FUN_OBJ_KW(str_isplitlines_obj, 1, str_isplitlines);
+#endif
+#endif
+
 STATIC mp_obj_t str_rsplit(size_t n_args, const mp_obj_t *args) {
     if (n_args < 3) {
         // If we don't have split limit, it doesn't matter from which side
@@ -654,16 +952,12 @@ STATIC mp_obj_t str_rsplit(size_t n_args, const mp_obj_t *args) {
         const byte *beg = s;
         const byte *last = s + len;
         for (;;) {
-            s = last - sep_len;
-            for (;;) {
-                if (splits == 0 || s < beg) {
-                    break;
-                } else if (memcmp(s, sep_str, sep_len) == 0) {
-                    break;
-                }
-                s--;
+            if (splits != 0) {
+                s = find_subbytes(beg, last - beg, (const byte*)sep_str, sep_len, -1);
+            } else {
+                s = NULL;
             }
-            if (s < beg || splits == 0) {
+            if (s == NULL) {
                 res->items[idx] = mp_obj_new_str_of_type(self_type, beg, last - beg);
                 break;
             }
@@ -722,7 +1016,11 @@ STATIC mp_obj_t str_finder(size_t n_args, const mp_obj_t *args, int direction, b
         // found
         #if MICROPY_PY_BUILTINS_STR_UNICODE
         if (self_type == &mp_type_str) {
+            #if MICROPY_OPT_STR_INDEX_CACHE
+            return MP_OBJ_NEW_SMALL_INT(str_ptr_to_index(haystack, haystack_len, p));
+            #else
             return MP_OBJ_NEW_SMALL_INT(utf8_ptr_to_index(haystack, p));
+            #endif
         }
         #endif
         return MP_OBJ_NEW_SMALL_INT(p - haystack);
@@ -941,450 +1239,668 @@ STATIC NORETURN void terse_str_format_value_error(void) {
 #define terse_str_format_value_error()
 #endif
 
-STATIC vstr_t mp_obj_str_format_helper(const char *str, const char *top, int *arg_i, size_t n_args, const mp_obj_t *args, mp_map_t *kwargs) {
-    vstr_t vstr;
-    mp_print_t print;
-    vstr_init_print(&vstr, 16, &print);
+#if MICROPY_OPT_STR_FORMAT_CACHE
+// A parsed str.format or % pattern, followed by its fields
+typedef struct _mp_str_template_t {
+    mp_obj_t pattern;
+    uint16_t kind;
+    // false if the pattern has an error or a feature that isn't cached, and
+    // must be formatted without the template
+    bool valid;
+    size_t n_fields;
+} mp_str_template_t;
 
-    for (; str < top; str++) {
-        if (*str == '}') {
-            str++;
-            if (str < top && *str == '}') {
-                vstr_add_byte(&vstr, '}');
-                continue;
-            }
-            if (MICROPY_ERROR_REPORTING == MICROPY_ERROR_REPORTING_TERSE) {
-                terse_str_format_value_error();
-            } else {
-                mp_raise_ValueError("single '}' encountered in format string");
-            }
+#define STR_TEMPLATE_FORMAT (0)
+#define STR_TEMPLATE_MODULO (1)
+
+#define str_template_fields(t, field_type) ((field_type*)((t) + 1))
+
+STATIC mp_str_template_t *str_template_find(mp_obj_t pattern, uint16_t kind) {
+    mp_str_template_t **cache = MP_STATE_THREAD(str_template_cache);
+    for (size_t i = 0; i < MICROPY_OPT_STR_FORMAT_CACHE_SIZE; ++i) {
+        if (cache[i] != NULL && cache[i]->pattern == pattern && cache[i]->kind == kind) {
+            return cache[i];
         }
-        if (*str != '{') {
-            vstr_add_byte(&vstr, *str);
-            continue;
+    }
+    return NULL;
+}
+
+// Returns NULL if there is no memory for the template
+STATIC mp_str_template_t *str_template_new(mp_obj_t pattern, uint16_t kind, size_t field_size, size_t n_fields) {
+    mp_str_template_t *t = m_malloc_maybe(sizeof(mp_str_template_t) + field_size * n_fields);
+    if (t != NULL) {
+        t->pattern = pattern;
+        t->kind = kind;
+        t->valid = false;
+        t->n_fields = 0;
+        size_t *next = &MP_STATE_THREAD(str_template_cache_next);
+        MP_STATE_THREAD(str_template_cache)[*next] = t;
+        *next = (*next + 1) % MICROPY_OPT_STR_FORMAT_CACHE_SIZE;
+    }
+    return t;
+}
+
+// Upper bound on the number of fields of a pattern, given the characters that
+// can end a field
+STATIC size_t str_template_max_fields(const byte *str, size_t len, const char *ends) {
+    size_t n = 1;
+    for (const byte *top = str + len; str < top; ++str) {
+        if (*str == ends[0] || *str == ends[1]) {
+            ++n;
         }
+    }
+    return n;
+}
+#endif
 
+// A replacement field of str.format, with the literal text before it.  A field
+// of kind FORMAT_FIELD_NONE is only literal text.
+typedef struct _str_format_field_t {
+    size_t lit_off;
+    size_t lit_len;
+    qstr name;
+    int index;
+    byte kind;
+    bool has_attr;
+    bool has_spec;
+    char conversion;
+    char fill;
+    char align;
+    char type;
+    int flags;
+    int width;
+    int precision;
+} str_format_field_t;
+
+#define FORMAT_FIELD_NONE (0)
+#define FORMAT_FIELD_INDEX (1)
+#define FORMAT_FIELD_NAME (2)
+
+// Parse the literal text at str and the replacement field after it, if any.
+// The format spec of the field is returned in *spec to *spec_top, and the
+// position after the field is returned.
+STATIC const char *str_format_parse_field(const char *start, const char *str, const char *top, int *arg_i,
+    str_format_field_t *field, const char **spec, const char **spec_top) {
+
+    field->lit_off = str - start;
+    while (str < top && *str != '{' && *str != '}') {
+        ++str;
+    }
+    field->lit_len = str - start - field->lit_off;
+    field->kind = FORMAT_FIELD_NONE;
+    if (str >= top) {
+        return str;
+    }
+
+    if (*str == '}') {
         str++;
-        if (str < top && *str == '{') {
-            vstr_add_byte(&vstr, '{');
-            continue;
+        if (str < top && *str == '}') {
+            // the literal text goes on to the first '}'
+            field->lit_len++;
+            return str + 1;
+        }
+        if (MICROPY_ERROR_REPORTING == MICROPY_ERROR_REPORTING_TERSE) {
+            terse_str_format_value_error();
+        } else {
+            mp_raise_ValueError("single '}' encountered in format string");
         }
+    }
 
-        // replacement_field ::=  "{" [field_name] ["!" conversion] [":" format_spec] "}"
+    str++;
+    if (str < top && *str == '{') {
+        field->lit_len++;
+        return str + 1;
+    }
 
-        const char *field_name = NULL;
-        const char *field_name_top = NULL;
-        char conversion = '\0';
-        const char *format_spec = NULL;
+    // replacement_field ::=  "{" [field_name] ["!" conversion] [":" format_spec] "}"
 
-        if (str < top && *str != '}' && *str != '!' && *str != ':') {
-            field_name = (const char *)str;
-            while (str < top && *str != '}' && *str != '!' && *str != ':') {
-                ++str;
-            }
-            field_name_top = (const char *)str;
+    const char *field_name = NULL;
+    const char *field_name_top = NULL;
+    char conversion = '\0';
+    const char *format_spec = NULL;
+
+    if (str < top && *str != '}' && *str != '!' && *str != ':') {
+        field_name = (const char *)str;
+        while (str < top && *str != '}' && *str != '!' && *str != ':') {
+            ++str;
         }
+        field_name_top = (const char *)str;
+    }
 
-        // conversion ::=  "r" | "s"
+    // conversion ::=  "r" | "s"
 
-        if (str < top && *str == '!') {
-            str++;
-            if (str < top && (*str == 'r' || *str == 's')) {
-                conversion = *str++;
+    if (str < top && *str == '!') {
+        str++;
+        if (str < top && (*str == 'r' || *str == 's')) {
+            conversion = *str++;
+        } else {
+            if (MICROPY_ERROR_REPORTING == MICROPY_ERROR_REPORTING_TERSE) {
+                terse_str_format_value_error();
+            } else if (MICROPY_ERROR_REPORTING == MICROPY_ERROR_REPORTING_NORMAL) {
+                mp_raise_ValueError("bad conversion specifier");
             } else {
-                if (MICROPY_ERROR_REPORTING == MICROPY_ERROR_REPORTING_TERSE) {
-                    terse_str_format_value_error();
-                } else if (MICROPY_ERROR_REPORTING == MICROPY_ERROR_REPORTING_NORMAL) {
-                    mp_raise_ValueError("bad conversion specifier");
+                if (str >= top) {
+                    mp_raise_ValueError(
+                        "end of format while looking for conversion specifier");
                 } else {
-                    if (str >= top) {
-                        mp_raise_ValueError(
-                            "end of format while looking for conversion specifier");
-                    } else {
-                        nlr_raise(mp_obj_new_exception_msg_varg(&mp_type_ValueError,
-                            "unknown conversion specifier %c", *str));
-                    }
+                    nlr_raise(mp_obj_new_exception_msg_varg(&mp_type_ValueError,
+                        "unknown conversion specifier %c", *str));
                 }
             }
         }
+    }
 
-        if (str < top && *str == ':') {
-            str++;
-            // {:} is the same as {}, which is the same as {!s}
-            // This makes a difference when passing in a True or False
-            // '{}'.format(True) returns 'True'
-            // '{:d}'.format(True) returns '1'
-            // So we treat {:} as {} and this later gets treated to be {!s}
-            if (*str != '}') {
-                format_spec = str;
-                for (int nest = 1; str < top;) {
-                    if (*str == '{') {
-                        ++nest;
-                    } else if (*str == '}') {
-                        if (--nest == 0) {
-                            break;
-                        }
+    if (str < top && *str == ':') {
+        str++;
+        // {:} is the same as {}, which is the same as {!s}
+        // This makes a difference when passing in a True or False
+        // '{}'.format(True) returns 'True'
+        // '{:d}'.format(True) returns '1'
+        // So we treat {:} as {} and this later gets treated to be {!s}
+        if (str < top && *str != '}') {
+            format_spec = str;
+            for (int nest = 1; str < top;) {
+                if (*str == '{') {
+                    ++nest;
+                } else if (*str == '}') {
+                    if (--nest == 0) {
+                        break;
                     }
-                    ++str;
                 }
+                ++str;
             }
         }
-        if (str >= top) {
-            if (MICROPY_ERROR_REPORTING == MICROPY_ERROR_REPORTING_TERSE) {
-                terse_str_format_value_error();
-            } else {
-                mp_raise_ValueError("unmatched '{' in format");
-            }
+    }
+    if (str >= top) {
+        if (MICROPY_ERROR_REPORTING == MICROPY_ERROR_REPORTING_TERSE) {
+            terse_str_format_value_error();
+        } else {
+            mp_raise_ValueError("unmatched '{' in format");
         }
-        if (*str != '}') {
-            if (MICROPY_ERROR_REPORTING == MICROPY_ERROR_REPORTING_TERSE) {
-                terse_str_format_value_error();
-            } else {
-                mp_raise_ValueError("expected ':' after format specifier");
-            }
+    }
+    if (*str != '}') {
+        if (MICROPY_ERROR_REPORTING == MICROPY_ERROR_REPORTING_TERSE) {
+            terse_str_format_value_error();
+        } else {
+            mp_raise_ValueError("expected ':' after format specifier");
         }
+    }
 
-        mp_obj_t arg = mp_const_none;
-
-        if (field_name) {
-            int index = 0;
-            if (MP_LIKELY(unichar_isdigit(*field_name))) {
-                if (*arg_i > 0) {
-                    if (MICROPY_ERROR_REPORTING == MICROPY_ERROR_REPORTING_TERSE) {
-                        terse_str_format_value_error();
-                    } else {
-                        mp_raise_ValueError(
-                            "can't switch from automatic field numbering to manual field specification");
-                    }
-                }
-                field_name = str_to_int(field_name, field_name_top, &index);
-                if ((uint)index >= n_args - 1) {
-                    mp_raise_msg(&mp_type_IndexError, "tuple index out of range");
-                }
-                arg = args[index + 1];
-                *arg_i = -1;
-            } else {
-                const char *lookup;
-                for (lookup = field_name; lookup < field_name_top && *lookup != '.' && *lookup != '['; lookup++);
-                mp_obj_t field_q = mp_obj_new_str_via_qstr(field_name, lookup - field_name); // should it be via qstr?
-                field_name = lookup;
-                mp_map_elem_t *key_elem = mp_map_lookup(kwargs, field_q, MP_MAP_LOOKUP);
-                if (key_elem == NULL) {
-                    nlr_raise(mp_obj_new_exception_arg1(&mp_type_KeyError, field_q));
-                }
-                arg = key_elem->value;
-            }
-            if (field_name < field_name_top) {
-                mp_raise_NotImplementedError("attributes not supported yet");
-            }
-        } else {
-            if (*arg_i < 0) {
+    field->has_attr = false;
+    if (field_name) {
+        if (MP_LIKELY(unichar_isdigit(*field_name))) {
+            if (*arg_i > 0) {
                 if (MICROPY_ERROR_REPORTING == MICROPY_ERROR_REPORTING_TERSE) {
                     terse_str_format_value_error();
                 } else {
                     mp_raise_ValueError(
-                        "can't switch from manual field specification to automatic field numbering");
+                        "can't switch from automatic field numbering to manual field specification");
                 }
             }
-            if ((uint)*arg_i >= n_args - 1) {
-                mp_raise_msg(&mp_type_IndexError, "tuple index out of range");
-            }
-            arg = args[(*arg_i) + 1];
-            (*arg_i)++;
-        }
-        if (!format_spec && !conversion) {
-            conversion = 's';
+            field->kind = FORMAT_FIELD_INDEX;
+            field->index = 0;
+            field_name = str_to_int(field_name, field_name_top, &field->index);
+            *arg_i = -1;
+        } else {
+            const char *lookup;
+            for (lookup = field_name; lookup < field_name_top && *lookup != '.' && *lookup != '['; lookup++);
+            field->kind = FORMAT_FIELD_NAME;
+            field->name = qstr_from_strn(field_name, lookup - field_name); // should it be via qstr?
+            field_name = lookup;
         }
-        if (conversion) {
-            mp_print_kind_t print_kind;
-            if (conversion == 's') {
-                print_kind = PRINT_STR;
+        field->has_attr = field_name < field_name_top;
+    } else {
+        if (*arg_i < 0) {
+            if (MICROPY_ERROR_REPORTING == MICROPY_ERROR_REPORTING_TERSE) {
+                terse_str_format_value_error();
             } else {
-                assert(conversion == 'r');
-                print_kind = PRINT_REPR;
+                mp_raise_ValueError(
+                    "can't switch from manual field specification to automatic field numbering");
             }
-            vstr_t arg_vstr;
-            mp_print_t arg_print;
-            vstr_init_print(&arg_vstr, 16, &arg_print);
-            mp_obj_print_helper(&arg_print, arg, print_kind);
-            arg = mp_obj_new_str_from_vstr(&mp_type_str, &arg_vstr);
         }
+        field->kind = FORMAT_FIELD_INDEX;
+        field->index = (*arg_i)++;
+    }
+    if (!format_spec && !conversion) {
+        conversion = 's';
+    }
+    field->conversion = conversion;
+    field->has_spec = format_spec != NULL;
+    field->fill = '\0';
+    field->align = '\0';
+    field->width = -1;
+    field->precision = -1;
+    field->type = '\0';
+    field->flags = 0;
 
-        char fill = '\0';
-        char align = '\0';
-        int width = -1;
-        int precision = -1;
-        char type = '\0';
-        int flags = 0;
-
-        if (format_spec) {
-            // The format specifier (from http://docs.python.org/2/library/string.html#formatspec)
-            //
-            // [[fill]align][sign][#][0][width][,][.precision][type]
-            // fill        ::=  <any character>
-            // align       ::=  "<" | ">" | "=" | "^"
-            // sign        ::=  "+" | "-" | " "
-            // width       ::=  integer
-            // precision   ::=  integer
-            // type        ::=  "b" | "c" | "d" | "e" | "E" | "f" | "F" | "g" | "G" | "n" | "o" | "s" | "x" | "X" | "%"
+    *spec = format_spec;
+    *spec_top = str;
+    return str + 1;
+}
 
-            // recursively call the formatter to format any nested specifiers
-            MP_STACK_CHECK();
-            vstr_t format_spec_vstr = mp_obj_str_format_helper(format_spec, str, arg_i, n_args, args, kwargs);
-            const char *s = vstr_null_terminated_str(&format_spec_vstr);
-            const char *stop = s + format_spec_vstr.len;
-            if (isalignment(*s)) {
-                align = *s++;
-            } else if (*s && isalignment(s[1])) {
-                fill = *s++;
-                align = *s++;
-            }
-            if (*s == '+' || *s == '-' || *s == ' ') {
-                if (*s == '+') {
-                    flags |= PF_FLAG_SHOW_SIGN;
-                } else if (*s == ' ') {
-                    flags |= PF_FLAG_SPACE_SIGN;
-                }
-                s++;
-            }
-            if (*s == '#') {
-                flags |= PF_FLAG_SHOW_PREFIX;
-                s++;
-            }
-            if (*s == '0') {
-                if (!align) {
-                    align = '=';
-                }
-                if (!fill) {
-                    fill = '0';
-                }
-            }
-            s = str_to_int(s, stop, &width);
-            if (*s == ',') {
-                flags |= PF_FLAG_SHOW_COMMA;
-                s++;
-            }
-            if (*s == '.') {
-                s++;
-                s = str_to_int(s, stop, &precision);
-            }
-            if (istype(*s)) {
-                type = *s++;
-            }
-            if (*s) {
-                if (MICROPY_ERROR_REPORTING == MICROPY_ERROR_REPORTING_TERSE) {
-                    terse_str_format_value_error();
-                } else {
-                    mp_raise_ValueError("invalid format specifier");
-                }
-            }
-            vstr_clear(&format_spec_vstr);
-        }
-        if (!align) {
-            if (arg_looks_numeric(arg)) {
-                align = '>';
-            } else {
-                align = '<';
-            }
+// Parse a format spec without nested replacement fields into the field
+STATIC void str_format_parse_spec(const char *s, const char *stop, str_format_field_t *field) {
+    // The format specifier (from http://docs.python.org/2/library/string.html#formatspec)
+    //
+    // [[fill]align][sign][#][0][width][,][.precision][type]
+    // fill        ::=  <any character>
+    // align       ::=  "<" | ">" | "=" | "^"
+    // sign        ::=  "+" | "-" | " "
+    // width       ::=  integer
+    // precision   ::=  integer
+    // type        ::=  "b" | "c" | "d" | "e" | "E" | "f" | "F" | "g" | "G" | "n" | "o" | "s" | "x" | "X" | "%"
+
+    if (s < stop && isalignment(*s)) {
+        field->align = *s++;
+    } else if (stop - s >= 2 && *s && isalignment(s[1])) {
+        field->fill = *s++;
+        field->align = *s++;
+    }
+    if (s < stop && (*s == '+' || *s == '-' || *s == ' ')) {
+        if (*s == '+') {
+            field->flags |= PF_FLAG_SHOW_SIGN;
+        } else if (*s == ' ') {
+            field->flags |= PF_FLAG_SPACE_SIGN;
+        }
+        s++;
+    }
+    if (s < stop && *s == '#') {
+        field->flags |= PF_FLAG_SHOW_PREFIX;
+        s++;
+    }
+    if (s < stop && *s == '0') {
+        if (!field->align) {
+            field->align = '=';
+        }
+        if (!field->fill) {
+            field->fill = '0';
+        }
+    }
+    s = str_to_int(s, stop, &field->width);
+    if (s < stop && *s == ',') {
+        field->flags |= PF_FLAG_SHOW_COMMA;
+        s++;
+    }
+    if (s < stop && *s == '.') {
+        s++;
+        s = str_to_int(s, stop, &field->precision);
+    }
+    if (s < stop && istype(*s)) {
+        field->type = *s++;
+    }
+    if (s < stop && *s) {
+        if (MICROPY_ERROR_REPORTING == MICROPY_ERROR_REPORTING_TERSE) {
+            terse_str_format_value_error();
+        } else {
+            mp_raise_ValueError("invalid format specifier");
         }
-        if (!fill) {
-            fill = ' ';
+    }
+}
+
+STATIC mp_obj_t str_format_get_arg(const str_format_field_t *field, size_t n_args, const mp_obj_t *args, mp_map_t *kwargs) {
+    if (field->kind == FORMAT_FIELD_NAME) {
+        mp_obj_t field_q = MP_OBJ_NEW_QSTR(field->name);
+        mp_map_elem_t *key_elem = mp_map_lookup(kwargs, field_q, MP_MAP_LOOKUP);
+        if (key_elem == NULL) {
+            nlr_raise(mp_obj_new_exception_arg1(&mp_type_KeyError, field_q));
         }
+        return key_elem->value;
+    }
+    if ((uint)field->index >= n_args - 1) {
+        mp_raise_msg(&mp_type_IndexError, "tuple index out of range");
+    }
+    return args[field->index + 1];
+}
 
-        if (flags & (PF_FLAG_SHOW_SIGN | PF_FLAG_SPACE_SIGN)) {
-            if (type == 's') {
-                if (MICROPY_ERROR_REPORTING == MICROPY_ERROR_REPORTING_TERSE) {
-                    terse_str_format_value_error();
-                } else {
-                    mp_raise_ValueError("sign not allowed in string format specifier");
-                }
+STATIC mp_obj_t str_format_convert(mp_obj_t arg, char conversion) {
+    mp_print_kind_t print_kind;
+    if (conversion == 's') {
+        print_kind = PRINT_STR;
+    } else {
+        assert(conversion == 'r');
+        print_kind = PRINT_REPR;
+    }
+    vstr_t arg_vstr;
+    mp_print_t arg_print;
+    vstr_init_print(&arg_vstr, 16, &arg_print);
+    mp_obj_print_helper(&arg_print, arg, print_kind);
+    return mp_obj_new_str_from_vstr(&mp_type_str, &arg_vstr);
+}
+
+// Print the (converted) argument of a field with a format spec
+STATIC void str_format_print(const mp_print_t *print, mp_obj_t arg, const str_format_field_t *field) {
+    char fill = field->fill;
+    char align = field->align;
+    int width = field->width;
+    int precision = field->precision;
+    char type = field->type;
+    int flags = field->flags;
+
+    if (!align) {
+        if (arg_looks_numeric(arg)) {
+            align = '>';
+        } else {
+            align = '<';
+        }
+    }
+    if (!fill) {
+        fill = ' ';
+    }
+
+    if (flags & (PF_FLAG_SHOW_SIGN | PF_FLAG_SPACE_SIGN)) {
+        if (type == 's') {
+            if (MICROPY_ERROR_REPORTING == MICROPY_ERROR_REPORTING_TERSE) {
+                terse_str_format_value_error();
+            } else {
+                mp_raise_ValueError("sign not allowed in string format specifier");
             }
-            if (type == 'c') {
-                if (MICROPY_ERROR_REPORTING == MICROPY_ERROR_REPORTING_TERSE) {
-                    terse_str_format_value_error();
-                } else {
-                    mp_raise_ValueError(
-                        "sign not allowed with integer format specifier 'c'");
-                }
+        }
+        if (type == 'c') {
+            if (MICROPY_ERROR_REPORTING == MICROPY_ERROR_REPORTING_TERSE) {
+                terse_str_format_value_error();
+            } else {
+                mp_raise_ValueError(
+                    "sign not allowed with integer format specifier 'c'");
             }
         }
+    }
 
-        switch (align) {
-            case '<': flags |= PF_FLAG_LEFT_ADJUST;     break;
-            case '=': flags |= PF_FLAG_PAD_AFTER_SIGN;  break;
-            case '^': flags |= PF_FLAG_CENTER_ADJUST;   break;
-        }
+    switch (align) {
+        case '<': flags |= PF_FLAG_LEFT_ADJUST;     break;
+        case '=': flags |= PF_FLAG_PAD_AFTER_SIGN;  break;
+        case '^': flags |= PF_FLAG_CENTER_ADJUST;   break;
+    }
 
-        if (arg_looks_integer(arg)) {
-            switch (type) {
-                case 'b':
-                    mp_print_mp_int(&print, arg, 2, 'a', flags, fill, width, 0);
-                    continue;
+    if (arg_looks_integer(arg)) {
+        switch (type) {
+            case 'b':
+                mp_print_mp_int(print, arg, 2, 'a', flags, fill, width, 0);
+                return;
 
-                case 'c':
-                {
-                    char ch = mp_obj_get_int(arg);
-                    mp_print_strn(&print, &ch, 1, flags, fill, width);
-                    continue;
+            case 'c':
+            {
+                char ch = mp_obj_get_int(arg);
+                mp_print_strn(print, &ch, 1, flags, fill, width);
+                return;
+            }
+
+            case '\0':  // No explicit format type implies 'd'
+            case 'n':   // I don't think we support locales in uPy so use 'd'
+            case 'd':
+                mp_print_mp_int(print, arg, 10, 'a', flags, fill, width, 0);
+                return;
+
+            case 'o':
+                if (flags & PF_FLAG_SHOW_PREFIX) {
+                    flags |= PF_FLAG_SHOW_OCTAL_LETTER;
                 }
 
-                case '\0':  // No explicit format type implies 'd'
-                case 'n':   // I don't think we support locales in uPy so use 'd'
-                case 'd':
-                    mp_print_mp_int(&print, arg, 10, 'a', flags, fill, width, 0);
-                    continue;
+                mp_print_mp_int(print, arg, 8, 'a', flags, fill, width, 0);
+                return;
 
-                case 'o':
-                    if (flags & PF_FLAG_SHOW_PREFIX) {
-                        flags |= PF_FLAG_SHOW_OCTAL_LETTER;
-                    }
+            case 'X':
+            case 'x':
+                mp_print_mp_int(print, arg, 16, type - ('X' - 'A'), flags, fill, width, 0);
+                return;
 
-                    mp_print_mp_int(&print, arg, 8, 'a', flags, fill, width, 0);
-                    continue;
-
-                case 'X':
-                case 'x':
-                    mp_print_mp_int(&print, arg, 16, type - ('X' - 'A'), flags, fill, width, 0);
-                    continue;
-
-                case 'e':
-                case 'E':
-                case 'f':
-                case 'F':
-                case 'g':
-                case 'G':
-                case '%':
-                    // The floating point formatters all work with anything that
-                    // looks like an integer
-                    break;
+            case 'e':
+            case 'E':
+            case 'f':
+            case 'F':
+            case 'g':
+            case 'G':
+            case '%':
+                // The floating point formatters all work with anything that
+                // looks like an integer
+                break;
 
-                default:
-                    if (MICROPY_ERROR_REPORTING == MICROPY_ERROR_REPORTING_TERSE) {
-                        terse_str_format_value_error();
-                    } else {
-                        nlr_raise(mp_obj_new_exception_msg_varg(&mp_type_ValueError,
-                            "unknown format code '%c' for object of type '%s'",
-                            type, mp_obj_get_type_str(arg)));
-                    }
-            }
+            default:
+                if (MICROPY_ERROR_REPORTING == MICROPY_ERROR_REPORTING_TERSE) {
+                    terse_str_format_value_error();
+                } else {
+                    nlr_raise(mp_obj_new_exception_msg_varg(&mp_type_ValueError,
+                        "unknown format code '%c' for object of type '%s'",
+                        type, mp_obj_get_type_str(arg)));
+                }
         }
+    }
 
-        // NOTE: no else here. We need the e, f, g etc formats for integer
-        //       arguments (from above if) to take this if.
-        if (arg_looks_numeric(arg)) {
-            if (!type) {
-
-                // Even though the docs say that an unspecified type is the same
-                // as 'g', there is one subtle difference, when the exponent
-                // is one less than the precision.
-                //
-                // '{:10.1}'.format(0.0) ==> '0e+00'
-                // '{:10.1g}'.format(0.0) ==> '0'
-                //
-                // TODO: Figure out how to deal with this.
-                //
-                // A proper solution would involve adding a special flag
-                // or something to format_float, and create a format_double
-                // to deal with doubles. In order to fix this when using
-                // sprintf, we'd need to use the e format and tweak the
-                // returned result to strip trailing zeros like the g format
-                // does.
-                //
-                // {:10.3} and {:10.2e} with 1.23e2 both produce 1.23e+02
-                // but with 1.e2 you get 1e+02 and 1.00e+02
-                //
-                // Stripping the trailing 0's (like g) does would make the
-                // e format give us the right format.
-                //
-                // CPython sources say:
-                //   Omitted type specifier.  Behaves in the same way as repr(x)
-                //   and str(x) if no precision is given, else like 'g', but with
-                //   at least one digit after the decimal point. */
-
-                type = 'g';
-            }
-            if (type == 'n') {
-                type = 'g';
-            }
+    // NOTE: no else here. We need the e, f, g etc formats for integer
+    //       arguments (from above if) to take this if.
+    if (arg_looks_numeric(arg)) {
+        if (!type) {
 
-            switch (type) {
+            // Even though the docs say that an unspecified type is the same
+            // as 'g', there is one subtle difference, when the exponent
+            // is one less than the precision.
+            //
+            // '{:10.1}'.format(0.0) ==> '0e+00'
+            // '{:10.1g}'.format(0.0) ==> '0'
+            //
+            // TODO: Figure out how to deal with this.
+            //
+            // A proper solution would involve adding a special flag
+            // or something to format_float, and create a format_double
+            // to deal with doubles. In order to fix this when using
+            // sprintf, we'd need to use the e format and tweak the
+            // returned result to strip trailing zeros like the g format
+            // does.
+            //
+            // {:10.3} and {:10.2e} with 1.23e2 both produce 1.23e+02
+            // but with 1.e2 you get 1e+02 and 1.00e+02
+            //
+            // Stripping the trailing 0's (like g) does would make the
+            // e format give us the right format.
+            //
+            // CPython sources say:
+            //   Omitted type specifier.  Behaves in the same way as repr(x)
+            //   and str(x) if no precision is given, else like 'g', but with
+            //   at least one digit after the decimal point. */
+
+            type = 'g';
+        }
+        if (type == 'n') {
+            type = 'g';
+        }
+
+        switch (type) {
 #if MICROPY_PY_BUILTINS_FLOAT
-                case 'e':
-                case 'E':
-                case 'f':
-                case 'F':
-                case 'g':
-                case 'G':
-                    mp_print_float(&print, mp_obj_get_float(arg), type, flags, fill, width, precision);
-                    break;
+            case 'e':
+            case 'E':
+            case 'f':
+            case 'F':
+            case 'g':
+            case 'G':
+                mp_print_float(print, mp_obj_get_float(arg), type, flags, fill, width, precision);
+                break;
 
-                case '%':
-                    flags |= PF_FLAG_ADD_PERCENT;
-                    #if MICROPY_FLOAT_IMPL == MICROPY_FLOAT_IMPL_FLOAT
-                    #define F100 100.0F
-                    #else
-                    #define F100 100.0
-                    #endif
-                    mp_print_float(&print, mp_obj_get_float(arg) * F100, 'f', flags, fill, width, precision);
-                    #undef F100
-                    break;
+            case '%':
+                flags |= PF_FLAG_ADD_PERCENT;
+                #if MICROPY_FLOAT_IMPL == MICROPY_FLOAT_IMPL_FLOAT
+                #define F100 100.0F
+                #else
+                #define F100 100.0
+                #endif
+                mp_print_float(print, mp_obj_get_float(arg) * F100, 'f', flags, fill, width, precision);
+                #undef F100
+                break;
 #endif
 
-                default:
-                    if (MICROPY_ERROR_REPORTING == MICROPY_ERROR_REPORTING_TERSE) {
-                        terse_str_format_value_error();
-                    } else {
-                        nlr_raise(mp_obj_new_exception_msg_varg(&mp_type_ValueError,
-                            "unknown format code '%c' for object of type '%s'",
-                            type, mp_obj_get_type_str(arg)));
-                    }
-            }
-        } else {
-            // arg doesn't look like a number
-
-            if (align == '=') {
+            default:
                 if (MICROPY_ERROR_REPORTING == MICROPY_ERROR_REPORTING_TERSE) {
                     terse_str_format_value_error();
                 } else {
-                    mp_raise_ValueError(
-                        "'=' alignment not allowed in string format specifier");
+                    nlr_raise(mp_obj_new_exception_msg_varg(&mp_type_ValueError,
+                        "unknown format code '%c' for object of type '%s'",
+                        type, mp_obj_get_type_str(arg)));
                 }
+        }
+    } else {
+        // arg doesn't look like a number
+
+        if (align == '=') {
+            if (MICROPY_ERROR_REPORTING == MICROPY_ERROR_REPORTING_TERSE) {
+                terse_str_format_value_error();
+            } else {
+                mp_raise_ValueError(
+                    "'=' alignment not allowed in string format specifier");
             }
+        }
 
-            switch (type) {
-                case '\0': // no explicit format type implies 's'
-                case 's': {
-                    size_t slen;
-                    const char *s = mp_obj_str_get_data(arg, &slen);
-                    if (precision < 0) {
-                        precision = slen;
-                    }
-                    if (slen > (size_t)precision) {
-                        slen = precision;
-                    }
-                    mp_print_strn(&print, s, slen, flags, fill, width);
-                    break;
+        switch (type) {
+            case '\0': // no explicit format type implies 's'
+            case 's': {
+                size_t slen;
+                const char *s = mp_obj_str_get_data(arg, &slen);
+                if (precision < 0) {
+                    precision = slen;
                 }
+                if (slen > (size_t)precision) {
+                    slen = precision;
+                }
+                mp_print_strn(print, s, slen, flags, fill, width);
+                break;
+            }
 
-                default:
-                    if (MICROPY_ERROR_REPORTING == MICROPY_ERROR_REPORTING_TERSE) {
-                        terse_str_format_value_error();
-                    } else {
-                        nlr_raise(mp_obj_new_exception_msg_varg(&mp_type_ValueError,
-                            "unknown format code '%c' for object of type '%s'",
-                            type, mp_obj_get_type_str(arg)));
-                    }
+            default:
+                if (MICROPY_ERROR_REPORTING == MICROPY_ERROR_REPORTING_TERSE) {
+                    terse_str_format_value_error();
+                } else {
+                    nlr_raise(mp_obj_new_exception_msg_varg(&mp_type_ValueError,
+                        "unknown format code '%c' for object of type '%s'",
+                        type, mp_obj_get_type_str(arg)));
+                }
+        }
+    }
+}
+
+STATIC vstr_t mp_obj_str_format_helper(const char *str, const char *top, int *arg_i, size_t n_args, const mp_obj_t *args, mp_map_t *kwargs) {
+    vstr_t vstr;
+    mp_print_t print;
+    vstr_init_print(&vstr, 16, &print);
+
+    const char *start = str;
+    while (str < top) {
+        str_format_field_t field;
+        const char *format_spec = NULL;
+        const char *format_spec_top = NULL;
+        str = str_format_parse_field(start, str, top, arg_i, &field, &format_spec, &format_spec_top);
+        vstr_add_strn(&vstr, start + field.lit_off, field.lit_len);
+        if (field.kind == FORMAT_FIELD_NONE) {
+            continue;
+        }
+
+        mp_obj_t arg = str_format_get_arg(&field, n_args, args, kwargs);
+        if (field.has_attr) {
+            mp_raise_NotImplementedError("attributes not supported yet");
+        }
+        if (!field.has_spec) {
+            // nothing to pad or truncate, so print the argument directly
+            mp_obj_print_helper(&print, arg, field.conversion == 'r' ? PRINT_REPR : PRINT_STR);
+            continue;
+        }
+        if (field.conversion) {
+            arg = str_format_convert(arg, field.conversion);
+        }
+
+        if (memchr(format_spec, '{', format_spec_top - format_spec) != NULL) {
+            // recursively call the formatter to format any nested specifiers
+            MP_STACK_CHECK();
+            vstr_t format_spec_vstr = mp_obj_str_format_helper(format_spec, format_spec_top, arg_i, n_args, args, kwargs);
+            str_format_parse_spec(format_spec_vstr.buf, format_spec_vstr.buf + format_spec_vstr.len, &field);
+            vstr_clear(&format_spec_vstr);
+        } else {
+            str_format_parse_spec(format_spec, format_spec_top, &field);
+        }
+        str_format_print(&print, arg, &field);
+    }
+
+    return vstr;
+}
+
+#if MICROPY_OPT_STR_FORMAT_CACHE
+// Parse a str.format pattern into a new template.  Patterns with errors,
+// attribute lookups or nested replacement fields give an invalid template.
+STATIC mp_str_template_t *str_format_compile(mp_obj_t pattern, const char *str, size_t len) {
+    mp_str_template_t *t = str_template_new(pattern, STR_TEMPLATE_FORMAT, sizeof(str_format_field_t),
+        str_template_max_fields((const byte*)str, len, "{}"));
+    if (t == NULL) {
+        return NULL;
+    }
+    str_format_field_t *fields = str_template_fields(t, str_format_field_t);
+    nlr_buf_t nlr;
+    if (nlr_push(&nlr) == 0) {
+        const char *start = str;
+        const char *top = str + len;
+        int arg_i = 0;
+        bool valid = true;
+        size_t n = 0;
+        while (valid && str < top) {
+            str_format_field_t *field = &fields[n++];
+            const char *format_spec = NULL;
+            const char *format_spec_top = NULL;
+            str = str_format_parse_field(start, str, top, &arg_i, field, &format_spec, &format_spec_top);
+            if (field->kind == FORMAT_FIELD_NONE) {
+                continue;
+            }
+            if (field->has_attr) {
+                valid = false;
+            } else if (field->has_spec) {
+                if (memchr(format_spec, '{', format_spec_top - format_spec) != NULL) {
+                    valid = false;
+                } else {
+                    str_format_parse_spec(format_spec, format_spec_top, field);
+                }
             }
         }
+        nlr_pop();
+        t->valid = valid;
+        t->n_fields = n;
+    }
+    return t;
+}
+
+STATIC vstr_t str_format_run(const mp_str_template_t *t, size_t n_args, const mp_obj_t *args, mp_map_t *kwargs) {
+    GET_STR_DATA_LEN(t->pattern, str, len);
+    vstr_t vstr;
+    mp_print_t print;
+    vstr_init_print(&vstr, len, &print);
+
+    const str_format_field_t *field = str_template_fields(t, str_format_field_t);
+    for (size_t i = 0; i < t->n_fields; ++i, ++field) {
+        vstr_add_strn(&vstr, (const char*)str + field->lit_off, field->lit_len);
+        if (field->kind == FORMAT_FIELD_NONE) {
+            continue;
+        }
+        mp_obj_t arg = str_format_get_arg(field, n_args, args, kwargs);
+        if (!field->has_spec) {
+            mp_obj_print_helper(&print, arg, field->conversion == 'r' ? PRINT_REPR : PRINT_STR);
+            continue;
+        }
+        if (field->conversion) {
+            arg = str_format_convert(arg, field->conversion);
+        }
+        str_format_print(&print, arg, field);
     }
 
     return vstr;
 }
+#endif
 
 mp_obj_t mp_obj_str_format(size_t n_args, const mp_obj_t *args, mp_map_t *kwargs) {
     mp_check_self(mp_obj_is_str_or_bytes(args[0]));
 
     GET_STR_DATA_LEN(args[0], str, len);
+    #if MICROPY_OPT_STR_FORMAT_CACHE
+    mp_str_template_t *t = str_template_find(args[0], STR_TEMPLATE_FORMAT);
+    if (t == NULL) {
+        t = str_format_compile(args[0], (const char*)str, len);
+    }
+    if (t != NULL && t->valid) {
+        vstr_t vstr = str_format_run(t, n_args, args, kwargs);
+        return mp_obj_new_str_from_vstr(mp_obj_get_type(args[0]), &vstr);
+    }
+    #endif
     int arg_i = 0;
     vstr_t vstr = mp_obj_str_format_helper((const char*)str, (const char*)str + len, &arg_i, n_args, args, kwargs);
     return mp_obj_new_str_from_vstr(mp_obj_get_type(args[0]), &vstr);
@@ -1392,192 +1908,315 @@ mp_obj_t mp_obj_str_format(size_t n_args, const mp_obj_t *args, mp_map_t *kwargs
 MP_DEFINE_CONST_FUN_OBJ_KW(str_format_obj, 1, mp_obj_str_format);
 
 #if MICROPY_PY_BUILTINS_STR_OP_MODULO
-STATIC mp_obj_t str_modulo_format(mp_obj_t pattern, size_t n_args, const mp_obj_t *args, mp_obj_t dict) {
-    mp_check_self(mp_obj_is_str_or_bytes(pattern));
-
-    GET_STR_DATA_LEN(pattern, str, len);
-    const byte *start_str = str;
-    bool is_bytes = mp_obj_is_type(pattern, &mp_type_bytes);
-    size_t arg_i = 0;
-    vstr_t vstr;
-    mp_print_t print;
-    vstr_init_print(&vstr, 16, &print);
-
-    for (const byte *top = str + len; str < top; str++) {
-        mp_obj_t arg = MP_OBJ_NULL;
-        if (*str != '%') {
-            vstr_add_byte(&vstr, *str);
-            continue;
+// A conversion specifier of % formatting, with the literal text before it.  A
+// field with no type and no error is only literal text.  Errors in the pattern
+// are raised when the field is formatted, so they come after errors from the
+// arguments of earlier fields.
+typedef struct _str_modulo_field_t {
+    size_t lit_off;
+    size_t lit_len;
+    size_t type_pos;
+    qstr key;
+    byte error;
+    bool has_key;
+    bool width_star;
+    bool prec_star;
+    char type;
+    char fill;
+    int flags;
+    int alt;
+    int width;
+    int prec;
+} str_modulo_field_t;
+
+#define MODULO_ERROR_NONE (0)
+#define MODULO_ERROR_KEY (1)
+#define MODULO_ERROR_FORMAT (2)
+
+// Parse the literal text at str and the conversion specifier after it, if any
+STATIC const byte *str_modulo_parse_field(const byte *start, const byte *str, const byte *top, str_modulo_field_t *field) {
+    field->lit_off = str - start;
+    while (str < top && *str != '%') {
+        ++str;
+    }
+    field->lit_len = str - start - field->lit_off;
+    field->type = '\0';
+    field->error = MODULO_ERROR_NONE;
+    field->has_key = false;
+    field->width_star = false;
+    field->prec_star = false;
+    if (str >= top) {
+        return str;
+    }
+    if (++str >= top) {
+        field->error = MODULO_ERROR_FORMAT;
+        return str;
+    }
+    if (*str == '%') {
+        // the literal text goes on to the first '%'
+        field->lit_len++;
+        return str + 1;
+    }
+
+    // Dictionary value lookup
+    if (*str == '(') {
+        field->has_key = true;
+        const byte *key = ++str;
+        while (str < top && *str != ')') {
+            ++str;
         }
-        if (++str >= top) {
-            goto incomplete_format;
-        }
-        if (*str == '%') {
-            vstr_add_byte(&vstr, '%');
-            continue;
-        }
-
-        // Dictionary value lookup
-        if (*str == '(') {
-            if (dict == MP_OBJ_NULL) {
-                mp_raise_TypeError("format needs a dict");
-            }
-            arg_i = 1; // we used up the single dict argument
-            const byte *key = ++str;
-            while (*str != ')') {
-                if (str >= top) {
-                    if (MICROPY_ERROR_REPORTING == MICROPY_ERROR_REPORTING_TERSE) {
-                        terse_str_format_value_error();
-                    } else {
-                        mp_raise_ValueError("incomplete format key");
-                    }
-                }
-                ++str;
-            }
-            mp_obj_t k_obj = mp_obj_new_str_via_qstr((const char*)key, str - key);
-            arg = mp_obj_dict_get(dict, k_obj);
-            str++;
+        if (str >= top) {
+            field->error = MODULO_ERROR_KEY;
+            return str;
         }
+        field->key = qstr_from_strn((const char*)key, str - key);
+        str++;
+    }
 
-        int flags = 0;
-        char fill = ' ';
-        int alt = 0;
-        while (str < top) {
-            if (*str == '-')      flags |= PF_FLAG_LEFT_ADJUST;
-            else if (*str == '+') flags |= PF_FLAG_SHOW_SIGN;
-            else if (*str == ' ') flags |= PF_FLAG_SPACE_SIGN;
-            else if (*str == '#') alt = PF_FLAG_SHOW_PREFIX;
-            else if (*str == '0') {
-                flags |= PF_FLAG_PAD_AFTER_SIGN;
-                fill = '0';
-            } else break;
+    int flags = 0;
+    char fill = ' ';
+    int alt = 0;
+    while (str < top) {
+        if (*str == '-')      flags |= PF_FLAG_LEFT_ADJUST;
+        else if (*str == '+') flags |= PF_FLAG_SHOW_SIGN;
+        else if (*str == ' ') flags |= PF_FLAG_SPACE_SIGN;
+        else if (*str == '#') alt = PF_FLAG_SHOW_PREFIX;
+        else if (*str == '0') {
+            flags |= PF_FLAG_PAD_AFTER_SIGN;
+            fill = '0';
+        } else break;
+        str++;
+    }
+    field->flags = flags;
+    field->fill = fill;
+    field->alt = alt;
+    // parse width, if it exists
+    field->width = 0;
+    if (str < top) {
+        if (*str == '*') {
+            field->width_star = true;
             str++;
+        } else {
+            str = (const byte*)str_to_int((const char*)str, (const char*)top, &field->width);
         }
-        // parse width, if it exists
-        int width = 0;
-        if (str < top) {
+    }
+    field->prec = -1;
+    if (str < top && *str == '.') {
+        if (++str < top) {
             if (*str == '*') {
-                if (arg_i >= n_args) {
-                    goto not_enough_args;
-                }
-                width = mp_obj_get_int(args[arg_i++]);
+                field->prec_star = true;
                 str++;
             } else {
-                str = (const byte*)str_to_int((const char*)str, (const char*)top, &width);
-            }
-        }
-        int prec = -1;
-        if (str < top && *str == '.') {
-            if (++str < top) {
-                if (*str == '*') {
-                    if (arg_i >= n_args) {
-                        goto not_enough_args;
-                    }
-                    prec = mp_obj_get_int(args[arg_i++]);
-                    str++;
-                } else {
-                    prec = 0;
-                    str = (const byte*)str_to_int((const char*)str, (const char*)top, &prec);
-                }
+                field->prec = 0;
+                str = (const byte*)str_to_int((const char*)str, (const char*)top, &field->prec);
             }
         }
+    }
 
-        if (str >= top) {
-incomplete_format:
+    if (str >= top) {
+        field->error = MODULO_ERROR_FORMAT;
+        return str;
+    }
+    field->type = *str;
+    field->type_pos = str - start;
+    return str + 1;
+}
+
+STATIC void str_modulo_format_field(const mp_print_t *print, const str_modulo_field_t *field,
+    size_t n_args, const mp_obj_t *args, size_t *arg_i, mp_obj_t dict, bool is_bytes) {
+
+    mp_obj_t arg = MP_OBJ_NULL;
+    if (field->has_key) {
+        if (dict == MP_OBJ_NULL) {
+            mp_raise_TypeError("format needs a dict");
+        }
+        *arg_i = 1; // we used up the single dict argument
+        if (field->error == MODULO_ERROR_KEY) {
             if (MICROPY_ERROR_REPORTING == MICROPY_ERROR_REPORTING_TERSE) {
                 terse_str_format_value_error();
             } else {
-                mp_raise_ValueError("incomplete format");
+                mp_raise_ValueError("incomplete format key");
             }
         }
+        arg = mp_obj_dict_get(dict, MP_OBJ_NEW_QSTR(field->key));
+    }
 
-        // Tuple value lookup
-        if (arg == MP_OBJ_NULL) {
-            if (arg_i >= n_args) {
+    int flags = field->flags;
+    int width = field->width;
+    if (field->width_star) {
+        if (*arg_i >= n_args) {
+            goto not_enough_args;
+        }
+        width = mp_obj_get_int(args[(*arg_i)++]);
+    }
+    int prec = field->prec;
+    if (field->prec_star) {
+        if (*arg_i >= n_args) {
+            goto not_enough_args;
+        }
+        prec = mp_obj_get_int(args[(*arg_i)++]);
+    }
+
+    if (field->error != MODULO_ERROR_NONE) {
+        if (MICROPY_ERROR_REPORTING == MICROPY_ERROR_REPORTING_TERSE) {
+            terse_str_format_value_error();
+        } else {
+            mp_raise_ValueError("incomplete format");
+        }
+    }
+
+    // Tuple value lookup
+    if (arg == MP_OBJ_NULL) {
+        if (*arg_i >= n_args) {
 not_enough_args:
-                mp_raise_TypeError("format string needs more arguments");
-            }
-            arg = args[arg_i++];
+            mp_raise_TypeError("format string needs more arguments");
         }
-        switch (*str) {
-            case 'c':
-                if (mp_obj_is_str(arg)) {
-                    size_t slen;
-                    const char *s = mp_obj_str_get_data(arg, &slen);
-                    if (slen != 1) {
-                        mp_raise_TypeError("%%c needs int or char");
-                    }
-                    mp_print_strn(&print, s, 1, flags, ' ', width);
-                } else if (arg_looks_integer(arg)) {
-                    char ch = mp_obj_get_int(arg);
-                    mp_print_strn(&print, &ch, 1, flags, ' ', width);
-                } else {
-                    mp_raise_TypeError("integer needed");
+        arg = args[(*arg_i)++];
+    }
+    switch (field->type) {
+        case 'c':
+            if (mp_obj_is_str(arg)) {
+                size_t slen;
+                const char *s = mp_obj_str_get_data(arg, &slen);
+                if (slen != 1) {
+                    mp_raise_TypeError("%%c needs int or char");
                 }
-                break;
+                mp_print_strn(print, s, 1, flags, ' ', width);
+            } else if (arg_looks_integer(arg)) {
+                char ch = mp_obj_get_int(arg);
+                mp_print_strn(print, &ch, 1, flags, ' ', width);
+            } else {
+                mp_raise_TypeError("integer needed");
+            }
+            break;
 
-            case 'd':
-            case 'i':
-            case 'u':
-                mp_print_mp_int(&print, arg_as_int(arg), 10, 'a', flags, fill, width, prec);
-                break;
+        case 'd':
+        case 'i':
+        case 'u':
+            mp_print_mp_int(print, arg_as_int(arg), 10, 'a', flags, field->fill, width, prec);
+            break;
 
 #if MICROPY_PY_BUILTINS_FLOAT
-            case 'e':
-            case 'E':
-            case 'f':
-            case 'F':
-            case 'g':
-            case 'G':
-                mp_print_float(&print, mp_obj_get_float(arg), *str, flags, fill, width, prec);
-                break;
+        case 'e':
+        case 'E':
+        case 'f':
+        case 'F':
+        case 'g':
+        case 'G':
+            mp_print_float(print, mp_obj_get_float(arg), field->type, flags, field->fill, width, prec);
+            break;
 #endif
 
-            case 'o':
-                if (alt) {
-                    flags |= (PF_FLAG_SHOW_PREFIX | PF_FLAG_SHOW_OCTAL_LETTER);
-                }
-                mp_print_mp_int(&print, arg, 8, 'a', flags, fill, width, prec);
-                break;
+        case 'o':
+            if (field->alt) {
+                flags |= (PF_FLAG_SHOW_PREFIX | PF_FLAG_SHOW_OCTAL_LETTER);
+            }
+            mp_print_mp_int(print, arg, 8, 'a', flags, field->fill, width, prec);
+            break;
 
-            case 'r':
-            case 's':
-            {
-                vstr_t arg_vstr;
-                mp_print_t arg_print;
-                vstr_init_print(&arg_vstr, 16, &arg_print);
-                mp_print_kind_t print_kind = (*str == 'r' ? PRINT_REPR : PRINT_STR);
-                if (print_kind == PRINT_STR && is_bytes && mp_obj_is_type(arg, &mp_type_bytes)) {
-                    // If we have something like b"%s" % b"1", bytes arg should be
-                    // printed undecorated.
-                    print_kind = PRINT_RAW;
-                }
-                mp_obj_print_helper(&arg_print, arg, print_kind);
-                uint vlen = arg_vstr.len;
-                if (prec < 0) {
-                    prec = vlen;
-                }
-                if (vlen > (uint)prec) {
-                    vlen = prec;
-                }
-                mp_print_strn(&print, arg_vstr.buf, vlen, flags, ' ', width);
-                vstr_clear(&arg_vstr);
+        case 'r':
+        case 's':
+        {
+            mp_print_kind_t print_kind = (field->type == 'r' ? PRINT_REPR : PRINT_STR);
+            if (print_kind == PRINT_STR && is_bytes && mp_obj_is_type(arg, &mp_type_bytes)) {
+                // If we have something like b"%s" % b"1", bytes arg should be
+                // printed undecorated.
+                print_kind = PRINT_RAW;
+            }
+            if (prec < 0 && width == 0) {
+                // nothing to pad or truncate, so print the argument directly
+                mp_obj_print_helper(print, arg, print_kind);
                 break;
             }
+            vstr_t arg_vstr;
+            mp_print_t arg_print;
+            vstr_init_print(&arg_vstr, 16, &arg_print);
+            mp_obj_print_helper(&arg_print, arg, print_kind);
+            uint vlen = arg_vstr.len;
+            if (prec < 0) {
+                prec = vlen;
+            }
+            if (vlen > (uint)prec) {
+                vlen = prec;
+            }
+            mp_print_strn(print, arg_vstr.buf, vlen, flags, ' ', width);
+            vstr_clear(&arg_vstr);
+            break;
+        }
 
-            case 'X':
-            case 'x':
-                mp_print_mp_int(&print, arg, 16, *str - ('X' - 'A'), flags | alt, fill, width, prec);
-                break;
+        case 'X':
+        case 'x':
+            mp_print_mp_int(print, arg, 16, field->type - ('X' - 'A'), flags | field->alt, field->fill, width, prec);
+            break;
 
-            default:
-                if (MICROPY_ERROR_REPORTING == MICROPY_ERROR_REPORTING_TERSE) {
-                    terse_str_format_value_error();
-                } else {
-                    nlr_raise(mp_obj_new_exception_msg_varg(&mp_type_ValueError,
-                        "unsupported format character '%c' (0x%x) at index %d",
-                        *str, *str, str - start_str));
-                }
+        default:
+            if (MICROPY_ERROR_REPORTING == MICROPY_ERROR_REPORTING_TERSE) {
+                terse_str_format_value_error();
+            } else {
+                nlr_raise(mp_obj_new_exception_msg_varg(&mp_type_ValueError,
+                    "unsupported format character '%c' (0x%x) at index %d",
+                    (byte)field->type, (byte)field->type, (int)field->type_pos));
+            }
+    }
+}
+
+#if MICROPY_OPT_STR_FORMAT_CACHE
+// Parse a % pattern into a new template; its errors are kept in the fields
+STATIC mp_str_template_t *str_modulo_compile(mp_obj_t pattern, const byte *str, size_t len) {
+    mp_str_template_t *t = str_template_new(pattern, STR_TEMPLATE_MODULO, sizeof(str_modulo_field_t),
+        str_template_max_fields(str, len, "%%"));
+    if (t == NULL) {
+        return NULL;
+    }
+    str_modulo_field_t *fields = str_template_fields(t, str_modulo_field_t);
+    nlr_buf_t nlr;
+    if (nlr_push(&nlr) == 0) {
+        size_t n = 0;
+        for (const byte *start = str, *top = str + len; str < top;) {
+            str = str_modulo_parse_field(start, str, top, &fields[n++]);
+        }
+        nlr_pop();
+        t->valid = true;
+        t->n_fields = n;
+    }
+    return t;
+}
+#endif
+
+STATIC mp_obj_t str_modulo_format(mp_obj_t pattern, size_t n_args, const mp_obj_t *args, mp_obj_t dict) {
+    mp_check_self(mp_obj_is_str_or_bytes(pattern));
+
+    GET_STR_DATA_LEN(pattern, str, len);
+    bool is_bytes = mp_obj_is_type(pattern, &mp_type_bytes);
+    size_t arg_i = 0;
+    vstr_t vstr;
+    mp_print_t print;
+
+    #if MICROPY_OPT_STR_FORMAT_CACHE
+    mp_str_template_t *t = str_template_find(pattern, STR_TEMPLATE_MODULO);
+    if (t == NULL) {
+        t = str_modulo_compile(pattern, str, len);
+    }
+    if (t != NULL && t->valid) {
+        vstr_init_print(&vstr, len, &print);
+        const str_modulo_field_t *field = str_template_fields(t, str_modulo_field_t);
+        for (size_t i = 0; i < t->n_fields; ++i, ++field) {
+            vstr_add_strn(&vstr, (const char*)str + field->lit_off, field->lit_len);
+            if (field->type != '\0' || field->error != MODULO_ERROR_NONE) {
+                str_modulo_format_field(&print, field, n_args, args, &arg_i, dict, is_bytes);
+            }
+        }
+    } else
+    #endif
+    {
+        vstr_init_print(&vstr, 16, &print);
+        for (const byte *start = str, *top = str + len; str < top;) {
+            str_modulo_field_t field;
+            str = str_modulo_parse_field(start, str, top, &field);
+            vstr_add_strn(&vstr, (const char*)start + field.lit_off, field.lit_len);
+            if (field.type != '\0' || field.error != MODULO_ERROR_NONE) {
+                str_modulo_format_field(&print, &field, n_args, args, &arg_i, dict, is_bytes);
+            }
         }
     }
 
@@ -1719,20 +2358,36 @@ STATIC mp_obj_t str_count(size_t n_args, const mp_obj_t *args) {
         end = str_index_to_ptr(self_type, haystack, haystack_len, args[3], true);
     }
 
+    // an empty range has no occurrences, and find_subbytes needs end >= start
+    if (end < start) {
+        return MP_OBJ_NEW_SMALL_INT(0);
+    }
+
     // if needle_len is zero then we count each gap between characters as an occurrence
     if (needle_len == 0) {
+        bool is_bytes = self_type == &mp_type_bytes;
+        if (n_args >= 3 && args[2] != mp_const_none) {
+            // a start past the end has no gaps, though it's clamped to the end
+            size_t charlen = is_bytes ? haystack_len : utf8_charlen(haystack, haystack_len);
+            if (mp_obj_get_int(args[2]) > (mp_int_t)charlen) {
+                return MP_OBJ_NEW_SMALL_INT(0);
+            }
+        }
+        if (is_bytes) {
+            return MP_OBJ_NEW_SMALL_INT(end - start + 1);
+        }
         return MP_OBJ_NEW_SMALL_INT(utf8_charlen(start, end - start) + 1);
     }
+    if ((size_t)(end - start) < needle_len) {
+        return MP_OBJ_NEW_SMALL_INT(0);
+    }
 
     // count the occurrences
     mp_int_t num_occurrences = 0;
-    for (const byte *haystack_ptr = start; haystack_ptr + needle_len <= end;) {
-        if (memcmp(haystack_ptr, needle, needle_len) == 0) {
-            num_occurrences++;
-            haystack_ptr += needle_len;
-        } else {
-            haystack_ptr = utf8_next_char(haystack_ptr);
-        }
+    for (const byte *haystack_ptr = start;
+         (haystack_ptr = find_subbytes(haystack_ptr, end - haystack_ptr, needle, needle_len, 1)) != NULL;
+         haystack_ptr += needle_len) {
+        num_occurrences++;
     }
 
     return MP_OBJ_NEW_SMALL_INT(num_occurrences);
@@ -1939,6 +2594,12 @@ STATIC const mp_rom_map_elem_t str8_locals_dict_table[] = {
     { MP_ROM_QSTR(MP_QSTR_splitlines), MP_ROM_PTR(&str_splitlines_obj) },
     #endif
     { MP_ROM_QSTR(MP_QSTR_rsplit), MP_ROM_PTR(&str_rsplit_obj) },
+    #if MICROPY_PY_BUILTINS_STR_ISPLIT
+    { MP_ROM_QSTR(MP_QSTR_isplit), MP_ROM_PTR(&str_isplit_obj) },
+    #if MICROPY_PY_BUILTINS_STR_SPLITLINES
+    { MP_ROM_QSTR(MP_QSTR_isplitlines), MP_ROM_PTR(&str_isplitlines_obj) },
+    #endif
+    #endif
     { MP_ROM_QSTR(MP_QSTR_startswith), MP_ROM_PTR(&str_startswith_obj) },
     { MP_ROM_QSTR(MP_QSTR_endswith), MP_ROM_PTR(&str_endswith_obj) },
     { MP_ROM_QSTR(MP_QSTR_strip), MP_ROM_PTR(&str_strip_obj) },
@@ -2003,7 +2664,21 @@ const mp_obj_str_t mp_const_empty_bytes_obj = {{&mp_type_bytes}, 0, 0, (const by
 // the data is copied across.  This function should only be used if the type is bytes,
 // or if the type is str and the string data is known to be not interned.
 mp_obj_t mp_obj_new_str_copy(const mp_obj_type_t *type, const byte* data, size_t len) {
-    mp_obj_str_t *o = m_new_obj(mp_obj_str_t);
+    mp_obj_str_t *o;
+    #if MICROPY_OPT_STR_INLINE
+    if (data && len <= MICROPY_OPT_STR_INLINE_MAX) {
+        o = m_new_obj_var(mp_obj_str_t, byte, len + 1);
+        o->base.type = type;
+        o->len = len;
+        o->hash = qstr_compute_hash(data, len);
+        byte *p = (byte*)(o + 1);
+        o->data = p;
+        memcpy(p, data, len * sizeof(byte));
+        p[len] = '\0';
+        return MP_OBJ_FROM_PTR(o);
+    }
+    #endif
+    o = m_new_obj(mp_obj_str_t);
     o->base.type = type;
     o->len = len;
     if (data) {
@@ -71,8 +71,24 @@ mp_obj_t mp_obj_new_str_of_type(const mp_obj_type_t *type, const byte* data, siz
 mp_obj_t mp_obj_str_binary_op(mp_binary_op_t op, mp_obj_t lhs_in, mp_obj_t rhs_in);
 mp_int_t mp_obj_str_get_buffer(mp_obj_t self_in, mp_buffer_info_t *bufinfo, mp_uint_t flags);
 
+#if MICROPY_OPT_STR_INLINE
+// Whether a str/bytes object keeps its data in the object itself.  Such data
+// must not be referred to by pointer from elsewhere, because a pointer into
+// the middle of a heap block doesn't keep the object alive.
+static inline bool mp_obj_str_data_is_inline(mp_obj_t self_in) {
+    if (!mp_obj_is_obj(self_in) || !mp_obj_is_str_or_bytes(self_in)) {
+        return false;
+    }
+    const mp_obj_str_t *self = MP_OBJ_TO_PTR(self_in);
+    return self->data == (const byte*)(self + 1);
+}
+#endif
+
 const byte *str_index_to_ptr(const mp_obj_type_t *type, const byte *self_data, size_t self_len,
                              mp_obj_t index, bool is_slice);
+#if MICROPY_PY_BUILTINS_STR_UNICODE && MICROPY_OPT_STR_INDEX_CACHE
+size_t str_ptr_to_index(const byte *self_data, size_t self_len, const byte *ptr);
+#endif
 const byte *find_subbytes(const byte *haystack, size_t hlen, const byte *needle, size_t nlen, int direction);
 
 MP_DECLARE_CONST_FUN_OBJ_VAR_BETWEEN(str_encode_obj);
@@ -84,6 +100,8 @@ MP_DECLARE_CONST_FUN_OBJ_2(str_join_obj);
 MP_DECLARE_CONST_FUN_OBJ_VAR_BETWEEN(str_split_obj);
 MP_DECLARE_CONST_FUN_OBJ_KW(str_splitlines_obj);
 MP_DECLARE_CONST_FUN_OBJ_VAR_BETWEEN(str_rsplit_obj);
+MP_DECLARE_CONST_FUN_OBJ_VAR_BETWEEN(str_isplit_obj);
+MP_DECLARE_CONST_FUN_OBJ_KW(str_isplitlines_obj);
 MP_DECLARE_CONST_FUN_OBJ_VAR_BETWEEN(str_startswith_obj);
 MP_DECLARE_CONST_FUN_OBJ_VAR_BETWEEN(str_endswith_obj);
 MP_DECLARE_CONST_FUN_OBJ_VAR_BETWEEN(str_strip_obj);
@@ -28,6 +28,7 @@
 #include <string.h>
 #include <assert.h>
 
+#include "py/unicode.h"
 #include "py/objstr.h"
 #include "py/objlist.h"
 #include "py/runtime.h"
@@ -98,13 +99,139 @@ STATIC void uni_print(const mp_print_t *print, mp_obj_t self_in, mp_print_kind_t
     }
 }
 
+#if MICROPY_OPT_STR_INDEX_CACHE
+
+#if MICROPY_OPT_STR_INLINE && MICROPY_OPT_STR_INLINE_MAX >= MICROPY_OPT_STR_INDEX_STRIDE
+// The cache refers to str data by pointer, which doesn't keep inline data alive
+#error MICROPY_OPT_STR_INDEX_STRIDE must be larger than MICROPY_OPT_STR_INLINE_MAX
+#endif
+
+// The character index of a str.  The data pointer keeps the data alive, and
+// str data never changes, so an index stays valid for as long as it's cached.
+typedef struct _mp_str_index_t {
+    const byte *data;
+    size_t len;
+    size_t charlen;
+    // byte offset of every MICROPY_OPT_STR_INDEX_STRIDE'th character, no
+    // entries if the data is ASCII (charlen == len)
+    size_t offsets[];
+} mp_str_index_t;
+
+STATIC mp_str_index_t *str_index_find(const byte *self_data, size_t self_len) {
+    if (self_len < MICROPY_OPT_STR_INDEX_STRIDE) {
+        return NULL;
+    }
+    mp_str_index_t **cache = MP_STATE_THREAD(str_index_cache);
+    for (size_t i = 0; i < MICROPY_OPT_STR_INDEX_CACHE_SIZE; ++i) {
+        if (cache[i] != NULL && cache[i]->data == self_data && cache[i]->len == self_len) {
+            return cache[i];
+        }
+    }
+    return NULL;
+}
+
+// Return the index of the given str, making and caching it if needed.  Returns
+// NULL if the str is too short to be worth indexing or there is no memory.
+STATIC mp_str_index_t *str_index_get(const byte *self_data, size_t self_len) {
+    if (self_len < MICROPY_OPT_STR_INDEX_STRIDE) {
+        return NULL;
+    }
+    mp_str_index_t *idx = str_index_find(self_data, self_len);
+    if (idx != NULL) {
+        return idx;
+    }
+
+    size_t charlen = utf8_charlen(self_data, self_len);
+    size_t n = 0;
+    if (charlen != self_len) {
+        n = (charlen + MICROPY_OPT_STR_INDEX_STRIDE - 1) / MICROPY_OPT_STR_INDEX_STRIDE;
+    }
+    idx = m_new_obj_var_maybe(mp_str_index_t, size_t, n);
+    if (idx == NULL) {
+        return NULL;
+    }
+    idx->data = self_data;
+    idx->len = self_len;
+    idx->charlen = charlen;
+    for (size_t i = 0, ch = 0, k = 0; k < n; ++i) {
+        if (!UTF8_IS_CONT(self_data[i])) {
+            if (ch++ % MICROPY_OPT_STR_INDEX_STRIDE == 0) {
+                idx->offsets[k++] = i;
+            }
+        }
+    }
+
+    size_t *next = &MP_STATE_THREAD(str_index_cache_next);
+    MP_STATE_THREAD(str_index_cache)[*next] = idx;
+    *next = (*next + 1) % MICROPY_OPT_STR_INDEX_CACHE_SIZE;
+    return idx;
+}
+
+STATIC const byte *str_index_lookup(const mp_str_index_t *idx, mp_int_t i, bool is_slice) {
+    if (i < 0) {
+        i += idx->charlen;
+        if (i < 0) {
+            if (is_slice) {
+                return idx->data;
+            }
+            mp_raise_msg(&mp_type_IndexError, "string index out of range");
+        }
+    } else if ((size_t)i >= idx->charlen) {
+        if (is_slice) {
+            return idx->data + idx->len;
+        }
+        mp_raise_msg(&mp_type_IndexError, "string index out of range");
+    }
+    if (idx->charlen == idx->len) {
+        return idx->data + i;
+    }
+    const byte *s = idx->data + idx->offsets[i / MICROPY_OPT_STR_INDEX_STRIDE];
+    for (i %= MICROPY_OPT_STR_INDEX_STRIDE; i > 0; --i) {
+        s = utf8_next_char(s);
+    }
+    return s;
+}
+
+// Convert a pointer into the str data to a character index.  This uses the
+// index of the str if it has one, but doesn't make one.
+size_t str_ptr_to_index(const byte *self_data, size_t self_len, const byte *ptr) {
+    const mp_str_index_t *idx = str_index_find(self_data, self_len);
+    if (idx == NULL) {
+        return utf8_ptr_to_index(self_data, ptr);
+    }
+    size_t off = ptr - self_data;
+    if (idx->charlen == idx->len) {
+        return off;
+    }
+    // find the last recorded offset at or before ptr
+    size_t lo = 0, hi = (idx->charlen - 1) / MICROPY_OPT_STR_INDEX_STRIDE;
+    while (lo < hi) {
+        size_t mid = (lo + hi + 1) / 2;
+        if (idx->offsets[mid] <= off) {
+            lo = mid;
+        } else {
+            hi = mid - 1;
+        }
+    }
+    return lo * MICROPY_OPT_STR_INDEX_STRIDE + utf8_ptr_to_index(self_data + idx->offsets[lo], ptr);
+}
+
+#endif // MICROPY_OPT_STR_INDEX_CACHE
+
 STATIC mp_obj_t uni_unary_op(mp_unary_op_t op, mp_obj_t self_in) {
     GET_STR_DATA_LEN(self_in, str_data, str_len);
     switch (op) {
         case MP_UNARY_OP_BOOL:
             return mp_obj_new_bool(str_len != 0);
-        case MP_UNARY_OP_LEN:
+        case MP_UNARY_OP_LEN: {
+            #if MICROPY_OPT_STR_INDEX_CACHE
+            const mp_str_index_t *idx = str_index_find(str_data, str_len);
+            if (idx != NULL) {
+                return MP_OBJ_NEW_SMALL_INT(idx->charlen);
+            }
+            #endif
             return MP_OBJ_NEW_SMALL_INT(utf8_charlen(str_data, str_len));
+        }
         default:
             return MP_OBJ_NULL; // op not supported
     }
@@ -131,6 +258,12 @@ const byte *str_index_to_ptr(const mp_obj_type_t *type, const byte *self_data, s
     } else if (!mp_obj_get_int_maybe(index, &i)) {
         nlr_raise(mp_obj_new_exception_msg_varg(&mp_type_TypeError, "string indices must be integers, not %s", mp_obj_get_type_str(index)));
     }
+    #if MICROPY_OPT_STR_INDEX_CACHE
+    const mp_str_index_t *idx = str_index_get(self_data, self_len);
+    if (idx != NULL) {
+        return str_index_lookup(idx, i, is_slice);
+    }
+    #endif
     const byte *s, *top = self_data + self_len;
     if (i < 0)
     {
@@ -240,6 +373,12 @@ STATIC const mp_rom_map_elem_t struni_locals_dict_table[] = {
     { MP_ROM_QSTR(MP_QSTR_splitlines), MP_ROM_PTR(&str_splitlines_obj) },
     #endif
     { MP_ROM_QSTR(MP_QSTR_rsplit), MP_ROM_PTR(&str_rsplit_obj) },
+    #if MICROPY_PY_BUILTINS_STR_ISPLIT
+    { MP_ROM_QSTR(MP_QSTR_isplit), MP_ROM_PTR(&str_isplit_obj) },
+    #if MICROPY_PY_BUILTINS_STR_SPLITLINES
+    { MP_ROM_QSTR(MP_QSTR_isplitlines), MP_ROM_PTR(&str_isplitlines_obj) },
+    #endif
+    #endif
     { MP_ROM_QSTR(MP_QSTR_startswith), MP_ROM_PTR(&str_startswith_obj) },
     { MP_ROM_QSTR(MP_QSTR_endswith), MP_ROM_PTR(&str_endswith_obj) },
     { MP_ROM_QSTR(MP_QSTR_strip), MP_ROM_PTR(&str_strip_obj) },
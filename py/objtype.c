@@ -44,6 +44,10 @@
 #define ENABLE_SPECIAL_ACCESSORS \
     (MICROPY_PY_DESCRIPTORS  || MICROPY_PY_DELATTR_SETATTR || MICROPY_PY_BUILTINS_PROPERTY)
 
+#if MICROPY_PY_CLASS_SLOTS && !MICROPY_OPT_INSTANCE_SHARED_KEYS
+#error MICROPY_PY_CLASS_SLOTS requires MICROPY_OPT_INSTANCE_SHARED_KEYS
+#endif
+
 STATIC mp_obj_t static_class_method_make_new(const mp_obj_type_t *self_in, size_t n_args, size_t n_kw, const mp_obj_t *args);
 
 /******************************************************************************/
@@ -93,15 +97,124 @@ STATIC mp_obj_t native_base_init_wrapper(size_t n_args, const mp_obj_t *args) {
 }
 STATIC MP_DEFINE_CONST_FUN_OBJ_VAR_BETWEEN(native_base_init_wrapper_obj, 1, MP_OBJ_FUN_ARGS_MAX, native_base_init_wrapper);
 
+#if MICROPY_OPT_INSTANCE_SHARED_KEYS
+
+mp_obj_t *mp_obj_instance_split_lookup(mp_obj_instance_t *self, qstr attr) {
+    const mp_obj_instance_keys_t *keys = self->split.keys;
+    for (size_t i = 0; i < self->split.used; ++i) {
+        if (keys->table[i] == attr) {
+            return &self->split.values[i];
+        }
+    }
+    return NULL;
+}
+
+#if MICROPY_PY_CLASS_SLOTS
+mp_obj_t *mp_obj_instance_slot_lookup(mp_obj_instance_t *self, qstr attr) {
+    const mp_obj_instance_keys_t *keys = ((mp_obj_user_type_t*)self->base.type)->keys;
+    for (size_t i = 0; i < keys->used; ++i) {
+        if (keys->table[i] == attr) {
+            return &mp_obj_instance_slots(self)[i];
+        }
+    }
+    return NULL;
+}
+#endif
+
+// Move the members of an instance from shared-key form to a map of its own
+STATIC void instance_convert_to_map(mp_obj_instance_t *self) {
+    mp_obj_instance_split_t split = self->split;
+    // leave room for the attribute that caused the conversion
+    mp_map_t map;
+    mp_map_init(&map, split.used + 1);
+    for (size_t i = 0; i < split.used; ++i) {
+        mp_map_lookup(&map, MP_OBJ_NEW_QSTR(split.keys->table[i]), MP_MAP_LOOKUP_ADD_IF_NOT_FOUND)->value = split.values[i];
+    }
+    m_del(mp_obj_t, split.values, split.alloc);
+    self->members = map;
+}
+
+// Store an attribute of an instance in shared-key form.  Returns false if the
+// attribute doesn't fit that form, in which case the instance must be converted
+// to use a map.
+STATIC bool instance_split_store(mp_obj_instance_t *self, qstr attr, mp_obj_t value) {
+    mp_obj_t *slot = mp_obj_instance_split_lookup(self, attr);
+    if (slot != NULL) {
+        *slot = value;
+        return true;
+    }
+
+    // A new attribute must be the next name in the key table of the class,
+    // or be appended to it if this instance already has all the names.
+    mp_obj_user_type_t *type = (mp_obj_user_type_t*)self->base.type;
+    mp_obj_instance_keys_t *keys = type->keys;
+    size_t n = self->split.used;
+    if (keys == NULL || n == keys->used) {
+        if (n >= MICROPY_OPT_INSTANCE_SHARED_KEYS_MAX) {
+            return false;
+        }
+        if (keys == NULL || keys->used == keys->alloc) {
+            size_t new_alloc = MIN(n + 4, MICROPY_OPT_INSTANCE_SHARED_KEYS_MAX);
+            mp_obj_instance_keys_t *new_keys = m_new_obj_var(mp_obj_instance_keys_t, qstr, new_alloc);
+            new_keys->used = n;
+            new_keys->alloc = new_alloc;
+            if (keys != NULL) {
+                memcpy(new_keys->table, keys->table, n * sizeof(qstr));
+            }
+            // Instances may still refer to the old table, which stays valid
+            // for them because the names they have are unchanged.
+            keys = type->keys = new_keys;
+        }
+        keys->table[keys->used++] = attr;
+    } else if (keys->table[n] != attr) {
+        // attributes are being added in a different order to other instances
+        return false;
+    }
+    self->split.keys = keys;
+
+    if (n == self->split.alloc) {
+        // Other instances of the class probably have all the names in the key
+        // table, so make room for them all at once.
+        self->split.values = m_renew(mp_obj_t, self->split.values, self->split.alloc, keys->used);
+        self->split.alloc = keys->used;
+    }
+    self->split.values[n] = value;
+    self->split.used = n + 1;
+    return true;
+}
+
+#endif
+
 #if !MICROPY_CPYTHON_COMPAT
 STATIC
 #endif
 mp_obj_instance_t *mp_obj_new_instance(const mp_obj_type_t *class, const mp_obj_type_t **native_base) {
     size_t num_native_bases = instance_count_native_bases(class, native_base);
     assert(num_native_bases < 2);
+    #if MICROPY_PY_CLASS_SLOTS
+    if (class->flags & MP_TYPE_FLAG_HAS_SLOTS) {
+        // a class with __slots__ has no native base
+        size_t num_slots = ((mp_obj_user_type_t*)class)->keys->used;
+        mp_obj_instance_t *o = m_malloc(offsetof(mp_obj_instance_t, members) + num_slots * sizeof(mp_obj_t));
+        o->base.type = class;
+        for (size_t i = 0; i < num_slots; ++i) {
+            mp_obj_instance_slots(o)[i] = MP_OBJ_NULL;
+        }
+        return o;
+    }
+    #endif
     mp_obj_instance_t *o = m_new_obj_var(mp_obj_instance_t, mp_obj_t, num_native_bases);
     o->base.type = class;
+    #if MICROPY_OPT_INSTANCE_SHARED_KEYS
+    o->split.all_keys_are_qstrs = 1;
+    o->split.is_split = 1;
+    o->split.used = 0;
+    o->split.alloc = 0;
+    o->split.keys = NULL;
+    o->split.values = NULL;
+    #else
     mp_map_init(&o->members, 0);
+    #endif
     // Initialise the native base-class slot (should be 1 at most) with a valid
     // object.  It doesn't matter which object, so long as it can be uniquely
     // distinguished from a native class that is initialised.
@@ -131,9 +244,45 @@ struct class_lookup_data {
     size_t meth_offset;
     mp_obj_t *dest;
     bool is_type;
+    #if MICROPY_OPT_ATTR_CACHE
+    // where the attribute was found, if it was found in a locals_dict
+    const mp_obj_type_t *found_type;
+    size_t found_pos;
+    // set if the search went past a native type, which may resolve attributes
+    // differently per instance, so the result can't be cached
+    bool no_cache;
+    #endif
 };
 
-STATIC void mp_obj_class_lookup(struct class_lookup_data  *lookup, const mp_obj_type_t *type) {
+STATIC void mp_obj_class_lookup_found(struct class_lookup_data *lookup, const mp_obj_type_t *type, mp_map_elem_t *elem) {
+    if (lookup->is_type) {
+        // If we look up a class method, we need to return original type for which we
+        // do a lookup, not a (base) type in which we found the class method.
+        const mp_obj_type_t *org_type = (const mp_obj_type_t*)lookup->obj;
+        mp_convert_member_lookup(MP_OBJ_NULL, org_type, elem->value, lookup->dest);
+    } else {
+        mp_obj_instance_t *obj = lookup->obj;
+        mp_obj_t obj_obj;
+        if (obj != NULL && mp_obj_is_native_type(type) && type != &mp_type_object /* object is not a real type */) {
+            // If we're dealing with native base class, then it applies to native sub-object
+            obj_obj = obj->subobj[0];
+        } else {
+            obj_obj = MP_OBJ_FROM_PTR(obj);
+        }
+        mp_convert_member_lookup(obj_obj, type, elem->value, lookup->dest);
+    }
+#if DEBUG_PRINT
+    DEBUG_printf("mp_obj_class_lookup: Returning: ");
+    mp_obj_print_helper(MICROPY_DEBUG_PRINTER, lookup->dest[0], PRINT_REPR);
+    if (lookup->dest[1] != MP_OBJ_NULL) {
+        // Don't try to repr() lookup->dest[1], as we can be called recursively
+        DEBUG_printf(" <%s @%p>", mp_obj_get_type_str(lookup->dest[1]), MP_OBJ_TO_PTR(lookup->dest[1]));
+    }
+    DEBUG_printf("\n");
+#endif
+}
+
+STATIC void mp_obj_class_lookup_walk(struct class_lookup_data  *lookup, const mp_obj_type_t *type) {
     assert(lookup->dest[0] == MP_OBJ_NULL);
     assert(lookup->dest[1] == MP_OBJ_NULL);
     for (;;) {
@@ -157,31 +306,11 @@ STATIC void mp_obj_class_lookup(struct class_lookup_data  *lookup, const mp_obj_
             mp_map_t *locals_map = &type->locals_dict->map;
             mp_map_elem_t *elem = mp_map_lookup(locals_map, MP_OBJ_NEW_QSTR(lookup->attr), MP_MAP_LOOKUP);
             if (elem != NULL) {
-                if (lookup->is_type) {
-                    // If we look up a class method, we need to return original type for which we
-                    // do a lookup, not a (base) type in which we found the class method.
-                    const mp_obj_type_t *org_type = (const mp_obj_type_t*)lookup->obj;
-                    mp_convert_member_lookup(MP_OBJ_NULL, org_type, elem->value, lookup->dest);
-                } else {
-                    mp_obj_instance_t *obj = lookup->obj;
-                    mp_obj_t obj_obj;
-                    if (obj != NULL && mp_obj_is_native_type(type) && type != &mp_type_object /* object is not a real type */) {
-                        // If we're dealing with native base class, then it applies to native sub-object
-                        obj_obj = obj->subobj[0];
-                    } else {
-                        obj_obj = MP_OBJ_FROM_PTR(obj);
-                    }
-                    mp_convert_member_lookup(obj_obj, type, elem->value, lookup->dest);
-                }
-#if DEBUG_PRINT
-                DEBUG_printf("mp_obj_class_lookup: Returning: ");
-                mp_obj_print_helper(MICROPY_DEBUG_PRINTER, lookup->dest[0], PRINT_REPR);
-                if (lookup->dest[1] != MP_OBJ_NULL) {
-                    // Don't try to repr() lookup->dest[1], as we can be called recursively
-                    DEBUG_printf(" <%s @%p>", mp_obj_get_type_str(lookup->dest[1]), MP_OBJ_TO_PTR(lookup->dest[1]));
-                }
-                DEBUG_printf("\n");
-#endif
+                #if MICROPY_OPT_ATTR_CACHE
+                lookup->found_type = type;
+                lookup->found_pos = elem - &locals_map->table[0];
+                #endif
+                mp_obj_class_lookup_found(lookup, type, elem);
                 return;
             }
         }
@@ -196,6 +325,12 @@ STATIC void mp_obj_class_lookup(struct class_lookup_data  *lookup, const mp_obj_
             }
         }
 
+        #if MICROPY_OPT_ATTR_CACHE
+        if (mp_obj_is_native_type(type)) {
+            lookup->no_cache = true;
+        }
+        #endif
+
         // attribute not found, keep searching base classes
 
         if (type->parent == NULL) {
@@ -213,7 +348,7 @@ STATIC void mp_obj_class_lookup(struct class_lookup_data  *lookup, const mp_obj_
                     // Not a "real" type
                     continue;
                 }
-                mp_obj_class_lookup(lookup, bt);
+                mp_obj_class_lookup_walk(lookup, bt);
                 if (lookup->dest[0] != MP_OBJ_NULL) {
                     return;
                 }
@@ -233,6 +368,45 @@ STATIC void mp_obj_class_lookup(struct class_lookup_data  *lookup, const mp_obj_
     }
 }
 
+#if MICROPY_OPT_ATTR_CACHE
+#define ATTR_CACHE_ENTRY(type, attr) (&MP_STATE_THREAD(attr_cache)[((((uintptr_t)(type)) >> 3) ^ (attr)) % MICROPY_OPT_ATTR_CACHE_SIZE])
+#endif
+
+STATIC void mp_obj_class_lookup(struct class_lookup_data  *lookup, const mp_obj_type_t *type) {
+    #if MICROPY_OPT_ATTR_CACHE
+    // An entry is valid if no key was added to any class locals_dict since it
+    // was made, which could shadow the cached location.  Other changes to the
+    // locals_dict, such as deleting the key or resizing the map, are caught by
+    // checking that the cached slot still holds the attribute.
+    mp_attr_cache_entry_t *entry = ATTR_CACHE_ENTRY(type, lookup->attr);
+    size_t version = MP_STATE_VM(map_version);
+    if (entry->type == type && entry->attr == lookup->attr
+        && entry->meth_offset == lookup->meth_offset && entry->version == version) {
+        mp_map_t *locals_map = &entry->found_type->locals_dict->map;
+        if (entry->pos < locals_map->alloc && locals_map->table[entry->pos].key == MP_OBJ_NEW_QSTR(lookup->attr)) {
+            ++MP_STATE_THREAD(attr_cache_hits);
+            mp_obj_class_lookup_found(lookup, entry->found_type, &locals_map->table[entry->pos]);
+            return;
+        }
+    }
+    ++MP_STATE_THREAD(attr_cache_misses);
+    lookup->found_type = NULL;
+    lookup->no_cache = false;
+    mp_obj_class_lookup_walk(lookup, type);
+    if (lookup->found_type != NULL && !lookup->no_cache
+        && lookup->found_pos <= 0xffff && lookup->meth_offset <= 0xffff) {
+        entry->type = type;
+        entry->found_type = lookup->found_type;
+        entry->version = version;
+        entry->attr = lookup->attr;
+        entry->meth_offset = lookup->meth_offset;
+        entry->pos = lookup->found_pos;
+    }
+    #else
+    mp_obj_class_lookup_walk(lookup, type);
+    #endif
+}
+
 STATIC void instance_print(const mp_print_t *print, mp_obj_t self_in, mp_print_kind_t kind) {
     mp_obj_instance_t *self = MP_OBJ_TO_PTR(self_in);
     qstr meth = (kind == PRINT_STR) ? MP_QSTR___str__ : MP_QSTR___repr__;
@@ -394,8 +568,21 @@ STATIC mp_obj_t instance_unary_op(mp_unary_op_t op, mp_obj_t self_in) {
         const mp_obj_type_t *native_base;
         size_t num_native_bases = instance_count_native_bases(mp_obj_get_type(self_in), &native_base);
 
-        size_t sz = sizeof(*self) + sizeof(*self->subobj) * num_native_bases
-            + sizeof(*self->members.table) * self->members.alloc;
+        size_t sz = sizeof(*self) + sizeof(*self->subobj) * num_native_bases;
+        #if MICROPY_PY_CLASS_SLOTS
+        if (self->base.type->flags & MP_TYPE_FLAG_HAS_SLOTS) {
+            sz = offsetof(mp_obj_instance_t, members)
+                + sizeof(mp_obj_t) * ((mp_obj_user_type_t*)self->base.type)->keys->used;
+        } else
+        #endif
+        #if MICROPY_OPT_INSTANCE_SHARED_KEYS
+        if (self->split.is_split) {
+            sz += sizeof(*self->split.values) * self->split.alloc;
+        } else
+        #endif
+        {
+            sz += sizeof(*self->members.table) * self->members.alloc;
+        }
         return MP_OBJ_NEW_SMALL_INT(sz);
     }
     #endif
@@ -580,17 +767,53 @@ STATIC void mp_obj_instance_load_attr(mp_obj_t self_in, qstr attr, mp_obj_t *des
     assert(mp_obj_is_instance_type(mp_obj_get_type(self_in)));
     mp_obj_instance_t *self = MP_OBJ_TO_PTR(self_in);
 
-    mp_map_elem_t *elem = mp_map_lookup(&self->members, MP_OBJ_NEW_QSTR(attr), MP_MAP_LOOKUP);
-    if (elem != NULL) {
-        // object member, always treated as a value
-        dest[0] = elem->value;
-        return;
+    #if MICROPY_PY_CLASS_SLOTS
+    if (self->base.type->flags & MP_TYPE_FLAG_HAS_SLOTS) {
+        mp_obj_t *value = mp_obj_instance_slot_lookup(self, attr);
+        if (value != NULL && *value != MP_OBJ_NULL) {
+            dest[0] = *value;
+            return;
+        }
+    } else
+    #endif
+    #if MICROPY_OPT_INSTANCE_SHARED_KEYS
+    if (self->split.is_split) {
+        mp_obj_t *value = mp_obj_instance_split_lookup(self, attr);
+        if (value != NULL) {
+            // object member, always treated as a value
+            dest[0] = *value;
+            return;
+        }
+    } else
+    #endif
+    {
+        mp_map_elem_t *elem = mp_map_lookup(&self->members, MP_OBJ_NEW_QSTR(attr), MP_MAP_LOOKUP);
+        if (elem != NULL) {
+            // object member, always treated as a value
+            dest[0] = elem->value;
+            return;
+        }
     }
 #if MICROPY_CPYTHON_COMPAT
-    if (attr == MP_QSTR___dict__) {
+    if (attr == MP_QSTR___dict__
+        #if MICROPY_PY_CLASS_SLOTS
+        // instances of a class with __slots__ have no __dict__
+        && !(self->base.type->flags & MP_TYPE_FLAG_HAS_SLOTS)
+        #endif
+        ) {
         // Create a new dict with a copy of the instance's map items.
         // This creates, unlike CPython, a 'read-only' __dict__: modifying
         // it will not result in modifications to the actual instance members.
+        #if MICROPY_OPT_INSTANCE_SHARED_KEYS
+        if (self->split.is_split) {
+            mp_obj_t attr_dict = mp_obj_new_dict(self->split.used);
+            for (size_t i = 0; i < self->split.used; ++i) {
+                mp_obj_dict_store(attr_dict, MP_OBJ_NEW_QSTR(self->split.keys->table[i]), self->split.values[i]);
+            }
+            dest[0] = attr_dict;
+            return;
+        }
+        #endif
         mp_map_t *map = &self->members;
         mp_obj_t attr_dict = mp_obj_new_dict(map->used);
         for (size_t i = 0; i < map->alloc; ++i) {
@@ -785,6 +1008,34 @@ STATIC bool mp_obj_instance_store_attr(mp_obj_t self_in, qstr attr, mp_obj_t val
     #endif
 
 skip_special_accessors:
+    return mp_obj_instance_store_member(self, attr, value);
+}
+
+bool mp_obj_instance_store_member(mp_obj_instance_t *self, qstr attr, mp_obj_t value) {
+    #if MICROPY_PY_CLASS_SLOTS
+    if (self->base.type->flags & MP_TYPE_FLAG_HAS_SLOTS) {
+        // only the names in __slots__ can be stored
+        mp_obj_t *slot = mp_obj_instance_slot_lookup(self, attr);
+        if (slot == NULL || (value == MP_OBJ_NULL && *slot == MP_OBJ_NULL)) {
+            return false;
+        }
+        *slot = value;
+        return true;
+    }
+    #endif
+
+    #if MICROPY_OPT_INSTANCE_SHARED_KEYS
+    if (self->split.is_split) {
+        if (value == MP_OBJ_NULL) {
+            if (mp_obj_instance_split_lookup(self, attr) == NULL) {
+                return false;
+            }
+        } else if (instance_split_store(self, attr, value)) {
+            return true;
+        }
+        instance_convert_to_map(self);
+    }
+    #endif
 
     if (value == MP_OBJ_NULL) {
         // delete attribute
@@ -1088,6 +1339,63 @@ const mp_obj_type_t mp_type_type = {
     .attr = type_attr,
 };
 
+#if MICROPY_PY_CLASS_SLOTS
+// Give the instances of a class a fixed array of attributes, named by its
+// __slots__ following those of its base.  This is only done if the class has
+// no base or a single base which also has __slots__, and __dict__ isn't one of
+// the names; otherwise __slots__ is ignored.
+STATIC void type_init_slots(mp_obj_user_type_t *type, size_t bases_len, const mp_obj_t *bases, mp_obj_t slots_in) {
+    const mp_obj_instance_keys_t *base_keys = NULL;
+    if (bases_len > 1) {
+        return;
+    } else if (bases_len == 1 && bases[0] != MP_OBJ_FROM_PTR(&mp_type_object)) {
+        const mp_obj_type_t *base = MP_OBJ_TO_PTR(bases[0]);
+        if (!(base->flags & MP_TYPE_FLAG_HAS_SLOTS)) {
+            return;
+        }
+        base_keys = ((const mp_obj_user_type_t*)base)->keys;
+    }
+
+    // a single string names one slot
+    size_t len;
+    mp_obj_t *items;
+    if (mp_obj_is_str(slots_in)) {
+        len = 1;
+        items = &slots_in;
+    } else {
+        mp_obj_get_array(slots_in, &len, &items);
+    }
+
+    size_t num_base_slots = base_keys == NULL ? 0 : base_keys->used;
+    size_t num_slots = num_base_slots + len;
+    mp_obj_instance_keys_t *keys = m_new_obj_var(mp_obj_instance_keys_t, qstr, num_slots);
+    keys->used = num_slots;
+    keys->alloc = num_slots;
+    if (base_keys != NULL) {
+        memcpy(keys->table, base_keys->table, num_base_slots * sizeof(qstr));
+    }
+    for (size_t i = 0; i < len; ++i) {
+        qstr attr = mp_obj_str_get_qstr(items[i]);
+        if (attr == MP_QSTR___dict__) {
+            m_del_var(mp_obj_instance_keys_t, qstr, num_slots, keys);
+            return;
+        }
+        // a slot is found before the class locals, so it would hide them
+        if (mp_map_lookup(&type->type.locals_dict->map, MP_OBJ_NEW_QSTR(attr), MP_MAP_LOOKUP) != NULL) {
+            if (MICROPY_ERROR_REPORTING == MICROPY_ERROR_REPORTING_TERSE) {
+                mp_raise_ValueError("__slots__ conflicts with class variable");
+            } else {
+                nlr_raise(mp_obj_new_exception_msg_varg(&mp_type_ValueError,
+                    "'%q' in __slots__ conflicts with class variable", attr));
+            }
+        }
+        keys->table[num_base_slots + i] = attr;
+    }
+    type->keys = keys;
+    type->type.flags |= MP_TYPE_FLAG_HAS_SLOTS;
+}
+#endif
+
 mp_obj_t mp_obj_new_type(qstr name, mp_obj_t bases_tuple, mp_obj_t locals_dict) {
     // Verify input objects have expected type
     if (!mp_obj_is_type(bases_tuple, &mp_type_tuple)) {
@@ -1126,7 +1434,11 @@ mp_obj_t mp_obj_new_type(qstr name, mp_obj_t bases_tuple, mp_obj_t locals_dict)
         #endif
     }
 
+    #if MICROPY_OPT_INSTANCE_SHARED_KEYS
+    mp_obj_type_t *o = &m_new0(mp_obj_user_type_t, 1)->type;
+    #else
     mp_obj_type_t *o = m_new0(mp_obj_type_t, 1);
+    #endif
     o->base.type = &mp_type_type;
     o->flags = base_flags;
     o->name = name;
@@ -1161,6 +1473,12 @@ mp_obj_t mp_obj_new_type(qstr name, mp_obj_t bases_tuple, mp_obj_t locals_dict)
 
     o->locals_dict = MP_OBJ_TO_PTR(locals_dict);
 
+    #if MICROPY_OPT_ATTR_CACHE
+    // Adding to the locals dict may shadow attributes of base classes.  This
+    // also invalidates entries for a previous type at the same address.
+    mp_map_set_versioned(&o->locals_dict->map);
+    #endif
+
     #if ENABLE_SPECIAL_ACCESSORS
     // Check if the class has any special accessor methods
     if (!(o->flags & MP_TYPE_FLAG_HAS_SPECIAL_ACCESSORS)) {
@@ -1192,6 +1510,13 @@ mp_obj_t mp_obj_new_type(qstr name, mp_obj_t bases_tuple, mp_obj_t locals_dict)
         }
     }
 
+    #if MICROPY_PY_CLASS_SLOTS
+    elem = mp_map_lookup(locals_map, MP_OBJ_NEW_QSTR(MP_QSTR___slots__), MP_MAP_LOOKUP);
+    if (elem != NULL) {
+        type_init_slots((mp_obj_user_type_t*)o, bases_len, bases_items, elem->value);
+    }
+    #endif
+
     return MP_OBJ_FROM_PTR(o);
 }
 
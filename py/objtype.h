@@ -28,15 +28,70 @@
 
 #include "py/obj.h"
 
+#if MICROPY_OPT_INSTANCE_SHARED_KEYS
+// names of the attributes of instances of a user class, in the order they
+// were first added to an instance; names are only ever appended
+typedef struct _mp_obj_instance_keys_t {
+    size_t used;
+    size_t alloc;
+    qstr table[];
+} mp_obj_instance_keys_t;
+
+// a user class created by mp_obj_new_type
+// if it has MP_TYPE_FLAG_HAS_SLOTS then keys holds the names in __slots__
+typedef struct _mp_obj_user_type_t {
+    mp_obj_type_t type;
+    mp_obj_instance_keys_t *keys;
+} mp_obj_user_type_t;
+
+// instance members in shared-key form: values[i] is the value of the attribute
+// named keys->table[i], for i < used
+// keys is the key table of the class, or an earlier one that it replaced,
+// which has the same first names
+// this overlays mp_map_t, with is_split in place of is_fixed (which is never
+// set for the members map of an instance)
+typedef struct _mp_obj_instance_split_t {
+    size_t all_keys_are_qstrs : 1;
+    size_t is_split : 1;
+    size_t used : 8;
+    size_t alloc : 8;
+    const mp_obj_instance_keys_t *keys;
+    mp_obj_t *values;
+} mp_obj_instance_split_t;
+#endif
+
 // instance object
 // creating an instance of a class makes one of these objects
 typedef struct _mp_obj_instance_t {
     mp_obj_base_t base;
+    #if MICROPY_OPT_INSTANCE_SHARED_KEYS
+    union {
+        mp_map_t members;
+        mp_obj_instance_split_t split;
+    };
+    #else
     mp_map_t members;
+    #endif
     mp_obj_t subobj[];
     // TODO maybe cache __getattr__ and __setattr__ for efficient lookup of them
 } mp_obj_instance_t;
 
+#if MICROPY_OPT_INSTANCE_SHARED_KEYS
+mp_obj_t *mp_obj_instance_split_lookup(mp_obj_instance_t *self, qstr attr);
+#endif
+
+#if MICROPY_PY_CLASS_SLOTS
+// an instance of a class with __slots__ has no members; instead it has one
+// slot in their place for each name in the keys of its class, holding
+// MP_OBJ_NULL while that attribute isn't set
+#define mp_obj_instance_slots(self) ((mp_obj_t*)&(self)->members)
+mp_obj_t *mp_obj_instance_slot_lookup(mp_obj_instance_t *self, qstr attr);
+#endif
+
+// stores (or deletes, if value is MP_OBJ_NULL) an attribute in the members of
+// an instance, bypassing properties and __setattr__/__delattr__
+bool mp_obj_instance_store_member(mp_obj_instance_t *self, qstr attr, mp_obj_t value);
+
 #if MICROPY_CPYTHON_COMPAT
 // this is needed for object.__new__
 mp_obj_instance_t *mp_obj_new_instance(const mp_obj_type_t *cls, const mp_obj_type_t **native_base);
@@ -1163,6 +1163,9 @@ void mp_parse_tree_clear(mp_parse_tree_t *tree) {
         m_del(byte, chunk, sizeof(mp_parse_chunk_t) + chunk->alloc);
         chunk = next;
     }
+    // the tree may be on the C stack, so don't leave pointers to freed memory
+    tree->root = MP_PARSE_NODE_NULL;
+    tree->chunk = NULL;
 }
 
 #endif // MICROPY_ENABLE_COMPILER
@@ -24,9 +24,13 @@
  * THE SOFTWARE.
  */
 
+#include <string.h>
+
 #include "py/profile.h"
 #include "py/bc0.h"
 #include "py/gc.h"
+#include "py/objfun.h"
+#include "py/objlist.h"
 
 #if MICROPY_PY_SYS_SETTRACE
 
@@ -913,7 +917,40 @@ STATIC const byte *mp_prof_opcode_decode(const byte *ip, const mp_uint_t *const_
             instruction->qstr_opname = MP_QSTR_IMPORT_STAR;
             break;
 
+        case MP_BC_LOAD_FAST_LOAD_FAST:
+            instruction->qstr_opname = MP_QSTR_LOAD_FAST_LOAD_FAST;
+            instruction->arg = *ip++;
+            break;
+
+        case MP_BC_LOAD_FAST_BINARY_OP_SMALL_INT:
+            instruction->qstr_opname = MP_QSTR_LOAD_FAST_BINARY_OP_SMALL_INT;
+            instruction->arg = *ip++;
+            break;
+
+        case MP_BC_LOAD_FAST_LOAD_ATTR:
+            DECODE_QSTR;
+            instruction->qstr_opname = MP_QSTR_LOAD_FAST_LOAD_ATTR;
+            instruction->arg = *ip++;
+            instruction->argobj= MP_OBJ_NEW_QSTR(qst);
+            if (MICROPY_OPT_CACHE_MAP_LOOKUP_IN_BYTECODE) {
+                instruction->argobjex_cache = MP_OBJ_NEW_SMALL_INT(*ip++);
+            }
+            break;
+
+        case MP_BC_BINARY_OP_POP_JUMP_IF:
+            DECODE_SLABEL;
+            instruction->qstr_opname = MP_QSTR_BINARY_OP_POP_JUMP_IF;
+            instruction->arg = unum;
+            instruction->argobj = MP_OBJ_NEW_SMALL_INT(*ip++);
+            break;
+
         default:
+            #if MICROPY_OPT_QUICKEN
+            if (ip[-1] < MP_BC_QUICK_BINARY_OP_MULTI + MP_BC_QUICK_BINARY_OP_MULTI_NUM) {
+                instruction->qstr_opname = MP_QSTR_BINARY_OP;
+                instruction->arg = mp_bc_quick_binary_op[ip[-1] - MP_BC_QUICK_BINARY_OP_MULTI];
+            } else
+            #endif
             if (ip[-1] < MP_BC_LOAD_CONST_SMALL_INT_MULTI + 64) {
                 instruction->qstr_opname = MP_QSTR_LOAD_CONST_SMALL_INT;
                 instruction->arg = (mp_int_t)ip[-1] - MP_BC_LOAD_CONST_SMALL_INT_MULTI - 16;
@@ -982,3 +1019,138 @@ void mp_prof_print_instr(const byte* ip, mp_code_state_t *code_state) {
 #endif // MICROPY_PROF_INSTR_DEBUG_PRINT_ENABLE
 
 #endif // MICROPY_PY_SYS_SETTRACE
+
+#if MICROPY_PY_MICROPYTHON_ALLOC_STATS
+
+/******************************************************************************/
+// allocation profiler
+
+#define alloc_sites MP_STATE_VM(alloc_sites)
+
+typedef struct _alloc_line_t {
+    qstr source_file;
+    qstr block_name;
+    size_t line;
+    size_t count;
+    size_t bytes;
+} alloc_line_t;
+
+void mp_alloc_stats_reset(void) {
+    memset(alloc_sites, 0, sizeof(alloc_sites));
+}
+
+// Count an allocation of n_bytes against the bytecode instruction being run by
+// the current thread.  Allocations made outside of any bytecode function are
+// not counted, and nor are those at new sites once the table is full.  This is
+// called by the GC for every allocation so it must be quick and not allocate.
+void mp_alloc_stats_record(size_t n_bytes) {
+    const mp_code_state_t *code_state = MP_STATE_THREAD(current_code_state);
+    if (code_state == NULL) {
+        return;
+    }
+    mp_obj_t fun = MP_OBJ_FROM_PTR(code_state->fun_bc);
+    size_t offset = code_state->ip - code_state->fun_bc->bytecode;
+    const size_t mask = MICROPY_PY_MICROPYTHON_ALLOC_STATS_SITES - 1;
+    size_t idx = (((uintptr_t)fun >> 3) ^ offset) & mask;
+    for (size_t i = 0; i <= mask; ++i) {
+        mp_alloc_site_t *site = &alloc_sites[idx];
+        if (site->fun == MP_OBJ_NULL) {
+            site->fun = fun;
+            site->offset = offset;
+        } else if (site->fun != fun || site->offset != offset) {
+            idx = (idx + 1) & mask;
+            continue;
+        }
+        site->count += 1;
+        site->bytes += n_bytes;
+        return;
+    }
+}
+
+// Find the source line of an allocation site, the same way as for a traceback.
+STATIC void alloc_site_get_line(const mp_alloc_site_t *site, alloc_line_t *line) {
+    const mp_obj_fun_bc_t *fun = MP_OBJ_TO_PTR(site->fun);
+    const byte *ip = fun->bytecode;
+    MP_BC_PRELUDE_SIG_DECODE(ip);
+    MP_BC_PRELUDE_SIZE_DECODE(ip);
+    const byte *bytecode_start = ip + n_info + n_cell;
+    #if !MICROPY_PERSISTENT_CODE
+    // so bytecode is aligned
+    bytecode_start = MP_ALIGN(bytecode_start, sizeof(mp_uint_t));
+    #endif
+    size_t bc = fun->bytecode + site->offset - bytecode_start;
+    #if MICROPY_PERSISTENT_CODE
+    line->block_name = ip[0] | (ip[1] << 8);
+    line->source_file = ip[2] | (ip[3] << 8);
+    ip += 4;
+    #else
+    line->block_name = mp_decode_uint_value(ip);
+    ip = mp_decode_uint_skip(ip);
+    line->source_file = mp_decode_uint_value(ip);
+    ip = mp_decode_uint_skip(ip);
+    #endif
+    line->line = mp_bytecode_get_source_line(ip, bc);
+    line->count = site->count;
+    line->bytes = site->bytes;
+}
+
+// Return a list of (file, line, name, count, bytes) tuples for the lines that
+// allocated the most bytes, at most max_lines of them, with the largest first.
+mp_obj_t mp_alloc_stats(size_t max_lines) {
+    // Work on a copy of the table so that the allocations made here to build
+    // the result do not change it, and don't count the copy itself
+    mp_code_state_t *code_state = MP_STATE_THREAD(current_code_state);
+    MP_STATE_THREAD(current_code_state) = NULL;
+    alloc_line_t *lines = m_new_maybe(alloc_line_t, MICROPY_PY_MICROPYTHON_ALLOC_STATS_SITES);
+    MP_STATE_THREAD(current_code_state) = code_state;
+    if (lines == NULL) {
+        m_malloc_fail(sizeof(alloc_line_t) * MICROPY_PY_MICROPYTHON_ALLOC_STATS_SITES);
+    }
+    size_t n_lines = 0;
+    for (size_t i = 0; i < MICROPY_PY_MICROPYTHON_ALLOC_STATS_SITES; ++i) {
+        if (alloc_sites[i].fun == MP_OBJ_NULL) {
+            continue;
+        }
+        alloc_line_t *line = &lines[n_lines];
+        alloc_site_get_line(&alloc_sites[i], line);
+
+        // merge sites on the same line, and insertion sort by bytes
+        size_t j = 0;
+        for (; j < n_lines; ++j) {
+            if (lines[j].line == line->line && lines[j].block_name == line->block_name
+                && lines[j].source_file == line->source_file) {
+                break;
+            }
+        }
+        if (j < n_lines) {
+            lines[j].count += line->count;
+            lines[j].bytes += line->bytes;
+        } else {
+            n_lines += 1;
+        }
+        for (; j > 0 && lines[j - 1].bytes < lines[j].bytes; --j) {
+            alloc_line_t tmp = lines[j - 1];
+            lines[j - 1] = lines[j];
+            lines[j] = tmp;
+        }
+    }
+
+    if (n_lines > max_lines) {
+        n_lines = max_lines;
+    }
+    mp_obj_list_t *list = MP_OBJ_TO_PTR(mp_obj_new_list(n_lines, NULL));
+    for (size_t i = 0; i < n_lines; ++i) {
+        mp_obj_t tuple[5] = {
+            MP_OBJ_NEW_QSTR(lines[i].source_file),
+            MP_OBJ_NEW_SMALL_INT(lines[i].line),
+            MP_OBJ_NEW_QSTR(lines[i].block_name),
+            mp_obj_new_int_from_uint(lines[i].count),
+            mp_obj_new_int_from_uint(lines[i].bytes),
+        };
+        list->items[i] = mp_obj_new_tuple(5, tuple);
+    }
+    m_del(alloc_line_t, lines, MICROPY_PY_MICROPYTHON_ALLOC_STATS_SITES);
+    return MP_OBJ_FROM_PTR(list);
+}
+
+#endif // MICROPY_PY_MICROPYTHON_ALLOC_STATS
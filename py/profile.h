@@ -76,4 +76,13 @@ void mp_prof_print_instr(const byte* ip, mp_code_state_t *code_state);
 #endif
 
 #endif // MICROPY_PY_SYS_SETTRACE
+
+#if MICROPY_PY_MICROPYTHON_ALLOC_STATS
+
+// This is the implementation of micropython.alloc_stats and alloc_stats_reset
+void mp_alloc_stats_record(size_t n_bytes);
+void mp_alloc_stats_reset(void);
+mp_obj_t mp_alloc_stats(size_t max_lines);
+
+#endif // MICROPY_PY_MICROPYTHON_ALLOC_STATS
 #endif // MICROPY_INCLUDED_PY_PROFILING_H
@@ -33,8 +33,9 @@
 #include "py/gc.h"
 #include "py/runtime.h"
 
-// NOTE: we are using linear arrays to store and search for qstr's (unique strings, interned strings)
-// ultimately we will replace this with a static hash table of some kind
+// NOTE: we are using linear arrays to store qstr's (unique strings, interned strings)
+// if MICROPY_QSTR_HASH_INDEX is enabled then each pool also has a hash index for
+// searching, otherwise the pools are searched linearly
 // also probably need to include the length in the string data, to allow null bytes in the string
 
 #if MICROPY_DEBUG_VERBOSE // print debugging info
@@ -85,13 +86,23 @@
 // allocated pool is twice this size.  The value here must be <= MP_QSTRnumber_of.
 #define MICROPY_ALLOC_QSTR_ENTRIES_INIT (10)
 
+#if MICROPY_QSTR_HASH_INDEX
+// Maximum number of entries in a dynamically allocated pool, so that the
+// position of a qstr within its pool always fits in a qstr_hash_index_t.
+#define QSTR_HASH_INDEX_MAX_ALLOC (0x8000)
+#endif
+
 // this must match the equivalent function in makeqstrdata.py
-mp_uint_t qstr_compute_hash(const byte *data, size_t len) {
+STATIC mp_uint_t qstr_compute_hash_full(const byte *data, size_t len) {
     // djb2 algorithm; see http://www.cse.yorku.ca/~oz/hash.html
     mp_uint_t hash = 5381;
     for (const byte *top = data + len; data < top; data++) {
         hash = ((hash << 5) + hash) ^ (*data); // hash * 33 ^ data
     }
+    return hash;
+}
+
+STATIC mp_uint_t qstr_fold_hash(mp_uint_t hash) {
     hash &= Q_HASH_MASK;
     // Make sure that valid hash is never zero, zero means "hash not computed"
     if (hash == 0) {
@@ -100,11 +111,31 @@ mp_uint_t qstr_compute_hash(const byte *data, size_t len) {
     return hash;
 }
 
+mp_uint_t qstr_compute_hash(const byte *data, size_t len) {
+    return qstr_fold_hash(qstr_compute_hash_full(data, len));
+}
+
+#if MICROPY_QSTR_HASH_INDEX
+STATIC const qstr_hash_index_t mp_qstr_const_hash_index[] = {
+#ifndef NO_QSTR
+#define QDEF(id, str)
+#define QHASHINDEX(...) __VA_ARGS__,
+#include "genhdr/qstrdefs.generated.h"
+#undef QHASHINDEX
+#undef QDEF
+#endif
+};
+#endif
+
 const qstr_pool_t mp_qstr_const_pool = {
     NULL,               // no previous pool
     0,                  // no previous pool
     MICROPY_ALLOC_QSTR_ENTRIES_INIT,
     MP_QSTRnumber_of,   // corresponds to number of strings in array just below
+    #if MICROPY_QSTR_HASH_INDEX
+    mp_qstr_const_hash_index,
+    MP_ARRAY_SIZE(mp_qstr_const_hash_index) - 1,
+    #endif
     {
 #ifndef NO_QSTR
 #define QDEF(id, str) str,
@@ -141,7 +172,7 @@ STATIC const byte *find_qstr(qstr q) {
 }
 
 // qstr_mutex must be taken while in this function
-STATIC qstr qstr_add(const byte *q_ptr) {
+STATIC qstr qstr_add(const byte *q_ptr, mp_uint_t hash_full) {
     DEBUG_printf("QSTR: add hash=%d len=%d data=%.*s\n", Q_GET_HASH(q_ptr), Q_GET_LENGTH(q_ptr), Q_GET_LENGTH(q_ptr), Q_GET_DATA(q_ptr));
 
     // make sure we have room in the pool for a new qstr
@@ -151,7 +182,18 @@ STATIC qstr qstr_add(const byte *q_ptr) {
         // Put a lower bound on the allocation size in case the extra qstr pool has few entries
         new_alloc = MAX(MICROPY_ALLOC_QSTR_ENTRIES_INIT, new_alloc);
         #endif
+        #if MICROPY_QSTR_HASH_INDEX
+        new_alloc = MIN(QSTR_HASH_INDEX_MAX_ALLOC, new_alloc);
+        size_t index_size = 1;
+        while (index_size < 2 * new_alloc) {
+            index_size <<= 1;
+        }
+        // the hash index is stored in the same memory block, after the qstrs
+        qstr_pool_t *pool = m_malloc_maybe(sizeof(qstr_pool_t) + sizeof(const char*) * new_alloc
+            + sizeof(qstr_hash_index_t) * index_size);
+        #else
         qstr_pool_t *pool = m_new_obj_var_maybe(qstr_pool_t, const char*, new_alloc);
+        #endif
         if (pool == NULL) {
             QSTR_EXIT();
             m_malloc_fail(new_alloc);
@@ -160,41 +202,78 @@ STATIC qstr qstr_add(const byte *q_ptr) {
         pool->total_prev_len = MP_STATE_VM(last_pool)->total_prev_len + MP_STATE_VM(last_pool)->len;
         pool->alloc = new_alloc;
         pool->len = 0;
+        #if MICROPY_QSTR_HASH_INDEX
+        qstr_hash_index_t *index = (qstr_hash_index_t*)&pool->qstrs[new_alloc];
+        memset(index, 0, sizeof(qstr_hash_index_t) * index_size);
+        pool->hash_index = index;
+        pool->hash_index_mask = index_size - 1;
+        #endif
         MP_STATE_VM(last_pool) = pool;
         DEBUG_printf("QSTR: allocate new pool of size %d\n", MP_STATE_VM(last_pool)->alloc);
     }
 
     // add the new qstr
-    MP_STATE_VM(last_pool)->qstrs[MP_STATE_VM(last_pool)->len++] = q_ptr;
+    qstr_pool_t *pool = MP_STATE_VM(last_pool);
+    pool->qstrs[pool->len++] = q_ptr;
+
+    #if MICROPY_QSTR_HASH_INDEX
+    // insert it into the hash index of the pool; there is always a free slot
+    qstr_hash_index_t *index = (qstr_hash_index_t*)pool->hash_index;
+    size_t pos = hash_full & pool->hash_index_mask;
+    while (index[pos] != 0) {
+        pos = (pos + 1) & pool->hash_index_mask;
+    }
+    index[pos] = pool->len;
+    #else
+    (void)hash_full;
+    #endif
 
     // return id for the newly-added qstr
-    return MP_STATE_VM(last_pool)->total_prev_len + MP_STATE_VM(last_pool)->len - 1;
+    return pool->total_prev_len + pool->len - 1;
 }
 
-qstr qstr_find_strn(const char *str, size_t str_len) {
-    // work out hash of str
-    mp_uint_t str_hash = qstr_compute_hash((const byte*)str, str_len);
+STATIC qstr qstr_find_strn_hash(const char *str, size_t str_len, mp_uint_t hash_full) {
+    mp_uint_t str_hash = qstr_fold_hash(hash_full);
 
     // search pools for the data
     for (qstr_pool_t *pool = MP_STATE_VM(last_pool); pool != NULL; pool = pool->prev) {
+        #if MICROPY_QSTR_HASH_INDEX
+        // probe the hash index of the pool until an empty slot is reached
+        for (size_t pos = hash_full & pool->hash_index_mask;; pos = (pos + 1) & pool->hash_index_mask) {
+            size_t i = pool->hash_index[pos];
+            if (i == 0) {
+                break;
+            }
+            const byte *q = pool->qstrs[i - 1];
+            if (Q_GET_HASH(q) == str_hash && Q_GET_LENGTH(q) == str_len && memcmp(Q_GET_DATA(q), str, str_len) == 0) {
+                return pool->total_prev_len + i - 1;
+            }
+        }
+        #else
         for (const byte **q = pool->qstrs, **q_top = pool->qstrs + pool->len; q < q_top; q++) {
             if (Q_GET_HASH(*q) == str_hash && Q_GET_LENGTH(*q) == str_len && memcmp(Q_GET_DATA(*q), str, str_len) == 0) {
                 return pool->total_prev_len + (q - pool->qstrs);
             }
         }
+        #endif
     }
 
     // not found; return null qstr
     return 0;
 }
 
+qstr qstr_find_strn(const char *str, size_t str_len) {
+    return qstr_find_strn_hash(str, str_len, qstr_compute_hash_full((const byte*)str, str_len));
+}
+
 qstr qstr_from_str(const char *str) {
     return qstr_from_strn(str, strlen(str));
 }
 
 qstr qstr_from_strn(const char *str, size_t len) {
     QSTR_ENTER();
-    qstr q = qstr_find_strn(str, len);
+    mp_uint_t hash_full = qstr_compute_hash_full((const byte*)str, len);
+    qstr q = qstr_find_strn_hash(str, len, hash_full);
     if (q == 0) {
         // qstr does not exist in interned pool so need to add it
 
@@ -245,12 +324,12 @@ qstr qstr_from_strn(const char *str, size_t len) {
         MP_STATE_VM(qstr_last_used) += n_bytes;
 
         // store the interned strings' data
-        mp_uint_t hash = qstr_compute_hash((const byte*)str, len);
+        mp_uint_t hash = qstr_fold_hash(hash_full);
         Q_SET_HASH(q_ptr, hash);
         Q_SET_LENGTH(q_ptr, len);
         memcpy(q_ptr + MICROPY_QSTR_BYTES_IN_HASH + MICROPY_QSTR_BYTES_IN_LEN, str, len);
         q_ptr[MICROPY_QSTR_BYTES_IN_HASH + MICROPY_QSTR_BYTES_IN_LEN + len] = '\0';
-        q = qstr_add(q_ptr);
+        q = qstr_add(q_ptr, hash_full);
     }
     QSTR_EXIT();
     return q;
@@ -293,6 +372,9 @@ void qstr_pool_info(size_t *n_pool, size_t *n_qstr, size_t *n_str_data_bytes, si
         *n_total_bytes += gc_nbytes(pool); // this counts actual bytes used in heap
         #else
         *n_total_bytes += sizeof(qstr_pool_t) + sizeof(qstr) * pool->alloc;
+        #if MICROPY_QSTR_HASH_INDEX
+        *n_total_bytes += sizeof(qstr_hash_index_t) * (pool->hash_index_mask + 1);
+        #endif
         #endif
     }
     *n_total_bytes += *n_str_data_bytes;
@@ -47,11 +47,23 @@ enum {
 
 typedef size_t qstr;
 
+#if MICROPY_QSTR_HASH_INDEX
+// Entries in a pool's hash index are (index into pool + 1), with 0 meaning an
+// empty slot, so a pool with a hash index can hold at most 0xfffe qstrs.
+typedef uint16_t qstr_hash_index_t;
+#endif
+
 typedef struct _qstr_pool_t {
     struct _qstr_pool_t *prev;
     size_t total_prev_len;
     size_t alloc;
     size_t len;
+    #if MICROPY_QSTR_HASH_INDEX
+    // Open-addressed table with linear probing, its size is a power of 2
+    // and at least twice the number of qstrs that the pool can hold.
+    const qstr_hash_index_t *hash_index;
+    size_t hash_index_mask;
+    #endif
     const byte *qstrs[];
 } qstr_pool_t;
 
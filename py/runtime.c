@@ -42,6 +42,7 @@
 #include "py/builtin.h"
 #include "py/stackctrl.h"
 #include "py/gc.h"
+#include "py/profile.h"
 
 #if MICROPY_DEBUG_VERBOSE // print debugging info
 #define DEBUG_PRINT (1)
@@ -87,6 +88,12 @@ void mp_init(void) {
     #if MICROPY_EMIT_NATIVE
     MP_STATE_VM(default_emit_opt) = MP_EMIT_OPT_NONE;
     #endif
+    #if MICROPY_OPT_TIERED_NATIVE
+    MP_STATE_VM(tier_threshold) = MICROPY_OPT_TIERED_NATIVE_THRESHOLD;
+    #if MICROPY_PY_THREAD && !MICROPY_PY_THREAD_GIL
+    mp_thread_mutex_init(&MP_STATE_VM(tier_mutex));
+    #endif
+    #endif
     #endif
 
     // init global module dict
@@ -94,6 +101,9 @@ void mp_init(void) {
 
     // initialise the __main__ module
     mp_obj_dict_init(&MP_STATE_VM(dict_main), 1);
+    #if MICROPY_OPT_LOAD_GLOBAL_CACHE
+    mp_map_set_versioned(&MP_STATE_VM(dict_main).map);
+    #endif
     mp_obj_dict_store(MP_OBJ_FROM_PTR(&MP_STATE_VM(dict_main)), MP_OBJ_NEW_QSTR(MP_QSTR___name__), MP_OBJ_NEW_QSTR(MP_QSTR___main__));
 
     // locals = globals for outer module (see Objects/frameobject.c/PyFrame_New())
@@ -105,6 +115,18 @@ void mp_init(void) {
     MP_STATE_VM(mp_module_builtins_override_dict) = NULL;
     #endif
 
+    #if MICROPY_OPT_STR_INDEX_CACHE
+    // any cached str indexes refer to a previous heap
+    memset(MP_STATE_THREAD(str_index_cache), 0, sizeof(MP_STATE_THREAD(str_index_cache)));
+    MP_STATE_THREAD(str_index_cache_next) = 0;
+    #endif
+
+    #if MICROPY_OPT_STR_FORMAT_CACHE
+    // any cached format patterns refer to a previous heap
+    memset(MP_STATE_THREAD(str_template_cache), 0, sizeof(MP_STATE_THREAD(str_template_cache)));
+    MP_STATE_THREAD(str_template_cache_next) = 0;
+    #endif
+
     #if MICROPY_PY_OS_DUPTERM
     for (size_t i = 0; i < MICROPY_PY_OS_DUPTERM; ++i) {
         MP_STATE_VM(dupterm_objs[i]) = MP_OBJ_NULL;
@@ -124,9 +146,19 @@ void mp_init(void) {
     #if MICROPY_PY_SYS_SETTRACE
     MP_STATE_THREAD(prof_trace_callback) = MP_OBJ_NULL;
     MP_STATE_THREAD(prof_callback_is_executing) = false;
+    #endif
+    #if MICROPY_PY_SYS_SETTRACE || MICROPY_PY_MICROPYTHON_ALLOC_STATS
     MP_STATE_THREAD(current_code_state) = NULL;
     #endif
 
+    #if MICROPY_PY_MICROPYTHON_ALLOC_STATS
+    mp_alloc_stats_reset();
+    #endif
+
+    #if MICROPY_GC_STATS && MICROPY_ENABLE_SCHEDULER
+    MP_STATE_VM(gc_callback) = MP_OBJ_NULL;
+    #endif
+
     #if MICROPY_PY_BLUETOOTH
     MP_STATE_VM(bluetooth) = MP_OBJ_NULL;
     #endif
@@ -168,21 +200,38 @@ mp_obj_t mp_load_name(qstr qst) {
     return mp_load_global(qst);
 }
 
+#if MICROPY_OPT_LOAD_GLOBAL_CACHE
+#define LOAD_GLOBAL_CACHE_ENTRY(globals, qst) (&MP_STATE_THREAD(load_global_cache)[((((uintptr_t)(globals)) >> 3) ^ (qst)) % MICROPY_OPT_LOAD_GLOBAL_CACHE_SIZE])
+#endif
+
 mp_obj_t mp_load_global(qstr qst) {
     // logic: search globals, builtins
     DEBUG_OP_printf("load global %s\n", qstr_str(qst));
-    mp_map_elem_t *elem = mp_map_lookup(&mp_globals_get()->map, MP_OBJ_NEW_QSTR(qst), MP_MAP_LOOKUP);
+    mp_map_t *globals = &mp_globals_get()->map;
+    #if MICROPY_OPT_LOAD_GLOBAL_CACHE
+    // A cached slot, in the globals or in the builtins, is valid while no key
+    // was added to the globals or to the builtins override dict: that could
+    // shadow a builtin, or rehash the globals and move the slot.  Deleting the
+    // name is caught by checking that the cached slot still holds it.
+    mp_load_global_cache_entry_t *entry = LOAD_GLOBAL_CACHE_ENTRY(globals, qst);
+    size_t version = MP_STATE_VM(map_version);
+    if (entry->globals == globals && entry->qst == qst && entry->version == version
+        && globals->is_versioned && entry->elem->key == MP_OBJ_NEW_QSTR(qst)) {
+        return entry->elem->value;
+    }
+    #endif
+    mp_map_elem_t *elem = mp_map_lookup(globals, MP_OBJ_NEW_QSTR(qst), MP_MAP_LOOKUP);
     if (elem == NULL) {
         #if MICROPY_CAN_OVERRIDE_BUILTINS
         if (MP_STATE_VM(mp_module_builtins_override_dict) != NULL) {
             // lookup in additional dynamic table of builtins first
             elem = mp_map_lookup(&MP_STATE_VM(mp_module_builtins_override_dict)->map, MP_OBJ_NEW_QSTR(qst), MP_MAP_LOOKUP);
-            if (elem != NULL) {
-                return elem->value;
-            }
         }
+        if (elem == NULL)
         #endif
-        elem = mp_map_lookup((mp_map_t*)&mp_module_builtins_globals.map, MP_OBJ_NEW_QSTR(qst), MP_MAP_LOOKUP);
+        {
+            elem = mp_map_lookup((mp_map_t*)&mp_module_builtins_globals.map, MP_OBJ_NEW_QSTR(qst), MP_MAP_LOOKUP);
+        }
         if (elem == NULL) {
             if (MICROPY_ERROR_REPORTING == MICROPY_ERROR_REPORTING_TERSE) {
                 mp_raise_msg(&mp_type_NameError, "name not defined");
@@ -192,6 +241,14 @@ mp_obj_t mp_load_global(qstr qst) {
             }
         }
     }
+    #if MICROPY_OPT_LOAD_GLOBAL_CACHE
+    if (globals->is_versioned) {
+        entry->globals = globals;
+        entry->elem = elem;
+        entry->version = version;
+        entry->qst = qst;
+    }
+    #endif
     return elem->value;
 }
 
@@ -42,6 +42,7 @@ enum {
     ID_FLAG_IS_PARAM = 0x01,
     ID_FLAG_IS_STAR_PARAM = 0x02,
     ID_FLAG_IS_DBL_STAR_PARAM = 0x04,
+    ID_FLAG_IS_DELETED = 0x08,
     ID_FLAG_VIPER_TYPE_POS = 4,
 };
 
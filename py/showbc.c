@@ -526,7 +526,41 @@ const byte *mp_bytecode_print_str(const byte *ip) {
             printf("IMPORT_STAR");
             break;
 
+        case MP_BC_LOAD_FAST_LOAD_FAST:
+            printf("LOAD_FAST_LOAD_FAST %u %u", *ip >> 4, *ip & 0xf);
+            ip += 1;
+            break;
+
+        case MP_BC_LOAD_FAST_BINARY_OP_SMALL_INT: {
+            mp_uint_t op = ((*ip & 2) ? MP_BINARY_OP_INPLACE_ADD : MP_BINARY_OP_ADD) + (*ip & 1);
+            printf("LOAD_FAST_BINARY_OP_SMALL_INT %u " UINT_FMT " %s %u",
+                *ip >> 4, op, qstr_str(mp_binary_op_method_name[op]), (*ip >> 2) & 3);
+            ip += 1;
+            break;
+        }
+
+        case MP_BC_LOAD_FAST_LOAD_ATTR:
+            DECODE_QSTR;
+            printf("LOAD_FAST_LOAD_ATTR %u %s", *ip++, qstr_str(qst));
+            if (MICROPY_OPT_CACHE_MAP_LOOKUP_IN_BYTECODE) {
+                printf(" (cache=%u)", *ip++);
+            }
+            break;
+
+        case MP_BC_BINARY_OP_POP_JUMP_IF:
+            DECODE_SLABEL;
+            printf("BINARY_OP_POP_JUMP_IF_%s %u %s " UINT_FMT, (*ip & 0x80) ? "TRUE" : "FALSE",
+                *ip & 0x7f, qstr_str(mp_binary_op_method_name[*ip & 0x7f]), (mp_uint_t)(ip + unum - mp_showbc_code_start));
+            ip += 1;
+            break;
+
         default:
+            #if MICROPY_OPT_QUICKEN
+            if (ip[-1] < MP_BC_QUICK_BINARY_OP_MULTI + MP_BC_QUICK_BINARY_OP_MULTI_NUM) {
+                mp_uint_t op = mp_bc_quick_binary_op[ip[-1] - MP_BC_QUICK_BINARY_OP_MULTI];
+                printf("BINARY_OP " UINT_FMT " %s (quick)", op, qstr_str(mp_binary_op_method_name[op]));
+            } else
+            #endif
             if (ip[-1] < MP_BC_LOAD_CONST_SMALL_INT_MULTI + 64) {
                 printf("LOAD_CONST_SMALL_INT " INT_FMT, (mp_int_t)ip[-1] - MP_BC_LOAD_CONST_SMALL_INT_MULTI - 16);
             } else if (ip[-1] < MP_BC_LOAD_FAST_MULTI + 16) {
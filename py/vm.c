@@ -35,6 +35,8 @@
 #include "py/bc0.h"
 #include "py/bc.h"
 #include "py/profile.h"
+#include "py/gc.h"
+#include "py/smallint.h"
 
 #if 0
 #define TRACE(ip) printf("sp=%d ", (int)(sp - &code_state->state[0] + 1)); mp_bytecode_print2(ip, 1, code_state->fun_bc->const_table);
@@ -165,6 +167,24 @@
     } \
 } while(0)
 
+#elif MICROPY_PY_MICROPYTHON_ALLOC_STATS
+
+// only track the current code state, so allocations can be attributed to it
+#define FRAME_SETUP() do { \
+    MP_STATE_THREAD(current_code_state) = code_state; \
+} while(0)
+
+#define FRAME_ENTER() do { \
+    code_state->prev_state = MP_STATE_THREAD(current_code_state); \
+} while(0)
+
+#define FRAME_LEAVE() do { \
+    MP_STATE_THREAD(current_code_state) = code_state->prev_state; \
+} while(0)
+
+#define FRAME_UPDATE()
+#define TRACE_TICK(current_ip, current_sp, is_exception)
+
 #else // MICROPY_PY_SYS_SETTRACE
 #define FRAME_SETUP()
 #define FRAME_ENTER()
@@ -188,6 +208,79 @@ static inline mp_map_elem_t *mp_map_cached_lookup(mp_map_t *map, qstr qst, uint8
     }
     return elem;
 }
+
+// Look up an attribute of an instance, returning a pointer to its value or NULL
+static inline mp_obj_t *mp_obj_instance_cached_lookup(mp_obj_instance_t *self, qstr qst, uint8_t *idx_cache) {
+    #if MICROPY_PY_CLASS_SLOTS
+    if (self->base.type->flags & MP_TYPE_FLAG_HAS_SLOTS) {
+        size_t idx = *idx_cache;
+        const mp_obj_instance_keys_t *keys = ((mp_obj_user_type_t*)self->base.type)->keys;
+        if (MP_LIKELY(idx < keys->used && keys->table[idx] == qst)) {
+            return &mp_obj_instance_slots(self)[idx];
+        }
+        mp_obj_t *value = mp_obj_instance_slot_lookup(self, qst);
+        if (value != NULL) {
+            *idx_cache = value - mp_obj_instance_slots(self);
+        }
+        return value;
+    }
+    #endif
+    #if MICROPY_OPT_INSTANCE_SHARED_KEYS
+    if (self->split.is_split) {
+        size_t idx = *idx_cache;
+        if (MP_LIKELY(idx < self->split.used && self->split.keys->table[idx] == qst)) {
+            return &self->split.values[idx];
+        }
+        mp_obj_t *value = mp_obj_instance_split_lookup(self, qst);
+        if (value != NULL) {
+            *idx_cache = value - self->split.values;
+        }
+        return value;
+    }
+    #endif
+    mp_map_elem_t *elem = mp_map_cached_lookup(&self->members, qst, idx_cache);
+    return elem == NULL ? NULL : &elem->value;
+}
+#endif
+
+#if MICROPY_OPT_QUICKEN
+// Rewrite the MP_BC_BINARY_OP_MULTI opcode at ip to a quickened opcode if there
+// is one for the types of its arguments.  Frozen bytecode is not on the heap
+// (and may be in ROM) so it is never rewritten.
+static inline void mp_bc_quicken_binary_op(const mp_code_state_t *code_state, byte *ip, mp_binary_op_t op, mp_obj_t lhs, mp_obj_t rhs) {
+    byte opcode = 0;
+    if (mp_obj_is_small_int(lhs) && mp_obj_is_small_int(rhs)) {
+        opcode = mp_bc_quick_int_opcode[op];
+    #if MICROPY_PY_BUILTINS_FLOAT
+    } else if (mp_obj_is_float(lhs) && mp_obj_is_float(rhs)) {
+        opcode = mp_bc_quick_float_opcode[op];
+    #endif
+    }
+    if (opcode != 0 && gc_is_heap_ptr(ip)) {
+        *ip = opcode;
+    }
+    #if MICROPY_OPT_TIERED_NATIVE
+    // Count the ops that can't be quickened, which decides whether the
+    // function is worth promoting to native code
+    if (opcode == 0 && code_state->fun_bc->rc->tier != NULL) {
+        ++code_state->fun_bc->rc->tier->n_generic;
+    }
+    #else
+    (void)code_state;
+    #endif
+}
+#endif
+
+#if MICROPY_OPT_TIERED_NATIVE
+// Count a backwards jump (a loop iteration) towards promoting the function to
+// native code; the promotion itself happens on its next call
+#define TIER_COUNT_BACK_EDGE(slab) do { \
+        if ((mp_int_t)(slab) < 0 && code_state->fun_bc->rc->tier != NULL) { \
+            ++code_state->fun_bc->rc->tier->count; \
+        } \
+    } while (0)
+#else
+#define TIER_COUNT_BACK_EDGE(slab)
 #endif
 
 // fastn has items in reverse order (fastn[0] is local[0], fastn[-1] is local[1], etc)
@@ -416,14 +509,14 @@ dispatch_loop:
                     MARK_EXC_IP_SELECTIVE();
                     DECODE_QSTR;
                     mp_obj_t top = TOP();
-                    mp_map_elem_t *elem = NULL;
+                    mp_obj_t *value = NULL;
                     if (mp_obj_is_instance_type(mp_obj_get_type(top))) {
                         mp_obj_instance_t *self = MP_OBJ_TO_PTR(top);
-                        elem = mp_map_cached_lookup(&self->members, qst, (uint8_t*)ip);
+                        value = mp_obj_instance_cached_lookup(self, qst, (uint8_t*)ip);
                     }
                     mp_obj_t obj;
-                    if (elem != NULL) {
-                        obj = elem->value;
+                    if (value != NULL && *value != MP_OBJ_NULL) {
+                        obj = *value;
                     } else {
                         obj = mp_load_attr(top, qst);
                     }
@@ -506,14 +599,14 @@ dispatch_loop:
                     FRAME_UPDATE();
                     MARK_EXC_IP_SELECTIVE();
                     DECODE_QSTR;
-                    mp_map_elem_t *elem = NULL;
+                    mp_obj_t *value = NULL;
                     mp_obj_t top = TOP();
                     if (mp_obj_is_instance_type(mp_obj_get_type(top)) && sp[-1] != MP_OBJ_NULL) {
                         mp_obj_instance_t *self = MP_OBJ_TO_PTR(top);
-                        elem = mp_map_cached_lookup(&self->members, qst, (uint8_t*)ip);
+                        value = mp_obj_instance_cached_lookup(self, qst, (uint8_t*)ip);
                     }
-                    if (elem != NULL) {
-                        elem->value = sp[-1];
+                    if (value != NULL) {
+                        *value = sp[-1];
                     } else {
                         mp_store_attr(sp[0], qst, sp[-1]);
                     }
@@ -596,6 +689,7 @@ dispatch_loop:
 
                 ENTRY(MP_BC_JUMP): {
                     DECODE_SLABEL;
+                    TIER_COUNT_BACK_EDGE(slab);
                     ip += slab;
                     DISPATCH_WITH_PEND_EXC_CHECK();
                 }
@@ -603,6 +697,7 @@ dispatch_loop:
                 ENTRY(MP_BC_POP_JUMP_IF_TRUE): {
                     DECODE_SLABEL;
                     if (mp_obj_is_true(POP())) {
+                        TIER_COUNT_BACK_EDGE(slab);
                         ip += slab;
                     }
                     DISPATCH_WITH_PEND_EXC_CHECK();
@@ -611,6 +706,7 @@ dispatch_loop:
                 ENTRY(MP_BC_POP_JUMP_IF_FALSE): {
                     DECODE_SLABEL;
                     if (!mp_obj_is_true(POP())) {
+                        TIER_COUNT_BACK_EDGE(slab);
                         ip += slab;
                     }
                     DISPATCH_WITH_PEND_EXC_CHECK();
@@ -972,7 +1068,7 @@ unwind_jump:;
                     // (unum >> 8) & 0xff == n_keyword
                     sp -= (unum & 0xff) + ((unum >> 7) & 0x1fe);
                     #if MICROPY_STACKLESS
-                    if (mp_obj_get_type(*sp) == &mp_type_fun_bc) {
+                    if (MP_OBJ_FUN_BC_IS_STACKLESS(*sp)) {
                         code_state->ip = ip;
                         code_state->sp = sp;
                         code_state->exc_sp_idx = MP_CODE_STATE_EXC_SP_IDX_FROM_PTR(exc_stack, exc_sp);
@@ -1009,7 +1105,7 @@ unwind_jump:;
                     // fun arg0 arg1 ... kw0 val0 kw1 val1 ... seq dict <- TOS
                     sp -= (unum & 0xff) + ((unum >> 7) & 0x1fe) + 2;
                     #if MICROPY_STACKLESS
-                    if (mp_obj_get_type(*sp) == &mp_type_fun_bc) {
+                    if (MP_OBJ_FUN_BC_IS_STACKLESS(*sp)) {
                         code_state->ip = ip;
                         code_state->sp = sp;
                         code_state->exc_sp_idx = MP_CODE_STATE_EXC_SP_IDX_FROM_PTR(exc_stack, exc_sp);
@@ -1053,7 +1149,7 @@ unwind_jump:;
                     // (unum >> 8) & 0xff == n_keyword
                     sp -= (unum & 0xff) + ((unum >> 7) & 0x1fe) + 1;
                     #if MICROPY_STACKLESS
-                    if (mp_obj_get_type(*sp) == &mp_type_fun_bc) {
+                    if (MP_OBJ_FUN_BC_IS_STACKLESS(*sp)) {
                         code_state->ip = ip;
                         code_state->sp = sp;
                         code_state->exc_sp_idx = MP_CODE_STATE_EXC_SP_IDX_FROM_PTR(exc_stack, exc_sp);
@@ -1094,7 +1190,7 @@ unwind_jump:;
                     // fun self arg0 arg1 ... kw0 val0 kw1 val1 ... seq dict <- TOS
                     sp -= (unum & 0xff) + ((unum >> 7) & 0x1fe) + 3;
                     #if MICROPY_STACKLESS
-                    if (mp_obj_get_type(*sp) == &mp_type_fun_bc) {
+                    if (MP_OBJ_FUN_BC_IS_STACKLESS(*sp)) {
                         code_state->ip = ip;
                         code_state->sp = sp;
                         code_state->exc_sp_idx = MP_CODE_STATE_EXC_SP_IDX_FROM_PTR(exc_stack, exc_sp);
@@ -1296,6 +1392,194 @@ yield:
                     mp_import_all(POP());
                     DISPATCH();
 
+                ENTRY(MP_BC_LOAD_FAST_LOAD_FAST): {
+                    mp_uint_t arg = *ip++;
+                    obj_shared = fastn[-(mp_int_t)(arg >> 4)];
+                    if (obj_shared == MP_OBJ_NULL) {
+                        goto local_name_error;
+                    }
+                    PUSH(obj_shared);
+                    obj_shared = fastn[-(mp_int_t)(arg & 0xf)];
+                    goto load_check;
+                }
+
+                ENTRY(MP_BC_LOAD_FAST_BINARY_OP_SMALL_INT): {
+                    // arg is 0bLLLLIIOO: local num, small int 0-3, op: bit 0 for
+                    // subtract instead of add, bit 1 for the inplace variant
+                    mp_uint_t arg = *ip++;
+                    mp_obj_t lhs = fastn[-(mp_int_t)(arg >> 4)];
+                    if (lhs == MP_OBJ_NULL) {
+                        goto local_name_error;
+                    }
+                    mp_int_t rhs_val = (arg >> 2) & 3;
+                    if (mp_obj_is_small_int(lhs)) {
+                        mp_int_t val = MP_OBJ_SMALL_INT_VALUE(lhs);
+                        if (arg & 1) {
+                            val -= rhs_val;
+                        } else {
+                            val += rhs_val;
+                        }
+                        if (MP_SMALL_INT_FITS(val)) {
+                            PUSH(MP_OBJ_NEW_SMALL_INT(val));
+                            DISPATCH();
+                        }
+                    }
+                    MARK_EXC_IP_SELECTIVE();
+                    mp_binary_op_t op = ((arg & 2) ? MP_BINARY_OP_INPLACE_ADD : MP_BINARY_OP_ADD) + (arg & 1);
+                    PUSH(mp_binary_op(op, lhs, MP_OBJ_NEW_SMALL_INT(rhs_val)));
+                    DISPATCH();
+                }
+
+                ENTRY(MP_BC_LOAD_FAST_LOAD_ATTR): {
+                    FRAME_UPDATE();
+                    MARK_EXC_IP_SELECTIVE();
+                    DECODE_QSTR;
+                    mp_obj_t top = fastn[-(mp_int_t)*ip++];
+                    if (top == MP_OBJ_NULL) {
+                        goto local_name_error;
+                    }
+                    #if !MICROPY_OPT_CACHE_MAP_LOOKUP_IN_BYTECODE
+                    PUSH(mp_load_attr(top, qst));
+                    #else
+                    mp_obj_t *value = NULL;
+                    if (mp_obj_is_instance_type(mp_obj_get_type(top))) {
+                        mp_obj_instance_t *self = MP_OBJ_TO_PTR(top);
+                        value = mp_obj_instance_cached_lookup(self, qst, (uint8_t*)ip);
+                    }
+                    mp_obj_t obj;
+                    if (value != NULL && *value != MP_OBJ_NULL) {
+                        obj = *value;
+                    } else {
+                        obj = mp_load_attr(top, qst);
+                    }
+                    PUSH(obj);
+                    ip++;
+                    #endif
+                    DISPATCH();
+                }
+
+                ENTRY(MP_BC_BINARY_OP_POP_JUMP_IF): {
+                    // The byte after the label is the relational binary op,
+                    // with the condition to jump on in the top bit
+                    DECODE_SLABEL;
+                    mp_uint_t arg = *ip;
+                    mp_binary_op_t op = arg & 0x7f;
+                    mp_obj_t rhs = POP();
+                    mp_obj_t lhs = POP();
+                    bool res;
+                    if (op == MP_BINARY_OP_IS) {
+                        res = lhs == rhs;
+                    } else if (mp_obj_is_small_int(lhs) && mp_obj_is_small_int(rhs) && op <= MP_BINARY_OP_NOT_EQUAL) {
+                        mp_int_t lhs_val = MP_OBJ_SMALL_INT_VALUE(lhs);
+                        mp_int_t rhs_val = MP_OBJ_SMALL_INT_VALUE(rhs);
+                        switch (op) {
+                            case MP_BINARY_OP_LESS:
+                                res = lhs_val < rhs_val;
+                                break;
+                            case MP_BINARY_OP_MORE:
+                                res = lhs_val > rhs_val;
+                                break;
+                            case MP_BINARY_OP_EQUAL:
+                                res = lhs_val == rhs_val;
+                                break;
+                            case MP_BINARY_OP_LESS_EQUAL:
+                                res = lhs_val <= rhs_val;
+                                break;
+                            case MP_BINARY_OP_MORE_EQUAL:
+                                res = lhs_val >= rhs_val;
+                                break;
+                            default:
+                                res = lhs_val != rhs_val;
+                                break;
+                        }
+                    } else {
+                        MARK_EXC_IP_SELECTIVE();
+                        res = mp_obj_is_true(mp_binary_op(op, lhs, rhs));
+                    }
+                    if (res == (arg >> 7)) {
+                        TIER_COUNT_BACK_EDGE(slab);
+                        ip += slab;
+                    } else {
+                        ip += 1;
+                    }
+                    DISPATCH_WITH_PEND_EXC_CHECK();
+                }
+
+                #if MICROPY_OPT_QUICKEN
+                ENTRY(MP_BC_QUICK_BINARY_OP_MULTI):
+                #if !MICROPY_OPT_COMPUTED_GOTO
+                quick_binary_op:
+                #endif
+                {
+                    MARK_EXC_IP_SELECTIVE();
+                    mp_obj_t rhs = POP();
+                    mp_obj_t lhs = TOP();
+                    if (mp_obj_is_small_int(lhs) && mp_obj_is_small_int(rhs)) {
+                        mp_int_t lhs_val = MP_OBJ_SMALL_INT_VALUE(lhs);
+                        mp_int_t rhs_val = MP_OBJ_SMALL_INT_VALUE(rhs);
+                        switch (ip[-1]) {
+                            case MP_BC_QUICK_INT_ADD:
+                            case MP_BC_QUICK_INT_INPLACE_ADD:
+                                lhs_val += rhs_val;
+                                if (MP_SMALL_INT_FITS(lhs_val)) {
+                                    SET_TOP(MP_OBJ_NEW_SMALL_INT(lhs_val));
+                                    DISPATCH();
+                                }
+                                break;
+                            case MP_BC_QUICK_INT_SUBTRACT:
+                            case MP_BC_QUICK_INT_INPLACE_SUBTRACT:
+                                lhs_val -= rhs_val;
+                                if (MP_SMALL_INT_FITS(lhs_val)) {
+                                    SET_TOP(MP_OBJ_NEW_SMALL_INT(lhs_val));
+                                    DISPATCH();
+                                }
+                                break;
+                            case MP_BC_QUICK_INT_LESS:
+                                SET_TOP(mp_obj_new_bool(lhs_val < rhs_val));
+                                DISPATCH();
+                            case MP_BC_QUICK_INT_MORE:
+                                SET_TOP(mp_obj_new_bool(lhs_val > rhs_val));
+                                DISPATCH();
+                            case MP_BC_QUICK_INT_LESS_EQUAL:
+                                SET_TOP(mp_obj_new_bool(lhs_val <= rhs_val));
+                                DISPATCH();
+                            case MP_BC_QUICK_INT_MORE_EQUAL:
+                                SET_TOP(mp_obj_new_bool(lhs_val >= rhs_val));
+                                DISPATCH();
+                        }
+                    #if MICROPY_PY_BUILTINS_FLOAT
+                    } else if (mp_obj_is_float(lhs) && mp_obj_is_float(rhs)) {
+                        mp_float_t lhs_val = mp_obj_float_get(lhs);
+                        mp_float_t rhs_val = mp_obj_float_get(rhs);
+                        switch (ip[-1]) {
+                            case MP_BC_QUICK_FLOAT_ADD:
+                            case MP_BC_QUICK_FLOAT_INPLACE_ADD:
+                                SET_TOP(mp_obj_new_float(lhs_val + rhs_val));
+                                DISPATCH();
+                            case MP_BC_QUICK_FLOAT_SUBTRACT:
+                                SET_TOP(mp_obj_new_float(lhs_val - rhs_val));
+                                DISPATCH();
+                            case MP_BC_QUICK_FLOAT_MULTIPLY:
+                                SET_TOP(mp_obj_new_float(lhs_val * rhs_val));
+                                DISPATCH();
+                            case MP_BC_QUICK_FLOAT_LESS:
+                                SET_TOP(mp_obj_new_bool(lhs_val < rhs_val));
+                                DISPATCH();
+                            case MP_BC_QUICK_FLOAT_MORE:
+                                SET_TOP(mp_obj_new_bool(lhs_val > rhs_val));
+                                DISPATCH();
+                        }
+                    #endif
+                    }
+                    // The arguments are not of the types that the opcode was quickened
+                    // for, or the result overflowed, so revert to the generic opcode.
+                    mp_binary_op_t op = mp_bc_quick_binary_op[ip[-1] - MP_BC_QUICK_BINARY_OP_MULTI];
+                    ((byte*)ip)[-1] = MP_BC_BINARY_OP_MULTI + op;
+                    SET_TOP(mp_binary_op(op, lhs, rhs));
+                    DISPATCH();
+                }
+                #endif
+
 #if MICROPY_OPT_COMPUTED_GOTO
                 ENTRY(MP_BC_LOAD_CONST_SMALL_INT_MULTI):
                     PUSH(MP_OBJ_NEW_SMALL_INT((mp_int_t)ip[-1] - MP_BC_LOAD_CONST_SMALL_INT_MULTI - MP_BC_LOAD_CONST_SMALL_INT_MULTI_EXCESS));
@@ -1319,6 +1603,9 @@ yield:
                     mp_obj_t rhs = POP();
                     mp_obj_t lhs = TOP();
                     SET_TOP(mp_binary_op(ip[-1] - MP_BC_BINARY_OP_MULTI, lhs, rhs));
+                    #if MICROPY_OPT_QUICKEN
+                    mp_bc_quicken_binary_op(code_state, (byte*)ip - 1, ip[-1] - MP_BC_BINARY_OP_MULTI, lhs, rhs);
+                    #endif
                     DISPATCH();
                 }
 
@@ -1326,6 +1613,11 @@ yield:
                     MARK_EXC_IP_SELECTIVE();
 #else
                 ENTRY_DEFAULT:
+                    #if MICROPY_OPT_QUICKEN
+                    if (ip[-1] < MP_BC_QUICK_BINARY_OP_MULTI + MP_BC_QUICK_BINARY_OP_MULTI_NUM) {
+                        goto quick_binary_op;
+                    } else
+                    #endif
                     if (ip[-1] < MP_BC_LOAD_CONST_SMALL_INT_MULTI + MP_BC_LOAD_CONST_SMALL_INT_MULTI_NUM) {
                         PUSH(MP_OBJ_NEW_SMALL_INT((mp_int_t)ip[-1] - MP_BC_LOAD_CONST_SMALL_INT_MULTI - MP_BC_LOAD_CONST_SMALL_INT_MULTI_EXCESS));
                         DISPATCH();
@@ -1342,6 +1634,9 @@ yield:
                         mp_obj_t rhs = POP();
                         mp_obj_t lhs = TOP();
                         SET_TOP(mp_binary_op(ip[-1] - MP_BC_BINARY_OP_MULTI, lhs, rhs));
+                        #if MICROPY_OPT_QUICKEN
+                        mp_bc_quicken_binary_op(code_state, (byte*)ip - 1, ip[-1] - MP_BC_BINARY_OP_MULTI, lhs, rhs);
+                        #endif
                         DISPATCH();
                     } else
 #endif
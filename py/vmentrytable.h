@@ -107,11 +107,18 @@ static const void *const entry_table[256] = {
     [MP_BC_IMPORT_NAME] = &&entry_MP_BC_IMPORT_NAME,
     [MP_BC_IMPORT_FROM] = &&entry_MP_BC_IMPORT_FROM,
     [MP_BC_IMPORT_STAR] = &&entry_MP_BC_IMPORT_STAR,
+    [MP_BC_LOAD_FAST_LOAD_FAST] = &&entry_MP_BC_LOAD_FAST_LOAD_FAST,
+    [MP_BC_LOAD_FAST_BINARY_OP_SMALL_INT] = &&entry_MP_BC_LOAD_FAST_BINARY_OP_SMALL_INT,
+    [MP_BC_LOAD_FAST_LOAD_ATTR] = &&entry_MP_BC_LOAD_FAST_LOAD_ATTR,
+    [MP_BC_BINARY_OP_POP_JUMP_IF] = &&entry_MP_BC_BINARY_OP_POP_JUMP_IF,
     [MP_BC_LOAD_CONST_SMALL_INT_MULTI ... MP_BC_LOAD_CONST_SMALL_INT_MULTI + MP_BC_LOAD_CONST_SMALL_INT_MULTI_NUM - 1] = &&entry_MP_BC_LOAD_CONST_SMALL_INT_MULTI,
     [MP_BC_LOAD_FAST_MULTI ... MP_BC_LOAD_FAST_MULTI + MP_BC_LOAD_FAST_MULTI_NUM - 1] = &&entry_MP_BC_LOAD_FAST_MULTI,
     [MP_BC_STORE_FAST_MULTI ... MP_BC_STORE_FAST_MULTI + MP_BC_STORE_FAST_MULTI_NUM - 1] = &&entry_MP_BC_STORE_FAST_MULTI,
     [MP_BC_UNARY_OP_MULTI ... MP_BC_UNARY_OP_MULTI + MP_BC_UNARY_OP_MULTI_NUM - 1] = &&entry_MP_BC_UNARY_OP_MULTI,
     [MP_BC_BINARY_OP_MULTI ... MP_BC_BINARY_OP_MULTI + MP_BC_BINARY_OP_MULTI_NUM - 1] = &&entry_MP_BC_BINARY_OP_MULTI,
+    #if MICROPY_OPT_QUICKEN
+    [MP_BC_QUICK_BINARY_OP_MULTI ... MP_BC_QUICK_BINARY_OP_MULTI + MP_BC_QUICK_BINARY_OP_MULTI_NUM - 1] = &&entry_MP_BC_QUICK_BINARY_OP_MULTI,
+    #endif
 };
 
 #if __clang__
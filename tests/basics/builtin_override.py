@@ -11,6 +11,18 @@ except AttributeError:
 
 print(abs(1))
 
+# override a builtin after loads of it have been made, then restore it
+def f():
+    return min(1, 2)
+print(f(), f())
+orig_min = min
+builtins.min = lambda x, y: 'min'
+print(f())
+builtins.min = lambda x, y: 'min2'
+print(f())
+builtins.min = orig_min
+print(f())
+
 # __build_class__ is handled in a special way
 orig_build_class = __build_class__
 builtins.__build_class__ = lambda x, y: ('class', y)
@@ -48,7 +48,16 @@ print(b"aaaa".count(b'a', 1, 5))
 print(b"aaaa".count(b'a', -1, 5))
 print(b"abbabba".count(b"abba"))
 
+# end before start
+print(b"abcabc".count(b"ab", 5, 2))
+print(b"abcabc".count(b"ab", -2, 3))
+print(b"abcabc".count(b"", 5, 2))
+print(b"abcabc".count(b"abc", 4, 6))
+
 def t():
     return True
 
 print(b"0000".count(b'0', t()))
+
+# start past the end
+print(b"abc".count(b"", 3), b"abc".count(b"", 4), b"abc".count(b"", 5, 1))
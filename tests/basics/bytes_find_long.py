@@ -0,0 +1,35 @@
+# substring search with needles and haystacks of various lengths and patterns
+
+try:
+    bytes.count
+except AttributeError:
+    print("SKIP")
+    raise SystemExit
+
+def check(h, n):
+    print(h.find(n), h.rfind(n), h.count(n), n in h, len(h.split(n)), len(h.rsplit(n, 2)))
+
+# 1-byte needles, and bytes that look like the start of a UTF-8 sequence
+check(b"abc\xc3\x80def\x80", b"\x80")
+check(b"abc\xc3\x80def\x80", b"d")
+check(b"\xc3\x80\xc3\x80", b"\x80\xc3")
+
+# short needles
+h = b"the quick brown fox jumps over the lazy dog " * 20
+for n in (b"th", b"the", b"dog ", b"fox jumps", b"lazy cat", b" " * 2):
+    check(h, n)
+
+# long needles, including ones longer than 255 bytes
+for n in (h[100:140], h[7:300], h[-290:], h[100:139] + b"!", h[:400] + b"x"):
+    check(h, n)
+
+# periodic needles and haystacks
+check(b"a" * 2000, b"a" * 40 + b"b")
+check(b"a" * 2000 + b"b", b"a" * 40 + b"b")
+check(b"ab" * 1000, b"ab" * 30 + b"b")
+check(b"aab" * 700 + b"aabaab", b"aab" * 20)
+check(b"a" * 500 + b"b" + b"a" * 50, b"b" + b"a" * 40)
+
+# str
+s = "αβγ-" * 30 + "xyz" * 20
+print(s.find("xyz" * 15), s.rfind("αβγ-" * 9), s.count("γ-α"), s.index("-x"), s.partition("yzx")[2][:4])
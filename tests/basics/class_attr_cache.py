@@ -0,0 +1,66 @@
+# test that class attribute lookups see changes made to classes after use
+
+class A:
+    x = 1
+    def f(self):
+        return 'A.f'
+
+class B(A):
+    pass
+
+b = B()
+
+# warm up lookups through the base class
+for i in range(3):
+    print(b.f(), b.x)
+
+# add a method to the subclass that shadows the base one
+def g(self):
+    return 'B.f'
+B.f = g
+print(b.f())
+
+# replace the value of an existing attribute
+A.x = 2
+print(b.x)
+B.x = 3
+print(b.x)
+
+# delete the subclass attribute so the base one is seen again
+del B.x
+print(b.x)
+del B.f
+print(b.f())
+
+# instance attribute shadows class attribute
+b.x = 4
+print(b.x)
+del b.x
+print(b.x)
+
+# class created with type() from a dict
+C = type('C', (A,), {'y': 5})
+c = C()
+for i in range(3):
+    print(c.y, c.f())
+C.f = lambda self: 'C.f'
+print(c.f())
+
+# multiple inheritance, attribute found in second base
+class D:
+    def h(self):
+        return 'D.h'
+
+class E(B, D):
+    pass
+
+e = E()
+for i in range(3):
+    print(e.h())
+A.h = lambda self: 'A.h'
+print(e.h())
+
+# many classes with the same attribute name
+classes = [type('K%d' % i, (), {'v': i}) for i in range(20)]
+for i in range(2):
+    print([k().v for k in classes])
@@ -0,0 +1,100 @@
+# instances of a class adding attributes in the same and in different orders
+
+class A:
+    pass
+
+def attrs(o):
+    return sorted(o.__dict__.items())
+
+# same order on every instance
+l = []
+for i in range(5):
+    a = A()
+    a.x = i
+    a.y = i * 2
+    a.z = str(i)
+    l.append(a)
+for a in l:
+    print(a.x, a.y, a.z, attrs(a))
+
+# overwrite
+a = l[0]
+a.y = 10
+print(a.x, a.y, a.z)
+
+# a subset of the attributes, then more
+b = A()
+b.x = 1
+print(attrs(b))
+b.y = 2
+b.z = 3
+b.w = 4
+print(attrs(b))
+print(attrs(l[1]))
+
+# a different order
+c = A()
+c.y = 5
+c.x = 6
+print(c.x, c.y, attrs(c))
+c.z = 7
+print(attrs(c))
+
+# delete an attribute
+d = A()
+d.x = 1
+d.y = 2
+del d.x
+print(attrs(d))
+try:
+    d.x
+except AttributeError:
+    print("AttributeError")
+d.x = 3
+print(attrs(d))
+try:
+    del d.q
+except AttributeError:
+    print("AttributeError")
+
+# deleting an attribute that the instance doesn't have
+e = A()
+e.x = 1
+try:
+    del e.y
+except AttributeError:
+    print("AttributeError")
+print(attrs(e))
+
+# many attributes
+f = A()
+for i in range(40):
+    setattr(f, "a%d" % i, i)
+print(sum(getattr(f, "a%d" % i) for i in range(40)))
+g = A()
+for i in range(40):
+    setattr(g, "a%d" % i, -i)
+print(sum(getattr(g, "a%d" % i) for i in range(40)), getattr(f, "a39"))
+
+# attributes set in __init__, and a class attribute
+class B:
+    k = "class"
+    def __init__(self, a, b):
+        self.a = a
+        self.b = b
+    def get(self):
+        return self.a + self.b
+
+l = [B(i, i) for i in range(10)]
+print([o.get() for o in l])
+l[3].k = "inst"
+print(l[3].k, l[4].k)
+
+# subclass has its own attributes
+class C(B):
+    def __init__(self):
+        self.c = 1
+        super().__init__(2, 3)
+
+o = C()
+print(o.get(), o.c, attrs(o))
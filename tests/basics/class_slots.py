@@ -0,0 +1,119 @@
+# test __slots__
+
+class A:
+    __slots__ = ("x", "y")
+
+    def __init__(self, x):
+        self.x = x
+
+    def sum(self):
+        return self.x + self.y
+
+# skip if __slots__ is not supported
+try:
+    A(1).z = 1
+    print("SKIP")
+    raise SystemExit
+except AttributeError:
+    pass
+
+a = A(1)
+print(a.x)
+try:
+    a.y
+except AttributeError:
+    print("AttributeError")
+a.y = 2
+print(a.x, a.y, a.sum())
+a.x = 10
+print(a.sum())
+
+# delete a slot
+del a.y
+try:
+    a.y
+except AttributeError:
+    print("AttributeError")
+try:
+    del a.y
+except AttributeError:
+    print("AttributeError")
+a.y = 5
+print(a.sum())
+
+# no other attributes, and no __dict__
+try:
+    a.z = 1
+except AttributeError:
+    print("AttributeError")
+try:
+    a.__dict__
+except AttributeError:
+    print("AttributeError")
+
+# instances are independent
+l = [A(i) for i in range(5)]
+for i, o in enumerate(l):
+    o.y = i * 10
+print([o.sum() for o in l])
+
+# a single string names one slot
+class B:
+    __slots__ = "v"
+b = B()
+b.v = 1
+print(b.v)
+
+# class attributes are still found
+class C:
+    __slots__ = ("a",)
+    k = 3
+    def __init__(self):
+        self.a = 4
+c = C()
+print(c.a, c.k)
+
+# subclass with more slots
+class D(A):
+    __slots__ = ("z",)
+    def __init__(self):
+        A.__init__(self, 1)
+        self.y = 2
+        self.z = 3
+d = D()
+print(d.x, d.y, d.z, d.sum())
+try:
+    d.w = 1
+except AttributeError:
+    print("AttributeError")
+
+# subclass without __slots__ can have any attribute
+class E(A):
+    pass
+e = E(1)
+e.y = 2
+e.w = 3
+print(e.sum(), e.w)
+
+# __dict__ in __slots__ allows any attribute
+class F:
+    __slots__ = ("a", "__dict__")
+f = F()
+f.a = 1
+f.b = 2
+print(f.a, f.b)
+
+# slot name that conflicts with a class variable
+try:
+    class G:
+        __slots__ = ("a",)
+        a = 1
+except ValueError:
+    print("ValueError")
+
+# invalid __slots__
+try:
+    class H:
+        __slots__ = (1,)
+except TypeError:
+    print("TypeError")
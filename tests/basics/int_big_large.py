@@ -0,0 +1,39 @@
+# test operations on integers large enough to use the sub-quadratic algorithms
+
+# build reproducible integers with n decimal digits
+def make(n, seed):
+    x = seed
+    s = "9"
+    for i in range(n - 1):
+        x = (x * 1103515245 + 12345) & 0x7FFFFFFF
+        s += chr(48 + (x >> 16) % 10)
+    return int(s)
+
+P = 1000000007
+
+for n in (100, 400, 1200, 2000):
+    a = make(n, n)
+    b = make(n // 3 + 1, n + 1)
+
+    # multiplication, balanced and unbalanced
+    print(n, (a * a) % P, (a * b) % P, (a * -b) % P)
+    print((a * a) == a ** 2, (a * b) // b == a)
+
+    # division and modulo, including negative operands
+    for x, y in ((a * a + b, a), (a * a + b, b), (-(a * a) - 1, b), (a * a, -a - 1)):
+        q, r = divmod(x, y)
+        print(q % P, r % P, q * y + r == x, abs(r) < abs(y))
+
+    # conversion to and from a string
+    s = str(a * b)
+    print(len(s), s[:10], s[-10:], int(s) == a * b, int("-" + s) == -a * b)
+    print(str(10 ** n) == "1" + "0" * n, str(10 ** n - 1) == "9" * n)
+    print(int(hex(a), 16) == a, int(oct(-a), 8) == -a)
+    s = "{:,}".format(a)
+    print(len(s), s[:7], s[-8:], int(s.replace(",", "")) == a)
+
+# modular exponentiation, with odd, even and negative moduli
+a = make(600, 1)
+e = make(300, 2)
+for m in (make(500, 3) | 1, make(500, 4) & ~1, -make(400, 5), 2 ** 1000, 3 ** 700):
+    print(pow(a, e, m) % P, pow(-a, e, m) % P, pow(a, 0, m) == 1 % m, pow(a, 1, m) == a % m)
@@ -47,3 +47,17 @@ l.sort()
 print(l)
 l.sort(reverse=True)
 print(l)
+
+# test large lists that are sorted, reversed or have many equal items
+for l in (list(range(1000)), list(range(1000, 0, -1)), [i % 3 for i in range(1000)]):
+    s = sorted(l)
+    print(s[0], s[500], s[-1], all(s[i] <= s[i + 1] for i in range(len(s) - 1)))
+
+# test that the list keeps all its items if a comparison raises
+l = [i * 7 % 101 for i in range(100)]
+l[60] = 'x'
+try:
+    l.sort()
+except TypeError:
+    print('TypeError')
+print(l.count('x'), sorted(i for i in l if i != 'x') == sorted(i * 7 % 101 for i in range(100) if i != 60))
@@ -21,3 +21,19 @@ for i in range(100000):
 
 # check that the memoryview is still what we want
 print(list(m))
+
+# same for short bytes, and for str/bytes made from the data of another
+b = bytes(range(10))
+m = memoryview(b)[1:]
+s = str(b"abcdefgh" + bytes(1), "utf-8")
+c = bytes(s, "utf-8")
+b = None
+gc.collect()
+for i in range(100000):
+    [42, 42, 42, 42]
+print(list(m))
+s = None
+gc.collect()
+for i in range(100000):
+    [42, 42, 42, 42]
+print(c)
@@ -0,0 +1,71 @@
+# test binary operations whose argument types change between executions
+
+def add(a, b):
+    return a + b
+
+def sub(a, b):
+    return a - b
+
+def iadd(a, b):
+    a += b
+    return a
+
+def isub(a, b):
+    a -= b
+    return a
+
+def cmp(a, b):
+    return a < b, a > b, a <= b, a >= b
+
+class A:
+    def __init__(self, x):
+        self.x = x
+    def __add__(self, other):
+        return 'A.__add__'
+    def __iadd__(self, other):
+        return 'A.__iadd__'
+    def __sub__(self, other):
+        return 'A.__sub__'
+    def __lt__(self, other):
+        return 'lt'
+    __gt__ = __le__ = __ge__ = __lt__
+
+# run each function with small ints first, then with other types, then
+# with small ints again
+args = [(1, 2), (-5, 3), ('a', 'b'), ([1], [2]), (A(1), A(2)), (1, 2), (100, -100), ((1,), (2,))]
+for f in (add, iadd):
+    for a, b in args:
+        print(f(a, b))
+for f in (sub, isub):
+    for a, b in args:
+        if isinstance(a, (int, A)):
+            print(f(a, b))
+for a, b in args:
+    print(cmp(a, b))
+
+# in-place add of a list must mutate it
+l = [1]
+for x in (1, [2], 3):
+    if isinstance(x, int):
+        print(iadd(x, x))
+    else:
+        l2 = l
+        iadd(l, x)
+        print(l, l2 is l)
+
+# errors raised after an operation has been specialised
+for a, b in ((1, 2), (1, 'a'), (3, 4)):
+    try:
+        print(add(a, b))
+    except TypeError:
+        print('TypeError')
+
+# a loop
+def loop(n):
+    s = 0
+    i = 0
+    while i < n:
+        s += i
+        i += 1
+    return s
+print(loop(10), loop(100))
@@ -0,0 +1,20 @@
+# test binary operations on small ints which overflow to big ints
+
+def add(a, b):
+    return a + b
+
+def sub(a, b):
+    return a - b
+
+big = 1 << 62
+for i in range(3):
+    print(add(1, 2), add(big - 1, big - 1), add(2, 3))
+    print(sub(1, 2), sub(-big + 1, big), sub(2, 3))
+
+# a loop whose counter overflows a small int
+def loop(start, n):
+    i = start
+    for j in range(n):
+        i += 1 << 28
+    return i
+print(loop(0, 4), loop(1 << 60, 100))
@@ -0,0 +1,107 @@
+# test combined opcodes emitted for common sequences of operations
+
+def load_two(a, b):
+    return a, b
+
+def add_const(a):
+    return a + 1, a - 2, a + 0, a - 3
+
+def iadd_const(a):
+    a += 3
+    b = a
+    b -= 1
+    return a, b
+
+class P:
+    def __init__(self, x):
+        self.x = x
+
+def attr(a, b):
+    return a.x, b.x, a.x + b.x
+
+def cmp_jump(a, b):
+    r = []
+    if a < b:
+        r.append('<')
+    if a > b:
+        r.append('>')
+    if a == b:
+        r.append('==')
+    if a <= b:
+        r.append('<=')
+    if a >= b:
+        r.append('>=')
+    if a != b:
+        r.append('!=')
+    if a is b:
+        r.append('is')
+    if a in (b,):
+        r.append('in')
+    if not a < b:
+        r.append('not <')
+    return r
+
+for args in ((1, 2), (2, 2), (-5, 1), (1.5, 1), ('a', 'b'), ([1], [1])):
+    print(load_two(*args), cmp_jump(*args))
+
+for a in (0, 1, -1, 100, 2.5, True):
+    print(add_const(a), iadd_const(a))
+
+print(attr(P(1), P(2)))
+
+# non-int types
+print(iadd_const(1.25))
+l = [1]
+def iadd_list(a):
+    a += [3]
+    return a
+print(iadd_list(l), l)
+try:
+    add_const('a')
+except TypeError:
+    print('TypeError')
+
+# while loop with a compare and jump
+def count(n):
+    i = 0
+    s = 0
+    while i < n:
+        s += i
+        i += 1
+    return s
+print(count(0), count(10))
+
+# unbound locals
+def unbound_load_two(c):
+    if c:
+        a = b = 1
+    return a, b
+
+def unbound_add(c):
+    if c:
+        a = 1
+    return a + 1
+
+def unbound_attr(c):
+    if c:
+        a = 1
+    return a.x
+
+for f in (unbound_load_two, unbound_add, unbound_attr):
+    try:
+        f(False)
+    except NameError:
+        print('NameError')
+
+# exception raised by the compare in a compare and jump
+class A:
+    def __lt__(self, other):
+        raise ValueError('lt')
+def cmp_raise(a, b):
+    if a < b:
+        return 1
+    return 2
+try:
+    cmp_raise(A(), 1)
+except ValueError as er:
+    print(er.args)
@@ -0,0 +1,69 @@
+# test that loads of builtins see globals which are later defined to shadow them
+
+def f():
+    return len([1, 2])
+
+# warm up the load of the builtin
+for i in range(3):
+    print(f())
+
+# shadow the builtin with a global
+len = lambda x: 'global len'
+print(f())
+
+# update the global
+len = lambda x: 'global len 2'
+print(f())
+
+# remove the global so the builtin is seen again
+del len
+for i in range(3):
+    print(f())
+
+# shadow it by assigning through globals()
+globals()['len'] = lambda x: 'globals() len'
+print(f())
+del globals()['len']
+print(f())
+
+# a function executed with different globals
+g = {}
+exec('def h():\n    return abs(-1)', g)
+print(g['h']())
+g['abs'] = lambda x: 'exec abs'
+print(g['h']())
+print(abs(-2))
+
+# name not defined anywhere
+def k():
+    return undefined_name
+for i in range(2):
+    try:
+        k()
+    except NameError:
+        print('NameError')
+undefined_name = 3
+print(k())
+
+# loads of a name found in the globals
+def m():
+    return glob
+glob = 1
+for i in range(3):
+    print(m())
+glob = 2
+print(m())
+del glob
+try:
+    m()
+except NameError:
+    print('NameError')
+glob = 3
+print(m())
+
+# adding enough globals to grow the table moves the slot of the name
+for i in range(40):
+    globals()['glob%d' % i] = i
+print(m())
+glob = 4
+print(m())
@@ -48,6 +48,12 @@ print("aaaa".count('a', 1, 5))
 print("aaaa".count('a', -1, 5))
 print("abbabba".count("abba"))
 
+# end before start
+print("abcabc".count("ab", 5, 2))
+print("abcabc".count("ab", -2, 3))
+print("abcabc".count("", 5, 2))
+print("abcabc".count("abc", 4, 6))
+
 def t():
     return True
 
@@ -57,3 +63,6 @@ try:
     'abc'.count(1)
 except TypeError:
     print('TypeError')
+
+# start past the end
+print("abc".count("", 3), "abc".count("", 4), "abc".count("", 5, 1))
@@ -0,0 +1,88 @@
+# test formatting with the same pattern object many times
+
+records = [(1, 'one', 1.5), (-22, 'two', 0.375), (333, 'three', -7.0), (True, '', 1e10)]
+
+fmt = '{}|{:>6}|{:<8}|{:.2f}|{!r}'
+for r in records:
+    print(fmt.format(r[0], r[1], r[1], r[2], r[1]))
+
+fmt = '{0:5} {2} {1!r:>7} {0}'
+for r in records:
+    print(fmt.format(*r))
+
+fmt = '{{{a}}} {b:^9} }}{{'
+for r in records:
+    print(fmt.format(a=r[0], b=r[1]))
+
+fmt = '%5d %-6s|%r %.1f%%'
+for r in records:
+    print(fmt % (r[0], r[1], r[1], r[2]))
+
+fmt = '%(a)s:%(b)4d %%'
+for r in records:
+    print(fmt % {'a': r[1], 'b': r[0]})
+
+fmt = '%*d|%-*.*s|'
+for r in records:
+    print(fmt % (8, r[0], 6, 2, r[1]))
+
+# nested replacement fields
+fmt = '{:{}}|{:>{w}}'
+for w in range(1, 4):
+    print(fmt.format('a', w, 'b', w=w))
+
+# errors from the arguments, after successful uses of the pattern
+fmt = '{} {}'
+for args in ((1, 2), (1,), (3, 4)):
+    try:
+        print(fmt.format(*args))
+    except IndexError:
+        print('IndexError')
+
+fmt = '{a}{b}'
+for kw in ({'a': 1, 'b': 2}, {'a': 1}):
+    try:
+        print(fmt.format(**kw))
+    except KeyError:
+        print('KeyError')
+
+fmt = '%d %s'
+for args in ((1, 'a'), (1,), (1, 'a', 2), ('x', 'y')):
+    try:
+        print(fmt % args)
+    except TypeError:
+        print('TypeError')
+
+fmt = '%(a)s'
+for args in ({'a': 1}, {'b': 1}, (1,)):
+    try:
+        print(fmt % args)
+    except (KeyError, TypeError) as e:
+        print(type(e).__name__)
+
+# errors in the pattern are raised every time it's used
+for fmt in ('{', '}', 'a{0}{}', '{:q}', '{!x}'):
+    for i in range(2):
+        try:
+            fmt.format(1, 2)
+        except ValueError:
+            print('ValueError')
+
+for fmt in ('%', '%(a', '%s %q', '%(a)'):
+    for args in ({'a': 1}, {'a': 1}):
+        try:
+            fmt % args
+        except (KeyError, TypeError, ValueError) as e:
+            print(type(e).__name__)
+
+# pattern errors come after argument errors of earlier fields
+try:
+    '{1} {'.format(1)
+except (IndexError, ValueError) as e:
+    print(type(e).__name__)
+
+try:
+    '%s %'.format()
+    '%s %' % ()
+except (TypeError, ValueError) as e:
+    print(type(e).__name__)
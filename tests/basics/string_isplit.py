@@ -0,0 +1,46 @@
+# test str.isplit and str.isplitlines, MicroPython-specific iterator forms
+# of split and splitlines
+
+try:
+    str.isplit
+    str.isplitlines
+except AttributeError:
+    print("SKIP")
+    raise SystemExit
+
+print(list(" a b  c ".isplit()))
+print(list("a,b,,c,".isplit(",")))
+print(list("a,b,,c,".isplit(",", 2)))
+print(list(" a  b c ".isplit(None, 1)))
+print(list("a--b--".isplit("--")))
+print(list("".isplit()))
+print(list("".isplit(",")))
+print(list(b"k1=v1;k2=v2".isplit(b";")))
+
+# one piece at a time
+it = "x y z".isplit()
+print(next(it))
+print(list(it))
+
+# pieces match split() for various inputs
+for s in ("", " ", "a", "  ab cd\t\nef  ", ",a,,b,", "a\r\nb"):
+    for sep in (None, ",", "\n", "ab"):
+        for n in (-1, 0, 1, 3):
+            if list(s.isplit(sep, n)) != s.split(sep, n):
+                print("mismatch", repr(s), repr(sep), n)
+
+try:
+    "abc".isplit("")
+except ValueError:
+    print("ValueError")
+
+try:
+    "abc".isplit(b"b")
+except TypeError:
+    print("TypeError")
+
+print(list("a\nb\r\nc\rd\n".isplitlines()))
+print(list("a\nb\r\nc\rd\n".isplitlines(True)))
+print(list(b"one\ntwo".isplitlines(keepends=True)))
+print(list("\n\n".isplitlines()))
+print(list("".isplitlines()))
@@ -0,0 +1,36 @@
+# cmdline: -X heapsize=100k -X heapmax=2M
+# test that the heap grows by adding regions when it is exhausted
+import gc
+
+# fill more than the initial heap
+l = [bytearray(50000) for i in range(10)]
+print(len(l))
+
+# the figures for each region add up to those of the whole heap
+n = 0
+free = alloc = 0
+while True:
+    try:
+        free += gc.mem_free(n)
+        alloc += gc.mem_alloc(n)
+    except ValueError:
+        break
+    n += 1
+print(n > 1)
+print(free + alloc == gc.mem_free() + gc.mem_alloc())
+print(gc.mem_free(0) + gc.mem_alloc(0) <= 100 * 1024)
+
+# objects in all regions survive a collection
+gc.collect()
+print(sum(len(b) for b in l))
+l = None
+
+# an allocation larger than the initial heap gets a region of its own
+b = bytearray(300000)
+print(len(b))
+
+# but the heap does not grow beyond its limit
+try:
+    bytearray(4000000)
+except MemoryError:
+    print('MemoryError')
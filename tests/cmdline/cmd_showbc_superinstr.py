@@ -0,0 +1,8 @@
+# cmdline: -v -v
+# test printing of superinstructions
+
+def f(a, b):
+    c = a.x
+    if a < b:
+        b += 1
+    return a - 2, b
@@ -0,0 +1,26 @@
+# test binary operations on floats whose argument types change between executions
+
+def ops(a, b):
+    x = a
+    x += b
+    return a + b, a - b, a * b, a < b, a > b, x
+
+args = [(1.5, 2.25), (-1.0, 3.0), (1, 2), (1.5, 2), (2, 1.5), (1.5, 2.5), (True, 0.5), (0.5, 0.25)]
+for a, b in args:
+    print(ops(a, b))
+
+# comparisons with nan and inf
+nan = float('nan')
+inf = float('inf')
+for a, b in ((1.0, 2.0), (nan, 1.0), (1.0, nan), (inf, 1.0), (-inf, inf)):
+    print(ops(a, b)[3:5])
+
+# a loop
+def loop(n):
+    x = 0.0
+    y = 1.0
+    for i in range(n):
+        x += 0.5
+        y = y * 1.5 - x
+    return x, y
+print(loop(10))
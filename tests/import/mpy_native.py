@@ -50,11 +50,11 @@ class UserFS:
 # these are the test .mpy files
 user_files = {
     # bad architecture
-    '/mod0.mpy': b'M\x05\xff\x00\x10',
+    '/mod0.mpy': b'M\x06\xff\x00\x10',
 
     # test loading of viper and asm
     '/mod1.mpy': (
-        b'M\x05\x0b\x1f\x20' # header
+        b'M\x06\x0b\x1f\x20' # header
 
         b'\x20' # n bytes, bytecode
             b'\x00\x08\x02m\x02m' # prelude
@@ -76,7 +76,7 @@ user_files = {
 
     # test loading viper with additional scope flags and relocation
     '/mod2.mpy': (
-        b'M\x05\x0b\x1f\x20' # header
+        b'M\x06\x0b\x1f\x20' # header
 
         b'\x20' # n bytes, bytecode
             b'\x00\x08\x02m\x02m' # prelude
@@ -0,0 +1,15 @@
+import bench
+
+# scan a 130KB log buffer for every occurrence of a needle
+BUF = b"".join(b"%08d INFO: request %d handled in %d ms\n" % (i, i, i % 97) for i in range(1500))
+BUF = BUF + b"ERROR: device timeout on port 17\n" + BUF
+
+def test(num):
+    buf = BUF
+    needle = b"\\n"
+    for i in iter(range(num // 10000)):
+        j = buf.find(needle)
+        while j >= 0:
+            j = buf.find(needle, j + 1)
+
+bench.run(test)
@@ -0,0 +1,10 @@
+import bench
+import gc
+
+def test(num):
+    live = [[i, str(i)] for i in range(20000)]
+    for i in iter(range(num // 100000)):
+        young = [str(j) for j in range(100)]
+        gc.collect(0)
+
+bench.run(test)
@@ -0,0 +1,20 @@
+# time taken to allocate 200-byte buffers past a region of the heap that is
+# 50% full of small objects, with free blocks between them
+import time
+import gc
+
+def test():
+    gc.collect()
+    objs = [(i,) for i in range(20000)]
+    for i in range(len(objs)):
+        if i % 4 >= 2:
+            objs[i] = None
+    gc.collect()
+    gc.disable()
+    t = time.ticks_us()
+    bufs = [bytearray(200) for i in range(2000)]
+    t = time.ticks_diff(time.ticks_us(), t)
+    gc.enable()
+    return t
+
+print(test() / 1e6)
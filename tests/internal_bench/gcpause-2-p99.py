@@ -0,0 +1,19 @@
+# 99th percentile of the time taken by an allocation-heavy loop iteration,
+# in seconds, which includes the pauses of the collections it triggers
+import time
+import array
+import gc
+
+def test():
+    live = [[i, str(i)] for i in range(2000)]
+    gc.threshold(16384)
+    pauses = array.array('I', bytes(4 * 10000))
+    for i in range(len(pauses)):
+        t = time.ticks_us()
+        live[i % 2000] = [i, str(i)]
+        x = [i] * 8
+        pauses[i] = time.ticks_diff(time.ticks_us(), t)
+    return sorted(pauses)
+
+pauses = test()
+print(pauses[len(pauses) * 99 // 100] / 1e6)
@@ -0,0 +1,22 @@
+# heap bytes used per instance of a class with 1 to 8 attributes
+import gc
+
+class Rec:
+    pass
+
+def test():
+    total = 0
+    for size in range(1, 9):
+        names = ["a%d" % k for k in range(size)]
+        gc.collect()
+        m = gc.mem_alloc()
+        objs = [Rec() for i in range(2000)]
+        for o in objs:
+            for k in names:
+                setattr(o, k, None)
+        gc.collect()
+        total += (gc.mem_alloc() - m) / 2000
+        objs = None
+    return total / len(range(1, 9))
+
+print(test())
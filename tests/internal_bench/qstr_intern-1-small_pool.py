@@ -0,0 +1,11 @@
+import bench
+
+class Foo:
+    pass
+
+def test(num):
+    o = Foo()
+    for i in iter(range(num // 40)):
+        hasattr(o, "attr%d" % (i & 63))
+
+bench.run(test)
@@ -0,0 +1,17 @@
+import bench
+
+class Foo:
+    pass
+
+# Intern a large number of extra qstrs before timing, so that the dynamic
+# qstr pools are much larger than in the small_pool variant.
+o = Foo()
+for i in range(20000):
+    hasattr(o, "pad%d" % i)
+
+def test(num):
+    o = Foo()
+    for i in iter(range(num // 40)):
+        hasattr(o, "attr%d" % (i & 63))
+
+bench.run(test)
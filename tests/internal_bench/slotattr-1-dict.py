@@ -0,0 +1,18 @@
+# get and set attributes of instances of a class with 4 attributes
+import bench
+
+class Rec:
+    def __init__(self, i):
+        self.id = i
+        self.temp = 0
+        self.humidity = 0
+        self.ok = True
+
+def test(num):
+    recs = [Rec(i) for i in range(100)]
+    for i in iter(range(num // 100)):
+        for r in recs:
+            r.temp = r.temp + r.id
+            r.humidity = r.temp + r.humidity
+
+bench.run(test)
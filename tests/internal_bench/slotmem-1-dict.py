@@ -0,0 +1,22 @@
+# heap bytes used per instance of a class with 1 to 8 attributes
+import gc
+
+def test():
+    total = 0
+    for size in range(1, 9):
+        names = tuple("a%d" % k for k in range(size))
+        Rec = type("Rec", (), {})
+        objs = [None] * 2000
+        gc.collect()
+        m = gc.mem_alloc()
+        for i in range(2000):
+            o = Rec()
+            for k in names:
+                setattr(o, k, i)
+            objs[i] = o
+        gc.collect()
+        total += (gc.mem_alloc() - m) / 2000
+        objs = None
+    return total / len(range(1, 9))
+
+print(test())
@@ -0,0 +1,19 @@
+# peak live heap bytes while going through a 100KB text line by line with splitlines()
+import gc
+
+TEXT = "".join("%06d some log message text for line %d\n" % (i, i) for i in range(2400))
+
+def test():
+    gc.collect()
+    base = gc.mem_alloc()
+    peak = 0
+    total = 0
+    for i, line in enumerate(TEXT.splitlines()):
+        total += len(line)
+        if i % 100 == 0:
+            line = None
+            gc.collect()
+            peak = max(peak, gc.mem_alloc() - base)
+    return peak
+
+print(test())
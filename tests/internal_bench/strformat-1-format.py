@@ -0,0 +1,12 @@
+import bench
+
+# format 100k records with the same str.format pattern
+NAMES = ("alpha", "beta", "gamma", "delta")
+
+def test(num):
+    fmt = "id={:>6} name={:<8} count={} ok={!r}\n"
+    names = NAMES
+    for i in iter(range(num // 200)):
+        s = fmt.format(i, names[i & 3], i * 7, i & 1 == 0)
+
+bench.run(test)
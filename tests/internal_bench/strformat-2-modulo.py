@@ -0,0 +1,12 @@
+import bench
+
+# format 100k records with the same % pattern
+NAMES = ("alpha", "beta", "gamma", "delta")
+
+def test(num):
+    fmt = "id=%6d name=%-8s count=%d ok=%r\n"
+    names = NAMES
+    for i in iter(range(num // 200)):
+        s = fmt % (i, names[i & 3], i * 7, i & 1 == 0)
+
+bench.run(test)
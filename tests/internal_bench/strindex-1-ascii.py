@@ -0,0 +1,16 @@
+import bench
+
+# character-by-character scan of a 1280-character line, as done by a tokenizer
+LINE = "abc def,123;xyz " * 80
+
+def test(num):
+    s = LINE
+    for i in iter(range(num // 20000)):
+        n = 0
+        j = 0
+        while j < len(s):
+            if s[j] == ",":
+                n += 1
+            j += 1
+
+bench.run(test)
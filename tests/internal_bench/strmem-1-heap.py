@@ -0,0 +1,17 @@
+# heap bytes used per short str built by formatting, slicing and splitting
+import gc
+
+N = 1000
+
+def test():
+    objs = [None] * (4 * N)
+    gc.collect()
+    m = gc.mem_alloc()
+    for i in range(N):
+        s = "%d,%d" % (i, i * 7)
+        a, b = s.split(",")
+        objs[4 * i:4 * i + 4] = (s, a, b, s[1:])
+    gc.collect()
+    return (gc.mem_alloc() - m) / len(objs)
+
+print(test())
@@ -0,0 +1,16 @@
+# heap allocations per short str built by formatting, slicing and splitting
+# (needs a build with MICROPY_PY_MICROPYTHON_ALLOC_STATS enabled)
+import micropython
+
+N = 1000
+
+def test():
+    objs = [None] * (4 * N)
+    micropython.alloc_stats_reset()
+    for i in range(N):
+        s = "%d,%d" % (i, i * 7)
+        a, b = s.split(",")
+        objs[4 * i:4 * i + 4] = (s, a, b, s[1:])
+    return sum(site[3] for site in micropython.alloc_stats()) / len(objs)
+
+print(test())
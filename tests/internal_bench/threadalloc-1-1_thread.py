@@ -0,0 +1,24 @@
+# time taken for 1000000 small heap allocations shared between 1 thread(s),
+# in seconds; measures contention on the heap between threads
+import time
+import _thread
+
+N_THREAD = 1
+N_ALLOC = 1000000
+
+def thread_entry(n):
+    global n_finished
+    for i in range(n):
+        # each iteration allocates a small tuple
+        x = (i, i)
+    with lock:
+        n_finished += 1
+
+lock = _thread.allocate_lock()
+n_finished = 0
+t = time.ticks_us()
+for i in range(N_THREAD):
+    _thread.start_new_thread(thread_entry, (N_ALLOC // N_THREAD,))
+while n_finished < N_THREAD:
+    time.sleep_ms(1)
+print(time.ticks_diff(time.ticks_us(), t) / 1e6)
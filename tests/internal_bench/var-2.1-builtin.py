@@ -0,0 +1,9 @@
+import bench
+
+def test(num):
+    i = 0
+    while i < 20000000:
+        len
+        i += 1
+
+bench.run(test)
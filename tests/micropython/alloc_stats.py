@@ -0,0 +1,43 @@
+# test micropython.alloc_stats and alloc_stats_reset
+
+import micropython
+
+try:
+    micropython.alloc_stats
+except AttributeError:
+    print('SKIP')
+    raise SystemExit
+
+def f(n):
+    for i in range(n):
+        x = bytearray(i + 1)
+    return x
+
+def g(n):
+    l = []
+    for i in range(n):
+        l.append(str(i) * 10)
+    return l
+
+micropython.alloc_stats_reset()
+print(micropython.alloc_stats())
+
+f(100)
+g(10)
+
+# sites are merged per line, largest first
+stats = micropython.alloc_stats()
+for file, line, name, count, nbytes in stats:
+    if name == 'f':
+        print(line, name, count, nbytes > 0)
+    elif name == 'g' and line == 19:
+        print(line, name, count >= 20, nbytes > 0)
+print(stats[0][2])
+print(stats == sorted(stats, key=lambda s: s[4], reverse=True))
+
+# limit the number of lines returned
+print(len(micropython.alloc_stats(1)))
+print(micropython.alloc_stats(0))
+
+micropython.alloc_stats_reset()
+print(micropython.alloc_stats())
@@ -0,0 +1,19 @@
+# test micropython.attr_cache_stats
+
+import micropython
+
+if not hasattr(micropython, 'attr_cache_stats'):
+    print('SKIP')
+    raise SystemExit
+
+class A:
+    def f(self):
+        pass
+
+a = A()
+a.f()
+hits0, misses0 = micropython.attr_cache_stats()
+for i in range(10):
+    a.f()
+hits1, misses1 = micropython.attr_cache_stats()
+print(hits1 - hits0 >= 5)
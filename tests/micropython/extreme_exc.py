@@ -49,8 +49,8 @@ def main():
         f(abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz=1)
     except Exception as er:
         e = er
-    lst[0] = None
-    lst = None
+    while lst:
+        lst[0], lst = None, lst[0] # unlink lists to free up heap
     print(repr(e)[:10])
 
     # raise a deep exception with the heap locked
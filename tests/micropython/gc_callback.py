@@ -0,0 +1,38 @@
+# test gc.callback
+
+import gc
+
+try:
+    gc.callback
+except AttributeError:
+    print("SKIP")
+    raise SystemExit
+
+pauses = []
+
+
+def cb(pause_us):
+    pauses.append(pause_us >= 0)
+
+
+# the callback is scheduled after each collection
+gc.callback(cb)
+gc.collect()
+for i in range(10):
+    pass
+gc.collect()
+for i in range(10):
+    pass
+print(pauses)
+
+# remove the callback
+gc.callback(None)
+gc.collect()
+for i in range(10):
+    pass
+print(pauses)
+
+try:
+    gc.callback(1)
+except ValueError:
+    print("ValueError")
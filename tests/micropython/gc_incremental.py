@@ -0,0 +1,48 @@
+# test incremental sweeping with gc.collect(budget_us=...)
+
+import gc
+
+try:
+    gc.collect(budget_us=0)
+except TypeError:
+    print('SKIP')
+    raise SystemExit
+
+# finish any sweep in progress
+gc.collect()
+
+# live data, and garbage left for the sweep
+live = [[i, str(i)] for i in range(100)]
+junk = [[i] * 4 for i in range(500)]
+junk = None
+
+# a collection with no time budget sweeps at most a slice
+done = gc.collect(budget_us=0)
+print(type(done))
+
+# objects allocated while the sweep is in progress must survive it
+new = []
+for steps in range(1, 21):
+    new.append((steps, str(steps) * 3))
+    gc.collect(budget_us=0)
+gc.collect()
+print(all(x == (i + 1, str(i + 1) * 3) for i, x in enumerate(new)))
+print(all(x == [i, str(i)] for i, x in enumerate(live)))
+
+# a full collection finishes a sweep in progress
+junk = [[i] * 4 for i in range(500)]
+junk = None
+gc.collect(budget_us=0)
+gc.collect()
+print(live[99], new[-1] == (steps, str(steps) * 3))
+
+# a generous budget completes the sweep
+print(gc.collect(budget_us=1000000))
+
+# automatic collections sweep lazily while allocating
+l = []
+for i in range(2000):
+    l.append(str(i) * 5)
+    if len(l) > 200:
+        l.pop(0)
+print(l[0], l[-1], live[50])
@@ -0,0 +1,53 @@
+# test minor collections, which skip tenured objects
+
+import gc
+
+try:
+    gc.collect(0)
+except TypeError:
+    print('SKIP')
+    raise SystemExit
+
+# long-lived containers which become tenured
+class A:
+    pass
+
+l = []
+d = {}
+a = A()
+gc.collect()
+
+# store young objects in the tenured containers, then run minor collections
+for i in range(10):
+    l.append([i, str(i) * 2])
+    d[i] = {'v': (i, i + 1)}
+    a.x = bytearray(i)
+    junk = [str(j) for j in range(20)]
+    gc.collect(0)
+print(l)
+print(d)
+print(a.x)
+
+# objects stored in tenured objects must survive later minor collections
+for i in range(3):
+    junk = [[j] * 10 for j in range(20)]
+    gc.collect(0)
+print(l[3], d[5], len(a.x))
+
+# a minor collection frees young garbage
+gc.collect()
+free0 = gc.mem_free()
+junk = [[j] * 10 for j in range(50)]
+junk = None
+gc.collect(0)
+print(gc.mem_free() >= free0 - 256)
+
+# tenured garbage is freed by a full collection
+l = [[j] * 10 for j in range(50)]
+gc.collect()
+free0 = gc.mem_free()
+l = None
+gc.collect(0)
+gc.collect(2)
+print(gc.mem_free() > free0)
+
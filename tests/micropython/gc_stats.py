@@ -0,0 +1,52 @@
+# test gc.stats and gc.adaptive
+
+import gc
+
+try:
+    gc.stats
+except AttributeError:
+    print("SKIP")
+    raise SystemExit
+
+# reset the figures
+gc.collect()
+gc.stats(True)
+print(gc.stats())
+
+# each full collection is recorded
+for i in range(3):
+    gc.collect()
+count, total_us, max_us, history = gc.stats()
+print(count, len(history), total_us >= max_us)
+for pause_us, freed, used, full in history:
+    print(pause_us >= 0, freed >= 0, used > 0, full)
+
+# history only keeps the most recent collections
+for i in range(20):
+    gc.collect()
+count, total_us, max_us, history = gc.stats(True)
+print(count, 0 < len(history) < count)
+
+# adaptive threshold goals
+try:
+    gc.adaptive
+except AttributeError:
+    print("SKIP")
+    raise SystemExit
+
+print(gc.adaptive())
+gc.adaptive(1000, 10)
+print(gc.adaptive())
+try:
+    gc.adaptive(0, 101)
+except ValueError:
+    print("ValueError")
+
+# the threshold is set after the next collection
+gc.collect()
+print(gc.threshold() > 0)
+
+# disable the controller and the threshold
+gc.adaptive(0, 0)
+gc.threshold(-1)
+print(gc.adaptive(), gc.threshold())
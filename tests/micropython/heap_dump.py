@@ -0,0 +1,69 @@
+# test micropython.heap_dump
+
+import micropython
+
+try:
+    import uio as io
+    micropython.heap_dump
+except (ImportError, AttributeError):
+    print('SKIP')
+    raise SystemExit
+
+class Foo:
+    pass
+
+foos = [Foo() for i in range(3)]
+buf = io.BytesIO()
+micropython.heap_dump(buf)
+data = buf.getvalue()
+print(data[:4])
+
+# decode the records
+pos = 4
+def uint():
+    global pos
+    val = 0
+    while True:
+        b = data[pos]
+        pos += 1
+        val = (val << 7) | (b & 0x7f)
+        if b & 0x80 == 0:
+            return val
+
+print(uint())
+bytes_per_word = uint()
+bytes_per_block = uint()
+types = {}
+objs = {}
+num = 0
+n_regions = 0
+n_roots = None
+while True:
+    tag = data[pos]
+    pos += 1
+    if tag == ord('R'):
+        uint()
+        uint()
+        n_regions += 1
+    elif tag == ord('S'):
+        n_roots = uint()
+        for i in range(n_roots):
+            uint()
+    elif tag == ord('T'):
+        addr = uint()
+        n = uint()
+        types[addr] = str(data[pos:pos + n], 'utf8')
+        pos += n
+    elif tag == ord('O'):
+        num += uint()
+        n_blocks = uint()
+        objs[num] = types.get(uint())
+        uint()
+        for i in range(uint()):
+            uint()
+    else:
+        break
+print(chr(tag), pos == len(data))
+print(n_regions > 0, n_roots > 0)
+print('Foo' in types.values())
+print(sum(1 for t in objs.values() if t == 'Foo'))
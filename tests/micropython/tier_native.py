@@ -0,0 +1,100 @@
+# test promotion of hot functions to native code
+
+import micropython
+
+try:
+    micropython.tier_threshold
+except AttributeError:
+    print('SKIP')
+    raise SystemExit
+
+# the default threshold depends on the port
+print(micropython.tier_threshold() >= 0)
+try:
+    micropython.tier_threshold(-1)
+except ValueError:
+    print('ValueError')
+
+# code must be compiled after the threshold is set for it to be promoted; only
+# functions with a loop that runs ops the VM can't quicken (like ops on str)
+# are promoted, so the functions below have such a loop
+micropython.tier_threshold(5)
+print(micropython.tier_threshold())
+exec('''
+def f(a, b=2, *, c=3):
+    s = 0
+    for i in range(a):
+        s += i * b + c
+    for x in 'abcd':
+        x += x
+    return s
+
+def g(*args, **kwargs):
+    for x in 'abcd':
+        x += x
+    return len(args) + len(kwargs)
+
+def make_adder(n):
+    def add(x):
+        for y in 'abcd':
+            y += y
+        return x + n
+    return add
+
+def gen(n):
+    for i in range(n):
+        yield i
+
+class A:
+    def __init__(self, x):
+        for y in 'abcd':
+            y += y
+        self.x = x
+    def m(self, y):
+        for z in 'abcd':
+            z += z
+        return self.x * y
+
+def loop(n):
+    s = ''
+    while len(s) < n:
+        s += '.'
+    return len(s)
+''')
+
+# a bare raise can't be compiled to native code, so this stays as bytecode
+try:
+    exec('''
+def reraise(x):
+    try:
+        raise ValueError(x)
+    except ValueError:
+        raise
+''')
+except NotImplementedError:
+    # everything is compiled to native code with --emit native
+    def reraise(x):
+        raise ValueError(x)
+
+for i in range(10):
+    print(f(i), f(i, 3), f(i, c=0), g(*range(i), a=i), make_adder(i)(1))
+for i in range(10):
+    print(sum(gen(i)), A(i).m(2))
+for i in range(10):
+    try:
+        reraise(i)
+    except ValueError as er:
+        print('ValueError', er.args)
+
+# a function that becomes hot because of its loop
+print(loop(100), loop(10))
+
+# exceptions propagate out of promoted functions
+add = make_adder('a')
+for i in range(10):
+    try:
+        add(i)
+    except TypeError:
+        print('TypeError')
+
+micropython.tier_threshold(0)
@@ -0,0 +1,84 @@
+# test that promoted functions keep their line numbers in tracebacks
+
+import sys
+import micropython
+
+try:
+    import uio as io
+    micropython.tier_threshold
+except (ImportError, AttributeError):
+    print('SKIP')
+    raise SystemExit
+
+# only functions with a loop that runs ops the VM can't quicken are promoted
+micropython.tier_threshold(2)
+exec('''
+def div(n):
+    for t in 'abcd':
+        t += t
+    x = 1
+    return x // \\
+        n
+
+def loop(n):
+    for t in 'abcd':
+        t += t
+    for i in range(3):
+        pass
+    return i // n
+
+def catch(n):
+    for t in 'abcd':
+        t += t
+    try:
+        div(n)
+    except ZeroDivisionError:
+        pass
+    return div(n)
+
+def finally_(n):
+    for t in 'abcd':
+        t += t
+    try:
+        return div(n)
+    finally:
+        n += 1
+
+class CM:
+    def __enter__(self):
+        pass
+    def __exit__(self, a, b, c):
+        pass
+
+def with_(n):
+    for t in 'abcd':
+        t += t
+    with CM():
+        return div(n)
+
+def unbound(c):
+    for t in 'abcd':
+        t += t
+    if c:
+        x = c
+    return x
+''')
+
+# print the lines of the traceback for the code above, which is in "<string>"
+def test(f, arg):
+    try:
+        f(arg)
+    except Exception as e:
+        buf = io.StringIO()
+        sys.print_exception(e, buf)
+        for l in buf.getvalue().split('\n'):
+            if '<string>' in l or 'Error' in l:
+                print(l.strip())
+
+# the first calls run as bytecode, the later ones as native code
+for f in (div, loop, catch, finally_, with_, unbound):
+    for i in range(4):
+        f(1)
+        test(f, 0)
+
+micropython.tier_threshold(0)
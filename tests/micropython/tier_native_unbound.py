@@ -0,0 +1,101 @@
+# test that promoted functions check for unbound locals
+
+import micropython
+
+try:
+    micropython.tier_threshold
+except AttributeError:
+    print('SKIP')
+    raise SystemExit
+
+# only functions with a loop that runs ops the VM can't quicken are promoted
+micropython.tier_threshold(2)
+exec('''
+def assigned_on_one_path(c):
+    for t in 'abcd':
+        t += t
+    if c:
+        x = c
+    return x
+
+def del_local(n):
+    for t in 'abcd':
+        t += t
+    i = n
+    del i
+    return i
+
+def del_twice(n):
+    for t in 'abcd':
+        t += t
+    i = n
+    del i
+    del i
+
+def del_arg(a):
+    for t in 'abcd':
+        t += t
+    if a:
+        del a
+    return a
+
+def del_then_assign(n):
+    for t in 'abcd':
+        t += t
+    i = n
+    del i
+    i = n + 1
+    return i
+
+def closed_over(c):
+    for t in 'abcd':
+        t += t
+    def inner():
+        return x
+    if c:
+        x = c
+    return inner()
+
+def del_closed_over(c):
+    for t in 'abcd':
+        t += t
+    x = c
+    def inner():
+        nonlocal x
+        del x
+    if c:
+        inner()
+    return x
+
+def except_as():
+    for t in 'abcd':
+        t += t
+    try:
+        raise ValueError
+    except ValueError as e:
+        pass
+    return e
+''')
+
+def test(f, *args):
+    try:
+        print(f(*args))
+    except NameError:
+        print('NameError')
+
+# the first calls run as bytecode, the later ones as native code
+for i in range(4):
+    test(assigned_on_one_path, 1)
+    test(assigned_on_one_path, 0)
+    test(del_local, i)
+    test(del_twice, i)
+    test(del_arg, 0)
+    test(del_arg, i + 1)
+    test(del_then_assign, i)
+    test(closed_over, 1)
+    test(closed_over, 0)
+    test(del_closed_over, 0)
+    test(del_closed_over, 1)
+    test(except_as)
+
+micropython.tier_threshold(0)
@@ -76,3 +76,7 @@ test("@micropython.viper\ndef f(): print(ptr(1))")
 
 # cast of a casting identifier not implemented
 test("@micropython.viper\ndef f(): int(int)")
+
+# raise with no argument or with from not implemented
+test("@micropython.viper\ndef f(): raise")
+test("@micropython.viper\ndef f(): raise 1 from 2")
@@ -0,0 +1,59 @@
+# Arithmetic on integers with thousands of decimal digits: multiplication,
+# division, conversion to and from a string, and modular exponentiation
+
+try:
+    import sys
+
+    # CPython limits the size of int/str conversions by default
+    sys.set_int_max_str_digits(0)
+except AttributeError:
+    pass
+
+
+def make_int(ndigits, seed):
+    # a simple LCG so that the input is the same everywhere
+    x = seed
+    digs = []
+    for i in range(ndigits):
+        x = (x * 1103515245 + 12345) & 0x7FFFFFFF
+        digs.append(chr(48 + (x >> 16) % 10))
+    digs[0] = "9"
+    return int("".join(digs))
+
+
+def bigint_ops(a, b, m, cycles):
+    check = 0
+    for _ in range(cycles):
+        p = a * b
+        q, r = divmod(p + 12345, b)
+        s = str(p)
+        n = int(s)
+        e = pow(a, b % m, m)
+        check += (q - a) + r + len(s) + (n % 1000003) + (e % 1000003)
+    return check
+
+
+bm_params = {
+    (50, 10): (1, 1000),
+    (100, 100): (8, 1000),
+    (1000, 1000): (4, 10000),
+    (5000, 1000): (1, 100000),
+}
+
+
+def bm_setup(params):
+    cycles, ndigits = params
+    a = make_int(ndigits, 1)
+    b = make_int(ndigits, 2)
+    # keep the modulus moderate so that pow() doesn't dominate the run time
+    m = make_int(min(ndigits, 2000), 3) | 1
+    check = 0
+
+    def run():
+        nonlocal check
+        check = bigint_ops(a, b, m, cycles)
+
+    def result():
+        return cycles * ndigits, check
+
+    return run, result
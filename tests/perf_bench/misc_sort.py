@@ -0,0 +1,52 @@
+# Sort lists that are random, already sorted, reversed and with many duplicates,
+# to test list.sort and sorted with and without a key function
+
+
+def make_inputs(n):
+    # a simple LCG so that the input is the same everywhere
+    x = 1
+    rand = []
+    for i in range(n):
+        x = (x * 1103515245 + 12345) & 0x7FFFFFFF
+        rand.append(x >> 8)
+    return (
+        rand,
+        list(range(n)),
+        list(range(n, 0, -1)),
+        [r % 16 for r in rand],
+    )
+
+
+def sort_all(inputs, cycles):
+    check = 0
+    for _ in range(cycles):
+        for lst in inputs:
+            a = sorted(lst)
+            b = sorted(lst, key=lambda v: -v)
+            lst = lst[:]
+            lst.sort(reverse=True)
+            check += a[len(a) // 3] + b[len(b) // 3] + lst[len(lst) // 3]
+    return check
+
+
+bm_params = {
+    (50, 10): (10, 100),
+    (100, 100): (10, 1000),
+    (1000, 1000): (20, 5000),
+    (5000, 1000): (50, 10000),
+}
+
+
+def bm_setup(params):
+    cycles, n = params
+    inputs = make_inputs(n)
+    check = 0
+
+    def run():
+        nonlocal check
+        check = sort_all(inputs, cycles)
+
+    def result():
+        return cycles * n, check
+
+    return run, result
@@ -0,0 +1,13 @@
+# str.count with non-ASCII characters
+
+s = 'é' * 40
+print(s.count('é'))
+print(s.count('é', 30))
+print(s.count('é', 30, 3))
+print(s.count('éé', 3, 4))
+print(s.count('', 30, 3))
+print(('aé' * 10).count('aé', -5, 2))
+
+# bytes are counted by byte
+b = bytes(s, 'utf8')
+print(b.count(b''), b.count(b'', 5, 20))
@@ -0,0 +1,23 @@
+# indexing, slicing and searching of long str, which may use a character index
+
+ascii = "abcdefghij" * 10
+mixed = "aé中\U0001f600bcdefg" * 10
+
+for s in (ascii, mixed):
+    n = len(s)
+    print(n)
+    print(s[0], s[31], s[32], s[33], s[63], s[64], s[n - 1])
+    print(s[-1], s[-32], s[-33], s[-n])
+    print(s[30:36], s[-36:-30], s[95:], s[:3], s[n:], s[-n - 5:2], s[2:n + 5] == s[2:])
+    print("".join(s[i] for i in range(n)) == s)
+    print(s.find("d"), s.find("d", 40), s.rfind("d"), s.index("fg", 50))
+    for i in (n, -n - 1):
+        try:
+            s[i]
+        except IndexError:
+            print("IndexError")
+
+# several long str in use at once
+strs = ["é" * 40 + str(i) for i in range(10)]
+print([s[40] for s in strs])
+print(" ".join(s[-2:] for s in strs))
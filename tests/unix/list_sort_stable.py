@@ -0,0 +1,12 @@
+# test that list.sort and sorted are stable, which needs MICROPY_OPT_LIST_TIMSORT
+
+l = [(i * 7 % 10, i) for i in range(100)]
+print(sorted(l, key=lambda t: t[0]) == sorted(l))
+print(sorted(l, key=lambda t: t[0], reverse=True)[:12])
+l.sort(key=lambda t: t[0] // 3)
+print(l[:12])
+
+# long runs with equal items, which are merged by galloping
+l = [(i // 50 % 2, i) for i in range(1000)]
+s = sorted(l, key=lambda t: t[0])
+print(s == sorted(l), s[499], s[500])
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+#
+# This file is part of the MicroPython project, http://micropython.org/
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 Damien P. George
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""
+This script analyses heap snapshots written by micropython.heap_dump().
+
+Typical usage is to take snapshots on the device some time apart:
+
+    >>> import gc, micropython
+    >>> gc.collect()
+    >>> with open('heap0.bin', 'wb') as f:
+    ...     micropython.heap_dump(f)
+
+then copy them to the host and run:
+
+    $ ./tools/heapdump.py summary heap0.bin      # size retained by each type
+    $ ./tools/heapdump.py dominators heap0.bin   # objects that retain the most
+    $ ./tools/heapdump.py fragmentation heap0.bin
+    $ ./tools/heapdump.py diff heap0.bin heap1.bin
+
+Object references are found the same way as the GC finds them, by looking
+for words that point to the start of an allocated block, so they include
+anything that happens to look like a pointer.  Blocks whose first word is
+not a known type, like the item arrays of lists, are shown as <data>.
+"""
+
+import argparse
+import sys
+
+HEAP_DUMP_VERSION = 1
+
+
+class HeapObject:
+    def __init__(self, num, n_blocks, first_word, flags, refs):
+        self.num = num
+        self.n_blocks = n_blocks
+        self.first_word = first_word
+        self.flags = flags
+        self.refs = refs
+
+
+class HeapSnapshot:
+    def __init__(self, filename):
+        with open(filename, 'rb') as f:
+            self.data = f.read()
+        self.pos = 0
+        if self.data[:4] != b'MPHD':
+            raise ValueError('{}: not a heap snapshot'.format(filename))
+        self.pos = 4
+        version = self.read_uint()
+        if version != HEAP_DUMP_VERSION:
+            raise ValueError('{}: unsupported snapshot version {}'.format(filename, version))
+        self.bytes_per_word = self.read_uint()
+        self.bytes_per_block = self.read_uint()
+        self.regions = []  # (address, first object number, number of blocks)
+        self.roots = []
+        self.types = {}  # address -> name
+        self.objects = {}  # number -> HeapObject
+        self.read_records(filename)
+
+    def read_uint(self):
+        val = 0
+        while True:
+            b = self.data[self.pos]
+            self.pos += 1
+            val = (val << 7) | (b & 0x7f)
+            if b & 0x80 == 0:
+                return val
+
+    def read_refs(self):
+        return [self.read_uint() for _ in range(self.read_uint())]
+
+    def read_records(self, filename):
+        next_num = 1
+        num = 0
+        while True:
+            if self.pos >= len(self.data):
+                raise ValueError('{}: snapshot is truncated'.format(filename))
+            tag = self.data[self.pos : self.pos + 1]
+            self.pos += 1
+            if tag == b'R':
+                address = self.read_uint()
+                n_blocks = self.read_uint()
+                self.regions.append((address, next_num, n_blocks))
+                next_num += n_blocks
+            elif tag == b'S':
+                self.roots = self.read_refs()
+            elif tag == b'T':
+                address = self.read_uint()
+                n = self.read_uint()
+                self.types[address] = str(self.data[self.pos : self.pos + n], 'utf8')
+                self.pos += n
+            elif tag == b'O':
+                num += self.read_uint()
+                n_blocks = self.read_uint()
+                first_word = self.read_uint()
+                flags = self.read_uint()
+                self.objects[num] = HeapObject(num, n_blocks, first_word, flags, self.read_refs())
+            elif tag == b'E':
+                return
+            else:
+                raise ValueError('{}: bad record {!r} at offset {}'.format(filename, tag, self.pos - 1))
+
+    def size(self, obj):
+        return obj.n_blocks * self.bytes_per_block
+
+    def type_name(self, obj):
+        return self.types.get(obj.first_word, '<data>')
+
+    def address(self, num):
+        for address, first, n_blocks in self.regions:
+            if first <= num < first + n_blocks:
+                return address + (num - first) * self.bytes_per_block
+        return 0
+
+    def describe(self, obj):
+        return '{} at 0x{:x}'.format(self.type_name(obj), self.address(obj.num))
+
+    def compute_dominators(self):
+        """
+        Compute the immediate dominator and retained size of every reachable
+        object, using the iterative algorithm of Cooper, Harvey and Kennedy.
+        Node 0 stands for the roots.
+        """
+
+        objects = self.objects
+        succs = {0: [r for r in self.roots if r in objects]}
+        for obj in objects.values():
+            succs[obj.num] = [r for r in obj.refs if r in objects]
+
+        # reverse postorder by an iterative depth-first search
+        order = []
+        seen = {0}
+        stack = [(0, iter(succs[0]))]
+        while stack:
+            node, it = stack[-1]
+            for child in it:
+                if child not in seen:
+                    seen.add(child)
+                    stack.append((child, iter(succs[child])))
+                    break
+            else:
+                stack.pop()
+                order.append(node)
+        order.reverse()
+        index = {node: i for i, node in enumerate(order)}
+
+        preds = {node: [] for node in order}
+        for node in order:
+            for child in succs[node]:
+                preds[child].append(node)
+
+        idom = {0: 0}
+        changed = True
+        while changed:
+            changed = False
+            for node in order[1:]:
+                new_idom = None
+                for p in preds[node]:
+                    if p not in idom:
+                        continue
+                    if new_idom is None:
+                        new_idom = p
+                        continue
+                    a, b = p, new_idom
+                    while a != b:
+                        while index[a] > index[b]:
+                            a = idom[a]
+                        while index[b] > index[a]:
+                            b = idom[b]
+                    new_idom = a
+                if idom.get(node) != new_idom:
+                    idom[node] = new_idom
+                    changed = True
+
+        retained = {node: 0 for node in order}
+        for node in reversed(order[1:]):
+            retained[node] += self.size(objects[node])
+            retained[idom[node]] += retained[node]
+
+        self.idom = idom
+        self.retained = retained
+        self.unreachable = [obj for num, obj in objects.items() if num not in idom]
+
+    def type_stats(self):
+        """Return a dict of type name -> [count, bytes, retained bytes]."""
+
+        self.compute_dominators()
+        stats = {}
+        for obj in self.objects.values():
+            s = stats.setdefault(self.type_name(obj), [0, 0, 0])
+            s[0] += 1
+            s[1] += self.size(obj)
+            if obj.num not in self.idom:
+                continue
+            # don't count objects retained by another object of the same type
+            name = self.type_name(obj)
+            dom = self.idom[obj.num]
+            while dom != 0 and self.type_name(self.objects[dom]) != name:
+                dom = self.idom[dom]
+            if dom == 0:
+                s[2] += self.retained[obj.num]
+        return stats
+
+
+def parse_limit(args):
+    return args.n if args.n > 0 else None
+
+
+def do_summary(args):
+    """Print the objects, bytes and retained bytes of each type."""
+
+    snap = HeapSnapshot(args.files[0])
+    stats = snap.type_stats()
+    total = sum(snap.size(obj) for obj in snap.objects.values())
+    print('objects: {}, bytes: {}, roots: {}'.format(len(snap.objects), total, len(snap.roots)))
+    if snap.unreachable:
+        print(
+            'unreachable: {} objects, {} bytes (garbage not yet collected)'.format(
+                len(snap.unreachable), sum(snap.size(obj) for obj in snap.unreachable)
+            )
+        )
+    print('{:>8} {:>10} {:>10}  {}'.format('count', 'bytes', 'retained', 'type'))
+    rows = sorted(stats.items(), key=lambda kv: (-kv[1][2], -kv[1][1], kv[0]))
+    for name, (count, nbytes, retained) in rows[: parse_limit(args)]:
+        print('{:8} {:10} {:10}  {}'.format(count, nbytes, retained, name))
+
+
+def do_dominators(args):
+    """Print the dominator tree, with the objects that retain the most first."""
+
+    snap = HeapSnapshot(args.files[0])
+    snap.compute_dominators()
+    children = {}
+    for node, dom in snap.idom.items():
+        if node != 0:
+            children.setdefault(dom, []).append(node)
+
+    def show(node, depth):
+        kids = sorted(children.get(node, []), key=lambda n: -snap.retained[n])
+        for child in kids[: parse_limit(args)]:
+            obj = snap.objects[child]
+            print(
+                '{}{} retains {} bytes in {} objects'.format(
+                    '  ' * depth, snap.describe(obj), snap.retained[child], count_tree(child)
+                )
+            )
+            if depth + 1 < args.depth:
+                show(child, depth + 1)
+
+    def count_tree(node):
+        n = 0
+        stack = [node]
+        while stack:
+            n += 1
+            stack.extend(children.get(stack.pop(), []))
+        return n
+
+    print('roots retain {} bytes'.format(snap.retained[0]))
+    show(0, 0)
+
+
+def do_fragmentation(args):
+    """Print the free space of each region and how it is broken up."""
+
+    snap = HeapSnapshot(args.files[0])
+    used = set()
+    for obj in snap.objects.values():
+        used.update(range(obj.num, obj.num + obj.n_blocks))
+    bpb = snap.bytes_per_block
+    for i, (address, first, n_blocks) in enumerate(snap.regions):
+        runs = []
+        run = 0
+        for num in range(first, first + n_blocks):
+            if num in used:
+                if run:
+                    runs.append(run)
+                run = 0
+            else:
+                run += 1
+        if run:
+            runs.append(run)
+        free = sum(runs)
+        largest = max(runs, default=0)
+        print(
+            'region {} at 0x{:x}: total {}, used {}, free {}'.format(
+                i, address, n_blocks * bpb, (n_blocks - free) * bpb, free * bpb
+            )
+        )
+        if free:
+            print(
+                '  {} free runs, largest {} bytes, fragmentation {:.1f}%'.format(
+                    len(runs), largest * bpb, 100 * (1 - largest / free)
+                )
+            )
+        # histogram of free runs by size, in powers of 2 blocks
+        hist = {}
+        for r in runs:
+            bucket = 1 << (r.bit_length() - 1)
+            h = hist.setdefault(bucket, [0, 0])
+            h[0] += 1
+            h[1] += r * bpb
+        for bucket in sorted(hist):
+            print(
+                '  runs of {:>7} bytes and up: {:6} runs, {:9} bytes'.format(
+                    bucket * bpb, hist[bucket][0], hist[bucket][1]
+                )
+            )
+
+
+def do_diff(args):
+    """Print the change in objects and bytes of each type between two snapshots."""
+
+    if len(args.files) != 2:
+        print('{}: diff needs two snapshots'.format(sys.argv[0]))
+        sys.exit(1)
+    stats0 = HeapSnapshot(args.files[0]).type_stats()
+    stats1 = HeapSnapshot(args.files[1]).type_stats()
+    rows = []
+    for name in set(stats0) | set(stats1):
+        s0 = stats0.get(name, [0, 0, 0])
+        s1 = stats1.get(name, [0, 0, 0])
+        delta = [b - a for a, b in zip(s0, s1)]
+        if any(delta):
+            rows.append((name, delta, s1))
+    rows.sort(key=lambda r: (-abs(r[1][1]), r[0]))
+    print('{:>8} {:>10} {:>10} {:>10}  {}'.format('count', 'bytes', 'retained', 'now', 'type'))
+    for name, (count, nbytes, retained), now in rows[: parse_limit(args)]:
+        print('{:+8} {:+10} {:+10} {:10}  {}'.format(count, nbytes, retained, now[1], name))
+    total = sum(r[1][1] for r in rows)
+    print('total: {:+} bytes'.format(total))
+
+
+def main():
+    cmd_parser = argparse.ArgumentParser(description='Analyse MicroPython heap snapshots.')
+    cmd_parser.add_argument(
+        'command',
+        choices=[name[3:] for name in globals() if name.startswith('do_')],
+        help='what to report',
+    )
+    cmd_parser.add_argument('files', nargs='+', help='snapshot files')
+    cmd_parser.add_argument('-n', type=int, default=20, help='number of lines to show, 0 for all')
+    cmd_parser.add_argument('-d', '--depth', type=int, default=3, help='depth of dominator tree')
+    args = cmd_parser.parse_args()
+    try:
+        globals()['do_' + args.command](args)
+    except ValueError as er:
+        print(er)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
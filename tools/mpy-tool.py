@@ -57,7 +57,7 @@ class FreezeError(Exception):
         return 'error while freezing %s: %s' % (self.rawcode.source_file, self.msg)
 
 class Config:
-    MPY_VERSION = 5
+    MPY_VERSION = 6
     MICROPY_LONGINT_IMPL_NONE = 0
     MICROPY_LONGINT_IMPL_LONGLONG = 1
     MICROPY_LONGINT_IMPL_MPZ = 2
@@ -116,6 +116,7 @@ MP_BC_LOAD_NAME = 0x11
 MP_BC_LOAD_GLOBAL = 0x12
 MP_BC_LOAD_ATTR = 0x13
 MP_BC_STORE_ATTR = 0x18
+MP_BC_LOAD_FAST_LOAD_ATTR = 0x1d # also always has an extra byte
 
 # this function mirrors that in py/bc.c
 def mp_opcode_format(bytecode, ip, count_var_uint):
@@ -127,8 +128,11 @@ def mp_opcode_format(bytecode, ip, count_var_uint):
             if (opcode == MP_BC_LOAD_NAME
                 or opcode == MP_BC_LOAD_GLOBAL
                 or opcode == MP_BC_LOAD_ATTR
+                or opcode == MP_BC_LOAD_FAST_LOAD_ATTR
                 or opcode == MP_BC_STORE_ATTR):
                 ip += 1
+        if opcode == MP_BC_LOAD_FAST_LOAD_ATTR:
+            ip += 1
         ip += 3
     else:
         extra_byte = (opcode & MP_BC_MASK_EXTRA_BYTE) == 0
@@ -406,7 +410,7 @@ class RawCodeBytecode(RawCode):
             f, sz = mp_opcode_format(self.bytecode, ip, True)
             if f == 1:
                 qst = self._unpack_qstr(ip + 1).qstr_id
-                extra = '' if sz == 3 else ' 0x%02x,' % self.bytecode[ip + 3]
+                extra = ''.join(' 0x%02x,' % self.bytecode[ip + i] for i in range(3, sz))
                 print('   ', '0x%02x,' % self.bytecode[ip], qst, '& 0xff,', qst, '>> 8,', extra)
             else:
                 print('   ', ''.join('0x%02x, ' % self.bytecode[ip + i] for i in range(sz)))
@@ -766,6 +770,17 @@ def freeze_mpy(base_qstrs, raw_codes):
     # As in qstr.c, set so that the first dynamically allocated pool is twice this size; must be <= the len
     qstr_pool_alloc = min(len(new), 10)
 
+    # The hash index is emitted unconditionally and selected by the C config
+    hash_index = qstrutil.make_hash_index([qstr for _, _, qstr in new])
+
+    print()
+    print('#if MICROPY_QSTR_HASH_INDEX')
+    print('STATIC const qstr_hash_index_t mp_qstr_frozen_const_hash_index[] = {')
+    for i in range(0, len(hash_index), 16):
+        print('    %s,' % ', '.join(str(x) for x in hash_index[i:i + 16]))
+    print('};')
+    print('#endif')
+
     print()
     print('extern const qstr_pool_t mp_qstr_const_pool;');
     print('const qstr_pool_t mp_qstr_frozen_const_pool = {')
@@ -773,6 +788,10 @@ def freeze_mpy(base_qstrs, raw_codes):
     print('    MP_QSTRnumber_of, // previous pool size')
     print('    %u, // allocated entries' % qstr_pool_alloc)
     print('    %u, // used entries' % len(new))
+    print('    #if MICROPY_QSTR_HASH_INDEX')
+    print('    mp_qstr_frozen_const_hash_index,')
+    print('    %u, // hash index mask' % (len(hash_index) - 1))
+    print('    #endif')
     print('    {')
     for _, _, qstr in new:
         print('        %s,'